@@ -3,12 +3,20 @@
 CME data processing for CME Makret by Price (MBP) and Market by Order (MBO) data
 """
 
+import os
+import io
+import re
+import glob
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from pandas import isnull
-from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from pandas import isnull, notnull
 from itertools import chain
+from math import erf, sqrt
+from .book_engine import mbp_books, side_codes, book_columns, flat_book, snapshot_states, \
+    top_of_book, consolidated_book as merge_books
+from .parquet_files import parsed_files, security_filter
 
 
 def meta_data(sunday_input_path, date):
@@ -35,303 +43,52 @@ def meta_data(sunday_input_path, date):
     def main(data, date, security=None):
 
         if date < datetime.strptime('2015-11-20', '%Y-%m-%d'):
-
-            if not isnull(security):
-
-                data = data[data[data.str.contains(
-                    fr'\x01107={security}(?![\s-])')].index]
-                data = data[data[data.str.contains(r'\x0135=d')].index]
-                data.replace(to_replace=r'\x01', value=',',
-                             regex=True, inplace=True)
-
-            else:
-                data = data[data[data.str.contains(r'\x0135=d')].index]
-                data.replace(to_replace=r'\x01', value=',',
-                             regex=True, inplace=True)
-
-            data.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),34=([^,]*),52=([^,]*),', value='',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',22=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',461=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',731=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1150=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',864=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'865=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'866=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'1145=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'870=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'871=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'872=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1141=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1146=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1180=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1300=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',5796=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',9850=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',15=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',48=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',202=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',462=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',827=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',947=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1143=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1144=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1147=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1151=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',55=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1148=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1149=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',555=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'600=([^,]*),602=([^,]*),603=([^,]*),623=([^,]*),624=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',762=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'10=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',+', value=',',
-                         regex=True, inplace=True)
-
-            if len(data) != 0:
-
-                if True in data.str.contains(r'1022=GBI,').unique():
-
-                    data1 = data[data[data.str.contains(
-                        r'1022=GBI,')].index]
-
-                    data1 = data1.str.extractall(
-                        r'15=([^,]*),107=([^,]*),200=([^,]*),207=([^,]*),562=([^,]*),969=([^,]*),996=([^,]*),1140=([^,]*),1022=([^,]*),264=([^,]*),1022=([^,]*),264=([^,]*),1142=([^,]*),9787=([^,]*),')
-
-                    data1.columns = ["Currency",
-                                     "Symbol",
-                                     "MaturityMonthYear",
-                                     "SecurityExchange",
-                                     "MinTradeVol",
-                                     "MinPriceIncrement",
-                                     "UnitOfMeasure",
-                                     "MaxTradeVol",
-                                     "MDFeedType",
-                                     "MarketDepth",
-                                     "MDFeedTypeimplied",
-                                     "MarketDepthimplied",
-                                     "MatchAlgorithm",
-                                     "DisplayFactor"]
-
-                else:
-
-                    data1 = data[data[data.str.contains(
-                        r'1022=GBX,')].index]
-
-                    data1 = data1.str.extractall(
-                        r'15=([^,]*),107=([^,]*),200=([^,]*),207=([^,]*),562=([^,]*),969=([^,]*),996=([^,]*),1140=([^,]*),1022=([^,]*),264=([^,]*),1022=([^,]*),9787=([^,]*),')
-
-                    data1.columns = ["Currency",
-                                     "Symbol",
-                                     "MaturityMonthYear",
-                                     "SecurityExchange",
-                                     "MinTradeVol",
-                                     "MinPriceIncrement",
-                                     "UnitOfMeasure",
-                                     "MaxTradeVol",
-                                     "MDFeedType",
-                                     "MarketDepth",
-                                     "MatchAlgorithm",
-                                     "DisplayFactor"]
-
-            meta_data = data1
-
+            header = {15: 'Currency', 107: 'Symbol', 200: 'MaturityMonthYear',
+                      207: 'SecurityExchange', 562: 'MinTradeVol', 969: 'MinPriceIncrement',
+                      996: 'UnitOfMeasure', 1140: 'MaxTradeVol', 1142: 'MatchAlgorithm',
+                      9787: 'DisplayFactor'}
+            columns = ["Currency", "Symbol", "MaturityMonthYear", "SecurityExchange",
+                       "MinTradeVol", "MinPriceIncrement", "UnitOfMeasure", "MaxTradeVol",
+                       "MDFeedType", "MarketDepth", "MDFeedTypeimplied", "MarketDepthimplied",
+                       "MatchAlgorithm", "DisplayFactor"]
+            implied_columns = ["MDFeedTypeimplied", "MarketDepthimplied"]
         else:
+            header = {75: 'Date', 55: 'Symbol', 200: 'MaturityMonthYear', 167: 'SecurityType',
+                      207: 'SecurityExchange', 15: 'Currency', 1142: 'MatchAlgorithm',
+                      562: 'MinTradeVol', 1140: 'MaxTradeVol', 969: 'MinPriceIncrement',
+                      9787: 'DisplayFactor', 996: 'UnitOfMeasure'}
+            columns = ["Date", "Symbol", "MaturityMonthYear", "SecurityType", "SecurityExchange",
+                       "Currency", "MatchAlgorithm", "MinTradeVol", "MaxTradeVol",
+                       "MinPriceIncrement", "DisplayFactor", "MDFeedType", "MarketDepth",
+                       "MDFeedTypeImplied", "MarketDepthImplied", "UnitOfMeasure"]
+            implied_columns = ["MDFeedTypeImplied", "MarketDepthImplied"]
 
-            if not isnull(security):
+        # the feed types (NoMDFeedTypes 1141) of every instrument, GBX and
+        # then GBI if implied books are available
 
-                data = data[data[data.str.contains(
-                    fr'\x0155={security}(?![\s-])')].index]
-                data = data[data[data.str.contains(r'\x0135=d')].index]
-                data.replace(to_replace=r'\x01', value=',',
-                             regex=True, inplace=True)
+        feeds = _fix_table(data, {x: (y, str) for x, y in header.items()},
+                           {1022: ('MDFeedType', str), 264: ('MarketDepth', str)}, group=1141,
+                           contains=['\x0135=d'], where={35: ['d']}).reset_index()
 
-            else:
-                data = data[data[data.str.contains(r'\x0135=d')].index]
-                data.replace(to_replace=r'\x01', value=',',
-                             regex=True, inplace=True)
-
-            data.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',34=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',201=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',52=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',5799=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',980=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',779=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1180=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1300=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',48=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',22=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1151=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',6937=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',461=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',9779=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',462=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',37702=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',9800=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1141=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',864=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'865=([^,]*),1145=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',870=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',871=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',872=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',731=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',10=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r'602=([^,]*),603=([^,]*),624=([^,]*),623=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',555=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',947=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',9850=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',711=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',311=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',309=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1146=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',305=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1150=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1147=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1149=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1148=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1143=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',762=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',202=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1234=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',+', value=',',
-                         regex=True, inplace=True)
-
-            if len(data) != 0:
-
-                if True in data.str.contains(r'1022=GBI,').unique():
-
-                    data1 = data[data[data.str.contains(
-                        r'1022=GBI,')].index]
-
-                    data1 = data1.str.extractall(
-                        r'75=([^,]*),55=([^,]*),200=([^,]*),167=([^,]*),207=([^,]*),15=([^,]*),1142=([^,]*),562=([^,]*),1140=([^,]*),969=([^,]*),9787=([^,]*),1022=([^,]*),264=([^,]*),1022=([^,]*),264=([^,]*),996=([^,]*),')
-
-                    data1.columns = [
-                        "Date",
-                        "Symbol",
-                        "MaturityMonthYear",
-                        "SecurityType",
-                        "SecurityExchange",
-                        "Currency",
-                        "MatchAlgorithm",
-                        "MinTradeVol",
-                        "MaxTradeVol",
-                        "MinPriceIncrement",
-                        "DisplayFactor",
-                        "MDFeedType",
-                        "MarketDepth",
-                        "MDFeedTypeImplied",
-                        "MarketDepthImplied",
-                        "UnitOfMeasure"
-                    ]
-                else:
+        implied = feeds.loc[feeds['match'] == 1, ['record', 'MDFeedType', 'MarketDepth']]
+        implied.columns = ['record'] + implied_columns
 
-                    data1 = data[data[data.str.contains(
-                        r'1022=GBX,')].index]
+        meta_data = feeds.loc[feeds['match'] == 0].merge(implied, how='left', on='record')
 
-                    data1 = data1.str.extractall(
-                        r'75=([^,]*),55=([^,]*),200=([^,]*),167=([^,]*),207=([^,]*),15=([^,]*),1142=([^,]*),562=([^,]*),1140=([^,]*),969=([^,]*),9787=([^,]*),1022=([^,]*),264=([^,]*),996=([^,]*)')
+        if not isnull(security):
+            meta_data = meta_data.loc[meta_data['Symbol'] == str(security)]
 
-                    data1.columns = ["Date",
-                                     "Symbol",
-                                     "MaturityMonthYear",
-                                     "SecurityType",
-                                     "SecurityExchange",
-                                     "Currency",
-                                     "MatchAlgorithm",
-                                     "MinTradeVol",
-                                     "MaxTradeVol",
-                                     "MinPriceIncrement",
-                                     "DisplayFactor",
-                                     "MDFeedType",
-                                     "MarketDepth",
-                                     "UnitOfMeasure"
-                                     ]
+        gbi = meta_data[implied_columns[0]] == 'GBI'
 
-            meta_data = data1
+        if gbi.any():
+            meta_data = meta_data.loc[gbi]
+        else:
+            meta_data = meta_data.loc[meta_data['MDFeedType'] == 'GBX']
+            columns = [x for x in columns if x not in implied_columns]
 
-        return meta_data
+        return meta_data[columns].reset_index(drop=True)
 
-    data = pd.read_csv(sunday_input_path, header=None)[0]
-    meta_data = main(data, date=date)
+    meta_data = main(sunday_input_path, date=date)
 
     print("CME MDP 3.0 Securitity Definition (Meta data)")
 
@@ -364,246 +121,47 @@ class mbp_input_fix:
 
         """
 
-        data = pd.read_csv(self.path, header=None)[0]
-
         if not isinstance(date, datetime):
             date = datetime.strptime(date, "%Y-%m-%d")
 
         if date < datetime.strptime('2015-11-20', '%Y-%m-%d'):
 
-            Trades = data[data[data.str.contains(r'\x01269=2')].index]
-            Trades.reset_index(drop=True, inplace=True)
-            Trades.replace(to_replace=r'\x01', value=',',
-                           regex=True, inplace=True)  # delete \x01
-            Trades.replace(to_replace=r'269=2,', value='',
-                           regex=True, inplace=True)
-
-            # further delete some unnecessary tags
-            Trades.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',5799=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',268=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',279=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',48=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',273=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',274=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',451=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',1020=([^,]*),', value=',',
-                           regex=True, inplace=True)
-
-            if len(Trades) != 0:
-
-                trade = Trades.str.extractall(
-                    r'83=([^,]*),107=([^,]*),270=([^,]*),271=([^,]*),1003=([^,]*),5797=([^,]*)')
-                # Should use str.extractall() instead of extract(),
-                # mutiple matches in a row will be assigned to a new row
-                # with one record at each row
-                # could be similar as R stringr::str_match_all()
-
-                trade.columns = ['Seq', 'Code',
-                                 'PX', 'Size', 'TrdID', 'agg']
-                trade.index.names = ['record', 'match']
-
-                trade_info = Trades.str.extractall(
-                    r'34=([^,]*),52=([^,]*),75=([^,]*)')
-
-                trade_info.columns = ['MsgSeq',
-                                      'SendingTime', 'Date']
-
-                trade_info.index.names = ['record', 'match']
-
-                # Though the number of rows is not the same, we could merge
-                # based on the index
-
-                Trades1 = trade_info.merge(
-                    trade, how='inner', on='record').reset_index(drop=True)
-
-                Trades1['Seq'] = Trades1['Seq'].astype(int)
-                Trades1['MsgSeq'] = Trades1['MsgSeq'].astype(int)
-                Trades1['PX'] = Trades1['PX'].astype(float)
-                Trades1['Size'] = Trades1['Size'].astype(int)
-                Trades1['TrdID'] = Trades1['TrdID'].astype(int)
-                Trades1['agg'] = Trades1['agg'].astype(int)
-
-                # second part
-                trade2 = Trades.str.extractall(
-                    r'83=([^,]*),107=([^,]*),270=([^,]*),271=([^,]*),1003=([^,]*),')
-                # Should use str.extractall() instead of extract(),
-                # mutiple matches in a row will be assigned to a new row
-                # with one record at each row
-                # could be similar as R stringr::str_match_all()
-
-                trade2.columns = ['Seq', 'Code', 'PX', 'Size', 'TrdID']
-                trade2.index.names = ['record', 'match']
-
-                trade2_info = Trades.str.extractall(
-                    r'34=([^,]*),52=([^,]*),75=([^,]*)')
-
-                trade2_info.columns = ['MsgSeq',
-                                       'SendingTime', 'Date']
-
-                trade2_info.index.names = ['record', 'match']
-
-                # Though the number of rows is not the same, we could merge
-                # based on the index
-
-                Trades2 = trade2_info.merge(
-                    trade2, how='inner', on='record').reset_index(drop=True)
-
-                Trades2['Seq'] = Trades2['Seq'].astype(int)
-                Trades2['MsgSeq'] = Trades2['MsgSeq'].astype(int)
-                Trades2['PX'] = Trades2['PX'].astype(float)
-                Trades2['Size'] = Trades2['Size'].astype(int)
-                Trades2['TrdID'] = Trades2['TrdID'].astype(int)
-
-                Trades1_1 = Trades1.drop(columns='agg')
-
-                trades = pd.concat([Trades1_1, Trades2],
-                                   axis=0, ignore_index=True)
-                trades.drop_duplicates(inplace=True)
-
-                trades = trades.merge(Trades1[['Seq', 'Code', 'agg']], on=[
-                                      'Seq', 'Code'], how='outer').reset_index(drop=True)
-
-                trades.sort_values(['Code', 'Seq'], inplace=True)
-
-                trade3 = Trades.str.extractall(
-                    r'83=([^,]*),107=([^,]*),270=([^,]*),271=([^,]*),277=([^,]*),1003=([^,]*),5797=([^,]*)')
-                trade3.columns = ['Seq', 'Code', 'PX',
-                                  'Size', 'TrdCon', 'TrdID', 'agg']
-                trade3.index.names = ['record', 'match']
-
-                trade3_info = Trades.str.extractall(
-                    r'34=([^,]*),52=([^,]*),75=([^,]*)')
-
-                trade3_info.columns = ['MsgSeq',
-                                       'SendingTime', 'Date']
-
-                trade3_info.index.names = ['record', 'match']
-
-                # Though the number of rows is not the same, we could merge
-                # based on the index
+            Trades = _fix_table(self.path, {34: ('MsgSeq', int), 52: ('SendingTime', str), 75: ('Date', str)},
+                                {269: ('Type', str), 83: ('Seq', float), 107: ('Code', str),
+                                 270: ('PX', float), 271: ('Size', float), 277: ('TrdCon', str),
+                                 1003: ('TrdID', float), 5797: ('agg', float)},
+                                contains=['\x01269=2'], where={269: ['2']})
 
-                Trades3 = trade3_info.merge(
-                    trade3, how='inner', on='record').reset_index(drop=True)
+            Trades = Trades.drop(columns='Type').dropna(
+                subset=['Seq', 'Code', 'PX', 'Size', 'TrdID']).drop_duplicates()
+            Trades = Trades.astype({'Seq': int, 'Size': int, 'TrdID': int})
 
-                Trades3['Seq'] = Trades3['Seq'].astype(int)
-                Trades3['MsgSeq'] = Trades3['MsgSeq'].astype(int)
-                Trades3['PX'] = Trades3['PX'].astype(float)
-                Trades3['Size'] = Trades3['Size'].astype(int)
-                Trades3['TrdID'] = Trades3['TrdID'].astype(int)
-                Trades3['agg'] = Trades3['agg'].astype(int)
+            # regular trades and then trades with trade conditions (277)
 
-                # special trades
+            special = Trades['TrdCon'].notna()
 
-                trade4 = Trades.str.extractall(
-                    r'83=([^,]*),107=([^,]*),270=([^,]*),271=([^,]*),277=([^,]*),1003=([^,]*),')
-                trade4.columns = ['Seq', 'Code',
-                                  'PX', 'Size', 'TrdCon', 'TrdID']
-                trade4.index.names = ['record', 'match']
+            Trades = pd.concat([Trades.loc[~special].drop(columns='TrdCon').sort_values(['Code', 'Seq'], kind='stable'),
+                                Trades.loc[special].sort_values(['Code', 'Seq'], kind='stable')],
+                               ignore_index=True)
 
-                trade4_info = Trades.str.extractall(
-                    r'34=([^,]*),52=([^,]*),75=([^,]*)')
-
-                trade4_info.columns = ['MsgSeq',
-                                       'SendingTime', 'Date']
-
-                trade4_info.index.names = ['record', 'match']
-
-                # Though the number of rows is not the same, we could merge
-                # based on the index
-
-                Trades4 = trade4_info.merge(
-                    trade4, how='inner', on='record').reset_index(drop=True)
-
-                Trades4['Seq'] = Trades4['Seq'].astype(int)
-                Trades4['MsgSeq'] = Trades4['MsgSeq'].astype(int)
-                Trades4['PX'] = Trades4['PX'].astype(float)
-                Trades4['Size'] = Trades4['Size'].astype(int)
-                Trades4['TrdID'] = Trades4['TrdID'].astype(int)
-
-                Trades3_1 = Trades3.drop(columns='agg')
-                Trades3_4_all = pd.concat(
-                    [Trades3_1, Trades4], axis=0, ignore_index=True)
-                Trades3_4_all.drop_duplicates(inplace=True)
-                Trades3_4_all = Trades3_4_all.merge(Trades3[['Code', 'Seq', 'agg']], on=['Code', 'Seq'],
-                                                    how='outer')
+        else:
 
-                Trades3_4_all.sort_values(['Code', 'Seq'], inplace=True)
+            Trades = _fix_table(self.path, {75: ('Date', str), 34: ('MsgSeq', int),
+                                            52: ('SendingTime', str), 60: ('TransactTime', str)},
+                                {269: ('Type', str), 55: ('Code', str), 83: ('Seq', float),
+                                 270: ('PX', float), 271: ('Size', float), 346: ('Ord', float),
+                                 5797: ('agg', float)},
+                                contains=['\x01269=2'], where={269: ['2']})
 
-                Trades = pd.concat(
-                    [trades, Trades3_4_all], ignore_index=True)
+            # unsigned trades (no AggressorSide) have agg 0
 
-            else:
-                raise Exception('No trade summary detected')
-        else:
-            Trades = data[data[data.str.contains(r'\x01269=2')].index]
-            Trades.reset_index(drop=True, inplace=True)
-            Trades.replace(to_replace=r'\x01', value=',',
-                           regex=True, inplace=True)  # delete \x01
-            Trades.replace(to_replace=r'269=2,', value='',
-                           regex=True, inplace=True)
-
-            # further delete some unnecessary tags
-            Trades.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',5799=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',268=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',279=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',48=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r',37705=([^,]*),', value=',',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r'37=([^,]*),', value='',
-                           regex=True, inplace=True)
-            Trades.replace(to_replace=r'32=([^,]*),', value='',
-                           regex=True, inplace=True)
-
-            if len(Trades) != 0:
-
-                trade = Trades.str.extractall(
-                    r'55=([^,]*),83=([^,]*),270=([^,]*),271=([^,]*),346=([^,]*),5797=([^,]*)')
-                # Should use str.extractall() instead of extract(),
-                # mutiple matches in a row will be assigned to a new row
-                # with one record at each row
-                # could be similar as R stringr::str_match_all()
-
-                trade.columns = ['Code', 'Seq', 'PX', 'Size', 'Ord', 'agg']
-                trade.index.names = ['record', 'match']
-
-                trade_info = Trades.str.extractall(
-                    r'75=([^,]*),34=([^,]*),52=([^,]*),60=([^,]*)')
-
-                trade_info.columns = ['Date', 'MsgSeq',
-                                      'SendingTime', 'TransactTime']
-
-                trade_info.index.names = ['record', 'match']
-
-                # Though the number of rows is not the same, we could merge
-                # based on the index
-
-                Trades = trade_info.merge(
-                    trade, how='outer', on='record').reset_index(drop=True)
-
-                Trades['Seq'] = Trades['Seq'].astype(int)
-                Trades['MsgSeq'] = Trades['MsgSeq'].astype(int)
-                Trades['PX'] = Trades['PX'].astype(float)
-                Trades['Size'] = Trades['Size'].astype(int)
-                Trades['Ord'] = Trades['Ord'].astype(int)
-                Trades['agg'] = Trades['agg'].astype(int)
+            Trades = Trades.drop(columns='Type').dropna(
+                subset=['Code', 'Seq', 'PX', 'Size']).reset_index(drop=True)
+            Trades = Trades.fillna({'Ord': 0, 'agg': 0}).astype(
+                {'Seq': int, 'Size': int, 'Ord': int, 'agg': int})
 
-            else:
-                raise Exception('No trade summary detected')
+        if len(Trades) == 0:
+            raise Exception('No trade summary detected')
 
         codes = Trades['Code'].unique()
 
@@ -657,235 +215,62 @@ class mbp_input_fix:
 
         """
 
-        data = pd.read_csv(self.path, header=None)[0]
-
         if not isinstance(date, datetime):
             date = datetime.strptime(date, "%Y-%m-%d")
 
         if date < datetime.strptime('2015-11-20', '%Y-%m-%d'):
 
-            Quotes = data[data[data.str.contains(
-                r'\x01269=[01]|\x01276=[RK]')].index]
-            # incremental updates
-            Quotes = Quotes[Quotes[Quotes.str.contains(r'\x0135=X')].index]
-            Quotes.reset_index(drop=True, inplace=True)
-            Quotes.replace(to_replace=r'\x01', value=',',
-                           regex=True, inplace=True)  # delete \x01
-
-            if len(Quotes) != 0:
-
-                # further delete some unnecessary tags
-                Quotes.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',268=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',22=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',48=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',273=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',336=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',10=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',5797=([^,]*),', value=',',
-                               regex=True, inplace=True)
-
-                # --- processing outright quotes
-
-                if True in Quotes.str.contains(r'269=[01]').unique():
-
-                    outright = Quotes.str.extractall(
-                        r'279=([012]),83=([^,]*),107=([^,]*),269=([01]*),270=([^,]*),271=([^,]*),346=([^,]*),1023=([^,]*),')
-
-                    outright.columns = ['Update', 'Seq', 'Code',
-                                        'Side', 'PX', 'Qty', 'Ord', 'PX_depth']
-                    outright.index.names = ['record', 'match']
-
-                    outright_info = Quotes.str.extractall(
-                        r'34=([^,]*),52=([^,]*),75=([^,]*)')
-
-                    outright_info.columns = ['MsgSeq',
-                                             'SendingTime', 'Date']
-
-                    outright_info.index.names = ['record', 'match']
-
-                    Quotes_outright = outright_info.merge(
-                        outright, how='inner', on='record').reset_index(drop=True)
-
-                    Quotes_outright['Update'] = Quotes_outright['Update'].astype(
-                        int)
-                    Quotes_outright['Seq'] = Quotes_outright['Seq'].astype(
-                        int)
-                    Quotes_outright['MsgSeq'] = Quotes_outright['MsgSeq'].astype(
-                        int)
-                    Quotes_outright['PX'] = Quotes_outright['PX'].astype(
-                        float)
-                    Quotes_outright['Qty'] = Quotes_outright['Qty'].astype(
-                        int)
-                    Quotes_outright['Ord'] = Quotes_outright['Ord'].astype(
-                        int)
-                    Quotes_outright['PX_depth'] = Quotes_outright['PX_depth'].astype(
-                        int)
-
-                    Quotes_outright['Implied'] = 'N'
-
-                # -- processing implied quotes
-
-                if True in Quotes.str.contains(r'276=K').unique():
-
-                    # Implied_Quotes = Quotes[Quotes[Quotes.str.contains(
-                    #   r'276=K')].index]
-                    implied = Quotes.str.extractall(
-                        r'279=([^,]*),83=([^,]*),107=([^,]*),269=([^,]*),270=([^,]*),271=([^,]*),276=([^,]*),1023=([^,]*),')
-
-                    implied.columns = ['Update', 'Seq', 'Code',
-                                       'Side', 'PX', 'Qty', 'Implied', 'PX_depth']
-                    implied.index.names = ['record', 'match']
-
-                    implied_info = Quotes.str.extractall(
-                        r'34=([^,]*),52=([^,]*),75=([^,]*)')
-
-                    implied_info.columns = ['MsgSeq',
-                                            'SendingTime', 'Date']
-
-                    implied_info.index.names = ['record', 'match']
-
-                    Quotes_implied = implied_info.merge(
-                        implied, how='inner', on='record').reset_index(drop=True)
-
-                    Quotes_implied['Update'] = Quotes_implied['Update'].astype(
-                        int)
-                    Quotes_implied['Seq'] = Quotes_implied['Seq'].astype(
-                        int)
-                    Quotes_implied['MsgSeq'] = Quotes_implied['MsgSeq'].astype(
-                        int)
-                    Quotes_implied['PX'] = Quotes_implied['PX'].astype(
-                        float)
-                    Quotes_implied['Qty'] = Quotes_implied['Qty'].astype(
-                        int)
-                    Quotes_implied['PX_depth'] = Quotes_implied['PX_depth'].astype(
-                        int)
-
-                    Quotes_implied['Implied'] = 'Y'
-
-                    Quotes = pd.concat(
-                        [Quotes_outright, Quotes_implied], axis=0, ignore_index=True)
-
-                    Quotes.sort_values(
-                        ['Code', 'Seq'], na_position='first', inplace=True)
+            # incremental updates, implied quotes have the quote condition (276)
 
-                else:
-                    Quotes = Quotes_outright
+            header = {34: ('MsgSeq', int), 52: ('SendingTime', str), 75: ('Date', str)}
+            entries = {279: ('Update', float), 83: ('Seq', float), 107: ('Code', str),
+                       269: ('Side', str), 270: ('PX', float), 271: ('Qty', float),
+                       346: ('Ord', float), 276: ('Implied', str), 1023: ('PX_depth', float)}
+            contains, where = ['\x0135=X'], {35: ['X']}
 
-            else:
-                raise Exception('No quote information detected')
         else:
-            Quotes = data[data[data.str.contains(
-                r'\x01269=[01EF]')].index]
-
-            if len(Quotes) != 0:
-                # incremental updates
-                Quotes.replace(to_replace=r'\x01', value=',',
-                               regex=True, inplace=True)  # delete \x01
-
-                # further delete some unnecessary tags
-                Quotes.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',5799=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',268=([^,]*),', value=',',
-                               regex=True, inplace=True)
-                Quotes.replace(to_replace=r',48=([^,]*),', value=',',
-                               regex=True, inplace=True)
-
-                # --- processing outright quotes
 
-                if True in Quotes.str.contains(r'269=[01]').unique():
+            # implied quotes have the sides E and F
 
-                    outright = Quotes.str.extractall(
-                        r'279=([012]),269=([01]),55=([^,]*),83=([^,]*),270=([^,]*),271=([^,]*),346=([^,]*),1023=([^,]*),')
+            header = {75: ('Date', str), 34: ('MsgSeq', int), 52: ('SendingTime', str),
+                      60: ('TransactTime', str)}
+            entries = {279: ('Update', float), 269: ('Side', str), 55: ('Code', str),
+                       83: ('Seq', float), 270: ('PX', float), 271: ('Qty', float),
+                       346: ('Ord', float), 1023: ('PX_depth', float)}
+            contains, where = None, {269: ['0', '1', 'E', 'F']}
 
-                    outright.columns = ['Update', 'Side', 'Code',
-                                        'Seq', 'PX', 'Qty', 'Ord', 'PX_depth']
-                    outright.index.names = ['record', 'match']
+        Quotes = _fix_table(self.path, header, entries, contains=contains, where=where)
+        Quotes = Quotes.reset_index(drop=True).dropna(
+            subset=['Update', 'Seq', 'Code', 'PX', 'Qty', 'PX_depth'])
 
-                    outright_info = Quotes.str.extractall(
-                        r'75=([^,]*),34=([^,]*),52=([^,]*),60=([^,]*)')
-
-                    outright_info.columns = ['Date', 'MsgSeq',
-                                             'SendingTime', 'TransactTime']
-
-                    outright_info.index.names = ['record', 'match']
-
-                    Quotes_outright = outright_info.merge(
-                        outright, how='inner', on='record').reset_index(drop=True)
-
-                    Quotes_outright['Update'] = Quotes_outright['Update'].astype(
-                        int)
-                    Quotes_outright['Seq'] = Quotes_outright['Seq'].astype(
-                        int)
-                    Quotes_outright['MsgSeq'] = Quotes_outright['MsgSeq'].astype(
-                        int)
-                    Quotes_outright['PX'] = Quotes_outright['PX'].astype(
-                        float)
-                    Quotes_outright['Qty'] = Quotes_outright['Qty'].astype(
-                        int)
-                    Quotes_outright['Ord'] = Quotes_outright['Ord'].astype(
-                        int)
-                    Quotes_outright['PX_depth'] = Quotes_outright['PX_depth'].astype(
-                        int)
-
-                    Quotes_outright['Implied'] = 'N'
-
-                # -- processing implied quotes
-
-                if True in Quotes.str.contains(r'269=[EF]').unique():
-
-                    implied = Quotes.str.extractall(
-                        r'279=([012]),269=([EF]),55=([^,]*),83=([^,]*),270=([^,]*),271=([^,]*),1023=([^,]*),')
-
-                    implied.columns = ['Update', 'Side', 'Code',
-                                       'Seq', 'PX', 'Qty', 'PX_depth']
-                    implied.index.names = ['record', 'match']
+        if 'Implied' in Quotes.columns:
+            implied = Quotes['Implied'].isin(['R', 'K'])
+        else:
+            implied = Quotes['Side'].isin(['E', 'F'])
 
-                    implied_info = Quotes.str.extractall(
-                        r'75=([^,]*),34=([^,]*),52=([^,]*),60=([^,]*)')
+        outright = ~implied & Quotes['Side'].isin(['0', '1']) & Quotes['Update'].isin([0, 1, 2]) & \
+            Quotes['Ord'].notna()
 
-                    implied_info.columns = ['Date', 'MsgSeq',
-                                            'SendingTime', 'TransactTime']
+        Quotes = Quotes.astype({'Update': int, 'Seq': int, 'Qty': int, 'PX_depth': int})
 
-                    implied_info.index.names = ['record', 'match']
+        Quotes_outright = Quotes.loc[outright].drop(columns='Implied', errors='ignore').astype(
+            {'Ord': int}).assign(Implied='N')
 
-                    Quotes_implied = implied_info.merge(
-                        implied, how='inner', on='record').reset_index(drop=True)
+        if implied.any():
 
-                    Quotes_implied['Update'] = Quotes_implied['Update'].astype(
-                        int)
-                    Quotes_implied['Seq'] = Quotes_implied['Seq'].astype(
-                        int)
-                    Quotes_implied['MsgSeq'] = Quotes_implied['MsgSeq'].astype(
-                        int)
-                    Quotes_implied['PX'] = Quotes_implied['PX'].astype(
-                        float)
-                    Quotes_implied['Qty'] = Quotes_implied['Qty'].astype(
-                        int)
-                    Quotes_implied['PX_depth'] = Quotes_implied['PX_depth'].astype(
-                        int)
+            Quotes_implied = Quotes.loc[implied].drop(columns='Ord').assign(Implied='Y')
 
-                    Quotes_implied['Implied'] = 'Y'
+            Quotes = pd.concat(
+                [Quotes_outright, Quotes_implied], axis=0, ignore_index=True)
 
-                    Quotes = pd.concat(
-                        [Quotes_outright, Quotes_implied], axis=0, ignore_index=True)
+            Quotes.sort_values(
+                ['Code', 'Seq'], na_position='first', kind='stable', inplace=True)
 
-                    Quotes.sort_values(
-                        ['Code', 'Seq'], na_position='first', inplace=True)
+        else:
+            Quotes = Quotes_outright.reset_index(drop=True)
 
-                else:
-                    Quotes = Quotes_outright
-            else:
-                raise Exception('No quote information detected')
+        if len(Quotes) == 0:
+            raise Exception('No quote information detected')
 
         codes = Quotes['Code'].unique()
 
@@ -935,474 +320,59 @@ class mbp_input_fix:
 
         """
 
-        date = datetime.strptime(date, "%Y-%m-%d")
-
-        def stat_main(data, date, security=None):
-
-            if date < datetime.strptime('2015-11-20', '%Y-%m-%d'):
-
-                data.replace(to_replace=r'\x01', value=',',
-                             regex=True, inplace=True)
-
-                data.replace(to_replace=r'1128=([^,]*),9=([^,]*),', value='',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r'49=([^,]*),34=([^,]*)', value='',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',5799=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',268=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',279=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',22=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',48=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',273=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',274=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',451=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',1003=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',1020=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',277=([^,]*),', value=',',
-                             regex=True, inplace=True)
-
-                OPEN = data[data[data.str.contains(r'269=4')].index]
-                SETTLE = data[data[data.str.contains(r'269=6')].index]
-                HIGH_PX = data[data[data.str.contains(r'269=7')].index]
-                LOW_PX = data[data[data.str.contains(r'269=8')].index]
-                HIGH_BID = data[data[data.str.contains(r'269=N')].index]
-                LOW_OFFER = data[data[data.str.contains(r'269=O')].index]
-                VOLUME = data[data[data.str.contains(r'269=B')].index]
-                OPEN_INT = data[data[data.str.contains(r'269=C')].index]
-                SIMULATE_SELL = data[data[data.str.contains(
-                    r'269=E')].index]
-                SIMULATE_BUY = data[data[data.str.contains(
-                    r'269=F')].index]
-                # g =Threshold Limits and Price Band Variation
-                LIMIT = data[data[data.str.contains(r'35=f')].index]
-
-                if len(OPEN) != 0:
-
-                    open_stat = OPEN.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=4,270=([^,]*),286=([^,]*),')
-
-                    open_stat.columns = ["Seq", "Code", "OPEN_PX", "Flag"]
-                    open_stat['Flag'] = open_stat['Flag'].astype('str')
-
-                    open_stat.loc[open_stat['Flag'] ==
-                                  '5', 'Flag'] = 'IndicativeOpen'
-                    open_stat.loc[open_stat['Flag']
-                                  == '0', 'Flag'] = 'DailyOpen'
-                    open_stat.index.names = ['record', 'match']
-
-                    open_info = OPEN.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    open_info.columns = ['Time', 'Date']
-                    open_info.index.names = ['record', 'match']
-
-                    open_stat = open_info.merge(
-                        open_stat, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(SETTLE) != 0:
-
-                    settle = SETTLE.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=6,270=([^,]*),')
-
-                    settle.columns = ["Seq", "Code", "SETTLE_PX"]
-                    settle.index.names = ['record', 'match']
-
-                    settle_info = SETTLE.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    settle_info.columns = ['Time', 'Date']
-                    settle_info.index.names = ['record', 'match']
-
-                    settle = settle_info.merge(
-                        settle, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(HIGH_PX) != 0:
-
-                    high_px = HIGH_PX.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=7,270=([^,]*),')
-
-                    high_px.columns = ["Seq", "Code", "HIGH"]
-                    high_px.index.names = ['record', 'match']
-
-                    high_px_info = HIGH_PX.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    high_px_info.columns = ['Time', 'Date']
-                    high_px_info.index.names = ['record', 'match']
-
-                    high_px = high_px_info.merge(
-                        high_px, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(LOW_PX) != 0:
-
-                    low_px = LOW_PX.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=8,270=([^,]*),')
-
-                    low_px.columns = ["Seq", "Code", "LOW"]
-                    low_px.index.names = ['record', 'match']
-
-                    low_px_info = LOW_PX.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    low_px_info.columns = ['Time', 'Date']
-                    low_px_info.index.names = ['record', 'match']
-
-                    low_px = low_px_info.merge(
-                        low_px, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(HIGH_BID) != 0:
-
-                    high_bid = HIGH_BID.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=N,270=([^,]*),')
-
-                    high_bid.columns = ["Seq", "Code", "HIGH_BID"]
-                    high_bid.index.names = ['record', 'match']
-
-                    high_bid_info = HIGH_BID.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    high_bid_info.columns = ['Time', 'Date']
-                    high_bid_info.index.names = ['record', 'match']
-
-                    high_bid = high_bid_info.merge(
-                        high_bid, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(LOW_OFFER) != 0:
-
-                    low_offer = LOW_OFFER.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=O,270=([^,]*),')
-
-                    low_offer.columns = ["Seq", "Code", "LOW_OFFER"]
-                    low_offer.index.names = ['record', 'match']
-
-                    low_offer_info = LOW_OFFER.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    low_offer_info.columns = ['Time', 'Date']
-                    low_offer_info.index.names = ['record', 'match']
-
-                    low_offer = low_offer_info.merge(
-                        low_offer, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(VOLUME) != 0:
-
-                    volume = VOLUME.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=B,271=([^,]*),')
-
-                    volume.columns = ["Seq", "Code", "VOLUME"]
-                    volume.index.names = ['record', 'match']
-
-                    volume_info = VOLUME.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    volume_info.columns = ['Time', 'Date']
-                    volume_info.index.names = ['record', 'match']
-
-                    volume = volume_info.merge(
-                        volume, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(VOLUME) != 0:
-
-                    volume = VOLUME.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=B,271=([^,]*),')
-
-                    volume.columns = ["Seq", "Code", "VOLUME"]
-                    volume.index.names = ['record', 'match']
-
-                    volume_info = VOLUME.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    volume_info.columns = ['Time', 'Date']
-                    volume_info.index.names = ['record', 'match']
-
-                    volume = volume_info.merge(
-                        volume, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(OPEN_INT) != 0:
-
-                    open_int = OPEN_INT.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=C,271=([^,]*),')
-
-                    open_int.columns = ["Seq", "Code", "OPEN_INT"]
-                    open_int.index.names = ['record', 'match']
-
-                    open_int_info = OPEN_INT.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    open_int_info.columns = ['Time', 'Date']
-                    open_int_info.index.names = ['record', 'match']
-
-                    open_int = open_int_info.merge(
-                        open_int, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(SIMULATE_SELL) != 0:
-
-                    simulate_sell = SIMULATE_SELL.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=E,270=([^,]*),271=([^,]*),')
-
-                    simulate_sell.columns = ["Seq", "Code", "PX", "Qty"]
-                    simulate_sell.index.names = ['record', 'match']
-
-                    simulate_sell_info = SIMULATE_SELL.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    simulate_sell_info.columns = ['Time', 'Date']
-                    simulate_sell_info.index.names = ['record', 'match']
-
-                    simulate_sell = simulate_sell_info.merge(
-                        simulate_sell, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(SIMULATE_BUY) != 0:
-
-                    simulate_buy = SIMULATE_BUY.str.extractall(
-                        r'83=([^,]*),107=([^,]*),269=F,270=([^,]*),271=([^,]*),')
-
-                    simulate_buy.columns = ["Seq", "Code", "PX", "Qty"]
-                    simulate_buy.index.names = ['record', 'match']
-
-                    simulate_buy_info = SIMULATE_BUY.str.extractall(
-                        r'52=([^,]*),75=([^,]*),')
-                    simulate_buy_info.columns = ['Time', 'Date']
-                    simulate_buy_info.index.names = ['record', 'match']
-
-                    simulate_buy = simulate_buy_info.merge(
-                        simulate_buy, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                info_list = {'open_stat': open_stat,
-                             'settle': settle, 'high_px': high_px,
-                             'low_px': low_px, 'high_bid': high_bid,
-                             'low_offer': low_offer, 'volume': volume,
-                             'open_int': open_int, 'simulate_buy': simulate_buy,
-                             'simulated_sell': simulate_sell}
-
-            else:
-
-                data.replace(to_replace=r'\x01', value=',',
-                             regex=True, inplace=True)
-
-                data.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r'34=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',5799=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',268=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',279=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',48=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',37705=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',37=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',32=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',10=([^,]*),', value=',',
-                             regex=True, inplace=True)
-                data.replace(to_replace=r',+,', value=',',
-                             regex=True, inplace=True)
-
-                OPEN = data[data[data.str.contains(r'269=4')].index]
-                SETTLE = data[data[data.str.contains(r'269=6')].index]
-                HIGH_PX = data[data[data.str.contains(r'269=7')].index]
-                LOW_PX = data[data[data.str.contains(r'269=8')].index]
-                HIGH_BID = data[data[data.str.contains(r'269=N')].index]
-                LOW_OFFER = data[data[data.str.contains(r'269=O')].index]
-                VOLUME = data[data[data.str.contains(r'269=B')].index]
-                OPEN_INT = data[data[data.str.contains(r'269=C')].index]
-                ELEC_VOLUME = data[data[data.str.contains(r'269=e')].index]
-                LIMIT = data[data[data.str.contains(r'269=g')].index]
-
-                if len(OPEN) != 0:
-
-                    open_stat = OPEN.str.extractall(
-                        r'269=4,55=([^,]*),83=([^,]*),270=([^,]*),286=([^,]*),')
-
-                    open_stat.columns = ["Seq", "Code", "OPEN_PX", "Flag"]
-                    open_stat['Flag'] = open_stat['Flag'].astype('str')
-
-                    open_stat.loc[open_stat['Flag'] ==
-                                  '5', 'Flag'] = 'IndicativeOpen'
-                    open_stat.loc[open_stat['Flag']
-                                  == '0', 'Flag'] = 'DailyOpen'
-                    open_stat.index.names = ['record', 'match']
-
-                    open_info = OPEN.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    open_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    open_info.index.names = ['record', 'match']
-
-                    open_stat = open_info.merge(
-                        open_stat, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(SETTLE) != 0:
-
-                    settle = SETTLE.str.extractall(
-                        r'269=6,55=([^,]*),83=([^,]*),270=([^,]*),')
-
-                    settle.columns = ["Seq", "Code", "SETTLE_PX"]
-                    settle.index.names = ['record', 'match']
-
-                    settle_info = SETTLE.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    settle_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    settle_info.index.names = ['record', 'match']
-
-                    settle = settle_info.merge(
-                        settle, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(HIGH_PX) != 0:
-
-                    high_px = HIGH_PX.str.extractall(
-                        r'269=7,55=([^,]*),83=([^,]*),270=([^,]*),')
-
-                    high_px.columns = ["Seq", "Code", "HIGH"]
-                    high_px.index.names = ['record', 'match']
-
-                    high_px_info = HIGH_PX.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    high_px_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    high_px_info.index.names = ['record', 'match']
-
-                    high_px = high_px_info.merge(
-                        high_px, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(LOW_PX) != 0:
-
-                    low_px = LOW_PX.str.extractall(
-                        r'269=8,55=([^,]*),83=([^,]*),270=([^,]*),')
-
-                    low_px.columns = ["Seq", "Code", "LOW"]
-                    low_px.index.names = ['record', 'match']
-
-                    low_px_info = LOW_PX.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    low_px_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    low_px_info.index.names = ['record', 'match']
-
-                    low_px = low_px_info.merge(
-                        low_px, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(HIGH_BID):
-
-                    high_bid = HIGH_BID.str.extractall(
-                        r'269=N,55=([^,]*),83=([^,]*),270=([^,]*),')
-
-                    high_bid.columns = ["Seq", "Code", "HIGH_BID"]
-                    high_bid.index.names = ['record', 'match']
-
-                    high_bid_info = HIGH_BID.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    high_bid_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    high_bid_info.index.names = ['record', 'match']
-
-                    high_bid = high_bid_info.merge(
-                        high_bid, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(LOW_OFFER):
-
-                    low_offer = LOW_OFFER.str.extractall(
-                        r'269=O,55=([^,]*),83=([^,]*),270=([^,]*),')
-
-                    low_offer.columns = ["Seq", "Code", "LOW_OFFER"]
-                    low_offer.index.names = ['record', 'match']
-
-                    low_offer_info = LOW_OFFER.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    low_offer_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    low_offer_info.index.names = ['record', 'match']
-
-                    low_offer = low_offer_info.merge(
-                        low_offer, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(VOLUME) != 0:
-
-                    volume = VOLUME.str.extractall(
-                        r'269=B,55=([^,]*),83=([^,]*),271=([^,]*),')
-
-                    volume.columns = ["Seq", "Code", "VOLUME"]
-                    volume.index.names = ['record', 'match']
-
-                    volume_info = VOLUME.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    volume_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    volume_info.index.names = ['record', 'match']
-
-                    volume = volume_info.merge(
-                        volume, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(OPEN_INT) != 0:
-
-                    open_int = OPEN_INT.str.extractall(
-                        r'269=C,55=([^,]*),83=([^,]*),271=([^,]*),')
-
-                    open_int.columns = ["Seq", "Code", "OPEN_INT"]
-                    open_int.index.names = ['record', 'match']
-
-                    open_int_info = OPEN_INT.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    open_int_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    open_int_info.index.names = ['record', 'match']
-
-                    open_int = open_int_info.merge(
-                        open_int, how='inner', left_on='record', right_on='record').reset_index(drop=True)
-
-                if len(ELEC_VOLUME) != 0:
-
-                    elec_volume = ELEC_VOLUME.str.extractall(
-                        r'269=e,55=([^,]*),83=([^,]*),271=([^,]*),')
+        if not isinstance(date, datetime):
+            date = datetime.strptime(date, "%Y-%m-%d")
 
-                    elec_volume.columns = ["Seq", "Code", "ELEC_VOLUME"]
-                    elec_volume.index.names = ['record', 'match']
+        # statistics by entry type (269) and their columns
 
-                    elec_volume_info = ELEC_VOLUME.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    elec_volume_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    elec_volume_info.index.names = ['record', 'match']
+        if date < datetime.strptime('2015-11-20', '%Y-%m-%d'):
 
-                    elec_volume = elec_volume_info.merge(
-                        elec_volume, how='inner', left_on='record', right_on='record').reset_index(drop=True)
+            header = {52: ('Time', str), 75: ('Date', str)}
+            entries = {269: ('Type', str), 83: ('Seq', str), 107: ('Code', str),
+                       270: ('PX', str), 271: ('Qty', str), 286: ('Flag', str)}
+            kinds = {'open_stat': ('4', {'PX': 'OPEN_PX', 'Flag': 'Flag'}),
+                     'settle': ('6', {'PX': 'SETTLE_PX'}),
+                     'high_px': ('7', {'PX': 'HIGH'}), 'low_px': ('8', {'PX': 'LOW'}),
+                     'high_bid': ('N', {'PX': 'HIGH_BID'}), 'low_offer': ('O', {'PX': 'LOW_OFFER'}),
+                     'volume': ('B', {'Qty': 'VOLUME'}), 'open_int': ('C', {'Qty': 'OPEN_INT'}),
+                     'simulate_buy': ('F', {'PX': 'PX', 'Qty': 'Qty'}),
+                     'simulated_sell': ('E', {'PX': 'PX', 'Qty': 'Qty'})}
 
-                if len(LIMIT) != 0:
+        else:
 
-                    limit = LIMIT.str.extractall(
-                        r'269=g,55=([^,]*),83=([^,]*),1149=([^,]*),1148=([^,]*),1143=([^,]*),')
+            header = {75: ('Date', str), 52: ('SendingTime', str), 60: ('TransactTime', str)}
+            entries = {269: ('Type', str), 55: ('Code', str), 83: ('Seq', str),
+                       270: ('PX', str), 271: ('Qty', str), 286: ('Flag', str),
+                       1149: ('high_limit', str), 1148: ('low_limit', str),
+                       1143: ('variation', str)}
+            kinds = {'open_stat': ('4', {'PX': 'OPEN_PX', 'Flag': 'Flag'}),
+                     'settle': ('6', {'PX': 'SETTLE_PX'}),
+                     'high_px': ('7', {'PX': 'HIGH'}), 'low_px': ('8', {'PX': 'LOW'}),
+                     'high_bid': ('N', {'PX': 'HIGH_BID'}), 'low_offer': ('O', {'PX': 'LOW_OFFER'}),
+                     'volume': ('B', {'Qty': 'VOLUME'}), 'open_int': ('C', {'Qty': 'OPEN_INT'}),
+                     'limit': ('g', {'high_limit': 'high_limit', 'low_limit': 'low_limit',
+                                     'variation': 'variation'})}
 
-                    limit.columns = ["Code", "Seq",
-                                     "high_limit", "low_limit", "variation"]
-                    limit.index.names = ['record', 'match']
+        stat = _fix_table(self.path, header, entries,
+                          where={269: [x for x, _ in kinds.values()]}).reset_index(drop=True)
 
-                    limit_info = LIMIT.str.extractall(
-                        r'75=([^,]*),52=([^,]*),60=([^,]*),')
-                    limit_info.columns = [
-                        "Date", "SendingTime", "TransactTime"]
-                    limit_info.index.names = ['record', 'match']
+        if not isnull(security):
+            stat = stat.loc[stat['Code'] == str(security)]
 
-                    limit = limit_info.merge(
-                        limit, how='inner', left_on='record', right_on='record').reset_index(drop=True)
+        info = [x for x, _ in header.values()]
+        info_list = {}
 
-                info_list = {'open_stat': open_stat,
-                             'settle': settle, 'high_px': high_px,
-                             'low_px': low_px, 'high_bid': high_bid,
-                             'low_offer': low_offer, 'volume': volume,
-                             'open_int': open_int, 'limit': limit}
+        for name, (kind, columns) in kinds.items():
 
-            return info_list
+            keys = ['Code', 'Seq'] if name == 'limit' else ['Seq', 'Code']
+            table = stat.loc[stat['Type'] == kind].dropna(subset=keys + list(columns))
+            info_list[name] = table[info + keys + list(columns)].rename(
+                columns=columns).reset_index(drop=True)
 
-        data = pd.read_csv(self.path, header=None)[0]
-        stat = stat_main(data, date=date, security=security)
+        info_list['open_stat']['Flag'] = info_list['open_stat']['Flag'].replace(
+            {'5': 'IndicativeOpen', '0': 'DailyOpen'})
 
-        return stat
+        return info_list
 
     def status(self, date, security=None):
         """
@@ -1423,42 +393,18 @@ class mbp_input_fix:
 
         """
 
-        data = pd.read_csv(self.path, header=None)[0]
+        if not isinstance(date, datetime):
+            date = datetime.strptime(date, "%Y-%m-%d")
 
         if date < datetime.strptime('2015-11-20', '%Y-%m-%d'):
 
-            data = data[data[data.str.contains(r'\x01336=([^,]*)')].index]
-            data.replace(to_replace=r'\x01', value=',',
-                         regex=True, inplace=True)
-
-            data.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',268=([^,]*),279=([^,]*),22=([^,]*),48=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',269=([^,]*),270=([^,]*),271=([^,]*),273=([^,]*)', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',276=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',10=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',+,', value=',',
-                         regex=True, inplace=True)
-
-            data1 = data.str.extractall(
-                r'83=([^,]*),107=([^,]*),336=([^,]*),')
+            data1 = _fix_table(self.path, {34: ('MsgSeq', str), 52: ('Time', str), 75: ('Date', str)},
+                               {83: ('Seq', str), 107: ('Code', str), 336: ('SessionID', float)},
+                               contains=['\x01336='])
+            data1 = data1.reset_index(drop=True).dropna(subset=['Seq', 'Code', 'SessionID'])
 
-            data1.columns = ["Seq", "Code", "SessionID"]
-            data1.index.names = ['record', 'match']
-
-            data1_info = data.str.extractall(
-                r'34=([^,]*),52=([^,]*),75=([^,]*),')
-
-            data1_info.columns = ["MsgSeq", "Time", "Date"]
-            data1_info.index.names = ['record', 'match']
-
-            data1 = data1_info.merge(
-                data1, how='inner', on='record').reset_index(drop=True)
-            data1['SessionID'] = data1['SessionID'].astype(int)
+            if not isnull(security):
+                data1 = data1.loc[data1['Code'] == str(security)]
 
             data1 = data1.loc[(data1['SessionID'] == 0) |
                               (data1['SessionID'] == 1)]
@@ -1469,48 +415,19 @@ class mbp_input_fix:
 
         else:
 
-            data = data[data[data.str.contains(r'\x0135=f')].index]
-            data.replace(to_replace=r'\x01', value=',',
-                         regex=True, inplace=True)
-
-            data.replace(to_replace=r'1128=([^,]*),9=([^,]*),35=([^,]*),49=([^,]*),', value='',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',5799=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',1151=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',6937=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',327=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',10=([^,]*),', value=',',
-                         regex=True, inplace=True)
-            data.replace(to_replace=r',+,', value=',',
-                         regex=True, inplace=True)
-
-            data1 = data[data[data.str.contains(r'326=21')].index]
-            data2 = data[data[data.str.contains(r'326=15')].index]
-            data3 = data[data[data.str.contains(r'326=17')].index]
-
-            data_all = [data1, data2, data3]
-
-            def status_processing(data):
-                if len(data) != 0:
-
-                    data = data.str.extractall(
-                        r'34=([^,]*),52=([^,]*),60=([^,]*),75=([^,]*),326=([^,]*),1174=([^,]*),')
-
-                    data.columns = ["MsgSeq",
-                                    "SendingTime",
-                                    "TransactTime",
-                                    "Date",
-                                    "TradingStatus",
-                                    "TradingEvent"]
-
-                return data
-
-            status = [status_processing(data) for data in data_all]
-            status = pd.concat(status, axis=0).reset_index(drop=True)
+            status = _fix_table(self.path, {34: ('MsgSeq', str), 52: ('SendingTime', str),
+                                            60: ('TransactTime', str), 75: ('Date', str),
+                                            326: ('TradingStatus', float),
+                                            1174: ('TradingEvent', float)},
+                                contains=['\x0135=f'], where={35: ['f'], 326: ['21', '15', '17']})
+            status = status.reset_index(drop=True).dropna()
+
+            # pre-open (21), then opening (15) and open (17) messages
+
+            order = status['TradingStatus'].map({21: 0, 15: 1, 17: 2})
+            status = status.loc[order.notna()]
+            status = status.iloc[np.argsort(order.dropna().to_numpy(), kind='stable')].reset_index(drop=True)
+
             status['TradingStatus'], status['TradingEvent'] = status['TradingStatus'].astype(
                 int), status['TradingEvent'].astype(int)
 
@@ -1617,48 +534,338 @@ class quotes:
         return OrderBook47
 
     @staticmethod
-    def order_book(data, security, level, consolidate=True, disable_progress_bar=False):
+    def read_mbp(save_file_path, security=None, filters=None):
+        """
+        Reading parsed MBP messages (template 46) in the layout of the FIX
+        quote messages, so that they can be used by `order_book`.
+
+        Only the row groups and rows of the given securities are read
+        (predicate pushdown on SecurityID).
+
+        Parameters
+        ----------
+        save_file_path : str
+            The directory that contains msgs_MDIncrementalRefreshBook46*.parquet files.
+        security : int or list, optional
+            SecurityIDs to be read. If None, all securities are read.
+            The default is None.
+        filters : list, optional
+            Other filters on the parsed columns, e.g., [('MsgSeq', '>', 1000)].
+            The default is None.
+
+        Returns
+        -------
+        quotes : pandas DataFrame
+            Quote messages where Code is the SecurityID, PX is the price
+            times 1e-9, and the timestamps are nanoseconds since epoch.
+
+        """
+
+        return _native_quotes(_read_mbp(save_file_path, security, filters))
+
+    @staticmethod
+    def read_snapshot(save_file_path, security=None, before=None, template=52):
+        """
+        Reading one complete snapshot of every security, so that books can
+        be started from any intraday file instead of the weekly open.
+
+        The snapshot of a security is identified by its LastMsgSeqNumProcessed.
+        By default, the first snapshot of every security is used. With
+        `before`, the latest snapshot whose LastMsgSeqNumProcessed is not
+        after the given packet sequence number is used instead. MBO snapshots
+        (53) are used only if all chunks are available.
+
+        Parameters
+        ----------
+        save_file_path : str
+            The directory of the parsed messages.
+        security : int or list, optional
+            SecurityIDs to be read. If None, all securities are read.
+            The default is None.
+        before : int, optional
+            The packet sequence number (MsgSeq) where the books start.
+            The default is None.
+        template : int, optional
+            52 for MBP snapshots (templates 52 and 69), which are returned in
+            the layout of `read_mbp` and can be passed to `order_book`, or 53
+            for MBO snapshots, which are returned as parsed and can be passed
+            to `cmemdp.mbo_engine.mbo_book.snapshot`. The default is 52.
+
+        Returns
+        -------
+        snapshot : pandas DataFrame
+            Snapshot entries. For MBP snapshots, MsgSeq is LastMsgSeqNumProcessed
+            and Seq is the RptSeq of the security at the snapshot.
+
+        """
+
+        if template == 52:
+            names = ['SnapshotFullRefresh52', 'SnapshotFullRefreshLongQty69']
+        elif template == 53:
+            names = ['SnapshotFullRefreshOrderBook53']
+        else:
+            raise Exception('Template should be either 52 or 53')
+
+        files = list(chain(*[parsed_files(save_file_path, x) for x in names]))
+
+        if len(files) == 0:
+            raise Exception('Cannot find the parsed snapshot messages')
+
+        data = pd.concat([pd.read_parquet(x, filters=security_filter(security)) for x in files],
+                         ignore_index=True)
+
+        if template == 53:
+
+            # complete snapshots only
+
+            chunks = data.groupby(['SecurityID', 'LastMsgSeqNumProcessed'])[
+                'CurrentChunk'].transform('nunique')
+            data = data.loc[chunks == data['NoChunks']]
+
+        snapshots = data[['SecurityID', 'LastMsgSeqNumProcessed']].drop_duplicates()
+
+        if notnull(before):
+            snapshots = snapshots.loc[snapshots['LastMsgSeqNumProcessed'] <= before]
+            snapshots = snapshots.groupby('SecurityID', as_index=False).max()
+        else:
+            snapshots = snapshots.groupby('SecurityID', as_index=False).min()
+
+        data = data.merge(snapshots, on=['SecurityID', 'LastMsgSeqNumProcessed'])
+
+        if template == 53:
+            return data.reset_index(drop=True)
+
+        data = data.loc[data['MDEntryType'].isin(
+            ['0', '1', 'E', 'F'])].reset_index(drop=True)
+
+        return pd.DataFrame({'Date': _trade_date(data['TransactTime']).values,
+                             'MsgSeq': data['LastMsgSeqNumProcessed'],
+                             'SendingTime': data['SendingTime'] if 'SendingTime' in data.columns else np.nan,
+                             'TransactTime': data['TransactTime'],
+                             'Update': 0,
+                             'Side': data['MDEntryType'],
+                             'Code': data['SecurityID'].astype(str),
+                             'Seq': data['RptSeq'],
+                             'PX': data['MDEntryPx'] * 1e-9,
+                             'Qty': data['MDEntrySize'],
+                             'Ord': data['NumberOfOrders'],
+                             'PX_depth': data['MDPriceLevel'],
+                             'Implied': np.where(data['MDEntryType'].isin(['E', 'F']), 'Y', 'N')})
+
+    @staticmethod
+    def bbo(data, security=None, implied=False, changes_only=True):
+        """
+        Best bid and offer (top of book) of every security, without
+        building the full limit order book.
+
+        Parameters
+        ----------
+        data : str or pandas DataFrame
+            The directory of the parsed MBP messages (templates 32, 46 and
+            64), or parsed MBP messages with the native columns, e.g., from
+            `cme_parser_datamine`.
+        security : int or list, optional
+            SecurityIDs. If None, all securities are included. The default is None.
+        implied : bool, optional
+            Whether to track the implied ('E', 'F') instead of the outright
+            ('0', '1') quotes. The default is False.
+        changes_only : bool, optional
+            Whether to keep only the messages that change the best bid or
+            offer. The default is True.
+
+        Returns
+        -------
+        bbo : pandas DataFrame
+            Top of book in the layout of a level 1 book from `order_book`,
+            where Code is the SecurityID and Seq is the RptSeq, so it can be
+            used by `orderbook.resample` and `orderbook.tbbo`.
+
+        """
+
+        columns = ['MsgSeq', 'SendingTime', 'TransactTime', 'MDEntryPx', 'MDEntrySize',
+                   'SecurityID', 'RptSeq', 'NumberOfOrders', 'MDPriceLevel',
+                   'MDUpdateAction', 'MDEntryType']
+
+        if isinstance(data, str):
+
+            files = list(chain(*[parsed_files(data, x) for x in ['MDIncrementalRefreshBook32',
+                                                                  'MDIncrementalRefreshBook46',
+                                                                  'MDIncrementalRefreshBookLongQty64']]))
+
+            if len(files) == 0:
+                raise Exception('Cannot find the parsed MBP messages')
+
+            data = pd.concat([pd.read_parquet(x, columns=columns, filters=security_filter(security))
+                              for x in files], ignore_index=True)
+
+        elif security is not None:
+            security = [security] if np.isscalar(security) else security
+            data = data.loc[data['SecurityID'].isin([int(x) for x in security])]
+
+        data = data.loc[data['MDEntryType'].isin(['E', 'F'] if implied else ['0', '1'])]
+        data = data.sort_values(['MsgSeq', 'RptSeq'], kind='stable')
+
+        index, top, states = top_of_book(data['SecurityID'].values, data['MDUpdateAction'].values,
+                                         side_codes(data['MDEntryType'].values),
+                                         data['MDPriceLevel'].values,
+                                         data['MDEntryPx'].to_numpy(dtype=np.float64) * 1e-9,
+                                         data['MDEntrySize'].values, data['NumberOfOrders'].values,
+                                         level=2 if implied else 10, changes_only=changes_only)
+
+        data = data.iloc[index]
+
+        bbo = pd.DataFrame(top, columns=book_columns(1))
+        bbo.insert(0, 'Date', _trade_date(data['TransactTime']).values)
+        bbo.insert(1, 'TransactTime', data['TransactTime'].values)
+        bbo.insert(2, 'Seq', data['RptSeq'].values)
+        bbo.insert(3, 'Code', data['SecurityID'].astype(str).values)
+        bbo['SendingTime'] = data['SendingTime'].values if 'SendingTime' in data.columns else np.nan
+        bbo['MsgSeq'] = data['MsgSeq'].values
+
+        return bbo
+
+    @staticmethod
+    def order_book(data, security, level, consolidate=True, disable_progress_bar=False,
+                   workers=None, save_file_path=None, snapshot=None, conflate=None):
         """
         Reconstructing the limit order book
         Parameters
         ----------
-        data : pandas DataFrame
-            Input MBP quote data.
-        security : string
-            A specific security.
+        data : pandas DataFrame or str
+            Input MBP quote data in the layout of the FIX quote messages,
+            parsed MBP messages with their native columns (MDEntryPx,
+            MDEntrySize, NumberOfOrders, MDPriceLevel, MDUpdateAction,
+            MDEntryType, RptSeq, SecurityID), or the directory of the parsed
+            MBP messages.
+        security : string, list or None
+            A specific security, a list of securities, or None for all
+            securities in the data. Books of many securities are built in
+            one chronological pass.
         level : int
             The number of book depths within the limit order book.
         consolidate : bool, optional
             Whether to reconstruct the consolidated limit order book that
             integrates implied and outright quotes. The default is True.
+        workers : int, optional
+            The number of processes. Securities are sharded across the
+            processes and their books are built independently. If `data` is
+            a directory, every process only reads its own securities.
+            The default is None, which uses the current process.
+        save_file_path : str, optional
+            If given, the books of every security are saved as
+            LOB_conso/LOB_outright/LOB_implied_<security>.parquet in this
+            directory, and the file paths are returned instead of the books.
+            The default is None.
+        snapshot : pandas DataFrame or str, optional
+            Snapshot entries from `read_snapshot`, or the directory to read
+            the first snapshots from. Books of the securities in the
+            snapshot start from it, and only messages with a later RptSeq
+            (Seq) are applied. The default is None, where books start empty.
+        conflate : str, optional
+            If 'event', only the book after the last update of every match
+            event is kept, where events end at messages with the EndOfEvent
+            bit of MatchEventIndicator or when TransactTime changes. If
+            'time', events are messages with the same TransactTime, which
+            also works for FIX messages. The default is None, where every
+            update is kept.
 
         Returns
         -------
-        pandas DataFrame
-            A dataframe that contains the limit order book defined by
-            the maximum number of book depths.
+        dict
+            The consolidated, outright and implied limit order books defined
+            by the maximum number of book depths. If `security` is not a
+            string, a dict of such results keyed by security.
         """
 
+        if isinstance(data, str):
+
+            # parsed binary outputs, codes are SecurityIDs
+
+            if notnull(workers) and workers > 1:
+                return _order_book_parallel(data, security, level, consolidate,
+                                            workers, save_file_path, snapshot, conflate)
+
+            data = _read_mbp(data, security)
+
+            if not isinstance(security, str) and np.isscalar(security):
+                security = str(security)
+
         if isinstance(data, pd.DataFrame) == False:
             raise Exception(
                 "Input should be a DataFrame that consists all MDP quote messages in a trading week")
 
-        if security != data['Code'].unique().astype('str')[0]:
+        if notnull(workers) and workers > 1:
+            return _order_book_parallel(data, security, level, consolidate,
+                                        workers, save_file_path, snapshot, conflate)
+
+        # prices of the FIX layout are used as they are
+
+        scale = 1
+
+        if 'MDEntryPx' in data.columns:
+
+            # native binary columns, codes are SecurityIDs. PRICE9 integers
+            # are applied to the books and only the book prices are scaled
+
+            if security is not None and not isinstance(security, str):
+                select = [security] if np.isscalar(security) else security
+                data = data.loc[data['SecurityID'].isin([int(x) for x in select])]
+                security = str(security) if np.isscalar(security) else [
+                    str(x) for x in security]
+
+            data = _native_layout(data)
+            scale = 1e-9
+
+        codes = data['Code'].astype('str')
+
+        if isinstance(security, str):
+            securities = [security]
+        elif security is None:
+            securities = codes.unique().tolist()
+        else:
+            securities = [str(x) for x in security]
+
+        if any(x not in codes.unique() for x in securities):
             raise Exception('Cannot find the security in the data input')
 
-        print('Processing', security, '...')
+        print('Processing', ', '.join(securities[:10]),
+              '' if len(securities) <= 10 else f'and {len(securities)-10} more ...')
+
+        data = data.loc[codes.isin(securities)]
 
         data = data.drop_duplicates()
         data = data.sort_values(['MsgSeq', 'Seq'])
 
+        # events need the messages in their sequence, so they are found after the sort
+
+        if conflate is not None:
+            data = data.assign(Event=_events(data, conflate))
+
+        if isinstance(snapshot, str):
+            snapshot = quotes.read_snapshot(
+                snapshot, [int(x) for x in securities])
+
+        if snapshot is not None:
+
+            # messages already in the snapshot are skipped by RptSeq
+
+            snapshot = snapshot.loc[snapshot['Code'].astype(
+                str).isin(securities)]
+            start = snapshot.groupby(snapshot['Code'].astype(str))[
+                'Seq'].max()
+
+            data = data.loc[data['Seq'].astype(float).values >
+                            data['Code'].astype(str).map(start).fillna(-np.inf).values]
+
         data['Seq'], data['MsgSeq'] = data.Seq.astype(
             float), data.MsgSeq.astype(float)
 
-        data['Update'], data['PX'], data['Qty'], data['Ord'], data['PX_depth'] = (
-            data.Update.astype(float), data.PX.astype(
-                float), data.Qty.astype(float),
-            data.Ord.astype(float), data.PX_depth.astype(int)
-        )
+        if scale == 1:
+            data['Update'], data['PX'], data['Qty'], data['Ord'], data['PX_depth'] = (
+                data.Update.astype(float), data.PX.astype(
+                    float), data.Qty.astype(float),
+                data.Ord.astype(float), data.PX_depth.astype(int)
+            )
 
         # Subseting the outright messages and implied messages
 
@@ -1692,228 +899,73 @@ class quotes:
             LOB.columns = LOB_names
             return LOB
 
-        def book1(msg, level):
-
-            book_list = []
-
-            for k in tqdm(range(msg.shape[0]), desc='outrihgt/implied book process...', disable=disable_progress_bar):
-                LOB = book_build(level)
-                # print(k)
-
-                if msg.Update[k] == 0:
-
-                    # ----------------------------- ORDER SUBMISSION -------------------------------------
-                    # be cautious that the side is in string format
-                    if msg.Side[k] == '0' or msg.Side[k] == 'E':
-                        # find where the column is for every corresponding column names
-                        column_name1 = f'Bid_PX_{msg.PX_depth[k]}'
-                        column_index1 = LOB.columns.get_loc(column_name1)
-                        column_name2 = f'Bid_Qty_{msg.PX_depth[k]}'
-                        column_index2 = LOB.columns.get_loc(column_name2)
-                        column_name3 = f'Bid_Ord_{msg.PX_depth[k]}'
-                        column_index3 = LOB.columns.get_loc(column_name3)
-
-                        if column_index1 > 4:
-
-                            if k == 0:  # intial snapshot
-                                LOB.iloc[:, column_index1] = msg.PX[k]
-                                LOB.iloc[:, column_index2] = msg.Qty[k]
-                                LOB.iloc[:, column_index3] = msg.Ord[k]
-
-                            else:
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-                                LOB.iloc[:, column_index1] = msg.PX[k]
-                                LOB.iloc[:, column_index2] = msg.Qty[k]
-                                LOB.iloc[:, column_index3] = msg.Ord[k]
-                                LOB.iloc[:, range(
-                                    4, (column_index3-2))] = book_list[k-1].iloc[:, range(7, column_index3+1)]
-                        else:
-                            if k != 0:
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-
-                            column_name1 = f'Bid_PX_{msg.PX_depth[k]}'
-                            column_index1 = LOB.columns.get_loc(column_name1)
-                            column_name2 = f'Bid_Qty_{msg.PX_depth[k]}'
-                            column_index2 = LOB.columns.get_loc(column_name2)
-                            column_name3 = f'Bid_Ord_{msg.PX_depth[k]}'
-                            column_index3 = LOB.columns.get_loc(column_name3)
-                            LOB.iloc[:, column_index1] = msg.PX[k]
-                            LOB.iloc[:, column_index2] = msg.Qty[k]
-                            LOB.iloc[:, column_index3] = msg.Ord[k]
-
-                    if msg.Side[k] == '1' or msg.Side[k] == 'F':
-                        # ask orders
-                        # find where the column is for every corresponding column names
-                        column_name1 = f'Ask_PX_{msg.PX_depth[k]}'
-                        column_index1 = LOB.columns.get_loc(column_name1)
-                        column_name2 = f'Ask_Qty_{msg.PX_depth[k]}'
-                        column_index2 = LOB.columns.get_loc(column_name2)
-                        column_name3 = f'Ask_Ord_{msg.PX_depth[k]}'
-                        column_index3 = LOB.columns.get_loc(column_name3)
-
-                        if column_index1 < (LOB.shape[1]-3):
-
-                            if k == 0:  # intial snapshot
-                                LOB.iloc[:, column_index1] = msg.PX[k]
-                                LOB.iloc[:, column_index2] = msg.Qty[k]
-                                LOB.iloc[:, column_index3] = msg.Ord[k]
-
-                            else:
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-                                LOB.iloc[:, column_index1] = msg.PX[k]
-                                LOB.iloc[:, column_index2] = msg.Qty[k]
-                                LOB.iloc[:, column_index3] = msg.Ord[k]
-                                LOB.iloc[:, range((column_index1+3), (LOB.shape[1]-2))] = book_list[k -
-                                                                                                    1].iloc[:, range(column_index1, (LOB.shape[1]-5))]
-                        else:
-                            if k != 0:
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-
-                            column_name1 = f'Ask_PX_{msg.PX_depth[k]}'
-                            column_index1 = LOB.columns.get_loc(column_name1)
-                            column_name2 = f'Ask_Qty_{msg.PX_depth[k]}'
-                            column_index2 = LOB.columns.get_loc(column_name2)
-                            column_name3 = f'Ask_Ord_{msg.PX_depth[k]}'
-                            column_index3 = LOB.columns.get_loc(column_name3)
-                            LOB.iloc[:, column_index1] = msg.PX[k]
-                            LOB.iloc[:, column_index2] = msg.Qty[k]
-                            LOB.iloc[:, column_index3] = msg.Ord[k]
-
-                if msg.Update[k] == 1:
-                    # ----------------------- ORDER MODIFICATION -----------------------------
-                    if msg.Side[k] == '0' or msg.Side[k] == 'E':
-
-                        if k != 0:
-
-                            LOB.iloc[:, range(
-                                4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-
-                        column_name1 = f'Bid_PX_{msg.PX_depth[k]}'
-                        column_index1 = LOB.columns.get_loc(column_name1)
-                        column_name2 = f'Bid_Qty_{msg.PX_depth[k]}'
-                        column_index2 = LOB.columns.get_loc(column_name2)
-                        column_name3 = f'Bid_Ord_{msg.PX_depth[k]}'
-                        column_index3 = LOB.columns.get_loc(column_name3)
-                        LOB.iloc[:, column_index1] = msg.PX[k]
-                        LOB.iloc[:, column_index2] = msg.Qty[k]
-                        LOB.iloc[:, column_index3] = msg.Ord[k]
-
-                    if msg.Side[k] == '1' or msg.Side[k] == 'F':
-
-                        if k != 0:
-
-                            LOB.iloc[:, range(
-                                4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-
-                        column_name1 = f'Ask_PX_{msg.PX_depth[k]}'
-                        column_index1 = LOB.columns.get_loc(column_name1)
-                        column_name2 = f'Ask_Qty_{msg.PX_depth[k]}'
-                        column_index2 = LOB.columns.get_loc(column_name2)
-                        column_name3 = f'Ask_Ord_{msg.PX_depth[k]}'
-                        column_index3 = LOB.columns.get_loc(column_name3)
-                        LOB.iloc[:, column_index1] = msg.PX[k]
-                        LOB.iloc[:, column_index2] = msg.Qty[k]
-                        LOB.iloc[:, column_index3] = msg.Ord[k]
-
-                if msg.Update[k] == 2:
-
-                    # ---------------- ORDER CANCELLATION -----------------------------
-
-                    if msg.Side[k] == '0' or msg.Side[k] == 'E':
-
-                        column_name1 = f'Bid_PX_{msg.PX_depth[k]}'
-                        column_index1 = LOB.columns.get_loc(column_name1)
-                        column_name2 = f'Bid_Qty_{msg.PX_depth[k]}'
-                        column_index2 = LOB.columns.get_loc(column_name2)
-                        column_name3 = f'Bid_Ord_{msg.PX_depth[k]}'
-                        column_index3 = LOB.columns.get_loc(column_name3)
-
-                        if k != 0:
-
-                            if column_index3 > 7:
-
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-                                LOB.iloc[:, range(
-                                    7, (column_index3+1))] = book_list[k-1].iloc[:, range(4, (column_index3-2))]
-                                LOB.iloc[:, range(4, 7)] = 0
-
-                            else:
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-                                LOB.iloc[:, range(4, 7)] = 0
-
-                        else:
-                            LOB.iloc[:, column_index1] = 0
-                            LOB.iloc[:, column_index2] = 0
-                            LOB.iloc[:, column_index3] = 0
-
-                    if msg.Side[k] == '1' or msg.Side[k] == 'F':
-
-                        column_name1 = f'Ask_PX_{msg.PX_depth[k]}'
-                        column_index1 = LOB.columns.get_loc(column_name1)
-                        column_name2 = f'Ask_Qty_{msg.PX_depth[k]}'
-                        column_index2 = LOB.columns.get_loc(column_name2)
-                        column_name3 = f'Ask_Ord_{msg.PX_depth[k]}'
-                        column_index3 = LOB.columns.get_loc(column_name3)
-
-                        if k != 0:
-
-                            if column_index1 < (LOB.shape[1]-5):
-
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-                                LOB.iloc[:, range(
-                                    column_index1, (LOB.shape[1]-5))] = book_list[k-1].iloc[:, range(column_index1+3, (LOB.shape[1]-2))]
-                                LOB.iloc[:, range(
-                                    LOB.shape[1]-5, LOB.shape[1]-2)] = 0
-
-                            else:
-                                LOB.iloc[:, range(
-                                    4, (LOB.shape[1]-2))] = book_list[k-1].iloc[:, range(4, (LOB.shape[1]-2))]
-                                LOB.iloc[:, range(
-                                    LOB.shape[1]-5, LOB.shape[1]-2)] = 0
+        # books seeded from the snapshots, keyed by security
 
-                        else:
-                            LOB.iloc[:, column_index1] = 0
-                            LOB.iloc[:, column_index2] = 0
-                            LOB.iloc[:, column_index3] = 0
+        seeds = {'N': {}, 'Y': {}}
 
-                book_list.append(LOB)
+        if snapshot is not None:
+            for implied, seed_level in [('N', 10), ('Y', 2)]:
+                seed = snapshot.loc[snapshot['Implied'] == implied]
+                px = seed['PX'].values if scale == 1 else np.rint(seed['PX'].values / scale)
+                seeds[implied] = snapshot_states(seed['Code'].astype(str).values,
+                                                 side_codes(seed['Side'].values),
+                                                 seed['PX_depth'].values, px,
+                                                 seed['Qty'].values, seed['Ord'].values,
+                                                 seed_level)
 
-            books = pd.concat(book_list, axis=0, ignore_index=True)
-            books['Seq'] = msg['Seq'].values
+        def book1(msg, level, implied):
 
-            return books
+            # the current books are kept in NumPy arrays, one per security,
+            # and every state is written into one preallocated array.
+            # securities are keyed by integer codes
 
-        if message_outright.shape[0] != 0:
-            print("Outright limit order book start...")
-            LOB_outright = book1(message_outright, 10)
-            LOB_outright.fillna(0, inplace=True)
+            key, names = pd.factorize(msg['Code'].astype(str).values)
+
+            states = {i: seeds[implied][x].copy() for i, x in enumerate(names)
+                      if x in seeds[implied]}
+
+            books, states = mbp_books(key, msg['Update'].values,
+                                      side_codes(msg['Side'].values),
+                                      msg['PX_depth'].values, msg['PX'].values,
+                                      msg['Qty'].values, msg['Ord'].values, level, states)
+
+            books = _scale_prices(books, book_columns(level), scale)
+
+            LOB = book_build(level)
+
+            books = pd.DataFrame(books, columns=LOB.columns[4:-2])
+            books.insert(0, 'Date', np.nan)
+            books.insert(1, 'TransactTime', np.nan)
+            books.insert(2, 'Seq', msg['Seq'].values)
+            books.insert(3, 'Code', np.nan)
+            books['SendingTime'] = np.nan
+            books['MsgSeq'] = np.nan
+
+            return books
+
+        if message_outright.shape[0] != 0:
+            print("Outright limit order book start...")
+            LOB_outright_all = book1(message_outright, 10, 'N')
+            LOB_outright_all.fillna(0, inplace=True)
 
         else:
-            LOB_outright = None
+            LOB_outright_all = None
 
         if message_implied.shape[0] != 0:
             print("Implied limit order book start...")
-            LOB_implied = book1(message_implied, 2)
-            LOB_implied.fillna(0, inplace=True)
-            LOB_implied = LOB_implied.drop(
+            LOB_implied_all = book1(message_implied, 2, 'Y')
+            LOB_implied_all.fillna(0, inplace=True)
+            LOB_implied_all = LOB_implied_all.drop(
                 ['Bid_Ord_1', 'Bid_Ord_2', 'Ask_Ord_1', 'Ask_Ord_2'], axis=1)
 
         else:
-            LOB_implied = None
+            LOB_implied_all = None
 
         # ------------------------ CONSOLIDATED BOOK PROCESSING ----------------
 
         if consolidate == True:
-            print("Consolidated limit order book...")
 
-            def book_check(LOB_outright, LOB_implied):
+            def book_check(LOB_outright, LOB_implied, data):
 
                 if LOB_outright is not None and LOB_implied is None:
                     LOB_conso = LOB_outright
@@ -1933,263 +985,35 @@ class quotes:
                         "Both outright order book and implied order book detected")
 
                     def consolidated_book(LOB_implied, LOB_outright):
-                        # ------- new implied order book ---------------------
-                        if LOB_implied.shape[0] != 0 and LOB_outright.shape[0] != 0:
-
-                            LOB_implied_new = pd.DataFrame(
-                                [[np.nan]*14]*LOB_outright.shape[0])
-                            LOB_implied_new.columns = LOB_implied.columns
-                            LOB_implied_new['Seq'] = LOB_outright['Seq'].values
-
-                            LOB_implied_new = pd.concat(
-                                [LOB_implied_new, LOB_implied], ignore_index=True)
-                            LOB_implied_new = LOB_implied_new.sort_values(
-                                'Seq', na_position='first').reset_index(drop=True)
-                            LOB_implied_new.iloc[:,
-                                                 4: 12] = LOB_implied_new.iloc[:, 4: 12].ffill()
-
-                            LOB_implied_new.loc[(LOB_implied_new['Bid_PX_1'].isna(
-                            ) == True), 'Bid_PX_1':'Bid_Qty_1'] = 0
-
-                            LOB_implied_new.loc[(LOB_implied_new['Bid_PX_2'].isna(
-                            ) == True), 'Bid_PX_2':'Bid_Qty_2'] = 0
-
-                            LOB_implied_new.loc[(LOB_implied_new['Ask_PX_1'].isna(
-                            ) == True), 'Ask_PX_1':'Ask_Qty_1'] = 0
-
-                            LOB_implied_new.loc[(LOB_implied_new['Ask_PX_2'].isna(
-                            ) == True), 'Ask_PX_2':'Ask_Qty_2'] = 0
-
-                            LOB_outright_new = pd.DataFrame(
-                                [[np.nan]*(level * 2 * 3 + 6)]*LOB_implied.shape[0])
-                            LOB_outright_new.columns = LOB_outright.columns
-                            LOB_outright_new['Seq'] = LOB_implied['Seq'].values
-
-                            LOB_outright_new = pd.concat(
-                                [LOB_outright_new, LOB_outright], ignore_index=True)
-                            LOB_outright_new = LOB_outright_new.sort_values(
-                                'Seq', na_position='first').reset_index(drop=True)
-                            LOB_outright_new.iloc[:,
-                                                  4: (LOB_outright_new.shape[1]-2)] = LOB_outright_new.iloc[:, 4: (LOB_outright_new.shape[1]-2)].ffill()
-
-                # ----------- Consolidating process---------------------
-
-                            LOB_conso_list = []
-
-                            bid_px1_index = 3 * level + 1
-                            ask_px1_index = 3 * level + 4
-
-                            for a in tqdm(range(data.shape[0]), desc='consolidated book process...', disable=disable_progress_bar):
-
-                                LOB_conso = book_build(level)
-
-                                LOB_conso.iloc[:, 4:(
-                                    level * 2 * 3 + 4)] = LOB_outright_new.iloc[a, 4: (level * 2 * 3 + 4)]
-
-                                if LOB_implied_new.loc[a, 'Bid_PX_1'] != 0:
-                                    # Implied price is in the existing book prices
-                                    if LOB_implied_new.loc[a, 'Bid_PX_1'] in LOB_conso.iloc[:, range(4, bid_px1_index+1, 3)].values:
-                                        bid1_index = (3 *
-                                                      (np.where(LOB_conso.iloc[:, range(
-                                                          4, bid_px1_index+1, 3)].values == LOB_implied_new.loc[a, 'Bid_PX_1'])[1] + 1)).astype(int)[0]+1
-                                        # .values will return list in list, needs to remove one list and make it array
-
-                                        # LOB_conso[:, bid1_index] = LOB_implied_new.loc[a, 'Bid_PX_1']
-                                        LOB_conso.iloc[:, bid1_index+1] = LOB_implied_new.loc[a,
-                                                                                              'Bid_Qty_1'] + LOB_conso.iloc[:, bid1_index + 1]
-
-                                    else:
-                                        # Implied price is not in the existing book prices
-                                        # Defining the existing book prices
-                                        px_seq = np.append(LOB_conso.iloc[:, range(4, bid_px1_index+1, 3)].values, np.array(
-                                            [LOB_implied_new.loc[a, 'Bid_PX_1']]).reshape(1, -1), axis=1)
-                                        # descending sort
-                                        px_seq = px_seq[~np.isnan(px_seq)]
-                                        px_seq = px_seq[px_seq > 0]
-                                        px_seq = np.unique(px_seq)
-                                        px_seq = np.sort(px_seq)[::-1]
-
-                                        conso_px = np.where(LOB_implied_new.loc[a, 'Bid_PX_1'] == px_seq)[
-                                            0].astype(int)[0]+1
-
-                                        if conso_px <= level:
-                                            conso_px_lv = f"Bid_PX_{conso_px}"
-                                            conso_px_id = LOB_conso.columns.get_loc(
-                                                conso_px_lv)
-
-                                            if conso_px_id > 5:
-                                                LOB_conso.iloc[:, 4: conso_px_id] = LOB_conso.iloc[:,
-                                                                                                   7: conso_px_id+3]
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Bid_PX_1']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Bid_Qty_1']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                            else:
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Bid_PX_1']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Bid_Qty_1']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                if LOB_implied_new.loc[a, 'Bid_PX_2'] != 0:
-                                    # Implied price is in the existing book prices
-                                    if LOB_implied_new.loc[a, 'Bid_PX_2'] in LOB_conso.iloc[:, range(4, bid_px1_index+1, 3)].values:
-                                        bid2_index = (3 *
-                                                      (np.where(LOB_conso.iloc[:, range(
-                                                          4, bid_px1_index+1, 3)].values == LOB_implied_new.loc[a, 'Bid_PX_2'])[1] + 1)).astype(int)[0]+1
-                                        # .values will return list in list, needs to remove one list and make it array
-
-                                        # LOB_conso[:, bid2_index] = LOB_implied_new.loc[a, 'Bid_PX_2']
-                                        LOB_conso.iloc[:, bid2_index+1] = LOB_implied_new.loc[a,
-                                                                                              'Bid_Qty_2'] + LOB_conso.iloc[:, bid2_index + 1]
-
-                                    else:
-                                        # Implied price is not in the existing book prices
-                                        # Defining the existing book prices
-                                        px_seq = np.append(LOB_conso.iloc[:, range(4, bid_px1_index+1, 3)].values, np.array(
-                                            [LOB_implied_new.loc[a, 'Bid_PX_2']]).reshape(1, -1), axis=1)
-                                        # descending sort
-                                        px_seq = px_seq[~np.isnan(px_seq)]
-                                        px_seq = px_seq[px_seq > 0]
-                                        px_seq = np.unique(px_seq)
-                                        px_seq = np.sort(px_seq)[::-1]
-
-                                        conso_px = np.where(LOB_implied_new.loc[a, 'Bid_PX_2'] == px_seq)[
-                                            0].astype(int)[0]+1
-
-                                        if conso_px <= level:
-                                            conso_px_lv = f"Bid_PX_{conso_px}"
-                                            conso_px_id = LOB_conso.columns.get_loc(
-                                                conso_px_lv)
-
-                                            if conso_px_id > 5:
-                                                LOB_conso.iloc[:, 4: conso_px_id] = LOB_conso.iloc[:,
-                                                                                                   7: conso_px_id+3]
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Bid_PX_2']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Bid_Qty_2']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                            else:
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Bid_PX_2']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Bid_Qty_2']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                if LOB_implied_new.loc[a, 'Ask_PX_1'] != 0:
-                                    # Implied price is in the existing book prices
-                                    if LOB_implied_new.loc[a, 'Ask_PX_1'] in LOB_conso.iloc[:, range(ask_px1_index, (level * 2 * 3 + 4), 3)].values:
-                                        ask1_index = (3 *
-                                                      (np.where(LOB_conso.iloc[:, range(ask_px1_index, (level * 2 * 3 + 4), 3)].values == LOB_implied_new.loc[a, 'Ask_PX_1'])[1] + 1)).astype(int)[0]+bid_px1_index
-                                        # .values will return list in list, needs to remove one list and make it array
-                                        # LOB_conso[:, ask1_index] = LOB_implied_new.loc[a, 'Ask_PX_1']
-                                        LOB_conso.iloc[:, ask1_index+1] = LOB_implied_new.loc[a,
-                                                                                              'Ask_Qty_1'] + LOB_conso.iloc[:, ask1_index + 1]
-
-                                    else:
-                                        # Implied price is not in the existing book prices
-                                        # Defining the existing book prices
-                                        px_seq = np.append(LOB_conso.iloc[:, range(ask_px1_index, (level * 2 * 3 + 4), 3)].values, np.array(
-                                            [LOB_implied_new.loc[a, 'Ask_PX_1']]).reshape(1, -1), axis=1)
-                                        # ascending sort
-                                        px_seq = px_seq[~np.isnan(px_seq)]
-                                        px_seq = px_seq[px_seq > 0]
-                                        px_seq = np.unique(px_seq)
-                                        px_seq = np.sort(px_seq)
-
-                                        conso_px = np.where(LOB_implied_new.loc[a, 'Ask_PX_1'] == px_seq)[
-                                            0].astype(int)[0]+1
-
-                                        if conso_px <= level:
-                                            conso_px_lv = f"Ask_PX_{conso_px}"
-                                            conso_px_id = LOB_conso.columns.get_loc(
-                                                conso_px_lv)
-
-                                            if conso_px_id < (level * 2 * 3 + 1):
-                                                LOB_conso.iloc[:, (conso_px_id+3):(level * 2 * 3 + 3)] = LOB_conso.iloc[:,
-                                                                                                                        conso_px_id: (level * 2 * 3)]
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Ask_PX_1']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Ask_Qty_1']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                            else:
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Ask_PX_1']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Ask_Qty_1']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                if LOB_implied_new.loc[a, 'Ask_PX_2'] != 0:
-                                    # Implied price is in the existing book prices
-                                    if LOB_implied_new.loc[a, 'Ask_PX_2'] in LOB_conso.iloc[:, range(ask_px1_index, (level * 2 * 3 + 4), 3)].values:
-                                        ask2_index = (3 *
-                                                      (np.where(LOB_conso.iloc[:, range(ask_px1_index, (level * 2 * 3 + 4), 3)].values == LOB_implied_new.loc[a, 'Ask_PX_2'])[1] + 1)).astype(int)[0]+bid_px1_index
-
-                                        # LOB_conso[:, ask2_index] = LOB_implied_new.loc[a, 'Ask_PX_2']
-                                        LOB_conso.iloc[:, ask2_index+1] = LOB_implied_new.loc[a,
-                                                                                              'Ask_Qty_2'] + LOB_conso.iloc[:, ask2_index + 1]
-                                    else:
-                                        # Implied price is not in the existing book prices
-                                        # Defining the existing book prices
-                                        px_seq = np.append(LOB_conso.iloc[:, range(ask_px1_index, (level * 2 * 3 + 4), 3)].values, np.array(
-                                            [LOB_implied_new.loc[a, 'Ask_PX_2']]).reshape(1, -1), axis=1)
-                                        # ascending sort
-                                        px_seq = px_seq[~np.isnan(px_seq)]
-                                        px_seq = px_seq[px_seq > 0]
-                                        px_seq = np.unique(px_seq)
-                                        px_seq = np.sort(px_seq)
-
-                                        conso_px = np.where(LOB_implied_new.loc[a, 'Ask_PX_2'] == px_seq)[
-                                            0].astype(int)[0]+1
-
-                                        if conso_px <= level:
-                                            conso_px_lv = f"Ask_PX_{conso_px}"
-                                            conso_px_id = LOB_conso.columns.get_loc(
-                                                conso_px_lv)
-
-                                            if conso_px_id < (level * 2 * 3 + 1):
-                                                LOB_conso.iloc[:, (conso_px_id+3):(level * 2 * 3 + 3)] = LOB_conso.iloc[:,
-                                                                                                                        conso_px_id: (level * 2 * 3)]
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Ask_PX_2']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Ask_Qty_2']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                            else:
-
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id] = LOB_implied_new.loc[a, 'Ask_PX_2']
-                                                LOB_conso.iloc[:, conso_px_id +
-                                                               1] = LOB_implied_new.loc[a, 'Ask_Qty_2']
-                                                LOB_conso.iloc[:,
-                                                               conso_px_id + 2] = 0
-
-                                LOB_conso_list.append(LOB_conso)
-
-                            LOB_conso = pd.concat(
-                                LOB_conso_list, axis=0, ignore_index=True)
-                            del LOB_implied_new, LOB_outright_new
+
+                        # implied levels are merged into the forward-filled
+                        # outright ladder for all messages at once
+
+                        code = str(data['Code'].iloc[0])
+                        outright_start, implied_start = None, None
+
+                        if code in seeds['N']:
+                            outright_start = _scale_prices(
+                                flat_book(seeds['N'][code]), book_columns(10), scale)
+                        if code in seeds['Y']:
+                            implied_start = _scale_prices(
+                                np.delete(flat_book(seeds['Y'][code]), [2, 5, 8, 11]),
+                                book_columns(2, orders=False), scale)
+
+                        seq, books = merge_books(LOB_outright['Seq'].values,
+                                                 LOB_outright[book_columns(10)].values,
+                                                 LOB_implied['Seq'].values,
+                                                 LOB_implied[book_columns(2, orders=False)].values,
+                                                 level, outright_start, implied_start)
+
+                        LOB_conso = pd.DataFrame(
+                            books, columns=book_build(level).columns[4:-2])
+                        LOB_conso.insert(0, 'Date', np.nan)
+                        LOB_conso.insert(1, 'TransactTime', np.nan)
+                        LOB_conso.insert(2, 'Seq', seq)
+                        LOB_conso.insert(3, 'Code', np.nan)
+                        LOB_conso['SendingTime'] = np.nan
+                        LOB_conso['MsgSeq'] = np.nan
 
                         LOB_conso['Seq'] = data['Seq'].values
                         LOB_conso['Date'] = data['Date'].values
@@ -2203,35 +1027,798 @@ class quotes:
                     LOB_conso = consolidated_book(LOB_implied, LOB_outright)
 
                 return LOB_conso
-            LOB_conso = book_check(LOB_outright, LOB_implied)
 
-        else:
-            LOB_conso = None
+        # ------------------------ PER-SECURITY RESULTS ------------------------
 
-        if LOB_outright is not None:
+        # rows of every security, found once instead of once per security
+
+        def rows(msg):
+            return msg.groupby(msg['Code'].astype(str).values).indices
+
+        rows_outright, rows_implied, rows_all = rows(
+            message_outright), rows(message_implied), rows(data)
+
+        def subset(LOB, msg, select, code):
+            # books and messages of one security
+
+            if LOB is None:
+                return None, msg
+
+            if code not in select:
+                return None, msg.iloc[0:0]
+
+            return LOB.iloc[select[code]].reset_index(drop=True), msg.iloc[select[code]]
+
+        results = {}
+
+        for code in securities:
+
+            LOB_outright, message_outright_code = subset(
+                LOB_outright_all, message_outright, rows_outright, code)
+            LOB_implied, message_implied_code = subset(
+                LOB_implied_all, message_implied, rows_implied, code)
+
+            if consolidate == True:
+                print("Consolidated limit order book...")
+                LOB_conso = book_check(LOB_outright, LOB_implied,
+                                       data.iloc[rows_all[code]])
+
+            else:
+                LOB_conso = None
 
-            LOB_outright['Seq'] = message_outright['Seq'].values
-            LOB_outright['Date'] = message_outright['Date'].values
-            LOB_outright['MsgSeq'] = message_outright['MsgSeq'].values
-            LOB_outright['SendingTime'] = message_outright['SendingTime'].values
-            LOB_outright['TransactTime'] = message_outright['TransactTime'].values
-            LOB_outright['Code'] = message_outright['Code'].values
+            if LOB_outright is not None:
 
-        if LOB_implied is not None:
+                LOB_outright['Seq'] = message_outright_code['Seq'].values
+                LOB_outright['Date'] = message_outright_code['Date'].values
+                LOB_outright['MsgSeq'] = message_outright_code['MsgSeq'].values
+                LOB_outright['SendingTime'] = message_outright_code['SendingTime'].values
+                LOB_outright['TransactTime'] = message_outright_code['TransactTime'].values
+                LOB_outright['Code'] = message_outright_code['Code'].values
 
-            LOB_implied['Seq'] = message_implied['Seq'].values
-            LOB_implied['Date'] = message_implied['Date'].values
-            LOB_implied['MsgSeq'] = message_implied['MsgSeq'].values
-            LOB_implied['SendingTime'] = message_implied['SendingTime'].values
-            LOB_implied['TransactTime'] = message_implied['TransactTime'].values
-            LOB_implied['Code'] = message_implied['Code'].values
+            if LOB_implied is not None:
 
-        results = {'LOB_conso': LOB_conso,
-                   'LOB_outright': LOB_outright, 'LOB_implied': LOB_implied}
+                LOB_implied['Seq'] = message_implied_code['Seq'].values
+                LOB_implied['Date'] = message_implied_code['Date'].values
+                LOB_implied['MsgSeq'] = message_implied_code['MsgSeq'].values
+                LOB_implied['SendingTime'] = message_implied_code['SendingTime'].values
+                LOB_implied['TransactTime'] = message_implied_code['TransactTime'].values
+                LOB_implied['Code'] = message_implied_code['Code'].values
+
+            if conflate is not None:
+                LOB_conso = _last_of_event(
+                    LOB_conso, data['Event'].values[rows_all[code]])
+                LOB_outright = _last_of_event(
+                    LOB_outright, message_outright_code['Event'].values)
+                LOB_implied = _last_of_event(
+                    LOB_implied, message_implied_code['Event'].values)
+
+            results[code] = {'LOB_conso': LOB_conso,
+                             'LOB_outright': LOB_outright, 'LOB_implied': LOB_implied}
+
+        if notnull(save_file_path):
+            results = {code: _save_books(x, code, save_file_path)
+                       for code, x in results.items()}
+
+        if isinstance(security, str):
+            return results[security]
 
         return results
 
 
+def _as_str(values):
+    # strings are built for the unique values only
+
+    codes, uniques = pd.factorize(np.asarray(values))
+
+    return pd.Series(np.asarray(uniques.astype(str), dtype=object)[codes], dtype=object)
+
+
+def _trade_date(TransactTime):
+    # CME trade date: sessions start at 17:00 Chicago time
+
+    trade_date = (pd.to_datetime(TransactTime, unit='ns', utc=True)
+                  .dt.tz_convert('America/Chicago') + pd.Timedelta(hours=7))
+
+    return _as_str(trade_date.dt.year * 10000 + trade_date.dt.month * 100 +
+                   trade_date.dt.day)
+
+
+def _read_mbp(save_file_path, security=None, filters=None):
+    # parsed MBP messages with their native columns
+
+    files = parsed_files(save_file_path, 'MDIncrementalRefreshBook46')
+
+    if len(files) == 0:
+        raise Exception('Cannot find the parsed MBP messages')
+
+    filters = (security_filter(security) or []) + (filters or [])
+    filters = filters if len(filters) != 0 else None
+
+    columns = ['MsgSeq', 'SendingTime', 'TransactTime', 'MatchEventIndicator', 'MDEntryPx',
+               'MDEntrySize', 'SecurityID', 'RptSeq', 'NumberOfOrders', 'MDPriceLevel',
+               'MDUpdateAction', 'MDEntryType']
+
+    return pd.concat([pd.read_parquet(x, columns=columns, filters=filters) for x in files],
+                     ignore_index=True)
+
+
+def _native_quotes(data):
+    # parsed template 46 (or 32/64) columns in the layout of the FIX quote
+    # messages, implied entries are mapped by their MDEntryType
+
+    side = data['MDEntryType'].to_numpy(dtype=object)
+
+    quotes = pd.DataFrame({'Date': _trade_date(data['TransactTime']).values,
+                           'MsgSeq': data['MsgSeq'].values,
+                           'SendingTime': data['SendingTime'].values if 'SendingTime' in data.columns else np.nan,
+                           'TransactTime': data['TransactTime'].values,
+                           'Update': data['MDUpdateAction'].values,
+                           'Side': side,
+                           'Code': _as_str(data['SecurityID']).values,
+                           'Seq': data['RptSeq'].values,
+                           'PX': data['MDEntryPx'].to_numpy(dtype=np.float64) * 1e-9,
+                           'Qty': data['MDEntrySize'].values,
+                           'Ord': data['NumberOfOrders'].values,
+                           'PX_depth': data['MDPriceLevel'].values,
+                           'Implied': np.where((side == 'E') | (side == 'F'), 'Y', 'N')})
+
+    if 'MatchEventIndicator' in data.columns:
+        quotes['MatchEventIndicator'] = data['MatchEventIndicator'].values
+
+    return quotes
+
+
+# native columns used by `order_book` under the names of the FIX layout
+
+NATIVE_COLUMNS = {'MDUpdateAction': 'Update', 'MDEntryType': 'Side', 'RptSeq': 'Seq',
+                  'MDEntryPx': 'PX', 'MDEntrySize': 'Qty', 'NumberOfOrders': 'Ord',
+                  'MDPriceLevel': 'PX_depth'}
+
+
+def _native_layout(data):
+    # parsed MBP messages renamed instead of copied, so the native arrays go
+    # to the book engine as they are. prices stay PRICE9 integers
+
+    data = data.rename(columns=NATIVE_COLUMNS)
+
+    return data.assign(Date=_trade_date(data['TransactTime']).values,
+                       SendingTime=data['SendingTime'] if 'SendingTime' in data.columns else np.nan,
+                       Code=_as_str(data['SecurityID']).values,
+                       Implied=np.where(data['Side'].isin(['E', 'F']).values, 'Y', 'N'))
+
+
+def _scale_prices(book, columns, scale):
+    # PRICE9 integers to prices in the price columns of flat books
+
+    if scale != 1:
+        book[..., np.array(['_PX_' in x for x in columns])] *= scale
+
+    return book
+
+
+def _events(data, conflate):
+    # match event number of every message, in the input order
+
+    TransactTime = data['TransactTime'].values
+    end = np.zeros(data.shape[0], dtype=bool)
+    end[-1:] = True
+    end[:-1] = TransactTime[1:] != TransactTime[:-1]
+
+    if conflate == 'event':
+
+        if 'MatchEventIndicator' not in data.columns:
+            raise Exception(
+                'MatchEventIndicator is required to conflate by the end of event, use conflate="time" instead')
+
+        # e.g., '0b10000100' as parsed, EndOfEvent is the highest bit
+
+        codes, uniques = pd.factorize(data['MatchEventIndicator'].values)
+        indicator = np.array([int(x, 0) if isinstance(x, str) else int(x)
+                              for x in uniques], dtype=np.int64)[codes]
+
+        # the last entry of a message with EndOfEvent closes the event
+
+        MsgSeq = data['MsgSeq'].values
+        last = np.ones(data.shape[0], dtype=bool)
+        last[:-1] = (MsgSeq[1:] != MsgSeq[:-1]) | (codes[1:] != codes[:-1]) | end[:-1]
+
+        end = end | (last & ((indicator & 0x80) != 0))
+
+    elif conflate != 'time':
+        raise Exception('Conflate should be either event or time')
+
+    return np.concatenate([[0], np.cumsum(end[:-1])]).astype(np.int64)
+
+
+def _last_of_event(LOB, event):
+    # the book after the last message of every event
+
+    if LOB is None:
+        return None
+
+    event = np.asarray(event)
+    keep = np.ones(event.shape[0], dtype=bool)
+    keep[:-1] = event[1:] != event[:-1]
+
+    return LOB.loc[keep].reset_index(drop=True)
+
+
+def _save_books(results, code, save_file_path):
+    # books of one security saved as parquet, paths returned
+
+    os.makedirs(save_file_path, exist_ok=True)
+
+    paths = {}
+
+    for name, book in results.items():
+
+        if book is None:
+            paths[name] = None
+            continue
+
+        paths[name] = os.path.join(save_file_path, f'{name}_{code}.parquet')
+        book.to_parquet(paths[name])
+
+    return paths
+
+
+def _order_book_shard(data, securities, level, consolidate, save_file_path, snapshot, conflate):
+
+    if isinstance(data, str):
+        data = _read_mbp(data, securities)
+
+    return quotes.order_book(data, [str(x) for x in securities], level, consolidate,
+                             disable_progress_bar=True, save_file_path=save_file_path,
+                             snapshot=snapshot, conflate=conflate)
+
+
+def _order_book_parallel(data, security, level, consolidate, workers, save_file_path,
+                         snapshot=None, conflate=None):
+
+    # number of messages per security, only the SecurityID column is read
+
+    if isinstance(data, str):
+        counts = pd.concat([pd.read_parquet(x, columns=['SecurityID'])
+                            for x in glob.glob(f"{data}/msgs_MDIncrementalRefreshBook46*.parquet")])
+        counts = counts['SecurityID'].astype(str).value_counts()
+    else:
+        codes = data['SecurityID' if 'MDEntryPx' in data.columns else 'Code'].astype(str)
+        counts = codes.value_counts()
+
+    if isinstance(security, str) or (security is not None and np.isscalar(security)):
+        securities = [str(security)]
+    elif security is None:
+        securities = counts.index.tolist()
+    else:
+        securities = [str(x) for x in security]
+
+    if any(x not in counts.index for x in securities):
+        raise Exception('Cannot find the security in the data input')
+
+    # the largest securities first, each to the least loaded shard
+
+    shards = [[] for i in range(min(workers, len(securities)))]
+    load = np.zeros(len(shards))
+
+    for code in counts.loc[securities].sort_values(ascending=False).index:
+        i = load.argmin()
+        shards[i].append(code)
+        load[i] += counts[code]
+
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+
+        if isinstance(data, str):
+            jobs = [pool.submit(_order_book_shard, data, shard, level, consolidate, save_file_path,
+                                snapshot, conflate)
+                    for shard in shards]
+        else:
+            jobs = [pool.submit(_order_book_shard, data.loc[codes.isin(shard)], shard, level,
+                                consolidate, save_file_path, snapshot, conflate)
+                    for shard in shards]
+
+        for job in jobs:
+            results.update(job.result())
+
+    if isinstance(security, str) or (security is not None and np.isscalar(security)):
+        return results[str(security)]
+
+    return {code: results[code] for code in securities}
+
+
+def _ns(values):
+    # timestamps as int64 nanoseconds since epoch (UTC)
+
+    values = pd.Series(values)
+
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.to_numpy(dtype=np.int64)
+
+    if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return _fix_ns(values)
+
+    if values.dt.tz is None:
+        values = values.dt.tz_localize('UTC')
+
+    return values.dt.tz_convert('UTC').dt.tz_localize(None).astype('datetime64[ns]') \
+        .to_numpy().astype(np.int64)
+
+
+def _security_codes(left, right):
+    # int64 codes of the securities of two frames on shared categories, or
+    # None if both frames hold the same single security
+
+    if left.size != 0 and right.size != 0 and notnull(left.iloc[0]) and \
+            str(left.iloc[0]) == str(right.iloc[0]) and \
+            (left == left.iloc[0]).all() and (right == right.iloc[0]).all():
+        return None, None
+
+    # SecurityIDs are keys already
+    if pd.api.types.is_integer_dtype(left.dtype) and pd.api.types.is_integer_dtype(right.dtype) \
+            and not left.hasnans and not right.hasnans:
+        return left.to_numpy(dtype=np.int64), right.to_numpy(dtype=np.int64)
+
+    left_codes, left_uniques = pd.factorize(left)
+    right_codes, right_uniques = pd.factorize(right)
+
+    # securities may be SecurityIDs on one side and strings on the other
+    categories = pd.Index(left_uniques.astype(str)).append(
+        pd.Index(right_uniques.astype(str))).unique()
+
+    if categories.size <= 1 and (left_codes >= 0).all() and (right_codes >= 0).all():
+        return None, None
+
+    def codes(x, uniques):
+        mapped = np.append(categories.get_indexer(pd.Index(uniques.astype(str))), -1)
+        return mapped[x].astype(np.int64)
+
+    return codes(left_codes, left_uniques), codes(right_codes, right_uniques)
+
+
+def _sorted(data):
+    # rows sorted by _Key, without sorting rows that already are
+
+    key = data['_Key'].to_numpy()
+
+    if key.size < 2 or (key[1:] >= key[:-1]).all():
+        return data
+
+    return data.sort_values('_Key', kind='stable')
+
+
+def _fix_ns(values):
+    # FIX timestamps (YYYYmmddHHMMSS and up to 9 fraction digits, UTC) to int64
+    # nanoseconds by digit arithmetic, which is much faster than strptime
+
+    codes, uniques = pd.factorize(values)
+    text = np.asarray(uniques.astype(str), dtype='S')
+
+    width = max(text.dtype.itemsize, 23)
+    digits = np.frombuffer(text.astype(f'S{width}').tobytes(), dtype=np.uint8)
+    digits = np.maximum(digits.reshape(-1, width)[:, 0:23].astype(np.int64) - 48, 0)
+
+    def number(first, last):
+        return digits[:, first:last] @ 10 ** np.arange(last - first - 1, -1, -1, dtype=np.int64)
+
+    year, month, day = number(0, 4), number(4, 6), number(6, 8)
+
+    # days since epoch from the civil date
+
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * np.where(month > 2, month - 3, month + 9) + 2) // 5 + day - 1
+    days = era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+
+    seconds = days * 86400 + number(8, 10) * 3600 + number(10, 12) * 60 + number(12, 14)
+
+    return (seconds * 1000000000 + number(14, 23))[codes]
+
+
+def _fix_buffers(data, chunk_size):
+    # byte buffers of whole messages (lines) from a FIX file or a Series of
+    # messages, read chunk_size bytes at a time
+
+    if isinstance(data, str):
+        f = open(data, 'rb')
+    else:
+        data = pd.Series(data).fillna('').astype(str)
+        f = io.BytesIO(('\n'.join(data) + '\n').encode('latin-1', errors='replace'))
+
+    with f:
+        rest = b''
+
+        while True:
+            block = f.read(chunk_size)
+
+            if not block:
+                break
+
+            block = rest + block
+            cut = block.rfind(b'\n') + 1
+            rest = block[cut:]
+
+            if cut > 0:
+                yield np.frombuffer(block[:cut], dtype=np.uint8)
+
+        if len(rest) > 0:
+            yield np.frombuffer(rest + b'\n', dtype=np.uint8)
+
+
+def _fix_words(buf):
+    # the 8 bytes from every position of the buffer as one integer
+
+    padded = np.concatenate([buf, np.zeros(8, dtype=np.uint8)])
+
+    return np.ndarray(buf.shape, dtype=np.uint64, buffer=padded, strides=(1,))
+
+
+def _fix_key(value):
+    # the integer of the first (at most 8) bytes of a string, as in _fix_words
+
+    return np.frombuffer(value.encode()[0:8].ljust(8, b'\x00'), dtype=np.uint64)[0]
+
+
+# masks keeping the first 0 to 8 bytes of _fix_words
+
+_FIX_MASKS = np.frombuffer(b''.join(b'\xff' * x + b'\x00' * (8 - x) for x in range(9)),
+                           dtype=np.uint64)
+
+
+def _fix_lines(buf, contains):
+    # the messages (lines) of the buffer that include any of the patterns
+
+    pattern = re.compile(b'|'.join(re.escape(x.encode()) for x in contains))
+    hit = np.fromiter((x.start() for x in pattern.finditer(buf.tobytes())), dtype=np.int64)
+
+    lines = np.flatnonzero(buf == 10)
+    keep = np.zeros(lines.size, dtype=bool)
+    keep[np.searchsorted(lines, hit)] = True
+
+    start = np.concatenate([[0], lines[:-1] + 1])[keep]
+    length = lines[keep] + 1 - start
+
+    # gathering the kept lines into one buffer
+
+    index = np.repeat(start - np.concatenate([[0], np.cumsum(length)[:-1]]), length)
+
+    return buf[index + np.arange(index.size)]
+
+
+def _fix_fields(buf, words):
+    # the record, tag key and value bounds of every tag=value field, found
+    # from one scan of the buffer for the separators (SOH, new lines and the
+    # other control characters) and '='; the key of a field is its 'tag='
+    # bytes as an integer
+
+    marks = np.flatnonzero((buf <= 13) | (buf == 61))
+    kind = buf[marks]
+
+    last = np.flatnonzero(kind != 61)
+    end = marks[last]
+    start = np.concatenate([[0], end[:-1] + 1])
+    record = np.concatenate([[0], np.cumsum(buf[end[:-1]] == 10)])
+
+    # the first '=' of every field
+
+    first = np.concatenate([[0], last[:-1] + 1])
+    equal = marks[first]
+    width = equal - start + 1
+    valid = (kind[first] == 61) & (width >= 2) & (width <= 8)
+
+    key = np.where(valid, words[start] & _FIX_MASKS[np.clip(width, 0, 8)], 0)
+
+    return record, key, equal + 1, end
+
+
+def _fix_strings(buf, start, end):
+    # values as a fixed width bytes array
+
+    width = int((end - start).max(initial=0))
+
+    if width == 0:
+        return np.full(start.size, b'', dtype='S1')
+
+    index = start[:, None] + np.arange(width)
+    chars = np.where(index < end[:, None],
+                     buf[np.minimum(index, buf.size - 1)], 0).astype(np.uint8)
+
+    return chars.view(f'S{width}').ravel()
+
+
+def _fix_numbers(buf, start, end):
+    # FIX int and float values (optional sign, digits and decimal point) by
+    # digit arithmetic, as the signed digits and the number of decimals
+
+    width = end - start
+    mantissa = np.zeros(start.size, dtype=np.int64)
+    decimals = np.zeros(start.size, dtype=np.int64)
+    point = np.zeros(start.size, dtype=bool)
+    negative = np.zeros(start.size, dtype=bool)
+    valid = width > 0
+
+    for j in range(int(width.max(initial=0))):
+        inside = j < width
+        char = buf[np.minimum(start + j, buf.size - 1)].astype(np.int64)
+
+        sign = inside & (j == 0) & ((char == 45) | (char == 43))
+        dot = inside & (char == 46) & ~point
+        digit = inside & (char >= 48) & (char <= 57)
+
+        valid &= ~inside | sign | dot | digit
+        mantissa = np.where(digit, mantissa * 10 + char - 48, mantissa)
+        decimals += digit & point
+        point |= dot
+        negative |= sign & (char == 45)
+
+    return np.where(negative, -mantissa, mantissa), decimals, valid
+
+
+def _fix_column(buf, start, end, present, dtype):
+    # typed column, missing values are None for strings and NaN for numbers
+
+    present = present & (end > start)
+    start, end = np.where(present, start, 0), np.where(present, end, 0)
+
+    if dtype is str:
+        column = _fix_strings(buf, start, end).astype(str).astype(object)
+        column[~present] = None
+        return column
+
+    mantissa, decimals, valid = _fix_numbers(buf, start, end)
+
+    if dtype is int and (present & valid & (decimals == 0)).all():
+        return mantissa
+
+    return np.where(present & valid, mantissa / 10.0 ** decimals, np.nan)
+
+
+def _first(index):
+    # the first of every run of a sorted index
+
+    return np.concatenate([[True], index[1:] != index[:-1]])[0:index.size]
+
+
+def _fix_table(data, header, entries=None, group=268, contains=None, where=None,
+               chunk_size=2 ** 26):
+    """
+    Tokenizing FIX tag=value messages into columns.
+
+    Every message is split on SOH once and only the requested tags are kept.
+    The entries of the repeating group are found by the count tag (e.g.,
+    NoMDEntries) and the tag following it, which starts every entry.
+
+    Parameters
+    ----------
+    data : str or pandas Series
+        The path of a FIX file (one message per line), or FIX messages.
+    header : dict
+        {tag: (column, dtype)} of the message tags, dtype is str, int or
+        float. The first occurrence in the message is taken.
+    entries : dict, optional
+        {tag: (column, dtype)} of the tags of the repeating group entries.
+        If None, one row per message. The default is None.
+    group : int, optional
+        The count tag of the repeating group. The default is 268.
+    contains : list, optional
+        Only messages including any of these strings, e.g., ['\\x0135=d'],
+        are tokenized. The default is None.
+    where : dict, optional
+        {tag: values} of the header or entry tags, only the rows with these
+        values (of at most 8 characters) are kept, e.g., {269: ['0', '1']}.
+        The default is None.
+    chunk_size : int, optional
+        The number of bytes tokenized at a time. The default is 2 ** 26.
+
+    Returns
+    -------
+    pandas DataFrame
+        One row per entry (or message) with the header columns followed by
+        the entry columns, indexed by record (message) and match (entry).
+
+    """
+
+    entries = entries or {}
+    where = where or {}
+    names = [x for x, _ in chain(header.values(), entries.values())]
+    tables = []
+    offset = 0
+
+    for buf in _fix_buffers(data, chunk_size):
+
+        if contains is not None:
+            buf = _fix_lines(buf, contains)
+
+            if buf.size == 0:
+                continue
+
+        words = _fix_words(buf)
+        record, tag, start, end = _fix_fields(buf, words)
+        n = int(record[-1]) + 1
+
+        keys = {x: _fix_key(f'{x}=') for x in chain(header, entries, where)}
+        wanted = list(keys.values())
+
+        if len(entries) > 0:
+            # the group count and the tag starting the entries of every message
+
+            counts = np.flatnonzero(tag == _fix_key(f'{group}='))
+            counts = counts[_first(record[counts])]
+            u = record[counts]
+
+            mantissa, decimals, valid = _fix_numbers(buf, start[counts], end[counts])
+            number = np.zeros(n, dtype=np.int64)
+            number[u] = np.where(valid & (decimals == 0), mantissa, 0)
+
+            group_field = np.full(n, tag.size, dtype=np.int64)
+            group_field[u] = counts
+
+            delimiter = np.zeros(n, dtype=np.uint64)
+            delimiter[u] = tag[np.minimum(counts + 1, tag.size - 1)]
+
+            wanted = wanted + [x for x in np.unique(delimiter[u]) if x > 0]
+
+        # only the requested tags and the tags starting the entries
+
+        field = np.flatnonzero(np.isin(tag, wanted))
+        record, tag, start, end = record[field], tag[field], start[field], end[field]
+
+        if len(entries) == 0:
+            rows = np.full(tag.size, -1, dtype=np.int64)
+            row_record = record[_first(record)]
+            row_match = np.zeros(row_record.size, dtype=np.int64)
+
+        else:
+            after = field > group_field[record]
+            begins = after & (tag == delimiter[record])
+
+            cum = np.cumsum(begins)
+            match = cum - np.concatenate([[0], cum])[np.searchsorted(field, group_field)][record] - 1
+            kept = after & (match >= 0) & (match < number[record])
+
+            starts = begins & kept
+            rows = np.where(kept, np.cumsum(starts) - 1, -1)
+            row_record, row_match = record[starts], match[starts]
+
+        # only the rows with the given values
+
+        for x, values in where.items():
+
+            fields = np.flatnonzero((tag == keys[x]) & ((rows >= 0) | (x not in entries)))
+            width = end[fields] - start[fields]
+            value = np.where(width <= 8, words[start[fields]] & _FIX_MASKS[np.clip(width, 0, 8)], 0)
+            fields = fields[np.isin(value, [_fix_key(y) for y in values]) & (width > 0)]
+
+            if x in entries:
+                keep = np.zeros(row_record.size, dtype=bool)
+                keep[rows[fields]] = True
+            else:
+                keep = np.zeros(n, dtype=bool)
+                keep[record[fields]] = True
+                keep = keep[row_record]
+
+            index = np.concatenate([np.where(keep, np.cumsum(keep) - 1, -1), [-1]])
+            rows = index[rows]
+            row_record, row_match = row_record[keep], row_match[keep]
+
+        # the header columns of every message, repeated for its entries
+
+        columns = {}
+        first = _first(row_record)
+        inverse = np.cumsum(first) - 1
+
+        for x, (name, dtype) in header.items():
+
+            fields = np.flatnonzero(tag == keys[x])
+            fields = fields[_first(record[fields])]
+
+            at = np.full(n, -1, dtype=np.int64)
+            at[record[fields]] = fields
+            at = at[row_record[first]]
+
+            columns[name] = _fix_column(buf, start[at], end[at], at >= 0, dtype)[inverse]
+
+        for x, (name, dtype) in entries.items():
+
+            fields = np.flatnonzero((tag == keys[x]) & (rows >= 0))
+            fields = fields[_first(rows[fields])]
+
+            at = np.full(row_record.size, -1, dtype=np.int64)
+            at[rows[fields]] = fields
+
+            columns[name] = _fix_column(buf, start[at], end[at], at >= 0, dtype)
+
+        tables.append(pd.DataFrame(columns, columns=names, index=pd.MultiIndex.from_arrays(
+            [row_record + offset, row_match], names=['record', 'match'])))
+
+        offset += n
+
+    if len(tables) == 0:
+        return pd.DataFrame(columns=names, index=pd.MultiIndex.from_arrays(
+            [[], []], names=['record', 'match']))
+
+    return pd.concat(tables)
+
+
+def _resample_book(book, grids, column, trading_tz):
+    # the last book at or before every grid point, for every security
+
+    book = book.reset_index(drop=True)
+    times = _ns(book[column])
+    seq = book['Seq'].to_numpy(dtype=np.float64) if 'Seq' in book.columns else \
+        np.zeros(book.shape[0])
+    seq = np.where(np.isnan(seq), -np.inf, seq)
+
+    if 'Code' in book.columns:
+        groups = pd.Series(np.arange(book.shape[0])).groupby(_as_str(book['Code']).values).indices
+    else:
+        groups = {None: np.arange(book.shape[0])}
+
+    results = {}
+
+    for x, grid in grids.items():
+
+        frames = []
+
+        for code, rows in groups.items():
+
+            rows = rows[np.lexsort((seq[rows], times[rows]))]
+            pos = np.searchsorted(times[rows], grid, side='right') - 1
+
+            # grid points before the first book are missing
+
+            frame = book.reindex(np.where(pos >= 0, rows[np.maximum(pos, 0)], -1)) \
+                .reset_index(drop=True)
+
+            if code is not None:
+                frame['Code'] = code
+
+            frame.insert(0, 'Time', pd.to_datetime(grid, utc=True).tz_convert(trading_tz))
+            frames.append(frame)
+
+        results[x] = pd.concat(frames, ignore_index=True)
+
+    return results
+
+
+def _group_fill(values, code, backward=False):
+    # fill missing values from the previous (or next) value of the same security
+
+    values = pd.Series(values)
+    groups = values.groupby(code) if code is not None else values.groupby(np.zeros(values.shape[0]))
+
+    return (groups.bfill() if backward else groups.ffill()).to_numpy()
+
+
+def _codes(data):
+
+    return data['Code'].to_numpy() if 'Code' in data.columns else None
+
+
+def _tick_test(data):
+    # 1 (buy) after an uptick, 2 (sell) after a downtick, zero ticks take the last nonzero tick
+
+    px = data['PX'].to_numpy(dtype=np.float64)
+    code = _codes(data)
+
+    change = pd.Series(px).groupby(code).diff().to_numpy() if code is not None else \
+        np.concatenate([[np.nan], np.diff(px)])
+
+    side = np.where(change > 0, 1.0, np.where(change < 0, 2.0, np.nan))
+
+    return np.nan_to_num(_group_fill(side, code)).astype(int)
+
+
+def _propagate_sides(data):
+    # unsigned trades (agg 0) take the side of the next signed trade of the same security
+
+    agg = data['agg'].to_numpy(dtype=np.float64)
+    side = _group_fill(np.where(agg == 0, np.nan, agg), _codes(data), backward=True)
+
+    return np.nan_to_num(side).astype(int)
+
+
 class orderbook:
 
     @staticmethod
@@ -2309,7 +1896,220 @@ class orderbook:
 
         return book
 
-    def tbbo(book, trades, merge_method, assign_trades=False):
+    @staticmethod
+    def resample_grid(book, freq, resample_start, resample_end, trading_tz='America/Chicago',
+                      transact_time=True, name='LOB_conso', save_file_path=None):
+        """
+        Resampling limit order books of many securities at several frequencies
+
+        Timestamps are kept as int64 nanoseconds, and the book at every grid
+        point is the last book at or before it (`searchsorted` on the sorted
+        times of every security), so updates before the start are carried
+        into the first grid points.
+
+        Parameters
+        ----------
+        book : pandas DataFrame, dict or str
+            Books with a Code column, books keyed by security (e.g., from
+            `quotes.order_book`), or a directory of books saved by
+            `quotes.order_book(..., save_file_path=...)`, which are read and
+            resampled one file at a time.
+        freq : str or list
+            One or several frequencies, e.g., '100ms', '1s' or '5min'.
+        resample_start : string
+            The first grid point in format "YYYY-MM-DD HH:MM:SS" in trading_tz.
+        resample_end : string
+            The last grid point in format "YYYY-MM-DD HH:MM:SS" in trading_tz.
+        trading_tz : string, optional
+            The timezone of the grid. The default is 'America/Chicago'.
+        transact_time : bool, optional
+            Whether to use the TransactTime, otherwise the SendingTime.
+            The default is True.
+        name : str, optional
+            The books to read from a directory, e.g., 'LOB_conso',
+            'LOB_outright' or 'LOB_implied'. The default is 'LOB_conso'.
+        save_file_path : str, optional
+            Directory where the resampled books of every file are saved as
+            {freq}/{file name} instead of being returned. The default is None.
+
+        Returns
+        -------
+        dict
+            Resampled books of all securities keyed by frequency, with the
+            grid point in the Time column, or the saved file paths.
+
+        """
+
+        freqs = [freq] if isinstance(freq, str) else list(freq)
+
+        start = pd.Timestamp(resample_start)
+        end = pd.Timestamp(resample_end)
+        start = start.tz_localize(trading_tz) if start.tzinfo is None else start
+        end = end.tz_localize(trading_tz) if end.tzinfo is None else end
+
+        grids = {x: np.arange(start.value, end.value + 1, pd.Timedelta(x).value, dtype=np.int64)
+                 for x in freqs}
+
+        column = 'TransactTime' if transact_time else 'SendingTime'
+
+        if isinstance(book, str):
+            files = sorted(glob.glob(os.path.join(book, f'{name}_*.parquet')))
+
+            if len(files) == 0:
+                raise Exception(f'Cannot find {name} books in {book}')
+
+            parts = ((os.path.basename(x), pd.read_parquet(x)) for x in files)
+
+        elif isinstance(book, dict):
+            parts = ((f'{name}_{code}.parquet', x[name] if isinstance(x, dict) else x)
+                     for code, x in book.items())
+
+        else:
+            parts = [(f'{name}.parquet', book)]
+
+        results = {x: [] for x in freqs}
+
+        for file, part in parts:
+
+            if part is None or part.shape[0] == 0:
+                continue
+
+            resampled = _resample_book(part, grids, column, trading_tz)
+
+            for x in freqs:
+
+                if save_file_path is None:
+                    results[x].append(resampled[x])
+                    continue
+
+                os.makedirs(os.path.join(save_file_path, x), exist_ok=True)
+                results[x].append(os.path.join(save_file_path, x, file))
+                resampled[x].to_parquet(results[x][-1])
+
+        if save_file_path is not None:
+            return results
+
+        return {x: pd.concat(results[x], ignore_index=True) if len(results[x]) > 0 else None
+                for x in freqs}
+
+    @staticmethod
+    def classify_trades(trades, method='tick'):
+        """
+        Classifying trades without the aggressor side in one vectorized pass
+
+        Trades with an aggressor side from the CME (agg 1 buy, 2 sell) are
+        kept, and the others are classified by
+
+        - 'tick': the tick test, buys after upticks and sells after
+          downticks, zero ticks take the last nonzero tick of the security.
+        - 'quote': Lee and Ready (1991), buys above and sells below the
+          midquote, the tick test at the midquote.
+        - 'emo': Ellis, Michaely and O'Hara (2000), buys at the ask and
+          sells at the bid, the tick test otherwise.
+
+        Parameters
+        ----------
+        trades : pandas DataFrame
+            Trades in chronological order with PX (and Code for many
+            securities), and Bid_PX_1 and Ask_PX_1 for 'quote' and 'emo',
+            e.g., from `tbbo`.
+        method : str, optional
+            'tick', 'quote' or 'emo'. The default is 'tick'.
+
+        Returns
+        -------
+        numpy array
+            The aggressor side of every trade, 0 if it cannot be classified.
+
+        """
+
+        if method not in ['tick', 'quote', 'emo']:
+            raise Exception('Trades are classified by either tick, quote, or emo')
+
+        tick = _tick_test(trades)
+
+        if method == 'tick':
+            side = tick
+
+        else:
+            px = trades['PX'].to_numpy(dtype=np.float64)
+            bid = trades['Bid_PX_1'].to_numpy(dtype=np.float64)
+            ask = trades['Ask_PX_1'].to_numpy(dtype=np.float64)
+
+            if method == 'quote':
+                mid = (bid + ask) / 2
+                side = np.where(px > mid, 1, np.where(px < mid, 2, tick))
+            else:
+                side = np.where(px == ask, 1, np.where(px == bid, 2, tick))
+
+        if 'agg' not in trades.columns:
+            return side
+
+        agg = trades['agg'].fillna(0).to_numpy().astype(int)
+
+        return np.where(agg == 0, side, agg)
+
+    @staticmethod
+    def bulk_volume(trades, freq='1min', window=None, trading_tz='America/Chicago'):
+        """
+        Bulk volume classification (Easley, Lopez de Prado and O'Hara, 2012)
+
+        Trades are aggregated into time bars of every security, and the buy
+        volume of a bar is its volume times the standard normal probability
+        of the price change of the bar over the standard deviation of the
+        price changes.
+
+        Parameters
+        ----------
+        trades : pandas DataFrame
+            Trades with TransactTime, PX and Size (and Code for many securities).
+        freq : str, optional
+            The bar length, e.g., '1s' or '1min'. The default is '1min'.
+        window : int, optional
+            The number of bars of the rolling standard deviation. If None, the
+            standard deviation of all bars of the security. The default is None.
+        trading_tz : string, optional
+            The timezone of the bar times. The default is 'America/Chicago'.
+
+        Returns
+        -------
+        bars : pandas DataFrame
+            Code, Time (bar start), PX (last price), Volume, BuyVolume and
+            SellVolume of every bar with trades.
+
+        """
+
+        time = _ns(trades['TransactTime'])
+        step = pd.Timedelta(freq).value
+        code = _as_str(trades['Code']).values if 'Code' in trades.columns else \
+            np.zeros(trades.shape[0], dtype=object)
+
+        bars = pd.DataFrame({'Code': code, 'Time': time - time % step,
+                             'PX': trades['PX'].to_numpy(dtype=np.float64),
+                             'Volume': trades['Size'].to_numpy(dtype=np.float64)})
+
+        bars = bars.groupby(['Code', 'Time'], sort=True).agg(
+            PX=('PX', 'last'), Volume=('Volume', 'sum')).reset_index()
+
+        change = bars.groupby('Code')['PX'].diff()
+
+        if window is None:
+            sigma = change.groupby(bars['Code']).transform('std')
+        else:
+            sigma = change.groupby(bars['Code']).transform(
+                lambda x: x.rolling(window, min_periods=2).std())
+
+        z = (change / sigma.where(sigma > 0)).to_numpy(dtype=np.float64)
+        probability = 0.5 * (1 + np.frompyfunc(erf, 1, 1)(z / sqrt(2)).astype(np.float64))
+        probability = np.where(np.isnan(probability), 0.5, probability)
+
+        bars['BuyVolume'] = bars['Volume'] * probability
+        bars['SellVolume'] = bars['Volume'] - bars['BuyVolume']
+        bars['Time'] = pd.to_datetime(bars['Time'], utc=True).dt.tz_convert(trading_tz)
+
+        return bars
+
+    def tbbo(book, trades, merge_method, assign_trades=False, level=1, post_trade=False):
         """
         Generating the TBBO data from the book and trade summary.
 
@@ -2322,8 +2122,16 @@ class orderbook:
         merge_method : str
             Either by 'Seq_number' or by 'TransactTime', which are squence number
              and transact timestamp, respectively.
-        assign_trades : bool, optional
-            Whether to assign trades by Lee and Ready (1991). The default is False.
+        assign_trades : bool or str, optional
+            Whether to assign trades without the aggressor side by Lee and
+            Ready (1991), or the classifier of `classify_trades`, e.g.,
+            'tick' or 'emo'. The default is False.
+        level : int, optional
+            The number of book depths at the trade. The default is 1.
+        post_trade : bool, optional
+            Whether to add the book at the end of the match event of the
+            trade (the last book at its TransactTime) as Post_ columns.
+            The default is False.
 
         Returns
         -------
@@ -2333,7 +2141,8 @@ class orderbook:
         """
 
         if isinstance(trades, pd.DataFrame) and isinstance(book, pd.DataFrame):
-            if any(date not in book['Date'].astype(str).unique() for date in trades['Date'].unique()):
+            dates = pd.unique(trades['Date'].astype(str))
+            if not np.isin(dates, pd.unique(book['Date'].astype(str))).all():
                 raise Exception(
                     'Trading dates of book and trades need to be the same')
 
@@ -2345,45 +2154,57 @@ class orderbook:
             raise Exception(
                 'Merge should be based on either Seq_number, TransactTime, or SendingTime')
 
-        if merge_method == 'Seq_number':
+        columns = [f'{x}_{y}_{i}' for i in range(1, level + 1)
+                   for x in ['Bid', 'Ask'] for y in ['PX', 'Qty', 'Ord']]
+        columns = [x for x in columns if x in book.columns]
 
-            # find the BBO immediately before the trade happens
-            tbbo = book[['Seq', 'Bid_PX_1', 'Bid_Qty_1',
-                         'Bid_Ord_1', 'Ask_PX_1', 'Ask_Qty_1', 'Ask_Ord_1']]
-            tbbo['Seq'] = tbbo['Seq'].astype(int)
-            tbbo = pd.merge_asof(trades, tbbo, on='Seq')
+        # books and trades of many securities are matched by security on int64
+        # codes, a single security is matched on the keys only
 
-        elif merge_method == "TransactTime":
-            tbbo = book[['TransactTime', 'Bid_PX_1', 'Bid_Qty_1',
-                         'Bid_Ord_1', 'Ask_PX_1', 'Ask_Qty_1', 'Ask_Ord_1']]
+        by = None
 
-            if not isinstance(trades['TransactTime'], datetime):
+        if 'Code' in book.columns and 'Code' in trades.columns:
+            book_code, trade_code = _security_codes(book['Code'], trades['Code'])
 
-                trades['TransactTime'] = pd.to_datetime(trades['TransactTime'], format='%Y%m%d%H%M%S%f',
-                                                        utc=True)
-                trades['TransactTime'] = trades['TransactTime'].dt.tz_convert(
-                    'America/Chicago')
+            if book_code is not None:
+                by = '_Code'
 
-            tbbo = pd.merge_asof(trades, tbbo, on='TransactTime')
+        def keys(data, column, code):
 
-        elif merge_method == "SendingTime":
-            tbbo = book[['SendingTime', 'Bid_PX_1', 'Bid_Qty_1',
-                         'Bid_Ord_1', 'Ask_PX_1', 'Ask_Qty_1', 'Ask_Ord_1']]
+            key = data[column].to_numpy(dtype=np.float64).astype(np.int64) \
+                if column == 'Seq' else _ns(data[column])
+            keys = {'_Key': key}
 
-            if not isinstance(trades['SendingTime'], datetime):
+            if by is not None:
+                keys[by] = code
 
-                trades['SendingTime'] = pd.to_datetime(trades['SendingTime'], format='%Y%m%d%H%M%S%f',
-                                                       utc=True)
-                trades['SendingTime'] = trades['SendingTime'].dt.tz_convert(
-                    'America/Chicago')
+            return keys
 
-            tbbo = pd.merge_asof(trades, tbbo, on='SendingTime')
+        column = 'Seq' if merge_method == 'Seq_number' else merge_method
 
-        else:
-            raise Exception(
-                'Merge between trades and quotes should be either TransactTime, Seq, or SendingTime')
+        # find the book immediately before the trade happens
+
+        left = trades.assign(**keys(trades, column, trade_code if by else None))
+        right = book[columns].assign(**keys(book, column, book_code if by else None))
+
+        if column == 'Seq' and book['Seq'].hasnans:
+            right = right.loc[book['Seq'].notna().to_numpy()]
 
-        if assign_trades == True:
+        tbbo = pd.merge_asof(_sorted(left), _sorted(right), on='_Key', by=by)
+
+        if post_trade:
+
+            # the book after the last update at the time of the trade
+
+            left = tbbo.assign(_Key=_ns(tbbo['TransactTime']))
+            right = book[columns].add_prefix('Post_').assign(
+                **keys(book, 'TransactTime', book_code if by else None))
+
+            tbbo = pd.merge_asof(_sorted(left), _sorted(right), on='_Key', by=by)
+
+        tbbo = tbbo.drop(columns=[x for x in ['_Key', by] if x is not None]).reset_index(drop=True)
+
+        if assign_trades:
 
             if 0 not in tbbo['agg'].unique():
                 raise Exception(
@@ -2392,21 +2213,11 @@ class orderbook:
             tbbo.sort_values('Seq', na_position='first', inplace=True)
             tbbo = tbbo.dropna()
 
-            tbbo.loc[tbbo['agg'] == 0, 'agg'] = np.where(
-                tbbo.loc[tbbo['agg'] == 0, 'PX'] > (
-                    tbbo.loc[tbbo['agg'] == 0, 'Bid_PX_1']+tbbo.loc[tbbo['agg'] == 0, 'Ask_PX_1'])/2, 1,
-                np.where(tbbo.loc[tbbo['agg'] == 0, 'PX'] < (
-                    tbbo.loc[tbbo['agg'] == 0, 'Bid_PX_1']+tbbo.loc[tbbo['agg'] == 0, 'Ask_PX_1'])/2, 2, 0))
+            method = 'quote' if assign_trades == True else assign_trades
+            tbbo['agg'] = orderbook.classify_trades(tbbo, method)
 
-        while True:
-
-            if 0 in tbbo.loc[tbbo['agg'] == 0, 'agg'].index:
-                break
+        # trades still without a side take the side of the next signed trade
 
-            tbbo['agg'] = np.where((tbbo['agg'] == 0) & 1 == (
-                tbbo['agg'].shift(-1)), 1, np.where((tbbo['agg'] == 0) & 2 == (tbbo['agg'].shift(-1)), 2, 0))
-
-            if tbbo.loc[tbbo['agg'] == 0, 'agg'].count() == 0:
-                break
+        tbbo['agg'] = _propagate_sides(tbbo)
 
         return tbbo
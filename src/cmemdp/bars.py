@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming OHLCV and VWAP bars from trade summary messages
+
+Trade summary records (templates 42, 48 and 65) are consumed batch by batch,
+e.g., parsed parquet chunks or the chunks of a running parser. Only the open
+bar and the running volume of every security are kept between batches, and
+completed bars are flushed to parquet files, so memory is bounded by the
+number of instruments rather than the number of trades.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from pandas import notnull
+from .parquet_files import parsed_files, security_filter
+
+# bar kinds and the running measure that closes the bars
+
+BAR_KINDS = {'time': None, 'volume': 'Qty', 'tick': 'Trades', 'dollar': 'Dollar'}
+
+TRADE_TEMPLATES = {42: 'MDIncrementalRefreshTradeSummary42',
+                   48: 'MDIncrementalRefreshTradeSummary48',
+                   65: 'MDIncrementalRefreshTradeSummaryLongQty65'}
+
+SUMS = ['Volume', 'Dollar', 'Trades', 'BuyVolume', 'SellVolume']
+
+
+def _trade_entries(data, last_seq):
+    # one row per trade entry, entries already seen (RptSeq increases for
+    # every instrument) are dropped
+
+    if data.shape[0] == 0 or 'SecurityID' not in data.columns:
+        return None
+
+    data = data.loc[data['SecurityID'].notna()]
+
+    action = pd.to_numeric(data['MDUpdateAction'], errors='coerce') \
+        if 'MDUpdateAction' in data.columns else pd.Series(0, index=data.index)
+    data = data.loc[~(action > 0)].drop_duplicates(['SecurityID', 'RptSeq'])
+
+    security = data['SecurityID'].to_numpy(dtype=np.int64)
+    seq = data['RptSeq'].to_numpy(dtype=np.float64)
+    data = data.loc[seq > pd.Series(security).map(last_seq).fillna(-1).to_numpy()]
+
+    if data.shape[0] == 0:
+        return None
+
+    px = data['MDEntryPx'].to_numpy(dtype=np.float64) * 1e-9
+    qty = data['MDEntrySize'].to_numpy(dtype=np.float64)
+    side = data['AggressorSide'].to_numpy(dtype=np.float64, na_value=0) \
+        if 'AggressorSide' in data.columns else np.zeros(data.shape[0])
+
+    return pd.DataFrame({'SecurityID': data['SecurityID'].to_numpy(dtype=np.int64),
+                         'RptSeq': data['RptSeq'].to_numpy(dtype=np.int64),
+                         'TransactTime': data['TransactTime'].to_numpy(dtype=np.int64),
+                         'PX': px,
+                         'Qty': qty,
+                         'Dollar': px * qty,
+                         'Trades': 1,
+                         'BuyVolume': np.where(side == 1, qty, 0),
+                         'SellVolume': np.where(side == 2, qty, 0)})
+
+
+class bar_builder:
+    """
+    Streaming bar builder for trade summary messages.
+
+    Bars of every kind are kept for every SecurityID:
+
+    - 'time': bars of a fixed length, e.g., '1min', starting at multiples of it.
+    - 'volume', 'tick' and 'dollar': bars closing every time the running
+      volume, number of trades or traded value (price times quantity) of
+      the security passes a multiple of the bar size. The trade that passes
+      it closes the bar and is not split.
+
+    Parameters
+    ----------
+    bars : dict
+        Bar sizes keyed by kind, e.g., {'time': '1min', 'volume': 1000}.
+    save_file_path : str, optional
+        Directory of the completed bars, saved as bars_{kind}_{n}.parquet.
+        If None, completed bars are kept in memory. The default is None.
+    chunk_size : int, optional
+        The number of completed bars of a kind written to one file.
+        The default is 100000.
+
+    """
+
+    def __init__(self, bars, save_file_path=None, chunk_size=100000):
+
+        if any(x not in BAR_KINDS for x in bars):
+            raise Exception(
+                'Bars should be either time, volume, tick, or dollar bars')
+
+        self.bars = dict(bars)
+        self.size = {x: pd.Timedelta(y).value if x == 'time' else float(y)
+                     for x, y in self.bars.items()}
+        self.save_file_path = save_file_path
+        self.chunk_size = chunk_size
+
+        self.open = {x: None for x in self.bars}
+        self.running = {x: pd.Series(dtype=np.float64) for x in self.bars}
+        self.done = {x: [] for x in self.bars}
+        self.chunk_index = {x: 1 for x in self.bars}
+        self.files = {x: [] for x in self.bars}
+        self.last_seq = pd.Series(dtype=np.float64)
+        self.watermark = None
+
+        if notnull(save_file_path):
+            os.makedirs(save_file_path, exist_ok=True)
+
+    def update(self, data):
+        """
+        Adding a batch of trade summary records in their original order,
+        with the native columns of templates 42, 48 or 65.
+        """
+
+        trades = _trade_entries(data, self.last_seq)
+
+        if trades is None:
+            return
+
+        last = trades.groupby('SecurityID')['RptSeq'].max()
+        self.last_seq = last.combine_first(self.last_seq)
+
+        time = trades['TransactTime'].max()
+        self.watermark = time if self.watermark is None else max(self.watermark, time)
+
+        for kind in self.bars:
+            self._update(kind, trades)
+
+    def _update(self, kind, trades):
+
+        size = self.size[kind]
+        security = trades['SecurityID']
+
+        if kind == 'time':
+            bar = trades['TransactTime'] - trades['TransactTime'] % size
+
+        else:
+            measure = trades[BAR_KINDS[kind]].astype(np.float64)
+            running = security.map(self.running[kind]).fillna(0) + \
+                measure.groupby(security).cumsum()
+            bar = np.floor((running - measure) / size).astype(np.int64)
+
+            last = running.groupby(security).last()
+            self.running[kind] = last.combine_first(self.running[kind])
+
+        bars = trades.assign(Bar=bar).groupby(['SecurityID', 'Bar'], sort=False).agg(
+            Start=('TransactTime', 'first'), End=('TransactTime', 'last'),
+            Open=('PX', 'first'), High=('PX', 'max'), Low=('PX', 'min'), Close=('PX', 'last'),
+            Volume=('Qty', 'sum'), Dollar=('Dollar', 'sum'), Trades=('Trades', 'sum'),
+            BuyVolume=('BuyVolume', 'sum'), SellVolume=('SellVolume', 'sum')).reset_index()
+
+        # the open bars continue with the trades of this batch
+
+        if self.open[kind] is not None:
+            bars = pd.concat([self.open[kind], bars], ignore_index=True)
+            bars = bars.groupby(['SecurityID', 'Bar'], sort=False).agg(
+                Start=('Start', 'min'), End=('End', 'max'), Open=('Open', 'first'),
+                High=('High', 'max'), Low=('Low', 'min'), Close=('Close', 'last'),
+                **{x: (x, 'sum') for x in SUMS}).reset_index()
+
+        bars = bars.sort_values(['SecurityID', 'Bar'], kind='stable').reset_index(drop=True)
+
+        # the last bar of every security stays open, time bars close once the
+        # stream passes their end
+
+        is_open = ~bars['SecurityID'].duplicated(keep='last')
+
+        if kind == 'time':
+            is_open &= bars['Bar'] + size > self.watermark
+
+        self.open[kind] = bars.loc[is_open].reset_index(drop=True)
+        self._emit(kind, bars.loc[~is_open])
+
+    def _emit(self, kind, bars):
+
+        if bars.shape[0] == 0:
+            return
+
+        self.done[kind].append(bars)
+
+        if notnull(self.save_file_path) and sum(x.shape[0] for x in self.done[kind]) >= self.chunk_size:
+            self._flush(kind)
+
+    def _flush(self, kind):
+
+        if len(self.done[kind]) == 0:
+            return
+
+        bars = _bar_table(pd.concat(self.done[kind], ignore_index=True))
+        file = os.path.join(self.save_file_path,
+                            f'bars_{kind}_{self.chunk_index[kind]}.parquet')
+
+        bars.to_parquet(file)
+
+        self.files[kind].append(file)
+        self.chunk_index[kind] += 1
+        self.done[kind] = []
+
+    def update_parquet(self, save_file_path, security=None):
+        """
+        Adding the parsed trade summary files of a directory, one chunk at a time.
+        """
+
+        for name in TRADE_TEMPLATES.values():
+            for file in parsed_files(save_file_path, name):
+                self.update(pd.read_parquet(
+                    file, filters=security_filter(security)))
+
+    def close(self):
+        """
+        Completing the open bars.
+
+        Returns
+        -------
+        dict
+            Bars keyed by kind, or the saved file paths.
+
+        """
+
+        for kind in self.bars:
+
+            if self.open[kind] is not None:
+                self._emit(kind, self.open[kind])
+                self.open[kind] = None
+
+            if notnull(self.save_file_path):
+                self._flush(kind)
+
+        if notnull(self.save_file_path):
+            return self.files
+
+        return {kind: _bar_table(pd.concat(self.done[kind], ignore_index=True))
+                if len(self.done[kind]) > 0 else None for kind in self.bars}
+
+
+def _bar_table(bars):
+    # completed bars in time order with the VWAP
+
+    bars = bars.sort_values(['End', 'SecurityID'], kind='stable').reset_index(drop=True)
+    bars['VWAP'] = bars['Dollar'] / bars['Volume'].where(bars['Volume'] > 0)
+
+    return bars[['SecurityID', 'Bar', 'Start', 'End', 'Open', 'High', 'Low', 'Close',
+                 'Volume', 'VWAP', 'Dollar', 'Trades', 'BuyVolume', 'SellVolume']]
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Batch parsing of many CME capture files
+
+Files are parsed in a process pool, each into its own output directory.
+Completed files are recorded in a manifest so that reruns skip them.
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from pandas import isnull
+from tabulate import tabulate
+from .cme_parser import cme_parser_datamine, cme_parser_pcap
+
+
+PARSERS = {'datamine': cme_parser_datamine, 'pcap': cme_parser_pcap}
+
+
+def read_manifest(manifest_path):
+    """
+    Read the manifest of parsed files.
+
+    Parameters
+    ----------
+    manifest_path : str
+        The path of the manifest, one JSON record per line.
+
+    Returns
+    -------
+    manifest : dict
+        The latest record of every file, keyed by the file path.
+
+    """
+
+    manifest = {}
+
+    if not os.path.exists(manifest_path):
+        return manifest
+
+    with open(manifest_path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                manifest[record['path']] = record
+
+    return manifest
+
+
+def _finished(record, path):
+    # the file must be unchanged since it was parsed
+
+    return (record is not None and record['status'] == 'finished'
+            and record['size'] == os.path.getsize(path)
+            and record['mtime'] == os.path.getmtime(path))
+
+
+def _output_path(save_file_path, path):
+    # files with the same name in different directories must not share outputs,
+    # the hash of the full path keeps the directory stable across reruns
+
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+
+    return os.path.join(save_file_path, f'{os.path.basename(path)}_{key}')
+
+
+def _parse_file(path, output_path, parser, parser_kwargs):
+
+    os.makedirs(output_path, exist_ok=True)
+
+    # the run report of every file is kept next to its outputs
+
+    parser_kwargs = {'report_path': os.path.join(output_path, 'run_report.json')} | parser_kwargs
+
+    start = time.perf_counter()
+    PARSERS[parser](path, save_file_path=output_path, **parser_kwargs)
+    seconds = time.perf_counter() - start
+
+    return seconds
+
+
+def batch_parser(paths, save_file_path, parser='datamine', workers=None,
+                 manifest_path=None, **parser_kwargs):
+    """
+    Parse many capture files in parallel.
+
+    Every file is parsed into save_file_path/<file name>_<hash>, where the
+    hash is taken from the full file path. Files recorded as
+    finished in the manifest are skipped unless they changed afterwards.
+
+    Parameters
+    ----------
+    paths : str or list
+        A glob pattern or a list of file paths.
+    save_file_path : str
+        The root directory of the outputs.
+    parser : str, optional
+        Either 'datamine' (`cme_parser_datamine`) or 'pcap' (`cme_parser_pcap`).
+        The default is 'datamine'.
+    workers : int, optional
+        The number of processes. If None, the number of CPUs is used.
+        The default is None.
+    manifest_path : str, optional
+        The path of the manifest. The default is save_file_path/manifest.jsonl.
+    **parser_kwargs
+        Other arguments of the parser, e.g., chunk_size, max_read_packets,
+        security_master_path, normalize_prices or profile_sample. The run
+        report of every file is saved as run_report.json in its directory.
+
+    Returns
+    -------
+    report : pandas DataFrame
+        Status, time and throughput of every file.
+
+    """
+
+    if parser not in PARSERS:
+        raise Exception('Parser should be either datamine or pcap')
+
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths))
+
+    if len(paths) == 0:
+        raise Exception('No files to parse')
+
+    os.makedirs(save_file_path, exist_ok=True)
+
+    if isnull(manifest_path):
+        manifest_path = os.path.join(save_file_path, 'manifest.jsonl')
+
+    manifest = read_manifest(manifest_path)
+
+    parser_kwargs['disable_progress_bar'] = True
+
+    report = []
+    jobs = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(manifest_path, 'a') as f:
+
+        for path in paths:
+
+            if _finished(manifest.get(path), path):
+                report.append(manifest[path] | {'status': 'skipped'})
+                continue
+
+            output_path = _output_path(save_file_path, path)
+
+            jobs[pool.submit(_parse_file, path, output_path,
+                             parser, parser_kwargs)] = (path, output_path)
+
+        for job in as_completed(jobs):
+
+            path, output_path = jobs[job]
+            size = os.path.getsize(path)
+
+            record = {'path': path,
+                      'output': output_path,
+                      'size': size,
+                      'mtime': os.path.getmtime(path)}
+
+            try:
+                seconds = job.result()
+
+            except Exception as e:
+                record = record | {'status': 'failed', 'error': repr(e),
+                                   'seconds': None, 'MB/s': None}
+
+            else:
+                record = record | {'status': 'finished', 'seconds': seconds,
+                                   'MB/s': size / 1e6 / seconds if seconds > 0 else None}
+
+            # written as soon as a file is done, so an interrupted run keeps its progress
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+
+            report.append(record)
+
+    report = pd.DataFrame(report)
+
+    return report[[x for x in ['path', 'status', 'size', 'seconds', 'MB/s', 'output', 'error']
+                   if x in report.columns]]
+
+
+def main(argv=None):
+    """
+    Console entry point, e.g.,
+    cmemdp-batch "R:/_RawData/PCAP/*_e" R:/_RawData/Parsed --workers 8
+    """
+
+    arg = argparse.ArgumentParser(
+        description='Parse many CME capture files in parallel')
+    arg.add_argument('paths', nargs='+',
+                     help='capture files or glob patterns')
+    arg.add_argument('save_file_path', help='root directory of the outputs')
+    arg.add_argument('--parser', default='datamine',
+                     choices=list(PARSERS))
+    arg.add_argument('--workers', type=int, default=None)
+    arg.add_argument('--manifest', default=None,
+                     help='manifest path, default <save_file_path>/manifest.jsonl')
+    arg.add_argument('--chunk-size', type=int, default=5000)
+    arg.add_argument('--max-read-packets', type=int, default=None)
+    arg.add_argument('--security-master', default=None,
+                     help='path of the security master store')
+    arg.add_argument('--normalize-prices', action='store_true')
+    arg.add_argument('--profile-sample', type=int, default=None,
+                     help='time one in every N decoder calls')
+    args = arg.parse_args(argv)
+
+    paths = []
+    for path in args.paths:
+        paths += sorted(glob.glob(path)) if any(x in path for x in '*?[') else [path]
+
+    report = batch_parser(paths, args.save_file_path, parser=args.parser,
+                          workers=args.workers, manifest_path=args.manifest,
+                          chunk_size=args.chunk_size,
+                          max_read_packets=args.max_read_packets,
+                          security_master_path=args.security_master,
+                          normalize_prices=args.normalize_prices,
+                          profile_sample=args.profile_sample)
+
+    print(tabulate(report, headers='keys', showindex=False))
+
+    return 0 if 'failed' not in report['status'].values else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmarks on synthetic data
+
+Every case runs in its own process so that the peak resident memory (RSS)
+of one case is not inherited by the next. The timed part of a case runs
+several times and the best run gives the throughput, with the spread of the
+runs kept next to it. Results can be saved as a JSON baseline, and later runs
+are compared against it to flag regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+import platform
+import tempfile
+import resource
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from .synthetic import capture_generator
+from .cme_parser import cme_parser_datamine, TEMPLATES, VERSIONED_TEMPLATES
+from .FIX_input import quotes, orderbook
+from .mbo_engine import mbo_book
+
+
+# event mix with implied quotes for the book benchmarks
+
+BOOK_EVENT_MIX = {'add': 0.4, 'modify': 0.15,
+                  'cancel': 0.25, 'trade': 0.1, 'implied': 0.1}
+
+# the number of events (decode, parse, order book) or rows (resample, tbbo),
+# and the least seconds of a timed run, which repeats its call until then.
+# Rates differ by 500x between cases, so a fixed size alone leaves the fast
+# cases timing a few milliseconds.
+# order books need about 50k events before the setup no longer dominates the rate
+
+SIZES = {'quick': {'min_seconds': 1.0, 'decode': 20000, 'parse': 20000, 'order_book': 50000,
+                   'bbo': 50000, 'mbo_book': 50000, 'mbo_replay': 200000, 'resample': 100000,
+                   'resample_grid': 100000, 'tbbo': 100000},
+         'full': {'min_seconds': 2.0, 'decode': 200000, 'parse': 500000, 'order_book': 500000,
+                  'bbo': 1000000, 'mbo_book': 1000000, 'mbo_replay': 1000000,
+                  'resample': 10000000, 'resample_grid': 10000000, 'tbbo': 10000000}}
+
+# the number of timed runs of every case, and the relative change allowed
+# before a regression is flagged. The best rates of three runs of the quick
+# scale on one (virtual) machine differ by a median of 34% between runs,
+# and a peak RSS by at most 4%
+
+REPEAT = 5
+
+TOLERANCE = 0.35
+
+CASES = ['decode_46', 'decode_47', 'decode_48', 'decode_52', 'decode_53', 'decode_54',
+         'parse_datamine', 'order_book_2', 'order_book_5', 'order_book_10',
+         'order_book_conso_10', 'bbo', 'mbo_book', 'mbo_replay', 'resample', 'resample_grid',
+         'tbbo']
+
+
+def _peak_rss():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+
+
+def _timings(run, repeat, min_seconds, inputs=None):
+    # calls and seconds of every run, a run calls run() until min_seconds,
+    # inputs() gives untimed fresh arguments to calls that change them
+
+    timings = []
+
+    for k in range(repeat):
+        calls, seconds = 0, 0.0
+
+        while seconds < min_seconds:
+            args = () if inputs is None else inputs()
+
+            start = time.perf_counter()
+            run(*args)
+            seconds += time.perf_counter() - start
+            calls += 1
+
+        timings.append((calls, seconds))
+
+    return timings
+
+
+def _result(n, timings, unit, amount=None):
+    # throughput of the best run, with the median and the spread of the runs
+
+    amount = n if amount is None else amount
+    rates = np.array([amount * calls / seconds for calls, seconds in timings])
+    best = rates.argmax()
+
+    return {'n': n, 'seconds': timings[best][1] / timings[best][0],
+            'calls': int(sum(calls for calls, seconds in timings)), 'repeat': len(timings),
+            'rate': float(rates[best]), 'median_rate': float(np.median(rates)),
+            'spread': float(rates[best] / rates.min() - 1), 'unit': unit}
+
+
+def _book_frame(n):
+    # a level 1 book and trades in the layout of `quotes.order_book`
+
+    rng = np.random.default_rng(0)
+
+    time_ns = pd.Timestamp('2025-04-20 22:00:00', tz='UTC').value + \
+        np.cumsum(rng.integers(1, 200000, n))
+    fix_time = pd.to_datetime(time_ns, unit='ns', utc=True).strftime('%Y%m%d%H%M%S%f') + \
+        pd.Series(time_ns % 1000).astype(str).str.zfill(3).values
+
+    bid = 5000 + np.cumsum(rng.integers(-1, 2, n)) * 0.25
+
+    book = pd.DataFrame({'Date': '20250420',
+                         'TransactTime': fix_time,
+                         'Seq': np.arange(n, dtype=float) * 2,
+                         'Code': 'SYN0000',
+                         'Bid_PX_1': bid,
+                         'Bid_Qty_1': rng.integers(1, 100, n).astype(float),
+                         'Bid_Ord_1': rng.integers(1, 10, n).astype(float),
+                         'Ask_PX_1': bid + 0.25,
+                         'Ask_Qty_1': rng.integers(1, 100, n).astype(float),
+                         'Ask_Ord_1': rng.integers(1, 10, n).astype(float),
+                         'SendingTime': fix_time,
+                         'MsgSeq': np.arange(n, dtype=float)})
+
+    # one trade in every ten book updates, half of them without the aggressor side
+
+    trades = book.iloc[::10][['Date', 'TransactTime', 'Code']].copy()
+    trades['Seq'] = np.arange(trades.shape[0]) * 20 + 1
+    trades['PX'] = np.where(rng.random(trades.shape[0]) < 0.5,
+                            book['Bid_PX_1'].values[::10], book['Ask_PX_1'].values[::10])
+    trades['Size'] = rng.integers(1, 20, trades.shape[0])
+    trades['agg'] = np.where(rng.random(trades.shape[0]) < 0.5,
+                             0, rng.integers(1, 3, trades.shape[0]))
+
+    return book, trades.reset_index(drop=True)
+
+
+def _decode(TemplateID, n, min_seconds, repeat):
+
+    # messages of one pass are repeated up to n
+
+    generator = capture_generator(templates=[46, 47, 48, 52, 53, 54],
+                                  snapshot_interval=100, n_instruments=5)
+    messages = []
+
+    for MsgSeq, SendingTime, packet in generator.packets(min(n, 20000)):
+        for message in packet:
+            if struct.unpack('<H', message[4:6])[0] == TemplateID:
+                messages.append(message)
+
+    messages = (messages * (n // len(messages) + 1))[0:n]
+    cme_packet = {'MsgSeq': 1, 'SendingTime': 1}
+    decoder = TEMPLATES[TemplateID]
+
+    def run():
+        for message in messages:
+            (MsgSize, BlockLength, TemplateID, SchemaID, Version) = struct.unpack(
+                '<HHHHH', message[0:10])
+
+            if TemplateID in VERSIONED_TEMPLATES:
+                decoder(message[10:], BlockLength, Version, cme_packet)
+            else:
+                decoder(message[10:], BlockLength, cme_packet)
+
+    return _result(len(messages), _timings(run, repeat, min_seconds), 'msgs/s')
+
+
+def _parse(n, min_seconds, repeat):
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        path = os.path.join(tmp, 'synthetic')
+        capture_generator(n_instruments=5).write_datamine(path, n)
+        size = os.path.getsize(path)
+
+        # every call writes into its own directory
+
+        def run(save_file_path):
+            cme_parser_datamine(path, save_file_path=save_file_path,
+                                disable_progress_bar=True, chunk_size=50000)
+
+        timings = _timings(run, repeat, min_seconds, lambda: (tempfile.mkdtemp(dir=tmp),))
+
+    return _result(size, timings, 'MB/s', size / 1e6)
+
+
+def _order_book(n, level, consolidate, min_seconds, repeat):
+
+    generator = capture_generator(templates=[46, 48], depth=level, seed=1,
+                                  event_mix=BOOK_EVENT_MIX if consolidate else None)
+    data, trades = generator.fix_frames(n)
+
+    def run():
+        quotes.order_book(data, 'SYN0000', level,
+                          consolidate=consolidate, disable_progress_bar=True)
+
+    return _result(data.shape[0], _timings(run, repeat, min_seconds), 'msgs/s')
+
+
+def _entries(TemplateID, n):
+    # entries of one template in the layout of the parsed messages
+
+    generator = capture_generator(templates=[TemplateID], n_instruments=5, seed=1,
+                                  event_mix=BOOK_EVENT_MIX)
+    entries = []
+
+    for MsgSeq, SendingTime, packet in generator.packets(n):
+        for message in packet:
+            (MsgSize, BlockLength, TemplateID, SchemaID, Version) = struct.unpack(
+                '<HHHHH', message[0:10])
+            cme_packet = {'MsgSeq': MsgSeq, 'SendingTime': SendingTime}
+
+            if TemplateID in VERSIONED_TEMPLATES:
+                entries += TEMPLATES[TemplateID](message[10:], BlockLength, Version, cme_packet)
+            else:
+                entries += TEMPLATES[TemplateID](message[10:], BlockLength, cme_packet)
+
+    return pd.DataFrame(entries)
+
+
+def _bbo(n, min_seconds, repeat):
+
+    data = _entries(46, n)
+
+    def run():
+        quotes.bbo(data)
+
+    return _result(data.shape[0], _timings(run, repeat, min_seconds), 'msgs/s')
+
+
+def _mbo_book(n, events, min_seconds, repeat):
+
+    data = _entries(47, n)
+
+    def run():
+        mbo_book().apply(data, events=events)
+
+    return _result(data.shape[0], _timings(run, repeat, min_seconds), 'msgs/s')
+
+
+def _resample(n, min_seconds, repeat):
+
+    book, trades = _book_frame(n)
+    del trades
+
+    # resample changes the time columns of the book
+
+    def run(book):
+        orderbook.resample(book, 'America/Chicago', 's', 1,
+                           '2025-04-20 17:00:00', '2025-04-22 17:00:00')
+
+    return _result(n, _timings(run, repeat, min_seconds, lambda: (book.copy(),)), 'rows/s')
+
+
+def _resample_grid(n, min_seconds, repeat):
+
+    book, trades = _book_frame(n)
+    del trades
+
+    def run():
+        orderbook.resample_grid(book, ['1s', '100ms'], '2025-04-20 17:00:00', '2025-04-20 18:00:00')
+
+    return _result(n, _timings(run, repeat, min_seconds), 'rows/s')
+
+
+def _tbbo(n, min_seconds, repeat):
+
+    book, trades = _book_frame(n)
+
+    def run():
+        orderbook.tbbo(book, trades, 'Seq_number')
+
+    return _result(n, _timings(run, repeat, min_seconds), 'rows/s')
+
+
+def _run_case(case, sizes, repeat):
+
+    timing = (sizes['min_seconds'], repeat)
+
+    if case.startswith('decode_'):
+        result = _decode(int(case.split('_')[1]), sizes['decode'], *timing)
+
+    elif case == 'parse_datamine':
+        result = _parse(sizes['parse'], *timing)
+
+    elif case.startswith('order_book_'):
+        result = _order_book(sizes['order_book'], int(case.split('_')[-1]),
+                             'conso' in case, *timing)
+
+    elif case == 'bbo':
+        result = _bbo(sizes['bbo'], *timing)
+
+    elif case == 'mbo_book':
+        result = _mbo_book(sizes['mbo_book'], True, *timing)
+
+    elif case == 'mbo_replay':
+        result = _mbo_book(sizes['mbo_replay'], False, *timing)
+
+    elif case == 'resample':
+        result = _resample(sizes['resample'], *timing)
+
+    elif case == 'resample_grid':
+        result = _resample_grid(sizes['resample_grid'], *timing)
+
+    elif case == 'tbbo':
+        result = _tbbo(sizes['tbbo'], *timing)
+
+    else:
+        raise Exception(f'Unknown benchmark case {case}')
+
+    result['peak_rss_mb'] = _peak_rss()
+
+    return result
+
+
+def run_benchmarks(cases=None, scale='quick', sizes=None, repeat=REPEAT):
+    """
+    Running benchmark cases, each in a fresh process.
+
+    Parameters
+    ----------
+    cases : list, optional
+        Benchmark cases from CASES. If None, all cases are run.
+        The default is None.
+    scale : str, optional
+        Either 'quick' or 'full', which decides the data sizes in SIZES.
+        The full scale runs resample and tbbo on 10M rows. The default is 'quick'.
+    sizes : dict, optional
+        Data sizes overriding the scale, e.g., {'order_book': 1000}.
+        The default is None.
+    repeat : int, optional
+        The number of timed runs of every case. The default is 5.
+
+    Returns
+    -------
+    results : dict
+        Machine information and the results of every case, including the
+        throughput of the best run ('rate' in 'unit'), the seconds of one
+        call in it, the median throughput and the spread (best over slowest
+        run, minus 1) of the runs, and the peak RSS in MB.
+
+    """
+
+    if cases is None:
+        cases = CASES
+
+    if scale not in SIZES:
+        raise Exception('Scale should be either quick or full')
+
+    sizes = SIZES[scale] | (sizes or {})
+
+    results = {'scale': scale,
+               'sizes': sizes,
+               'repeat': repeat,
+               'machine': {'python': platform.python_version(),
+                           'platform': platform.platform(),
+                           'processor': platform.processor(),
+                           'cpus': os.cpu_count(),
+                           'numpy': np.__version__,
+                           'pandas': pd.__version__},
+               'time': pd.Timestamp.now(tz='UTC').isoformat(),
+               'cases': {}}
+
+    for case in cases:
+
+        print(f'Running {case}...')
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            try:
+                results['cases'][case] = pool.submit(
+                    _run_case, case, sizes, repeat).result()
+
+            except Exception as e:
+                results['cases'][case] = {'error': repr(e)}
+
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Comparing benchmark results with a baseline.
+
+    A case regresses if its throughput is lower than the baseline, or its
+    peak RSS is higher than the baseline, by more than the tolerance. The
+    throughput of a case whose runs spread more than that, in the results
+    or the baseline, is allowed to change by the sum of the two spreads.
+
+    Parameters
+    ----------
+    results : dict
+        Results from `run_benchmarks`.
+    baseline : dict
+        Baseline results from `run_benchmarks`.
+    tolerance : float, optional
+        The relative change allowed. The default is 0.35, from the spread
+        of repeated runs of the quick scale.
+
+    Returns
+    -------
+    report : pandas DataFrame
+        Throughput and peak RSS against the baseline of every case.
+
+    """
+
+    report = []
+
+    for case, result in results['cases'].items():
+
+        base = baseline['cases'].get(case)
+
+        if 'error' in result:
+            report.append({'case': case, 'status': 'failed'})
+            continue
+
+        row = {'case': case, 'unit': result['unit'], 'rate': result['rate'],
+               'spread': result.get('spread'), 'peak_rss_mb': result['peak_rss_mb']}
+
+        if base is None or 'error' in base:
+            report.append(row | {'status': 'new'})
+            continue
+
+        row['base_rate'] = base['rate']
+        row['rate_change'] = result['rate'] / base['rate'] - 1
+        row['base_rss_mb'] = base['peak_rss_mb']
+        row['rss_change'] = result['peak_rss_mb'] / base['peak_rss_mb'] - 1
+
+        # baselines without repeated runs have no spread
+
+        spread = result.get('spread', 0) + base.get('spread', 0)
+
+        if row['rate_change'] < -max(tolerance, spread) or row['rss_change'] > tolerance:
+            row['status'] = 'regression'
+        else:
+            row['status'] = 'ok'
+
+        report.append(row)
+
+    return pd.DataFrame(report)
+
+
+def main(argv=None):
+    """
+    Console entry point, e.g.,
+    cmemdp-bench --scale full --baseline benchmarks/baseline.json
+    """
+
+    arg = argparse.ArgumentParser(
+        description='Benchmark the cmemdp parsers and book reconstruction')
+    arg.add_argument('--cases', nargs='+', default=None, choices=CASES)
+    arg.add_argument('--scale', default='quick', choices=list(SIZES))
+    arg.add_argument('--baseline', default=None,
+                     help='baseline JSON to compare with')
+    arg.add_argument('--save', default=None,
+                     help='path to save the results as JSON')
+    arg.add_argument('--repeat', type=int, default=REPEAT,
+                     help='the number of timed runs of every case')
+    arg.add_argument('--tolerance', type=float, default=TOLERANCE,
+                     help='relative change allowed before a regression is flagged')
+    args = arg.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.scale, repeat=args.repeat)
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        report = compare(results, baseline, args.tolerance)
+
+    else:
+        report = compare(results, {'cases': {}})
+
+    print(tabulate(report, headers='keys', showindex=False, floatfmt='.4g'))
+
+    return 1 if report['status'].isin(['regression', 'failed']).any() else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
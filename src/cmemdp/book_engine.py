@@ -0,0 +1,528 @@
+# -*- coding: utf-8 -*-
+"""
+Array-backed limit order book engine for Market by Price (MBP) messages
+
+The current book of a security is kept in a small NumPy array of shape
+(2, level, 3), i.e., bid/ask, price levels and price/quantity/orders, and
+every post-update state is written into a preallocated output array instead
+of a new DataFrame per message.
+"""
+
+import numpy as np
+from itertools import chain
+
+
+# update actions and sides in the MBP messages
+
+NEW, CHANGE, DELETE = 0, 1, 2
+
+BID_SIDES = ['0', 'E']
+ASK_SIDES = ['1', 'F']
+
+
+def book_columns(level, orders=True):
+    """
+    Names of the book columns, from the deepest bid to the deepest ask.
+
+    Parameters
+    ----------
+    level : int
+        The number of book depths.
+    orders : bool, optional
+        Whether to include the number of orders. The default is True.
+
+    Returns
+    -------
+    list
+        e.g., Bid_PX_2, Bid_Qty_2, Bid_Ord_2, Bid_PX_1, ..., Ask_Ord_2.
+
+    """
+
+    fields = ['PX', 'Qty', 'Ord'] if orders else ['PX', 'Qty']
+
+    bid = chain(*[[f'Bid_{x}_{i}' for x in fields]
+                for i in range(level, 0, -1)])
+    ask = chain(*[[f'Ask_{x}_{i}' for x in fields]
+                for i in range(1, level+1)])
+
+    return list(chain(bid, ask))
+
+
+def side_codes(side):
+    """
+    Mapping MDEntryType (or the FIX Side) into 0 (bid), 1 (ask) and -1 (other).
+    """
+
+    side = np.asarray(side).astype(str)
+
+    return np.where(np.isin(side, BID_SIDES), 0,
+                    np.where(np.isin(side, ASK_SIDES), 1, -1)).astype(np.int8)
+
+
+def column_order(level):
+    """
+    Positions of the (2, level, 3) state in the flat book columns of `book_columns`.
+    """
+
+    bid = np.arange(3 * level).reshape(level, 3)[::-1].ravel()
+    ask = np.arange(3 * level, 6 * level)
+
+    return np.concatenate([bid, ask])
+
+
+def _values(px, qty, orders):
+
+    values = np.column_stack([np.asarray(px, dtype=np.float64),
+                              np.asarray(qty, dtype=np.float64),
+                              np.asarray(orders, dtype=np.float64)])
+    values[np.isnan(values)] = 0
+
+    return values
+
+
+def _apply(key, update, side, depth, values, states, level):
+    # one chronological pass, states[key[k]] is the book of message k
+
+    n = update.shape[0]
+    book = np.empty((n, 2, level, 3))
+
+    for k in range(n):
+
+        state = states[key[k]]
+        s, d, u = side[k], depth[k] - 1, update[k]
+
+        if s < 0 or u > DELETE or u < NEW:
+            state[:] = 0
+
+        elif u == NEW:
+            state[s, d+1:] = state[s, d:-1]
+            state[s, d] = values[k]
+
+        elif u == CHANGE:
+            state[s, d] = values[k]
+
+        else:
+            state[s, d:-1] = state[s, d+1:]
+            state[s, -1] = 0
+
+        book[k] = state
+
+    return book.reshape(n, 6 * level)[:, column_order(level)]
+
+
+def _check(update, side, depth, level):
+
+    update = np.asarray(update, dtype=np.int64)
+    side = np.asarray(side, dtype=np.int64)
+    depth = np.asarray(depth, dtype=np.int64)
+
+    if update.shape[0] != 0 and depth.max() > level:
+        raise Exception(
+            f'Price level {depth.max()} is deeper than the book level {level}')
+
+    return update, side, depth
+
+
+def mbp_book(update, side, depth, px, qty, orders, level, state=None):
+    """
+    Applying MBP messages of one security to the book one by one.
+
+    New levels are inserted and push the deeper levels down, changed levels
+    are overwritten, and deleted levels pull the deeper levels up with the
+    deepest level emptied. Messages with other update actions or sides leave
+    an empty book, the same as the DataFrame implementation.
+
+    Parameters
+    ----------
+    update : array-like
+        MDUpdateAction (0 new, 1 change, 2 delete).
+    side : array-like
+        0 for bids and 1 for asks, see `side_codes`.
+    depth : array-like
+        MDPriceLevel, starting from 1.
+    px : array-like
+        Prices.
+    qty : array-like
+        Quantities.
+    orders : array-like
+        Number of orders. Missing values are stored as 0.
+    level : int
+        The number of book depths.
+    state : numpy array, optional
+        The book before the first message, in shape (2, level, 3).
+        The default is None, which is an empty book.
+
+    Returns
+    -------
+    book : numpy array
+        Books after every message in shape (n_messages, 6*level), ordered
+        as `book_columns(level)`.
+    state : numpy array
+        The book after the last message.
+
+    """
+
+    update, side, depth = _check(update, side, depth, level)
+
+    if state is None:
+        state = np.zeros((2, level, 3))
+
+    book = _apply(np.zeros(update.shape[0], dtype=np.int64), update, side, depth,
+                  _values(px, qty, orders), [state], level)
+
+    return book, state
+
+
+def mbp_books(security, update, side, depth, px, qty, orders, level, states=None):
+    """
+    Applying MBP messages of many securities in one chronological pass.
+
+    Every security has its own book state, kept in a dict of (2, level, 3)
+    arrays, so messages of outrights and spreads on one channel can be
+    processed together in their original order.
+
+    Parameters
+    ----------
+    security : array-like
+        The security (SecurityID or symbol) of every message.
+    update, side, depth, px, qty, orders, level
+        See `mbp_book`.
+    states : dict, optional
+        Books before the first message, keyed by security. Books of new
+        securities start empty. The default is None.
+
+    Returns
+    -------
+    book : numpy array
+        Books of the security of every message after the message, in shape
+        (n_messages, 6*level), in the input order.
+    states : dict
+        Books after the last message, keyed by security.
+
+    """
+
+    update, side, depth = _check(update, side, depth, level)
+
+    if states is None:
+        states = {}
+
+    codes, key = np.unique(np.asarray(security), return_inverse=True)
+
+    local = [states[x] if x in states else np.zeros((2, level, 3))
+             for x in codes.tolist()]
+
+    book = _apply(key, update, side, depth,
+                  _values(px, qty, orders), local, level)
+
+    states.update(zip(codes.tolist(), local))
+
+    return book, states
+
+
+def _to_state(book, level):
+    # flat book columns to (n, 2, level, 3), best levels first
+
+    book = book[:, np.argsort(column_order(level))]
+
+    return book.reshape(book.shape[0], 2, level, 3)
+
+
+def _insert(side, j, values, select):
+    # insert values at level j of the selected rows, deeper levels move down
+
+    level = side.shape[1]
+    k = np.arange(level)[None, :]
+    src = np.where(k > j[:, None], k - 1, k)
+    src = np.where(select[:, None], src, k)
+
+    side[:] = np.take_along_axis(side, src[:, :, None], axis=1)
+
+    rows = np.flatnonzero(select)
+    side[rows, j[rows]] = values[rows]
+
+
+def _merge_implied(side, px, qty, bid):
+    # merge one implied level into one side of the consolidated books
+
+    n, level = side.shape[0], side.shape[1]
+    active = px != 0
+
+    # an implied price already in the book adds to its quantity,
+    # matching the deepest bid or the best ask with that price
+
+    match = side[:, :, 0] == px[:, None]
+    found = active & match.any(axis=1)
+
+    if bid:
+        j = level - 1 - np.argmax(match[:, ::-1], axis=1)
+    else:
+        j = np.argmax(match, axis=1)
+
+    rows = np.flatnonzero(found)
+    side[rows, j[rows], 1] += qty[rows]
+
+    # otherwise it is inserted at its rank among the distinct book prices
+
+    prices = side[:, :, 0]
+    better = (prices > px[:, None]) if bid else (prices < px[:, None])
+    better = np.where(better & (prices > 0), prices, np.nan)
+    better = np.sort(better, axis=1)
+    count = (~np.isnan(better)).sum(axis=1) - \
+        (better[:, 1:] == better[:, :-1]).sum(axis=1)
+
+    insert = active & ~found & (count < level)
+    values = np.column_stack([px, qty, np.zeros(n)])
+
+    _insert(side, np.minimum(count, level - 1), values, insert)
+
+
+def consolidated_book(outright_seq, outright, implied_seq, implied, level,
+                      outright_start=None, implied_start=None):
+    """
+    Merging the outright and implied books into the consolidated book.
+
+    Both books are forward filled onto the union of their messages (ordered
+    by Seq). The two implied levels on either side are then merged into the
+    outright ladder for all messages at once: an implied price already in
+    the ladder adds to its quantity, otherwise it is inserted at its rank
+    among the ladder prices with the number of orders set to 0.
+
+    Parameters
+    ----------
+    outright_seq : array-like
+        Seq of the outright messages.
+    outright : numpy array
+        Outright books in the columns of `book_columns(n_levels)`.
+    implied_seq : array-like
+        Seq of the implied messages.
+    implied : numpy array
+        Implied books in the columns of `book_columns(2, orders=False)`.
+    level : int
+        The number of book depths of the consolidated book.
+    outright_start, implied_start : numpy array, optional
+        Outright and implied books before the first message in the same
+        columns, e.g., from snapshots. The default is None, where the
+        outright book is missing and the implied book is empty.
+
+    Returns
+    -------
+    seq : numpy array
+        Seq of all messages.
+    book : numpy array
+        Consolidated books in shape (n_messages, 6*level), ordered as
+        `book_columns(level)`. Without `outright_start`, books before the
+        first outright message only contain the implied quotes, other
+        levels are missing.
+
+    """
+
+    outright_seq = np.asarray(outright_seq, dtype=np.float64)
+    implied_seq = np.asarray(implied_seq, dtype=np.float64)
+
+    n_o, n_i = outright_seq.shape[0], implied_seq.shape[0]
+
+    seq = np.concatenate([outright_seq, implied_seq])
+    order = np.argsort(seq, kind='stable')
+    seq = seq[order]
+
+    # position of the latest outright and implied book of every message
+
+    is_outright = order < n_o
+    pos_o = np.cumsum(is_outright) - 1
+    pos_i = np.cumsum(~is_outright) - 1
+
+    outright = np.asarray(outright, dtype=np.float64)
+
+    if outright_start is not None:
+        outright = np.vstack([outright, np.asarray(outright_start, dtype=np.float64)])
+        pos_o = np.where(pos_o < 0, n_o, pos_o)
+
+    state_o = _to_state(outright, outright.shape[1] // 6)
+
+    if state_o.shape[2] >= level:
+        state_o = state_o[:, :, 0:level]
+    else:
+        state_o = np.concatenate([state_o, np.zeros((state_o.shape[0], 2, level - state_o.shape[2], 3))],
+                                 axis=2)
+
+    book = np.where((pos_o >= 0)[:, None, None, None],
+                    state_o[np.maximum(pos_o, 0)], np.nan)
+
+    # implied levels: Bid_PX_2, Bid_Qty_2, Bid_PX_1, Bid_Qty_1, Ask_PX_1, ...
+
+    implied = np.asarray(implied, dtype=np.float64)
+    start = 0 if implied_start is None else np.asarray(implied_start, dtype=np.float64)
+    implied = np.where((pos_i >= 0)[:, None],
+                       implied[np.maximum(pos_i, 0)] if n_i > 0 else 0, start)
+
+    bid, ask = book[:, 0], book[:, 1]
+
+    _merge_implied(bid, implied[:, 2], implied[:, 3], True)
+    _merge_implied(bid, implied[:, 0], implied[:, 1], True)
+    _merge_implied(ask, implied[:, 4], implied[:, 5], False)
+    _merge_implied(ask, implied[:, 6], implied[:, 7], False)
+
+    book = book.reshape(book.shape[0], 6 * level)[:, column_order(level)]
+
+    return seq, book
+
+
+def flat_book(state):
+    """
+    A (2, level, 3) book state in the columns of `book_columns(level)`.
+    """
+
+    return state.reshape(-1)[column_order(state.shape[1])]
+
+
+def book_state(book):
+    """
+    The inverse of `flat_book`, a (2, level, 3) book state from the columns
+    of `book_columns(level)`.
+    """
+
+    book = np.asarray(book, dtype=np.float64)
+
+    return _to_state(book[None, :], book.shape[0] // 6)[0].copy()
+
+
+def snapshot_states(security, side, depth, px, qty, orders, level, states=None):
+    """
+    Book states of many securities from snapshot messages (templates 52 and 69).
+
+    Every snapshot entry sets one price level, and levels missing from the
+    snapshot of a security are empty. The states can be passed to
+    `mbp_books` so that only the incrementals after the snapshots are applied.
+
+    Parameters
+    ----------
+    security : array-like
+        The security of every snapshot entry.
+    side, depth, px, qty, orders, level
+        See `mbp_book`. Entries of other sides (e.g., trades or statistics)
+        and deeper than the level are skipped.
+    states : dict, optional
+        Books to be updated, keyed by security. Books of the securities in
+        the snapshots are replaced. The default is None.
+
+    Returns
+    -------
+    states : dict
+        Books of the securities in shape (2, level, 3), keyed by security.
+
+    """
+
+    side = np.asarray(side, dtype=np.int64)
+    depth = np.asarray(depth, dtype=np.float64)
+
+    if states is None:
+        states = {}
+
+    values = _values(px, qty, orders)
+
+    for x in dict.fromkeys(np.asarray(security).tolist()):
+        states[x] = np.zeros((2, level, 3))
+
+    for k, x in enumerate(np.asarray(security).tolist()):
+
+        if side[k] < 0 or not 1 <= depth[k] <= level:
+            continue
+
+        states[x][side[k], int(depth[k]) - 1] = values[k]
+
+    return states
+
+
+def top_of_book(security, update, side, depth, px, qty, orders, level=10, states=None,
+                changes_only=True):
+    """
+    Best bid and ask of many securities from MBP messages.
+
+    The price levels of every side are kept as short Python lists, where
+    new levels are inserted, changed levels are overwritten and deleted
+    levels are removed. Levels deeper than 1 are still kept, because they
+    become the best level after the best level is deleted, but only
+    messages at level 1 can change the best bid or ask, so only they are
+    checked and written out.
+
+    Parameters
+    ----------
+    security, update, side, depth, px, qty, orders
+        See `mbp_books`.
+    level : int, optional
+        The number of book depths kept. The default is 10.
+    states : dict, optional
+        Price levels before the first message, keyed by security, as
+        [bid levels, ask levels] lists of (price, quantity, orders), best
+        first. The default is None.
+    changes_only : bool, optional
+        Whether to return only the messages that change the best bid or
+        ask of their security. Otherwise, the top of book after every
+        message is returned. The default is True.
+
+    Returns
+    -------
+    index : numpy array
+        Positions of the returned messages.
+    top : numpy array
+        Bid price, quantity, orders and ask price, quantity, orders of the
+        security after every returned message, 0 if a side is empty.
+    states : dict
+        Price levels after the last message, keyed by security.
+
+    """
+
+    update, side, depth = _check(update, side, depth, level)
+
+    if states is None:
+        states = {}
+
+    values = _values(px, qty, orders)
+    values = list(map(tuple, values.tolist()))
+    empty = (0.0, 0.0, 0.0)
+
+    index, top = [], []
+
+    for k, (x, u, s, d) in enumerate(zip(np.asarray(security).tolist(), update.tolist(),
+                                         side.tolist(), depth.tolist())):
+
+        book = states.get(x)
+
+        if book is None:
+            book = states[x] = [[], []]
+
+        if s < 0 or u > DELETE or u < NEW:
+            book[0], book[1] = [], []
+            changed = True
+
+        else:
+            levels = book[s]
+            best = levels[0] if levels else empty
+            d -= 1
+
+            # missing levels are padded as the array engine does
+
+            while len(levels) < d:
+                levels.append(empty)
+
+            if u == NEW:
+                levels.insert(d, values[k])
+                del levels[level:]
+
+            elif u == CHANGE:
+                if d < len(levels):
+                    levels[d] = values[k]
+                else:
+                    levels.append(values[k])
+
+            elif d < len(levels):
+                del levels[d]
+
+            changed = d == 0 and (levels[0] if levels else empty) != best
+
+        if changed or not changes_only:
+            index.append(k)
+            top.append((book[0][0] if book[0] else empty) +
+                       (book[1][0] if book[1] else empty))
+
+    return np.array(index, dtype=np.int64), np.array(top).reshape(-1, 6), states
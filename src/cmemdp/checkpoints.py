@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Book checkpoints for point-in-time book queries
+
+The books of all securities are saved every N messages or T seconds into an
+on-disk SQLite store, together with the packet sequence number (MsgSeq)
+and the message offset. The book of a security at any time is then the
+nearest earlier checkpoint plus the messages after it, which are read from
+the parsed parquet files with predicate pushdown.
+"""
+
+import io
+import zlib
+import sqlite3
+import numpy as np
+import pandas as pd
+from pandas import notnull
+from .book_engine import mbp_book, mbp_books, side_codes, book_columns, flat_book, book_state, \
+    consolidated_book
+from .mbo_engine import mbo_book
+from .prices import price_table
+from .FIX_input import quotes
+from .parquet_files import parsed_files, security_filter
+
+
+CHECKPOINT_COLUMNS = ['Kind', 'SecurityID', 'TransactTime', 'MsgSeq', 'Offset', 'Book']
+
+
+def _timestamp(timestamp, timezone):
+    # nanoseconds since epoch, naive times are in the trading time zone
+
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+
+    timestamp = pd.Timestamp(timestamp)
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(timezone)
+
+    return timestamp.value
+
+
+def _boundaries(MsgSeq, TransactTime, every_events, every_seconds):
+    # checkpoints are taken at the first message of a packet
+
+    n = MsgSeq.shape[0]
+    cut = []
+
+    if notnull(every_events):
+        cut.append(np.arange(every_events, n, every_events))
+
+    if notnull(every_seconds):
+        bucket = TransactTime // int(every_seconds * 1e9)
+        cut.append(np.flatnonzero(bucket[1:] != bucket[:-1]) + 1)
+
+    if len(cut) == 0:
+        raise Exception('Either every_events or every_seconds should be given')
+
+    cut = np.searchsorted(MsgSeq, MsgSeq[np.concatenate(cut)], side='left')
+    cut = np.unique(cut[cut > 0])
+
+    return np.concatenate([cut, [n]])
+
+
+class book_store:
+    """
+    On-disk store of book checkpoints.
+
+    Parameters
+    ----------
+    path : str
+        The path of the SQLite store. It is created if it does not exist.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS checkpoints (
+                {', '.join(CHECKPOINT_COLUMNS)},
+                PRIMARY KEY (Kind, SecurityID, TransactTime, MsgSeq))""")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS settings (Kind PRIMARY KEY, SaveFilePath, Level)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _save(self, kind, rows):
+
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO checkpoints VALUES ({', '.join(['?'] * len(CHECKPOINT_COLUMNS))})", rows)
+
+    def _settings(self, kind):
+
+        settings = self.conn.execute(
+            "SELECT SaveFilePath, Level FROM settings WHERE Kind = ?", (kind,)).fetchone()
+
+        if settings is None:
+            raise Exception(f'No {kind} checkpoints in the store')
+
+        return settings
+
+    def _checkpoint(self, kind, security, timestamp):
+
+        return self.conn.execute(
+            """SELECT TransactTime, MsgSeq, Offset, Book FROM checkpoints
+               WHERE Kind = ? AND SecurityID = ? AND TransactTime <= ?
+               ORDER BY TransactTime DESC, MsgSeq DESC LIMIT 1""",
+            (kind, int(security), timestamp)).fetchone()
+
+    def build(self, save_file_path, security=None, every_events=100000, every_seconds=None):
+        """
+        Saving checkpoints of the outright and implied MBP books from the
+        parsed template 46 messages.
+
+        Parameters
+        ----------
+        save_file_path : str
+            The directory that contains msgs_MDIncrementalRefreshBook46*.parquet files.
+        security : int or list, optional
+            SecurityIDs. If None, all securities are included. The default is None.
+        every_events : int, optional
+            The number of messages between checkpoints. The default is 100000.
+        every_seconds : float, optional
+            The number of seconds (TransactTime) between checkpoints.
+            The default is None.
+
+        Returns
+        -------
+        int
+            The number of checkpoints saved.
+
+        """
+
+        data = quotes.read_mbp(save_file_path, security)
+        data = data.sort_values(['MsgSeq', 'Seq'], kind='stable').reset_index(drop=True)
+
+        MsgSeq = data['MsgSeq'].to_numpy(dtype=np.int64)
+        TransactTime = data['TransactTime'].to_numpy(dtype=np.int64)
+        code = data['Code'].to_numpy(dtype=str)
+        implied = (data['Implied'] == 'Y').to_numpy()
+
+        side = side_codes(data['Side'])
+        update = data['Update'].to_numpy(dtype=np.float64, na_value=-1)
+        depth = data['PX_depth'].to_numpy(dtype=np.int64)
+        px = data['PX'].to_numpy(dtype=np.float64, na_value=np.nan)
+        qty = data['Qty'].to_numpy(dtype=np.float64, na_value=np.nan)
+        orders = data['Ord'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        states = {'N': {}, 'Y': {}}
+        start, n_saved = 0, 0
+
+        for end in _boundaries(MsgSeq, TransactTime, every_events, every_seconds):
+
+            rows = np.arange(start, end)
+
+            for kind, level, select in [('N', 10, ~implied[rows]), ('Y', 2, implied[rows])]:
+                k = rows[select]
+                mbp_books(code[k], update[k], side[k], depth[k], px[k], qty[k], orders[k],
+                          level, states[kind])
+
+            # securities updated since the last checkpoint, with their last message
+
+            checkpoint = []
+            names, last = np.unique(code[rows][::-1], return_index=True)
+
+            for x, j in zip(names.tolist(), rows[::-1][last].tolist()):
+                book = [states['N'].get(x, np.zeros((2, 10, 3))),
+                        states['Y'].get(x, np.zeros((2, 2, 3)))]
+                book = np.concatenate([flat_book(y) for y in book])
+
+                checkpoint.append(('mbp', int(x), int(TransactTime[j]), int(MsgSeq[j]),
+                                   int(end), zlib.compress(book.tobytes())))
+
+            self._save('mbp', checkpoint)
+            n_saved += len(checkpoint)
+            start = end
+
+        self.conn.execute("INSERT OR REPLACE INTO settings VALUES (?, ?, ?)",
+                          ('mbp', save_file_path, 10))
+        self.conn.commit()
+
+        return n_saved
+
+    def build_mbo(self, save_file_path, security=None, every_events=100000, every_seconds=None):
+        """
+        Saving checkpoints of the MBO books from the parsed template 47 messages.
+
+        The orders of every security are saved in queue order, see `build`
+        for the parameters.
+        """
+
+        files = parsed_files(save_file_path, 'MDIncrementalRefreshOrderBook47')
+
+        if len(files) == 0:
+            raise Exception('Cannot find the parsed MBO messages')
+
+        data = pd.concat([pd.read_parquet(x, filters=security_filter(security)) for x in files],
+                         ignore_index=True)
+        data = data.sort_values('MsgSeq', kind='stable').reset_index(drop=True)
+
+        MsgSeq = data['MsgSeq'].to_numpy(dtype=np.int64)
+        TransactTime = data['TransactTime'].to_numpy(dtype=np.int64)
+
+        book = mbo_book(price_table.from_parquet(save_file_path))
+        start, n_saved = 0, 0
+
+        for end in _boundaries(MsgSeq, TransactTime, every_events, every_seconds):
+
+            chunk = data.iloc[start:end]
+            book.apply(chunk, events=False)
+
+            checkpoint = []
+            last = chunk.drop_duplicates('SecurityID', keep='last')
+
+            for x, t, m in zip(last['SecurityID'].tolist(), last['TransactTime'].tolist(),
+                               last['MsgSeq'].tolist()):
+                orders = book.to_snapshot(x)
+                buffer = io.BytesIO()
+                np.savez_compressed(buffer,
+                                    OrderID=orders['OrderID'].to_numpy(dtype=np.int64),
+                                    MDOrderPriority=orders['MDOrderPriority'].to_numpy(
+                                        dtype=np.float64),
+                                    MDEntryPx=orders['MDEntryPx'].to_numpy(dtype=np.int64),
+                                    MDDisplayQty=orders['MDDisplayQty'].to_numpy(
+                                        dtype=np.float64),
+                                    MDEntryType=orders['MDEntryType'].to_numpy(dtype=str))
+
+                checkpoint.append(('mbo', int(x), int(t), int(m), int(end), buffer.getvalue()))
+
+            self._save('mbo', checkpoint)
+            n_saved += len(checkpoint)
+            start = end
+
+        self.conn.execute("INSERT OR REPLACE INTO settings VALUES (?, ?, ?)",
+                          ('mbo', save_file_path, None))
+        self.conn.commit()
+
+        return n_saved
+
+    def book_at(self, security, timestamp, level=10, timezone='America/Chicago'):
+        """
+        The MBP book of a security at a point in time.
+
+        The nearest checkpoint at or before the time is restored and only
+        the messages after it, up to the time, are applied.
+
+        Parameters
+        ----------
+        security : int
+            SecurityID.
+        timestamp : str, datetime or int
+            The time of interest, in the trading time zone if naive, or
+            nanoseconds since epoch (TransactTime).
+        level : int, optional
+            The number of book depths of the consolidated book. The default is 10.
+        timezone : str, optional
+            The time zone of naive timestamps. The default is 'America/Chicago'.
+
+        Returns
+        -------
+        dict
+            The consolidated, outright and implied books after the last
+            message at or before the time, each as one row with Code,
+            TransactTime and MsgSeq of the last message.
+
+        """
+
+        save_file_path, book_level = self._settings('mbp')
+        timestamp = _timestamp(timestamp, timezone)
+        checkpoint = self._checkpoint('mbp', security, timestamp)
+
+        if checkpoint is None:
+            TransactTime, MsgSeq = np.nan, -1
+            state = {'N': np.zeros((2, book_level, 3)), 'Y': np.zeros((2, 2, 3))}
+
+        else:
+            TransactTime, MsgSeq, offset, book = checkpoint
+            book = np.frombuffer(zlib.decompress(book), dtype=np.float64)
+            state = {'N': book_state(book[0:(6 * book_level)]),
+                     'Y': book_state(book[(6 * book_level):])}
+
+        # messages after the checkpoint
+
+        tail = quotes.read_mbp(save_file_path, security,
+                               filters=[('MsgSeq', '>', MsgSeq), ('TransactTime', '<=', timestamp)])
+        tail = tail.sort_values(['MsgSeq', 'Seq'], kind='stable')
+
+        for kind in ['N', 'Y']:
+            msg = tail.loc[tail['Implied'] == kind]
+            mbp_book(msg['Update'].values, side_codes(msg['Side'].values), msg['PX_depth'].values,
+                     msg['PX'].values, msg['Qty'].values, msg['Ord'].values,
+                     state[kind].shape[1], state[kind])
+
+        if tail.shape[0] != 0:
+            TransactTime, MsgSeq = tail['TransactTime'].iloc[-1], tail['MsgSeq'].iloc[-1]
+
+        outright = flat_book(state['N'])
+        implied = np.delete(flat_book(state['Y']), [2, 5, 8, 11])
+
+        conso = consolidated_book(np.zeros(1), outright[None, :], np.zeros(0),
+                                  np.zeros((0, 8)), level, implied_start=implied)[1]
+
+        def frame(book, columns):
+            book = pd.DataFrame(book.reshape(1, -1), columns=columns)
+            book.insert(0, 'Code', str(security))
+            book.insert(1, 'TransactTime', TransactTime)
+            book.insert(2, 'MsgSeq', MsgSeq)
+            return book
+
+        return {'LOB_conso': frame(conso, book_columns(level)),
+                'LOB_outright': frame(outright, book_columns(book_level)),
+                'LOB_implied': frame(implied, book_columns(2, orders=False))}
+
+    def mbo_at(self, security, timestamp, timezone='America/Chicago'):
+        """
+        The MBO book of a security at a point in time.
+
+        Parameters
+        ----------
+        security : int
+            SecurityID.
+        timestamp : str, datetime or int
+            See `book_at`.
+        timezone : str, optional
+            The time zone of naive timestamps. The default is 'America/Chicago'.
+
+        Returns
+        -------
+        cmemdp.mbo_engine.mbo_book
+            The order book of the security after the last message at or
+            before the time, e.g., for `depth` and `queue`.
+
+        """
+
+        save_file_path, level = self._settings('mbo')
+        timestamp = _timestamp(timestamp, timezone)
+        checkpoint = self._checkpoint('mbo', security, timestamp)
+
+        book = mbo_book(price_table.from_parquet(save_file_path))
+        MsgSeq = -1
+
+        if checkpoint is not None:
+            TransactTime, MsgSeq, offset, orders = checkpoint
+            orders = dict(np.load(io.BytesIO(orders)))
+            orders = pd.DataFrame(orders).assign(SecurityID=int(security),
+                                                 LastMsgSeqNumProcessed=MsgSeq, CurrentChunk=1)
+            book.snapshot(orders)
+
+        filters = security_filter(security) + [('MsgSeq', '>', MsgSeq),
+                                                ('TransactTime', '<=', timestamp)]
+        tail = pd.concat([pd.read_parquet(x, filters=filters)
+                          for x in parsed_files(save_file_path, 'MDIncrementalRefreshOrderBook47')],
+                         ignore_index=True)
+
+        book.apply(tail.sort_values('MsgSeq', kind='stable'), events=False)
+
+        return book
@@ -37,6 +37,8 @@ description means the date when the format has been modified
 
 
 from . import main_template
+from .security_master import security_master
+from .prices import price_table
 from tabulate import tabulate
 from pandas import isnull, notnull
 import pandas as pd
@@ -44,14 +46,302 @@ import struct
 import numpy as np
 from tqdm import tqdm
 import os
+import glob
+import json
+import time
 from itertools import chain, islice
 import pickle
 
 
+# Template ID and the corresponding decoder in `main_template`
+# Parsed messages are saved as msgs_{decoder name}.parquet
+
+TEMPLATES = {
+    4: main_template.ChannelReset4,
+    16: main_template.AdminLogout16,
+    27: main_template.MDInstrumentDefinitionFuture27,
+    29: main_template.MDInstrumentDefinitionSpread29,
+    30: main_template.SecurityStatus30,
+    32: main_template.MDIncrementalRefreshBook32,
+    33: main_template.MDIncrementalRefreshDailyStatistics33,
+    34: main_template.MDIncrementalRefreshLimitsBanding34,
+    35: main_template.MDIncrementalRefreshSessionStatistics35,
+    36: main_template.MDIncrementalRefreshTrade36,
+    37: main_template.MDIncrementalRefreshVolume37,
+    38: main_template.SnapshotFullRefresh38,
+    39: main_template.QuoteRequest39,
+    41: main_template.MDInstrumentDefinitionOption41,
+    42: main_template.MDIncrementalRefreshTradeSummary42,
+    43: main_template.MDIncrementalRefreshOrderBook43,
+    44: main_template.SnapshotFullRefreshOrderBook44,
+    46: main_template.MDIncrementalRefreshBook46,
+    47: main_template.MDIncrementalRefreshOrderBook47,
+    48: main_template.MDIncrementalRefreshTradeSummary48,
+    49: main_template.MDIncrementalRefreshDailyStatistics49,
+    50: main_template.MDIncrementalRefreshLimitsBanding50,
+    51: main_template.MDIncrementalRefreshSessionStatistics51,
+    52: main_template.SnapshotFullRefresh52,
+    53: main_template.SnapshotFullRefreshOrderBook53,
+    54: main_template.MDInstrumentDefinitionFuture54,
+    55: main_template.MDInstrumentDefinitionOption55,
+    56: main_template.MDInstrumentDefinitionSpread56,
+    57: main_template.MDInstrumentDefinitionFixedIncome57,
+    58: main_template.MDInstrumentDefinitionRepo58,
+    59: main_template.SnapshotRefreshTopOrders59,
+    60: main_template.SecurityStatusWorkup60,
+    61: main_template.SnapshotFullRefreshTCP61,
+    62: main_template.CollateralMarketValue62,
+    63: main_template.MDInstrumentDefinitionFX63,
+    64: main_template.MDIncrementalRefreshBookLongQty64,
+    65: main_template.MDIncrementalRefreshTradeSummaryLongQty65,
+    66: main_template.MDIncrementalRefreshVolumeLongQty66,
+    67: main_template.MDIncrementalRefreshSessionStatisticsLongQty67,
+    68: main_template.SnapshotFullRefreshTCPLongQty68,
+    69: main_template.SnapshotFullRefreshLongQty69,
+}
+
+# decoders whose layout depends on the schema version
+
+VERSIONED_TEMPLATES = [4, 27, 29, 41, 46, 54, 55, 56, 58]
+
+# instrument definitions feeding the security master
+
+DEFINITION_TEMPLATES = [27, 29, 41, 54, 55, 56]
+
+# trade summaries feeding the bar builder
+
+TRADE_TEMPLATES = [42, 48, 65]
+
+# fills (order entries) decoded with the trade entries of a template, which
+# are saved as msgs_{decoder name} files of their own
+
+FILL_TEMPLATES = {48: main_template.TradeSummaryFills48}
+
+
+class _template_writer:
+    """
+    Collecting decoded messages for every template and saving them into
+    parquet files once `chunk_size` messages are buffered.
+
+    The writer also counts messages, entries and bytes of every template,
+    and the time spent in building (flush) and writing (I/O) the chunks.
+    If `profile_sample` is given, one in every `profile_sample` decoder calls
+    is timed with `time.perf_counter_ns`.
+    """
+
+    def __init__(self, save_file_path, chunk_size, security_master_path=None,
+                 normalize_prices=False, profile_sample=None, bars=None):
+
+        self.save_file_path = save_file_path
+        self.bars = bars
+        self.chunk_size = chunk_size
+        self.profile_sample = profile_sample
+        self.msgs = {}
+        self.fills = {}
+        self.chunk_index = {}
+        self.stats = {}
+        self.files = {}
+        self.packets = 0
+
+        if notnull(security_master_path):
+            self.security_master = security_master(security_master_path)
+        else:
+            self.security_master = None
+
+        # display factors and tick sizes known so far, and definitions
+        # decoded since the table was last updated
+
+        self.definitions = []
+
+        if normalize_prices and self.security_master is not None:
+            self.prices = price_table.from_security_master(
+                self.security_master)
+        elif normalize_prices:
+            self.prices = price_table()
+        else:
+            self.prices = None
+
+    def decode(self, TemplateID, messages, BlockLength, Version, cme_packet):
+
+        if TemplateID not in TEMPLATES:
+            return
+
+        if TemplateID not in self.msgs:
+            self.msgs[TemplateID] = []
+            self.fills[TemplateID] = []
+            self.chunk_index[TemplateID] = 1
+            self.stats[TemplateID] = {'messages': 0, 'entries': 0, 'bytes': 0,
+                                      'sampled': 0, 'decode_ns': 0,
+                                      'flush_ns': 0, 'write_ns': 0}
+
+        stats = self.stats[TemplateID]
+
+        if notnull(self.profile_sample) and stats['messages'] % self.profile_sample == 0:
+            start = time.perf_counter_ns()
+
+        if TemplateID in VERSIONED_TEMPLATES:
+            msgs = TEMPLATES[TemplateID](
+                messages, BlockLength, Version, cme_packet)
+        elif TemplateID in FILL_TEMPLATES:
+            msgs = TEMPLATES[TemplateID](
+                messages, BlockLength, cme_packet, self.fills[TemplateID])
+        else:
+            msgs = TEMPLATES[TemplateID](messages, BlockLength, cme_packet)
+
+        if notnull(self.profile_sample) and stats['messages'] % self.profile_sample == 0:
+            stats['decode_ns'] += time.perf_counter_ns() - start
+            stats['sampled'] += 1
+
+        stats['messages'] += 1
+        stats['bytes'] += len(messages) + 10  # including the message header
+
+        if msgs is not None:
+            stats['entries'] += len(msgs)
+
+            # definitions must be in the price table before any book or
+            # trade chunk is normalized, whichever chunk is saved first
+
+            if self.prices is not None and TemplateID in DEFINITION_TEMPLATES:
+                self.definitions += msgs
+
+        self.msgs[TemplateID].append(msgs)
+
+        if len(self.msgs[TemplateID]) >= self.chunk_size:
+            self.save(TemplateID, self.chunk_index[TemplateID])
+            self.chunk_index[TemplateID] += 1
+
+    def save(self, TemplateID, chunk_index=None):
+
+        name = TEMPLATES[TemplateID].__name__
+        stats = self.stats[TemplateID]
+
+        start = time.perf_counter_ns()
+
+        msgs = pd.DataFrame(chain.from_iterable(self.msgs[TemplateID]))
+
+        if len(self.definitions) != 0:
+            self.prices.update(pd.DataFrame(self.definitions))
+            self.definitions = []
+
+        if (self.prices is not None and TemplateID not in DEFINITION_TEMPLATES
+                and 'SecurityID' in msgs.columns):
+            msgs = self.prices.normalize(msgs)
+
+        suffix = '' if isnull(chunk_index) else f'_{chunk_index}'
+        file = f"{self.save_file_path}/msgs_{name}{suffix}.parquet"
+
+        # the fills of the messages in this chunk
+
+        if len(self.fills[TemplateID]) != 0:
+            fills = pd.DataFrame(self.fills[TemplateID])
+            fills_file = f"{self.save_file_path}/msgs_{FILL_TEMPLATES[TemplateID].__name__}{suffix}.parquet"
+        else:
+            fills = None
+
+        stats['flush_ns'] += time.perf_counter_ns() - start
+        start = time.perf_counter_ns()
+
+        msgs.to_parquet(file)
+
+        if fills is not None:
+            fills.to_parquet(fills_file)
+            self.files[fills_file] = fills.shape[0]
+
+        if self.security_master is not None and TemplateID in DEFINITION_TEMPLATES:
+            self.security_master.update(msgs, TemplateID)
+
+        if self.bars is not None and TemplateID in TRADE_TEMPLATES:
+            self.bars.update(msgs)
+
+        stats['write_ns'] += time.perf_counter_ns() - start
+
+        self.files[file] = msgs.shape[0]
+        self.msgs[TemplateID] = []
+        self.fills[TemplateID] = []
+
+    def close(self):
+
+        for TemplateID in self.msgs:
+            if len(self.msgs[TemplateID]) != 0:
+                self.save(TemplateID)
+
+        if self.security_master is not None:
+            self.security_master.close()
+
+        if self.bars is not None:
+            self.bars.close()
+
+    def report(self, path, bytes_read, seconds):
+        """
+        Summary of a parser run.
+
+        Decode time of a template is estimated from the sampled decoder calls.
+        The time left after decoding, building and writing chunks is spent in
+        reading and framing the packets.
+        """
+
+        templates = {}
+
+        for TemplateID, stats in sorted(self.stats.items()):
+
+            if stats['sampled'] > 0:
+                decode_seconds = stats['decode_ns'] / \
+                    stats['sampled'] * stats['messages'] / 1e9
+            else:
+                decode_seconds = None
+
+            templates[TEMPLATES[TemplateID].__name__] = {
+                'TemplateID': TemplateID,
+                'messages': stats['messages'],
+                'entries': stats['entries'],
+                'bytes': stats['bytes'],
+                'decode_seconds': decode_seconds,
+                'flush_seconds': stats['flush_ns'] / 1e9,
+                'write_seconds': stats['write_ns'] / 1e9,
+            }
+
+        decode_seconds = sum(x['decode_seconds'] for x in templates.values()
+                             if notnull(x['decode_seconds']))
+        flush_seconds = sum(x['flush_seconds'] for x in templates.values())
+        write_seconds = sum(x['write_seconds'] for x in templates.values())
+
+        report = {'path': path,
+                  'packets': self.packets,
+                  'messages': sum(x['messages'] for x in templates.values()),
+                  'bytes': bytes_read,
+                  'seconds': seconds,
+                  'MB/s': bytes_read / 1e6 / seconds if seconds > 0 else None,
+                  'decode_seconds': decode_seconds if notnull(self.profile_sample) else None,
+                  'flush_seconds': flush_seconds,
+                  'write_seconds': write_seconds,
+                  'read_seconds': (seconds - decode_seconds - flush_seconds - write_seconds
+                                   if notnull(self.profile_sample) else None),
+                  'templates': templates,
+                  'files': self.files}
+
+        return report
+
+
+def _run_report(writer, path, bytes_read, start, report_path, return_report):
+
+    report = writer.report(path, bytes_read, time.perf_counter() - start)
+
+    if notnull(report_path):
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if return_report:
+        return report
+
+    return f"PCAP file {path} cleaning finished"
+
+
 def cme_parser_datamine(path, max_read_packets=None, cme_header=True,
-                        save_file_path=None, disable_progress_bar=False, chunk_size=5000):
+                        save_file_path=None, disable_progress_bar=False, chunk_size=5000,
+                        security_master_path=None, normalize_prices=False,
+                        report_path=None, return_report=False, profile_sample=None, bars=None):
     """
-    `cme_parser_datamine` is a binary pacaket capture (PCAP) data parser for 
+    `cme_parser_datamine` is a binary pacaket capture (PCAP) data parser for
     market data obtained from the Chicago Mercantile Exchange (CME) Datamine.
     PCAP data from the CME Datamine does not follow standard PCAP data format,
     e.g., packet headers, UDP, payloads. It remains the main part of the actual
@@ -67,10 +357,10 @@ def cme_parser_datamine(path, max_read_packets=None, cme_header=True,
     path : str
         The path of the raw data file.
     max_read_packets : int, optional
-        The maximum number of packaets need to be processed, if None, 
+        The maximum number of packaets need to be processed, if None,
         all packets are read. The default is None.
     msgs_template : list, optional
-        Types of messages need to be returned. CME provides 
+        Types of messages need to be returned. CME provides
         numbers to different message templates, e.g., the channel reset messages
         are marked as 4. Users need to give the template numbers into a list. If None,
         all messages are returned. The default is None.
@@ -83,6 +373,32 @@ def cme_parser_datamine(path, max_read_packets=None, cme_header=True,
         Whether to disable the progress bar. The default is False.
     chunk_size : int
         The chunk size that needs to be saved.
+    security_master_path : str, optional
+        The path of the security master store. If given, instrument definitions
+        are added to the store while they are saved. The default is None.
+    normalize_prices : bool, optional
+        Whether to add display prices and tick indices (e.g., MDEntryPxDisplay
+        and MDEntryPxTick) to the saved messages, based on the definitions in
+        the security master and those parsed from the file. The default is False.
+    report_path : str, optional
+        The path of a JSON run report, which includes packets, messages and
+        bytes per template, time spent in decoding, building and writing chunks,
+        rows written per output file, and overall MB/s. The default is None.
+    return_report : bool, optional
+        Whether to return the run report as a dictionary instead of a message.
+        The default is False.
+    profile_sample : int, optional
+        If given, one in every `profile_sample` decoder calls of each template
+        is timed to estimate the decode time. The default is None.
+    bars : bar_builder, optional
+        A `bars.bar_builder` that receives every saved chunk of the trade
+        summaries (templates 42, 48 and 65) and is closed at the end of the
+        file. The default is None.
+
+    Returns
+    -------
+    str or dict
+        A message when the file is finished, or the run report.
 
     """
     if isnull(save_file_path):
@@ -92,89 +408,10 @@ def cme_parser_datamine(path, max_read_packets=None, cme_header=True,
     # you could only return the messages you want
     # users need to give the template IDs of that messages
 
-    msgs_ChannelReset4 = []
-    msgs_AdminLogout16 = []
-    msgs_MDInstrumentDefinitionFuture27 = []
-    msgs_MDInstrumentDefinitionSpread29 = []
-    msgs_SecurityStatus30 = []
-    msgs_MDIncrementalRefreshBook32 = []
-    msgs_MDIncrementalRefreshDailyStatistics33 = []
-    msgs_MDIncrementalRefreshLimitsBanding34 = []
-    msgs_MDIncrementalRefreshSessionStatistics35 = []
-    msgs_MDIncrementalRefreshTrade36 = []
-    msgs_MDIncrementalRefreshVolume37 = []
-    msgs_SnapshotFullRefresh38 = []
-    msgs_QuoteRequest39 = []
-    msgs_MDInstrumentDefinitionOption41 = []
-    msgs_MDIncrementalRefreshTradeSummary42 = []
-    msgs_MDIncrementalRefreshOrderBook43 = []
-    msgs_SnapshotFullRefreshOrderBook44 = []
-    msgs_MDIncrementalRefreshBook46 = []
-    msgs_MDIncrementalRefreshOrderBook47 = []
-    msgs_MDIncrementalRefreshTradeSummary48 = []
-    msgs_MDIncrementalRefreshDailyStatistics49 = []
-    msgs_MDIncrementalRefreshLimitsBanding50 = []
-    msgs_MDIncrementalRefreshSessionStatistics51 = []
-    msgs_SnapshotFullRefresh52 = []
-    msgs_SnapshotFullRefreshOrderBook53 = []
-    msgs_MDInstrumentDefinitionFuture54 = []
-    msgs_MDInstrumentDefinitionOption55 = []
-    msgs_MDInstrumentDefinitionSpread56 = []
-    msgs_MDInstrumentDefinitionFixedIncome57 = []
-    msgs_MDInstrumentDefinitionRepo58 = []
-    msgs_SnapshotRefreshTopOrders59 = []
-    msgs_SecurityStatusWorkup60 = []
-    msgs_SnapshotFullRefreshTCP61 = []
-    msgs_CollateralMarketValue62 = []
-    msgs_MDInstrumentDefinitionFX63 = []
-    msgs_MDIncrementalRefreshBookLongQty64 = []
-    msgs_MDIncrementalRefreshTradeSummaryLongQty65 = []
-    msgs_MDIncrementalRefreshVolumeLongQty66 = []
-    msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = []
-    msgs_SnapshotFullRefreshTCPLongQty68 = []
-    msgs_SnapshotFullRefreshLongQty69 = []
-
-    chunk_index4 = 1
-    chunk_index16 = 1
-    chunk_index27 = 1
-    chunk_index29 = 1
-    chunk_index30 = 1
-    chunk_index32 = 1
-    chunk_index33 = 1
-    chunk_index34 = 1
-    chunk_index35 = 1
-    chunk_index36 = 1
-    chunk_index37 = 1
-    chunk_index38 = 1
-    chunk_index39 = 1
-    chunk_index41 = 1
-    chunk_index42 = 1
-    chunk_index43 = 1
-    chunk_index44 = 1
-    chunk_index46 = 1
-    chunk_index47 = 1
-    chunk_index48 = 1
-    chunk_index49 = 1
-    chunk_index50 = 1
-    chunk_index51 = 1
-    chunk_index52 = 1
-    chunk_index53 = 1
-    chunk_index54 = 1
-    chunk_index55 = 1
-    chunk_index56 = 1
-    chunk_index57 = 1
-    chunk_index58 = 1
-    chunk_index59 = 1
-    chunk_index60 = 1
-    chunk_index61 = 1
-    chunk_index62 = 1
-    chunk_index63 = 1
-    chunk_index64 = 1
-    chunk_index65 = 1
-    chunk_index66 = 1
-    chunk_index67 = 1
-    chunk_index68 = 1
-    chunk_index69 = 1
+    start = time.perf_counter()
+
+    writer = _template_writer(save_file_path, chunk_size,
+                              security_master_path, normalize_prices, profile_sample, bars)
 
     if isnull(max_read_packets):
         print('maximum number of packets read does not provide. Read the whole file by default')
@@ -219,6 +456,7 @@ def cme_parser_datamine(path, max_read_packets=None, cme_header=True,
             while read < max_read:
 
                 (Channel, message_length) = struct.unpack('<HH', f.read(4))
+                writer.packets += 1
 
                 end_pos += (message_length + 4)
 
@@ -281,578 +519,8 @@ def cme_parser_datamine(path, max_read_packets=None, cme_header=True,
 
                         # guding to the signle message
 
-                        if TemplateID == 4:
-
-                            msgs_ChannelReset4.append(main_template.ChannelReset4(
-                                messages, BlockLength, cme_packet))
-
-                            if len(msgs_ChannelReset4) >= chunk_size:
-                                msgs_ChannelReset4 = pd.DataFrame(
-                                    chain.from_iterable(msgs_ChannelReset4))
-                                msgs_ChannelReset4.to_parquet(
-                                    f"{save_file_path}/msgs_ChannelReset4_{chunk_index4}.parquet")
-                                chunk_index4 += 1
-                                msgs_ChannelReset4 = []
-
-                        elif TemplateID == 16:
-
-                            msgs_AdminLogout16.append(main_template.AdminLogout16(
-                                messages, BlockLength, cme_packet))
-
-                            if len(msgs_AdminLogout16) >= chunk_size:
-
-                                msgs_AdminLogout16 = pd.DataFrame(
-                                    chain.from_iterable(msgs_AdminLogout16))
-                                msgs_AdminLogout16.to_parquet(
-                                    f"{save_file_path}/msgs_AdminLogout16_{chunk_index16}.parquet")
-                                chunk_index16 += 1
-                                msgs_AdminLogout16 = []
-
-                        elif TemplateID == 27:
-
-                            msgs_MDInstrumentDefinitionFuture27.append(
-                                main_template.MDInstrumentDefinitionFuture27(messages, BlockLength, Version, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionFuture27) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionFuture27 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionFuture27))
-                                msgs_MDInstrumentDefinitionFuture27.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionFuture27_{chunk_index27}.parquet")
-                                chunk_index27 += 1
-                                msgs_MDInstrumentDefinitionFuture27 = []
-
-                        elif TemplateID == 29:
-
-                            msgs_MDInstrumentDefinitionSpread29.append(
-                                main_template.MDInstrumentDefinitionSpread29(messages, BlockLength, Version, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionSpread29) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionSpread29 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionSpread29))
-                                msgs_MDInstrumentDefinitionSpread29.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionSpread29_{chunk_index29}.parquet")
-                                chunk_index29 += 1
-                                msgs_MDInstrumentDefinitionSpread29 = []
-
-                        elif TemplateID == 30:
-
-                            msgs_SecurityStatus30.append(
-                                main_template.SecurityStatus30(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SecurityStatus30) >= chunk_size:
-
-                                msgs_SecurityStatus30 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SecurityStatus30))
-                                msgs_SecurityStatus30.to_parquet(
-                                    f"{save_file_path}/msgs_SecurityStatus30_{chunk_index30}.parquet")
-                                chunk_index30 += 1
-                                msgs_SecurityStatus30 = []
-
-                        elif TemplateID == 32:
-
-                            msgs_MDIncrementalRefreshBook32.append(
-                                main_template.MDIncrementalRefreshBook32(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshBook32) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshBook32 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshBook32))
-                                msgs_MDIncrementalRefreshBook32.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshBook32_{chunk_index32}.parquet")
-                                chunk_index32 += 1
-                                msgs_MDIncrementalRefreshBook32 = []
-
-                        elif TemplateID == 33:
-
-                            msgs_MDIncrementalRefreshDailyStatistics33.append(
-                                main_template.MDIncrementalRefreshDailyStatistics33(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshDailyStatistics33) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshDailyStatistics33 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics33))
-                                msgs_MDIncrementalRefreshDailyStatistics33.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics33_{chunk_index33}.parquet")
-                                chunk_index33 += 1
-                                msgs_MDIncrementalRefreshDailyStatistics33 = []
-
-                        elif TemplateID == 34:
-
-                            msgs_MDIncrementalRefreshLimitsBanding34.append(
-                                main_template.MDIncrementalRefreshLimitsBanding34(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshLimitsBanding34) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshLimitsBanding34 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding34))
-                                msgs_MDIncrementalRefreshLimitsBanding34.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding34_{chunk_index34}.parquet")
-                                chunk_index34 += 1
-                                msgs_MDIncrementalRefreshLimitsBanding34 = []
-
-                        elif TemplateID == 35:
-
-                            msgs_MDIncrementalRefreshSessionStatistics35.append(
-                                main_template.MDIncrementalRefreshSessionStatistics35(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshSessionStatistics35) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshSessionStatistics35 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics35))
-                                msgs_MDIncrementalRefreshSessionStatistics35.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics35_{chunk_index35}.parquet")
-                                chunk_index35 += 1
-                                msgs_MDIncrementalRefreshSessionStatistics35 = []
-
-                        elif TemplateID == 36:
-
-                            msgs_MDIncrementalRefreshTrade36.append(
-                                main_template.MDIncrementalRefreshTrade36(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshTrade36) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshTrade36 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshTrade36))
-                                msgs_MDIncrementalRefreshTrade36.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshTrade36_{chunk_index36}.parquet")
-                                chunk_index36 += 1
-                                msgs_MDIncrementalRefreshTrade36 = []
-
-                        elif TemplateID == 37:
-
-                            msgs_MDIncrementalRefreshVolume37.append(
-                                main_template.MDIncrementalRefreshVolume37(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshVolume37) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshVolume37 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshVolume37))
-                                msgs_MDIncrementalRefreshVolume37.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshVolume37_{chunk_index37}.parquet")
-                                chunk_index37 += 1
-                                msgs_MDIncrementalRefreshVolume37 = []
-
-                        elif TemplateID == 38:
-
-                            msgs_SnapshotFullRefresh38.append(
-                                main_template.SnapshotFullRefresh38(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotFullRefresh38) >= chunk_size:
-
-                                msgs_SnapshotFullRefresh38 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotFullRefresh38))
-                                msgs_SnapshotFullRefresh38.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotFullRefresh38_{chunk_index38}.parquet")
-                                chunk_index38 += 1
-                                msgs_SnapshotFullRefresh38 = []
-
-                        elif TemplateID == 39:
-
-                            msgs_QuoteRequest39.append(
-                                main_template.QuoteRequest39(messages, BlockLength, cme_packet))
-
-                            if len(msgs_QuoteRequest39) >= chunk_size:
-
-                                msgs_QuoteRequest39 = pd.DataFrame(
-                                    chain.from_iterable(msgs_QuoteRequest39))
-                                msgs_QuoteRequest39.to_parquet(
-                                    f"{save_file_path}/msgs_QuoteRequest39_{chunk_index39}.parquet")
-                                chunk_index39 += 1
-                                msgs_QuoteRequest39 = []
-
-                        elif TemplateID == 41:
-
-                            msgs_MDInstrumentDefinitionOption41.append(
-                                main_template.MDInstrumentDefinitionOption41(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionOption41) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionOption41 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionOption41))
-                                msgs_MDInstrumentDefinitionOption41.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionOption41_{chunk_index41}.parquet")
-                                chunk_index41 += 1
-                                msgs_MDInstrumentDefinitionOption41 = []
-
-                        elif TemplateID == 42:
-
-                            msgs_MDIncrementalRefreshTradeSummary42.append(
-                                main_template.MDIncrementalRefreshTradeSummary42(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshTradeSummary42) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshTradeSummary42 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary42))
-                                msgs_MDIncrementalRefreshTradeSummary42.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary42_{chunk_index42}.parquet")
-                                chunk_index42 += 1
-                                msgs_MDIncrementalRefreshTradeSummary42 = []
-
-                        elif TemplateID == 43:
-
-                            msgs_MDIncrementalRefreshOrderBook43.append(
-                                main_template.MDIncrementalRefreshOrderBook43(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshOrderBook43) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshOrderBook43 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshOrderBook43))
-                                msgs_MDIncrementalRefreshOrderBook43.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook43_{chunk_index43}.parquet")
-                                chunk_index43 += 1
-                                msgs_MDIncrementalRefreshOrderBook43 = []
-
-                        elif TemplateID == 44:
-
-                            msgs_SnapshotFullRefreshOrderBook44.append(
-                                main_template.SnapshotFullRefreshOrderBook44(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotFullRefreshOrderBook44) >= chunk_size:
-
-                                msgs_SnapshotFullRefreshOrderBook44 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotFullRefreshOrderBook44))
-                                msgs_SnapshotFullRefreshOrderBook44.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook44_{chunk_index44}.parquet")
-                                chunk_index44 += 1
-                                msgs_SnapshotFullRefreshOrderBook44 = []
-
-                        elif TemplateID == 46:
-
-                            msgs_MDIncrementalRefreshBook46.append(
-                                main_template.MDIncrementalRefreshBook46(messages, BlockLength, Version, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshBook46) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshBook46 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshBook46))
-                                msgs_MDIncrementalRefreshBook46.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshBook46_{chunk_index46}.parquet")
-                                chunk_index46 += 1
-                                msgs_MDIncrementalRefreshBook46 = []
-
-                        elif TemplateID == 47:
-
-                            msgs_MDIncrementalRefreshOrderBook47.append(
-                                main_template.MDIncrementalRefreshOrderBook47(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshOrderBook47) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshOrderBook47 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshOrderBook47))
-                                msgs_MDIncrementalRefreshOrderBook47.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook47_{chunk_index47}.parquet")
-                                chunk_index47 += 1
-                                msgs_MDIncrementalRefreshOrderBook47 = []
-
-                        elif TemplateID == 48:
-
-                            msgs_MDIncrementalRefreshTradeSummary48.append(
-                                main_template.MDIncrementalRefreshTradeSummary48(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshTradeSummary48) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshTradeSummary48 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary48))
-                                msgs_MDIncrementalRefreshTradeSummary48.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary48_{chunk_index48}.parquet")
-                                chunk_index48 += 1
-                                msgs_MDIncrementalRefreshTradeSummary48 = []
-
-                        elif TemplateID == 49:
-
-                            msgs_MDIncrementalRefreshDailyStatistics49.append(
-                                main_template.MDIncrementalRefreshDailyStatistics49(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshDailyStatistics49) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshDailyStatistics49 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics49))
-                                msgs_MDIncrementalRefreshDailyStatistics49.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics49_{chunk_index49}.parquet")
-                                chunk_index49 += 1
-                                msgs_MDIncrementalRefreshDailyStatistics49 = []
-
-                        elif TemplateID == 50:
-
-                            msgs_MDIncrementalRefreshLimitsBanding50.append(
-                                main_template.MDIncrementalRefreshLimitsBanding50(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshLimitsBanding50) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshLimitsBanding50 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding50))
-                                msgs_MDIncrementalRefreshLimitsBanding50.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding50_{chunk_index50}.parquet")
-                                chunk_index50 += 1
-                                msgs_MDIncrementalRefreshLimitsBanding50 = []
-
-                        elif TemplateID == 51:
-
-                            msgs_MDIncrementalRefreshSessionStatistics51.append(
-                                main_template.MDIncrementalRefreshSessionStatistics51(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshSessionStatistics51) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshSessionStatistics51 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics51))
-                                msgs_MDIncrementalRefreshSessionStatistics51.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics51_{chunk_index51}.parquet")
-                                chunk_index51 += 1
-                                msgs_MDIncrementalRefreshSessionStatistics51 = []
-
-                        elif TemplateID == 52:
-
-                            msgs_SnapshotFullRefresh52.append(
-                                main_template.SnapshotFullRefresh52(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotFullRefresh52) >= chunk_size:
-
-                                msgs_SnapshotFullRefresh52 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotFullRefresh52))
-                                msgs_SnapshotFullRefresh52.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotFullRefresh52_{chunk_index52}.parquet")
-                                chunk_index52 += 1
-                                msgs_SnapshotFullRefresh52 = []
-
-                        elif TemplateID == 53:
-
-                            msgs_SnapshotFullRefreshOrderBook53.append(
-                                main_template.SnapshotFullRefreshOrderBook53(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotFullRefreshOrderBook53) >= chunk_size:
-
-                                msgs_SnapshotFullRefreshOrderBook53 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotFullRefreshOrderBook53))
-                                msgs_SnapshotFullRefreshOrderBook53.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook53_{chunk_index53}.parquet")
-                                chunk_index53 += 1
-                                msgs_SnapshotFullRefreshOrderBook53 = []
-
-                        elif TemplateID == 54:
-
-                            msgs_MDInstrumentDefinitionFuture54.append(
-                                main_template.MDInstrumentDefinitionFuture54(messages, BlockLength, Version, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionFuture54) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionFuture54 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionFuture54))
-                                msgs_MDInstrumentDefinitionFuture54.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionFuture54_{chunk_index54}.parquet")
-                                chunk_index54 += 1
-                                msgs_MDInstrumentDefinitionFuture54 = []
-
-                        elif TemplateID == 55:
-
-                            msgs_MDInstrumentDefinitionOption55.append(
-                                main_template.MDInstrumentDefinitionOption55(messages, BlockLength, Version, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionOption55) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionOption55 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionOption55))
-                                msgs_MDInstrumentDefinitionOption55.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionOption55_{chunk_index55}.parquet")
-                                chunk_index55 += 1
-                                msgs_MDInstrumentDefinitionOption55 = []
-
-                        elif TemplateID == 56:
-
-                            msgs_MDInstrumentDefinitionSpread56.append(
-                                main_template.MDInstrumentDefinitionSpread56(messages, BlockLength, Version, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionSpread56) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionSpread56 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionSpread56))
-                                msgs_MDInstrumentDefinitionSpread56.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionSpread56_{chunk_index56}.parquet")
-                                chunk_index56 += 1
-                                msgs_MDInstrumentDefinitionSpread56 = []
-
-                        elif TemplateID == 57:
-
-                            msgs_MDInstrumentDefinitionFixedIncome57.append(
-                                main_template.MDInstrumentDefinitionFixedIncome57(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionFixedIncome57) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionFixedIncome57 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionFixedIncome57))
-                                msgs_MDInstrumentDefinitionFixedIncome57.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionFixedIncome57_{chunk_index57}.parquet")
-                                chunk_index57 += 1
-                                msgs_MDInstrumentDefinitionFixedIncome57 = []
-
-                        elif TemplateID == 58:
-
-                            msgs_MDInstrumentDefinitionRepo58.append(
-                                main_template.MDInstrumentDefinitionRepo58(messages, BlockLength, Version, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionRepo58) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionRepo58 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionRepo58))
-                                msgs_MDInstrumentDefinitionRepo58.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionRepo58_{chunk_index58}.parquet")
-                                chunk_index58 += 1
-                                msgs_MDInstrumentDefinitionRepo58 = []
-
-                        elif TemplateID == 59:
-
-                            msgs_SnapshotRefreshTopOrders59.append(
-                                main_template.SnapshotRefreshTopOrders59(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotRefreshTopOrders59) >= chunk_size:
-
-                                msgs_SnapshotRefreshTopOrders59 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotRefreshTopOrders59))
-                                msgs_SnapshotRefreshTopOrders59.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotRefreshTopOrders59_{chunk_index59}.parquet")
-                                chunk_index59 += 1
-                                msgs_SnapshotRefreshTopOrders59 = []
-
-                        elif TemplateID == 60:
-
-                            msgs_SecurityStatusWorkup60.append(
-                                main_template.SecurityStatusWorkup60(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SecurityStatusWorkup60) >= chunk_size:
-
-                                msgs_SecurityStatusWorkup60 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SecurityStatusWorkup60))
-                                msgs_SecurityStatusWorkup60.to_parquet(
-                                    f"{save_file_path}/msgs_SecurityStatusWorkup60_{chunk_index60}.parquet")
-                                chunk_index60 += 1
-                                msgs_SecurityStatusWorkup60 = []
-
-                        elif TemplateID == 61:
-
-                            msgs_SnapshotFullRefreshTCP61.append(
-                                main_template.SnapshotFullRefreshTCP61(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotFullRefreshTCP61) >= chunk_size:
-
-                                msgs_SnapshotFullRefreshTCP61 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotFullRefreshTCP61))
-                                msgs_SnapshotFullRefreshTCP61.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotFullRefreshTCP61_{chunk_index61}.parquet")
-                                chunk_index61 += 1
-                                msgs_SnapshotFullRefreshTCP61 = []
-
-                        elif TemplateID == 62:
-
-                            msgs_CollateralMarketValue62.append(
-                                main_template.CollateralMarketValue62(messages, BlockLength, cme_packet))
-
-                            if len(msgs_CollateralMarketValue62) >= chunk_size:
-
-                                msgs_CollateralMarketValue62 = pd.DataFrame(
-                                    chain.from_iterable(msgs_CollateralMarketValue62))
-                                msgs_CollateralMarketValue62.to_parquet(
-                                    f"{save_file_path}/msgs_CollateralMarketValue62_{chunk_index62}.parquet")
-                                chunk_index62 += 1
-                                msgs_CollateralMarketValue62 = []
-
-                        elif TemplateID == 63:
-
-                            msgs_MDInstrumentDefinitionFX63.append(
-                                main_template.MDInstrumentDefinitionFX63(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDInstrumentDefinitionFX63) >= chunk_size:
-
-                                msgs_MDInstrumentDefinitionFX63 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDInstrumentDefinitionFX63))
-                                msgs_MDInstrumentDefinitionFX63.to_parquet(
-                                    f"{save_file_path}/msgs_MDInstrumentDefinitionFX63_{chunk_index63}.parquet")
-                                chunk_index63 += 1
-                                msgs_MDInstrumentDefinitionFX63 = []
-
-                        elif TemplateID == 64:
-
-                            msgs_MDIncrementalRefreshBookLongQty64.append(
-                                main_template.MDIncrementalRefreshBookLongQty64(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshBookLongQty64) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshBookLongQty64 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshBookLongQty64))
-                                msgs_MDIncrementalRefreshBookLongQty64.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshBookLongQty64_{chunk_index64}.parquet")
-                                chunk_index64 += 1
-                                msgs_MDIncrementalRefreshBookLongQty64 = []
-
-                        elif TemplateID == 65:
-
-                            msgs_MDIncrementalRefreshTradeSummaryLongQty65.append(
-                                main_template.MDIncrementalRefreshTradeSummaryLongQty65(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshTradeSummaryLongQty65) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshTradeSummaryLongQty65 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshTradeSummaryLongQty65))
-                                msgs_MDIncrementalRefreshTradeSummaryLongQty65.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummaryLongQty65_{chunk_index65}.parquet")
-                                chunk_index65 += 1
-                                msgs_MDIncrementalRefreshTradeSummaryLongQty65 = []
-
-                        elif TemplateID == 66:
-
-                            msgs_MDIncrementalRefreshVolumeLongQty66.append(
-                                main_template.MDIncrementalRefreshVolumeLongQty66(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshVolumeLongQty66) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshVolumeLongQty66 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshVolumeLongQty66))
-                                msgs_MDIncrementalRefreshVolumeLongQty66.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshVolumeLongQty66_{chunk_index66}.parquet")
-                                chunk_index66 += 1
-                                msgs_MDIncrementalRefreshVolumeLongQty66 = []
-
-                        elif TemplateID == 67:
-
-                            msgs_MDIncrementalRefreshSessionStatisticsLongQty67.append(
-                                main_template.MDIncrementalRefreshSessionStatisticsLongQty67(messages, BlockLength, cme_packet))
-
-                            if len(msgs_MDIncrementalRefreshSessionStatisticsLongQty67) >= chunk_size:
-
-                                msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = pd.DataFrame(
-                                    chain.from_iterable(msgs_MDIncrementalRefreshSessionStatisticsLongQty67))
-                                msgs_MDIncrementalRefreshSessionStatisticsLongQty67.to_parquet(
-                                    f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatisticsLongQty67_{chunk_index67}.parquet")
-                                chunk_index67 += 1
-                                msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = []
-
-                        elif TemplateID == 68:
-
-                            msgs_SnapshotFullRefreshTCPLongQty68.append(
-                                main_template.SnapshotFullRefreshTCPLongQty68(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotFullRefreshTCPLongQty68) >= chunk_size:
-
-                                msgs_SnapshotFullRefreshTCPLongQty68 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotFullRefreshTCPLongQty68))
-                                msgs_SnapshotFullRefreshTCPLongQty68.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotFullRefreshTCPLongQty68_{chunk_index68}.parquet")
-                                chunk_index68 += 1
-                                msgs_SnapshotFullRefreshTCPLongQty68 = []
-
-                        elif TemplateID == 69:
-
-                            msgs_SnapshotFullRefreshLongQty69.append(
-                                main_template.SnapshotFullRefreshLongQty69(messages, BlockLength, cme_packet))
-
-                            if len(msgs_SnapshotFullRefreshLongQty69) >= chunk_size:
-
-                                msgs_SnapshotFullRefreshLongQty69 = pd.DataFrame(
-                                    chain.from_iterable(msgs_SnapshotFullRefreshLongQty69))
-                                msgs_SnapshotFullRefreshLongQty69.to_parquet(
-                                    f"{save_file_path}/msgs_SnapshotFullRefreshLongQty69_{chunk_index69}.parquet")
-                                chunk_index69 += 1
-                                msgs_SnapshotFullRefreshLongQty69 = []
+                        writer.decode(TemplateID, messages,
+                                      BlockLength, Version, cme_packet)
 
                     fix_repeat += MsgSize
 
@@ -866,300 +534,17 @@ def cme_parser_datamine(path, max_read_packets=None, cme_header=True,
 
                 f.seek(end_pos)  # making sure that we jump out the packet
 
-    if (len(msgs_ChannelReset4) != 0):
-        msgs_ChannelReset4 = pd.DataFrame(
-            chain.from_iterable(msgs_ChannelReset4))
-        msgs_ChannelReset4.to_parquet(
-            f"{save_file_path}/msgs_ChannelReset4.parquet")
-        del msgs_ChannelReset4
-
-    if (len(msgs_AdminLogout16) != 0):
-        msgs_AdminLogout16 = pd.DataFrame(
-            chain.from_iterable(msgs_AdminLogout16))
-        msgs_AdminLogout16.to_parquet(
-            f"{save_file_path}/msgs_AdminLogout16.parquet")
-        del msgs_AdminLogout16
-
-    if (len(msgs_MDInstrumentDefinitionFuture27) != 0):
-        msgs_MDInstrumentDefinitionFuture27 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFuture27))
-        msgs_MDInstrumentDefinitionFuture27.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFuture27.parquet")
-        del msgs_MDInstrumentDefinitionFuture27
-
-    if (len(msgs_MDInstrumentDefinitionSpread29) != 0):
-        msgs_MDInstrumentDefinitionSpread29 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionSpread29))
-        msgs_MDInstrumentDefinitionSpread29.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionSpread29.parquet")
-        del msgs_MDInstrumentDefinitionSpread29
-
-    if (len(msgs_SecurityStatus30) != 0):
-        msgs_SecurityStatus30 = pd.DataFrame(
-            chain.from_iterable(msgs_SecurityStatus30))
-        msgs_SecurityStatus30.to_parquet(
-            f"{save_file_path}/msgs_SecurityStatus30.parquet")
-        del msgs_SecurityStatus30
-
-    if (len(msgs_MDIncrementalRefreshBook32) != 0):
-        msgs_MDIncrementalRefreshBook32 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshBook32))
-        msgs_MDIncrementalRefreshBook32.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshBook32.parquet")
-        del msgs_MDIncrementalRefreshBook32
-
-    if (len(msgs_MDIncrementalRefreshDailyStatistics33) != 0):
-        msgs_MDIncrementalRefreshDailyStatistics33 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics33))
-        msgs_MDIncrementalRefreshDailyStatistics33.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics33.parquet")
-        del msgs_MDIncrementalRefreshDailyStatistics33
-
-    if (len(msgs_MDIncrementalRefreshLimitsBanding34) != 0):
-        msgs_MDIncrementalRefreshLimitsBanding34 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding34))
-        msgs_MDIncrementalRefreshLimitsBanding34.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding34.parquet")
-        del msgs_MDIncrementalRefreshLimitsBanding34
-
-    if (len(msgs_MDIncrementalRefreshSessionStatistics35) != 0):
-        msgs_MDIncrementalRefreshSessionStatistics35 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics35))
-        msgs_MDIncrementalRefreshSessionStatistics35.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics35.parquet")
-        del msgs_MDIncrementalRefreshSessionStatistics35
-
-    if (len(msgs_MDIncrementalRefreshTrade36) != 0):
-        msgs_MDIncrementalRefreshTrade36 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTrade36))
-        msgs_MDIncrementalRefreshTrade36.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTrade36.parquet")
-        del msgs_MDIncrementalRefreshTrade36
-
-    if (len(msgs_MDIncrementalRefreshVolume37) != 0):
-        msgs_MDIncrementalRefreshVolume37 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshVolume37))
-        msgs_MDIncrementalRefreshVolume37.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshVolume37.parquet")
-        del msgs_MDIncrementalRefreshVolume37
-
-    if (len(msgs_SnapshotFullRefresh38) != 0):
-        msgs_SnapshotFullRefresh38 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefresh38))
-        msgs_SnapshotFullRefresh38.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefresh38.parquet")
-        del msgs_SnapshotFullRefresh38
-
-    if (len(msgs_QuoteRequest39) != 0):
-        msgs_QuoteRequest39 = pd.DataFrame(
-            chain.from_iterable(msgs_QuoteRequest39))
-        msgs_QuoteRequest39.to_parquet(
-            f"{save_file_path}/msgs_QuoteRequest39.parquet")
-        del msgs_QuoteRequest39
-
-    if (len(msgs_MDInstrumentDefinitionOption41) != 0):
-        msgs_MDInstrumentDefinitionOption41 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionOption41))
-        msgs_MDInstrumentDefinitionOption41.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionOption41.parquet")
-        del msgs_MDInstrumentDefinitionOption41
-
-    if (len(msgs_MDIncrementalRefreshTradeSummary42) != 0):
-        msgs_MDIncrementalRefreshTradeSummary42 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary42))
-        msgs_MDIncrementalRefreshTradeSummary42.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary42.parquet")
-        del msgs_MDIncrementalRefreshTradeSummary42
-
-    if (len(msgs_MDIncrementalRefreshOrderBook43) != 0):
-        msgs_MDIncrementalRefreshOrderBook43 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshOrderBook43))
-        msgs_MDIncrementalRefreshOrderBook43.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook43.parquet")
-        del msgs_MDIncrementalRefreshOrderBook43
-
-    if (len(msgs_SnapshotFullRefreshOrderBook44) != 0):
-        msgs_SnapshotFullRefreshOrderBook44 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshOrderBook44))
-        msgs_SnapshotFullRefreshOrderBook44.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook44.parquet")
-        del msgs_SnapshotFullRefreshOrderBook44
-
-    if (len(msgs_MDIncrementalRefreshBook46) != 0):
-        msgs_MDIncrementalRefreshBook46 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshBook46))
-        msgs_MDIncrementalRefreshBook46.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshBook46.parquet")
-        del msgs_MDIncrementalRefreshBook46
-
-    if (len(msgs_MDIncrementalRefreshOrderBook47) != 0):
-        msgs_MDIncrementalRefreshOrderBook47 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshOrderBook47))
-        msgs_MDIncrementalRefreshOrderBook47.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook47.parquet")
-        del msgs_MDIncrementalRefreshOrderBook47
-
-    if (len(msgs_MDIncrementalRefreshTradeSummary48) != 0):
-        msgs_MDIncrementalRefreshTradeSummary48 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary48))
-        msgs_MDIncrementalRefreshTradeSummary48.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary48.parquet")
-        del msgs_MDIncrementalRefreshTradeSummary48
-
-    if (len(msgs_MDIncrementalRefreshDailyStatistics49) != 0):
-        msgs_MDIncrementalRefreshDailyStatistics49 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics49))
-        msgs_MDIncrementalRefreshDailyStatistics49.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics49.parquet")
-        del msgs_MDIncrementalRefreshDailyStatistics49
-
-    if (len(msgs_MDIncrementalRefreshLimitsBanding50) != 0):
-        msgs_MDIncrementalRefreshLimitsBanding50 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding50))
-        msgs_MDIncrementalRefreshLimitsBanding50.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding50.parquet")
-        del msgs_MDIncrementalRefreshLimitsBanding50
-
-    if (len(msgs_MDIncrementalRefreshSessionStatistics51) != 0):
-        msgs_MDIncrementalRefreshSessionStatistics51 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics51))
-        msgs_MDIncrementalRefreshSessionStatistics51.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics51.parquet")
-        del msgs_MDIncrementalRefreshSessionStatistics51
-
-    if (len(msgs_SnapshotFullRefresh52) != 0):
-        msgs_SnapshotFullRefresh52 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefresh52))
-        msgs_SnapshotFullRefresh52.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefresh52.parquet")
-        del msgs_SnapshotFullRefresh52
-
-    if (len(msgs_SnapshotFullRefreshOrderBook53) != 0):
-        msgs_SnapshotFullRefreshOrderBook53 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshOrderBook53))
-        msgs_SnapshotFullRefreshOrderBook53.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook53.parquet")
-        del msgs_SnapshotFullRefreshOrderBook53
-
-    if (len(msgs_MDInstrumentDefinitionFuture54) != 0):
-        msgs_MDInstrumentDefinitionFuture54 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFuture54))
-        msgs_MDInstrumentDefinitionFuture54.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFuture54.parquet")
-        del msgs_MDInstrumentDefinitionFuture54
-
-    if (len(msgs_MDInstrumentDefinitionOption55) != 0):
-        msgs_MDInstrumentDefinitionOption55 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionOption55))
-        msgs_MDInstrumentDefinitionOption55.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionOption55.parquet")
-        del msgs_MDInstrumentDefinitionOption55
-
-    if (len(msgs_MDInstrumentDefinitionSpread56) != 0):
-        msgs_MDInstrumentDefinitionSpread56 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionSpread56))
-        msgs_MDInstrumentDefinitionSpread56.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionSpread56.parquet")
-        del msgs_MDInstrumentDefinitionSpread56
-
-    if (len(msgs_MDInstrumentDefinitionFixedIncome57) != 0):
-        msgs_MDInstrumentDefinitionFixedIncome57 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFixedIncome57))
-        msgs_MDInstrumentDefinitionFixedIncome57.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFixedIncome57.parquet")
-        del msgs_MDInstrumentDefinitionFixedIncome57
-
-    if (len(msgs_MDInstrumentDefinitionRepo58) != 0):
-        msgs_MDInstrumentDefinitionRepo58 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionRepo58))
-        msgs_MDInstrumentDefinitionRepo58.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionRepo58.parquet")
-        del msgs_MDInstrumentDefinitionRepo58
-
-    if (len(msgs_SnapshotRefreshTopOrders59) != 0):
-        msgs_SnapshotRefreshTopOrders59 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotRefreshTopOrders59))
-        msgs_SnapshotRefreshTopOrders59.to_parquet(
-            f"{save_file_path}/msgs_SnapshotRefreshTopOrders59.parquet")
-        del msgs_SnapshotRefreshTopOrders59
-
-    if (len(msgs_SecurityStatusWorkup60) != 0):
-        msgs_SecurityStatusWorkup60 = pd.DataFrame(
-            chain.from_iterable(msgs_SecurityStatusWorkup60))
-        msgs_SecurityStatusWorkup60.to_parquet(
-            f"{save_file_path}/msgs_SecurityStatusWorkup60.parquet")
-        del msgs_SecurityStatusWorkup60
-
-    if (len(msgs_SnapshotFullRefreshTCP61) != 0):
-        msgs_SnapshotFullRefreshTCP61 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshTCP61))
-        msgs_SnapshotFullRefreshTCP61.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshTCP61.parquet")
-        del msgs_SnapshotFullRefreshTCP61
-
-    if (len(msgs_CollateralMarketValue62) != 0):
-        msgs_CollateralMarketValue62 = pd.DataFrame(
-            chain.from_iterable(msgs_CollateralMarketValue62))
-        msgs_CollateralMarketValue62.to_parquet(
-            f"{save_file_path}/msgs_CollateralMarketValue62.parquet")
-        del msgs_CollateralMarketValue62
-
-    if (len(msgs_MDInstrumentDefinitionFX63) != 0):
-        msgs_MDInstrumentDefinitionFX63 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFX63))
-        msgs_MDInstrumentDefinitionFX63.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFX63.parquet")
-        del msgs_MDInstrumentDefinitionFX63
-
-    if (len(msgs_MDIncrementalRefreshBookLongQty64) != 0):
-        msgs_MDIncrementalRefreshBookLongQty64 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshBookLongQty64))
-        msgs_MDIncrementalRefreshBookLongQty64.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshBookLongQty64.parquet")
-        del msgs_MDIncrementalRefreshBookLongQty64
-
-    if (len(msgs_MDIncrementalRefreshTradeSummaryLongQty65) != 0):
-        msgs_MDIncrementalRefreshTradeSummaryLongQty65 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTradeSummaryLongQty65))
-        msgs_MDIncrementalRefreshTradeSummaryLongQty65.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummaryLongQty65.parquet")
-        del msgs_MDIncrementalRefreshTradeSummaryLongQty65
-
-    if (len(msgs_MDIncrementalRefreshVolumeLongQty66) != 0):
-        msgs_MDIncrementalRefreshVolumeLongQty66 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshVolumeLongQty66))
-        msgs_MDIncrementalRefreshVolumeLongQty66.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshVolumeLongQty66.parquet")
-        del msgs_MDIncrementalRefreshVolumeLongQty66
-
-    if (len(msgs_MDIncrementalRefreshSessionStatisticsLongQty67) != 0):
-        msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshSessionStatisticsLongQty67))
-        msgs_MDIncrementalRefreshSessionStatisticsLongQty67.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatisticsLongQty67.parquet")
-        del msgs_MDIncrementalRefreshSessionStatisticsLongQty67
-
-    if (len(msgs_SnapshotFullRefreshTCPLongQty68) != 0):
-        msgs_SnapshotFullRefreshTCPLongQty68 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshTCPLongQty68))
-        msgs_SnapshotFullRefreshTCPLongQty68.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshTCPLongQty68.parquet")
-        del msgs_SnapshotFullRefreshTCPLongQty68
-
-    if (len(msgs_SnapshotFullRefreshLongQty69) != 0):
-        msgs_SnapshotFullRefreshLongQty69 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshLongQty69))
-        msgs_SnapshotFullRefreshLongQty69.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshLongQty69.parquet")
-        del msgs_SnapshotFullRefreshLongQty69
+    writer.close()
 
-    return f"PCAP file {path} cleaning finished"
+    return _run_report(writer, path, end_pos, start, report_path, return_report)
 
 
 def cme_parser_pcap(path, max_read_packets=None, msgs_template=None, cme_header=True,
-                    save_file_path=None, disable_progress_bar=True, chunk_size=5000):
+                    save_file_path=None, disable_progress_bar=True, chunk_size=5000,
+                    security_master_path=None, normalize_prices=False,
+                    report_path=None, return_report=False, profile_sample=None, bars=None):
     """
-    `cme_parser_pcap` is a binary pacaket capture (PCAP) data parser for 
+    `cme_parser_pcap` is a binary pacaket capture (PCAP) data parser for
     market data in the Chicago Mercantile Exchange (CME).
     This function applies to the real pcap data that contain both global header,
     packet header, etc. An overall data structure can be found as follows:
@@ -1174,10 +559,10 @@ def cme_parser_pcap(path, max_read_packets=None, msgs_template=None, cme_header=
     path : str
         The path of the raw data file.
     max_read_packets : int, optional
-        The maximum number of packaets need to be processed, if None, 
+        The maximum number of packaets need to be processed, if None,
         all packets are read. The default is None.
     msgs_template : list, optional
-        Types of messages need to be returned. CME provides 
+        Types of messages need to be returned. CME provides
         numbers to different message templates, e.g., the channel reset messages
         are marked as 4. Users need to give the template numbers into a list. If None,
         all messages are returned. The default is None.
@@ -1190,6 +575,32 @@ def cme_parser_pcap(path, max_read_packets=None, msgs_template=None, cme_header=
         Whether to disable the progress bar. The default is False.
     chunk_size : int
         The chunk size that needs to be saved.
+    security_master_path : str, optional
+        The path of the security master store. If given, instrument definitions
+        are added to the store while they are saved. The default is None.
+    normalize_prices : bool, optional
+        Whether to add display prices and tick indices (e.g., MDEntryPxDisplay
+        and MDEntryPxTick) to the saved messages, based on the definitions in
+        the security master and those parsed from the file. The default is False.
+    report_path : str, optional
+        The path of a JSON run report, which includes packets, messages and
+        bytes per template, time spent in decoding, building and writing chunks,
+        rows written per output file, and overall MB/s. The default is None.
+    return_report : bool, optional
+        Whether to return the run report as a dictionary instead of a message.
+        The default is False.
+    profile_sample : int, optional
+        If given, one in every `profile_sample` decoder calls of each template
+        is timed to estimate the decode time. The default is None.
+    bars : bar_builder, optional
+        A `bars.bar_builder` that receives every saved chunk of the trade
+        summaries (templates 42, 48 and 65) and is closed at the end of the
+        file. The default is None.
+
+    Returns
+    -------
+    str or dict
+        A message when the file is finished, or the run report.
 
     """
     if isnull(save_file_path):
@@ -1205,89 +616,10 @@ def cme_parser_pcap(path, max_read_packets=None, msgs_template=None, cme_header=
 
         return msgs_blocks
 
-    msgs_ChannelReset4 = []
-    msgs_AdminLogout16 = []
-    msgs_MDInstrumentDefinitionFuture27 = []
-    msgs_MDInstrumentDefinitionSpread29 = []
-    msgs_SecurityStatus30 = []
-    msgs_MDIncrementalRefreshBook32 = []
-    msgs_MDIncrementalRefreshDailyStatistics33 = []
-    msgs_MDIncrementalRefreshLimitsBanding34 = []
-    msgs_MDIncrementalRefreshSessionStatistics35 = []
-    msgs_MDIncrementalRefreshTrade36 = []
-    msgs_MDIncrementalRefreshVolume37 = []
-    msgs_SnapshotFullRefresh38 = []
-    msgs_QuoteRequest39 = []
-    msgs_MDInstrumentDefinitionOption41 = []
-    msgs_MDIncrementalRefreshTradeSummary42 = []
-    msgs_MDIncrementalRefreshOrderBook43 = []
-    msgs_SnapshotFullRefreshOrderBook44 = []
-    msgs_MDIncrementalRefreshBook46 = []
-    msgs_MDIncrementalRefreshOrderBook47 = []
-    msgs_MDIncrementalRefreshTradeSummary48 = []
-    msgs_MDIncrementalRefreshDailyStatistics49 = []
-    msgs_MDIncrementalRefreshLimitsBanding50 = []
-    msgs_MDIncrementalRefreshSessionStatistics51 = []
-    msgs_SnapshotFullRefresh52 = []
-    msgs_SnapshotFullRefreshOrderBook53 = []
-    msgs_MDInstrumentDefinitionFuture54 = []
-    msgs_MDInstrumentDefinitionOption55 = []
-    msgs_MDInstrumentDefinitionSpread56 = []
-    msgs_MDInstrumentDefinitionFixedIncome57 = []
-    msgs_MDInstrumentDefinitionRepo58 = []
-    msgs_SnapshotRefreshTopOrders59 = []
-    msgs_SecurityStatusWorkup60 = []
-    msgs_SnapshotFullRefreshTCP61 = []
-    msgs_CollateralMarketValue62 = []
-    msgs_MDInstrumentDefinitionFX63 = []
-    msgs_MDIncrementalRefreshBookLongQty64 = []
-    msgs_MDIncrementalRefreshTradeSummaryLongQty65 = []
-    msgs_MDIncrementalRefreshVolumeLongQty66 = []
-    msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = []
-    msgs_SnapshotFullRefreshTCPLongQty68 = []
-    msgs_SnapshotFullRefreshLongQty69 = []
-
-    chunk_index4 = 1
-    chunk_index16 = 1
-    chunk_index27 = 1
-    chunk_index29 = 1
-    chunk_index30 = 1
-    chunk_index32 = 1
-    chunk_index33 = 1
-    chunk_index34 = 1
-    chunk_index35 = 1
-    chunk_index36 = 1
-    chunk_index37 = 1
-    chunk_index38 = 1
-    chunk_index39 = 1
-    chunk_index41 = 1
-    chunk_index42 = 1
-    chunk_index43 = 1
-    chunk_index44 = 1
-    chunk_index46 = 1
-    chunk_index47 = 1
-    chunk_index48 = 1
-    chunk_index49 = 1
-    chunk_index50 = 1
-    chunk_index51 = 1
-    chunk_index52 = 1
-    chunk_index53 = 1
-    chunk_index54 = 1
-    chunk_index55 = 1
-    chunk_index56 = 1
-    chunk_index57 = 1
-    chunk_index58 = 1
-    chunk_index59 = 1
-    chunk_index60 = 1
-    chunk_index61 = 1
-    chunk_index62 = 1
-    chunk_index63 = 1
-    chunk_index64 = 1
-    chunk_index65 = 1
-    chunk_index66 = 1
-    chunk_index67 = 1
-    chunk_index68 = 1
-    chunk_index69 = 1
+    start = time.perf_counter()
+
+    writer = _template_writer(save_file_path, chunk_size,
+                              security_master_path, normalize_prices, profile_sample, bars)
 
     if isnull(max_read_packets):
         print('maximum number of packets read does not provide. Read the whole file by default')
@@ -1333,6 +665,7 @@ def cme_parser_pcap(path, max_read_packets=None, msgs_template=None, cme_header=
                 # find the packet length
 
                 packet_length = packet_head(f.read(16))[2]
+                writer.packets += 1
 
                 end_pos += (packet_length + 16)
 
@@ -1372,938 +705,283 @@ def cme_parser_pcap(path, max_read_packets=None, msgs_template=None, cme_header=
                 ----------------------------------------------------------------------
                 """
 
-                (MsgSize, BlockLength, TemplateID, SchemaID, Version) = struct.unpack(
-                    '<HHHHH', f.read(10))
-
-                # print
-
-                # MsgSize =12, which is heartbeat
-                # No action needed
-
-                # print(TemplateID, SchemaID, Version)
-
-                # One needs to find the template ID, Schema ID in a XML file of the correct version
-
-                if BlockLength > 0:
-
-                    # should be 16
-                    messages = f.read(MsgSize-10)
-
-                    # guding to the signle message
-
-                    if TemplateID == 4:
-
-                        msgs_ChannelReset4.append(main_template.ChannelReset4(
-                            messages, BlockLength, cme_packet))
-
-                        if len(msgs_ChannelReset4) >= chunk_size:
-                            msgs_ChannelReset4 = pd.DataFrame(
-                                chain.from_iterable(msgs_ChannelReset4))
-                            msgs_ChannelReset4.to_parquet(
-                                f"{save_file_path}/msgs_ChannelReset4_{chunk_index4}.parquet")
-                            chunk_index4 += 1
-                            msgs_ChannelReset4 = []
-
-                    elif TemplateID == 16:
-
-                        msgs_AdminLogout16.append(main_template.AdminLogout16(
-                            messages, BlockLength, cme_packet))
-
-                        if len(msgs_AdminLogout16) >= chunk_size:
-
-                            msgs_AdminLogout16 = pd.DataFrame(
-                                chain.from_iterable(msgs_AdminLogout16))
-                            msgs_AdminLogout16.to_parquet(
-                                f"{save_file_path}/msgs_AdminLogout16_{chunk_index16}.parquet")
-                            chunk_index16 += 1
-                            msgs_AdminLogout16 = []
-
-                    elif TemplateID == 27:
-
-                        msgs_MDInstrumentDefinitionFuture27.append(
-                            main_template.MDInstrumentDefinitionFuture27(messages, BlockLength, Version, cme_packet))
-
-                        if len(msgs_MDInstrumentDefinitionFuture27) >= chunk_size:
-
-                            msgs_MDInstrumentDefinitionFuture27 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionFuture27))
-                            msgs_MDInstrumentDefinitionFuture27.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionFuture27_{chunk_index27}.parquet")
-                            chunk_index27 += 1
-                            msgs_MDInstrumentDefinitionFuture27 = []
-
-                    elif TemplateID == 29:
-
-                        msgs_MDInstrumentDefinitionSpread29.append(
-                            main_template.MDInstrumentDefinitionSpread29(messages, BlockLength, Version, cme_packet))
-
-                        if len(msgs_MDInstrumentDefinitionSpread29) >= chunk_size:
-
-                            msgs_MDInstrumentDefinitionSpread29 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionSpread29))
-                            msgs_MDInstrumentDefinitionSpread29.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionSpread29_{chunk_index29}.parquet")
-                            chunk_index29 += 1
-                            msgs_MDInstrumentDefinitionSpread29 = []
-
-                    elif TemplateID == 30:
-
-                        msgs_SecurityStatus30.append(
-                            main_template.SecurityStatus30(messages, BlockLength, cme_packet))
-
-                        if len(msgs_SecurityStatus30) >= chunk_size:
-
-                            msgs_SecurityStatus30 = pd.DataFrame(
-                                chain.from_iterable(msgs_SecurityStatus30))
-                            msgs_SecurityStatus30.to_parquet(
-                                f"{save_file_path}/msgs_SecurityStatus30_{chunk_index30}.parquet")
-                            chunk_index30 += 1
-                            msgs_SecurityStatus30 = []
-
-                    elif TemplateID == 32:
-
-                        msgs_MDIncrementalRefreshBook32.append(
-                            main_template.MDIncrementalRefreshBook32(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshBook32) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshBook32 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshBook32))
-                            msgs_MDIncrementalRefreshBook32.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshBook32_{chunk_index32}.parquet")
-                            chunk_index32 += 1
-                            msgs_MDIncrementalRefreshBook32 = []
-
-                    elif TemplateID == 33:
-
-                        msgs_MDIncrementalRefreshDailyStatistics33.append(
-                            main_template.MDIncrementalRefreshDailyStatistics33(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshDailyStatistics33) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshDailyStatistics33 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics33))
-                            msgs_MDIncrementalRefreshDailyStatistics33.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics33_{chunk_index33}.parquet")
-                            chunk_index33 += 1
-                            msgs_MDIncrementalRefreshDailyStatistics33 = []
-
-                    elif TemplateID == 34:
-
-                        msgs_MDIncrementalRefreshLimitsBanding34.append(
-                            main_template.MDIncrementalRefreshLimitsBanding34(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshLimitsBanding34) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshLimitsBanding34 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding34))
-                            msgs_MDIncrementalRefreshLimitsBanding34.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding34_{chunk_index34}.parquet")
-                            chunk_index34 += 1
-                            msgs_MDIncrementalRefreshLimitsBanding34 = []
-
-                    elif TemplateID == 35:
-
-                        msgs_MDIncrementalRefreshSessionStatistics35.append(
-                            main_template.MDIncrementalRefreshSessionStatistics35(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshSessionStatistics35) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshSessionStatistics35 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics35))
-                            msgs_MDIncrementalRefreshSessionStatistics35.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics35_{chunk_index35}.parquet")
-                            chunk_index35 += 1
-                            msgs_MDIncrementalRefreshSessionStatistics35 = []
-
-                    elif TemplateID == 36:
-
-                        msgs_MDIncrementalRefreshTrade36.append(
-                            main_template.MDIncrementalRefreshTrade36(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshTrade36) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshTrade36 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshTrade36))
-                            msgs_MDIncrementalRefreshTrade36.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshTrade36_{chunk_index36}.parquet")
-                            chunk_index36 += 1
-                            msgs_MDIncrementalRefreshTrade36 = []
-
-                    elif TemplateID == 37:
-
-                        msgs_MDIncrementalRefreshVolume37.append(
-                            main_template.MDIncrementalRefreshVolume37(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshVolume37) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshVolume37 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshVolume37))
-                            msgs_MDIncrementalRefreshVolume37.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshVolume37_{chunk_index37}.parquet")
-                            chunk_index37 += 1
-                            msgs_MDIncrementalRefreshVolume37 = []
-
-                    elif TemplateID == 38:
-
-                        msgs_SnapshotFullRefresh38.append(
-                            main_template.SnapshotFullRefresh38(messages, BlockLength, cme_packet))
+                # a packet may carry several messages
+                # frames shorter than 60 bytes are padded after the messages
 
-                        if len(msgs_SnapshotFullRefresh38) >= chunk_size:
-
-                            msgs_SnapshotFullRefresh38 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotFullRefresh38))
-                            msgs_SnapshotFullRefresh38.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotFullRefresh38_{chunk_index38}.parquet")
-                            chunk_index38 += 1
-                            msgs_SnapshotFullRefresh38 = []
-
-                    elif TemplateID == 39:
-
-                        msgs_QuoteRequest39.append(
-                            main_template.QuoteRequest39(messages, BlockLength, cme_packet))
-
-                        if len(msgs_QuoteRequest39) >= chunk_size:
-
-                            msgs_QuoteRequest39 = pd.DataFrame(
-                                chain.from_iterable(msgs_QuoteRequest39))
-                            msgs_QuoteRequest39.to_parquet(
-                                f"{save_file_path}/msgs_QuoteRequest39_{chunk_index39}.parquet")
-                            chunk_index39 += 1
-                            msgs_QuoteRequest39 = []
-
-                    elif TemplateID == 41:
-
-                        msgs_MDInstrumentDefinitionOption41.append(
-                            main_template.MDInstrumentDefinitionOption41(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDInstrumentDefinitionOption41) >= chunk_size:
-
-                            msgs_MDInstrumentDefinitionOption41 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionOption41))
-                            msgs_MDInstrumentDefinitionOption41.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionOption41_{chunk_index41}.parquet")
-                            chunk_index41 += 1
-                            msgs_MDInstrumentDefinitionOption41 = []
-
-                    elif TemplateID == 42:
-
-                        msgs_MDIncrementalRefreshTradeSummary42.append(
-                            main_template.MDIncrementalRefreshTradeSummary42(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshTradeSummary42) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshTradeSummary42 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary42))
-                            msgs_MDIncrementalRefreshTradeSummary42.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary42_{chunk_index42}.parquet")
-                            chunk_index42 += 1
-                            msgs_MDIncrementalRefreshTradeSummary42 = []
-
-                    elif TemplateID == 43:
-
-                        msgs_MDIncrementalRefreshOrderBook43.append(
-                            main_template.MDIncrementalRefreshOrderBook43(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshOrderBook43) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshOrderBook43 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshOrderBook43))
-                            msgs_MDIncrementalRefreshOrderBook43.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook43_{chunk_index43}.parquet")
-                            chunk_index43 += 1
-                            msgs_MDIncrementalRefreshOrderBook43 = []
-
-                    elif TemplateID == 44:
-
-                        msgs_SnapshotFullRefreshOrderBook44.append(
-                            main_template.SnapshotFullRefreshOrderBook44(messages, BlockLength, cme_packet))
-
-                        if len(msgs_SnapshotFullRefreshOrderBook44) >= chunk_size:
-
-                            msgs_SnapshotFullRefreshOrderBook44 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotFullRefreshOrderBook44))
-                            msgs_SnapshotFullRefreshOrderBook44.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook44_{chunk_index44}.parquet")
-                            chunk_index44 += 1
-                            msgs_SnapshotFullRefreshOrderBook44 = []
-
-                    elif TemplateID == 46:
-
-                        msgs_MDIncrementalRefreshBook46.append(
-                            main_template.MDIncrementalRefreshBook46(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshBook46) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshBook46 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshBook46))
-                            msgs_MDIncrementalRefreshBook46.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshBook46_{chunk_index46}.parquet")
-                            chunk_index46 += 1
-                            msgs_MDIncrementalRefreshBook46 = []
-
-                    elif TemplateID == 47:
-
-                        msgs_MDIncrementalRefreshOrderBook47.append(
-                            main_template.MDIncrementalRefreshOrderBook47(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshOrderBook47) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshOrderBook47 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshOrderBook47))
-                            msgs_MDIncrementalRefreshOrderBook47.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook47_{chunk_index47}.parquet")
-                            chunk_index47 += 1
-                            msgs_MDIncrementalRefreshOrderBook47 = []
-
-                    elif TemplateID == 48:
-
-                        msgs_MDIncrementalRefreshTradeSummary48.append(
-                            main_template.MDIncrementalRefreshTradeSummary48(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshTradeSummary48) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshTradeSummary48 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary48))
-                            msgs_MDIncrementalRefreshTradeSummary48.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary48_{chunk_index48}.parquet")
-                            chunk_index48 += 1
-                            msgs_MDIncrementalRefreshTradeSummary48 = []
-
-                    elif TemplateID == 49:
-
-                        msgs_MDIncrementalRefreshDailyStatistics49.append(
-                            main_template.MDIncrementalRefreshDailyStatistics49(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshDailyStatistics49) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshDailyStatistics49 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics49))
-                            msgs_MDIncrementalRefreshDailyStatistics49.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics49_{chunk_index49}.parquet")
-                            chunk_index49 += 1
-                            msgs_MDIncrementalRefreshDailyStatistics49 = []
-
-                    elif TemplateID == 50:
-
-                        msgs_MDIncrementalRefreshLimitsBanding50.append(
-                            main_template.MDIncrementalRefreshLimitsBanding50(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshLimitsBanding50) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshLimitsBanding50 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding50))
-                            msgs_MDIncrementalRefreshLimitsBanding50.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding50_{chunk_index50}.parquet")
-                            chunk_index50 += 1
-                            msgs_MDIncrementalRefreshLimitsBanding50 = []
-
-                    elif TemplateID == 51:
-
-                        msgs_MDIncrementalRefreshSessionStatistics51.append(
-                            main_template.MDIncrementalRefreshSessionStatistics51(messages, BlockLength, cme_packet))
-
-                        if len(msgs_MDIncrementalRefreshSessionStatistics51) >= chunk_size:
-
-                            msgs_MDIncrementalRefreshSessionStatistics51 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics51))
-                            msgs_MDIncrementalRefreshSessionStatistics51.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics51_{chunk_index51}.parquet")
-                            chunk_index51 += 1
-                            msgs_MDIncrementalRefreshSessionStatistics51 = []
-
-                    elif TemplateID == 52:
-
-                        msgs_SnapshotFullRefresh52.append(
-                            main_template.SnapshotFullRefresh52(messages, BlockLength, cme_packet))
-
-                        if len(msgs_SnapshotFullRefresh52) >= chunk_size:
-
-                            msgs_SnapshotFullRefresh52 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotFullRefresh52))
-                            msgs_SnapshotFullRefresh52.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotFullRefresh52_{chunk_index52}.parquet")
-                            chunk_index52 += 1
-                            msgs_SnapshotFullRefresh52 = []
+                fix_repeat = 0
 
-                    elif TemplateID == 53:
+                while fix_repeat + 10 <= (packet_length-54):
 
-                        msgs_SnapshotFullRefreshOrderBook53.append(
-                            main_template.SnapshotFullRefreshOrderBook53(messages, BlockLength, cme_packet))
+                    (MsgSize, BlockLength, TemplateID, SchemaID, Version) = struct.unpack(
+                        '<HHHHH', f.read(10))
 
-                        if len(msgs_SnapshotFullRefreshOrderBook53) >= chunk_size:
+                    # MsgSize =12, which is heartbeat
+                    # No action needed
 
-                            msgs_SnapshotFullRefreshOrderBook53 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotFullRefreshOrderBook53))
-                            msgs_SnapshotFullRefreshOrderBook53.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook53_{chunk_index53}.parquet")
-                            chunk_index53 += 1
-                            msgs_SnapshotFullRefreshOrderBook53 = []
+                    # One needs to find the template ID, Schema ID in a XML file of the correct version
 
-                    elif TemplateID == 54:
+                    if MsgSize < 10:
+                        break
 
-                        msgs_MDInstrumentDefinitionFuture54.append(
-                            main_template.MDInstrumentDefinitionFuture54(messages, BlockLength, Version, cme_packet))
+                    if BlockLength > 0:
 
-                        if len(msgs_MDInstrumentDefinitionFuture54) >= chunk_size:
+                        messages = f.read(MsgSize-10)
 
-                            msgs_MDInstrumentDefinitionFuture54 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionFuture54))
-                            msgs_MDInstrumentDefinitionFuture54.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionFuture54_{chunk_index54}.parquet")
-                            chunk_index54 += 1
-                            msgs_MDInstrumentDefinitionFuture54 = []
+                        # guding to the signle message
 
-                    elif TemplateID == 55:
+                        writer.decode(TemplateID, messages,
+                                      BlockLength, Version, cme_packet)
 
-                        msgs_MDInstrumentDefinitionOption55.append(
-                            main_template.MDInstrumentDefinitionOption55(messages, BlockLength, Version, cme_packet))
+                    else:
+                        f.read(MsgSize-10)
 
-                        if len(msgs_MDInstrumentDefinitionOption55) >= chunk_size:
+                    fix_repeat += MsgSize
 
-                            msgs_MDInstrumentDefinitionOption55 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionOption55))
-                            msgs_MDInstrumentDefinitionOption55.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionOption55_{chunk_index55}.parquet")
-                            chunk_index55 += 1
-                            msgs_MDInstrumentDefinitionOption55 = []
+                if notnull(max_read_packets):
+                    read += 1
+                    pbar.update(1)
+                else:
+                    read = end_pos
+                    pbar.update(packet_length + 16)
 
-                    elif TemplateID == 56:
+                f.seek(end_pos)
 
-                        msgs_MDInstrumentDefinitionSpread56.append(
-                            main_template.MDInstrumentDefinitionSpread56(messages, BlockLength, Version, cme_packet))
+    writer.close()
 
-                        if len(msgs_MDInstrumentDefinitionSpread56) >= chunk_size:
+    return _run_report(writer, path, end_pos, start, report_path, return_report)
 
-                            msgs_MDInstrumentDefinitionSpread56 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionSpread56))
-                            msgs_MDInstrumentDefinitionSpread56.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionSpread56_{chunk_index56}.parquet")
-                            chunk_index56 += 1
-                            msgs_MDInstrumentDefinitionSpread56 = []
 
-                    elif TemplateID == 57:
+def timestamp_conversion(msgs_data, USCentralTime=True, timezone=None):
+    """
+    Convert the timestamps, including SendingTime and TransactTime.
 
-                        msgs_MDInstrumentDefinitionFixedIncome57.append(
-                            main_template.MDInstrumentDefinitionFixedIncome57(messages, BlockLength, cme_packet))
+    Parameters
+    ----------
+    msgs_data : pandas DataFrame
+        Message data need to convert timestamps.
+    USCentralTime : str, optional
+        Whether to convert the timestamp to the U.S. Central Time. The default is True.
+    timezone : str, optional
+        The target timezone needs to be converted. The default is None.
 
-                        if len(msgs_MDInstrumentDefinitionFixedIncome57) >= chunk_size:
+    Returns
+    -------
+    msgs_data : pandas DataFrame
+        message data with converted timestamps.
 
-                            msgs_MDInstrumentDefinitionFixedIncome57 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionFixedIncome57))
-                            msgs_MDInstrumentDefinitionFixedIncome57.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionFixedIncome57_{chunk_index57}.parquet")
-                            chunk_index57 += 1
-                            msgs_MDInstrumentDefinitionFixedIncome57 = []
+    """
 
-                    elif TemplateID == 58:
+    msgs_data['SendingTime'] = pd.to_datetime(
+        msgs_data['SendingTime'], utc=True, unit='ns')
+    msgs_data['TransactTime'] = pd.to_datetime(
+        msgs_data['TransactTime'], utc=True, unit='ns')
 
-                        msgs_MDInstrumentDefinitionRepo58.append(
-                            main_template.MDInstrumentDefinitionRepo58(messages, BlockLength, Version, cme_packet))
+    if USCentralTime:
 
-                        if len(msgs_MDInstrumentDefinitionRepo58) >= chunk_size:
+        msgs_data['SendingTime'] = msgs_data['SendingTime'].dt.tz_convert(
+            'America/Chicago')
+        msgs_data['TransactTime'] = msgs_data['TransactTime'].dt.tz_convert(
+            'America/Chicago')
 
-                            msgs_MDInstrumentDefinitionRepo58 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionRepo58))
-                            msgs_MDInstrumentDefinitionRepo58.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionRepo58_{chunk_index58}.parquet")
-                            chunk_index58 += 1
-                            msgs_MDInstrumentDefinitionRepo58 = []
+    else:
 
-                    elif TemplateID == 59:
+        if isnull(timezone):
+            raise Exception('Targeted timezone must be provided')
 
-                        msgs_SnapshotRefreshTopOrders59.append(
-                            main_template.SnapshotRefreshTopOrders59(messages, BlockLength, cme_packet))
+        else:
+            msgs_data['SendingTime'] = msgs_data['SendingTime'].dt.tz_convert(
+                timezone)
+            msgs_data['TransactTime'] = msgs_data['TransactTime'].dt.tz_convert(
+                timezone)
 
-                        if len(msgs_SnapshotRefreshTopOrders59) >= chunk_size:
+    return msgs_data
 
-                            msgs_SnapshotRefreshTopOrders59 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotRefreshTopOrders59))
-                            msgs_SnapshotRefreshTopOrders59.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotRefreshTopOrders59_{chunk_index59}.parquet")
-                            chunk_index59 += 1
-                            msgs_SnapshotRefreshTopOrders59 = []
 
-                    elif TemplateID == 60:
+# timestamps of the parsed messages, nanoseconds since the UNIX epoch (UTC)
 
-                        msgs_SecurityStatusWorkup60.append(
-                            main_template.SecurityStatusWorkup60(messages, BlockLength, cme_packet))
+TIMESTAMP_COLUMNS = ['SendingTime', 'TransactTime', 'LastUpdateTime', 'EventTime']
 
-                        if len(msgs_SecurityStatusWorkup60) >= chunk_size:
+# null value of the uInt64 timestamps
 
-                            msgs_SecurityStatusWorkup60 = pd.DataFrame(
-                                chain.from_iterable(msgs_SecurityStatusWorkup60))
-                            msgs_SecurityStatusWorkup60.to_parquet(
-                                f"{save_file_path}/msgs_SecurityStatusWorkup60_{chunk_index60}.parquet")
-                            chunk_index60 += 1
-                            msgs_SecurityStatusWorkup60 = []
+TIMESTAMP_NULL = 18446744073709551615
 
-                    elif TemplateID == 61:
 
-                        msgs_SnapshotFullRefreshTCP61.append(
-                            main_template.SnapshotFullRefreshTCP61(messages, BlockLength, cme_packet))
+def ns_to_datetime(values, timezone=None):
+    """
+    View int64 nanoseconds as a timezone-aware datetime array.
 
-                        if len(msgs_SnapshotFullRefreshTCP61) >= chunk_size:
+    The int64 buffer is reused without copying and the timezone is only
+    metadata of the dtype. Null timestamps need a copy to be set as NaT.
 
-                            msgs_SnapshotFullRefreshTCP61 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotFullRefreshTCP61))
-                            msgs_SnapshotFullRefreshTCP61.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotFullRefreshTCP61_{chunk_index61}.parquet")
-                            chunk_index61 += 1
-                            msgs_SnapshotFullRefreshTCP61 = []
+    Parameters
+    ----------
+    values : numpy array
+        Timestamps in nanoseconds since the UNIX epoch (UTC).
+    timezone : str, optional
+        The timezone to be displayed. If None, timestamps are in UTC.
+        The default is None.
 
-                    elif TemplateID == 62:
+    Returns
+    -------
+    pandas DatetimeArray
+        Datetimes in datetime64[ns, timezone].
 
-                        msgs_CollateralMarketValue62.append(
-                            main_template.CollateralMarketValue62(messages, BlockLength, cme_packet))
+    """
 
-                        if len(msgs_CollateralMarketValue62) >= chunk_size:
+    if isnull(timezone):
+        timezone = 'UTC'
 
-                            msgs_CollateralMarketValue62 = pd.DataFrame(
-                                chain.from_iterable(msgs_CollateralMarketValue62))
-                            msgs_CollateralMarketValue62.to_parquet(
-                                f"{save_file_path}/msgs_CollateralMarketValue62_{chunk_index62}.parquet")
-                            chunk_index62 += 1
-                            msgs_CollateralMarketValue62 = []
+    if values.dtype.kind == 'f':
+        values = np.where(np.isnan(values), np.iinfo(
+            np.int64).min, values).astype(np.int64)
 
-                    elif TemplateID == 63:
+    elif values.dtype == np.uint64:
+        null = values == TIMESTAMP_NULL
+        values = values.view(np.int64)
 
-                        msgs_MDInstrumentDefinitionFX63.append(
-                            main_template.MDInstrumentDefinitionFX63(messages, BlockLength, cme_packet))
+        if null.any():
+            values = np.where(null, np.iinfo(np.int64).min, values)
 
-                        if len(msgs_MDInstrumentDefinitionFX63) >= chunk_size:
+    values = values.view('M8[ns]')
 
-                            msgs_MDInstrumentDefinitionFX63 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDInstrumentDefinitionFX63))
-                            msgs_MDInstrumentDefinitionFX63.to_parquet(
-                                f"{save_file_path}/msgs_MDInstrumentDefinitionFX63_{chunk_index63}.parquet")
-                            chunk_index63 += 1
-                            msgs_MDInstrumentDefinitionFX63 = []
+    # the private constructor is the only one that does not copy the buffer
 
-                    elif TemplateID == 64:
+    try:
+        return pd.arrays.DatetimeArray._simple_new(values, dtype=pd.DatetimeTZDtype('ns', timezone))
 
-                        msgs_MDIncrementalRefreshBookLongQty64.append(
-                            main_template.MDIncrementalRefreshBookLongQty64(messages, BlockLength, cme_packet))
+    except AttributeError:
+        return pd.Series(values).dt.tz_localize('UTC').dt.tz_convert(timezone).array
 
-                        if len(msgs_MDIncrementalRefreshBookLongQty64) >= chunk_size:
 
-                            msgs_MDIncrementalRefreshBookLongQty64 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshBookLongQty64))
-                            msgs_MDIncrementalRefreshBookLongQty64.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshBookLongQty64_{chunk_index64}.parquet")
-                            chunk_index64 += 1
-                            msgs_MDIncrementalRefreshBookLongQty64 = []
+def timestamp_conversion_fast(msgs_data, columns=None, timezone='America/Chicago'):
+    """
+    Convert nanosecond timestamps without copying and without mutating the input.
 
-                    elif TemplateID == 65:
+    Unlike `timestamp_conversion`, any set of timestamp columns is converted and
+    the int64 nanoseconds are reused as datetime64[ns, timezone] directly.
 
-                        msgs_MDIncrementalRefreshTradeSummaryLongQty65.append(
-                            main_template.MDIncrementalRefreshTradeSummaryLongQty65(messages, BlockLength, cme_packet))
+    Parameters
+    ----------
+    msgs_data : pandas DataFrame
+        Message data need to convert timestamps.
+    columns : list, optional
+        Timestamp columns to be converted. If None, all of SendingTime,
+        TransactTime, LastUpdateTime and EventTime in the data are converted.
+        The default is None.
+    timezone : str, optional
+        The target timezone. If None, timestamps are kept in UTC.
+        The default is 'America/Chicago'.
 
-                        if len(msgs_MDIncrementalRefreshTradeSummaryLongQty65) >= chunk_size:
+    Returns
+    -------
+    msgs_data : pandas DataFrame
+        A new DataFrame with converted timestamps, other columns are shared.
 
-                            msgs_MDIncrementalRefreshTradeSummaryLongQty65 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshTradeSummaryLongQty65))
-                            msgs_MDIncrementalRefreshTradeSummaryLongQty65.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummaryLongQty65_{chunk_index65}.parquet")
-                            chunk_index65 += 1
-                            msgs_MDIncrementalRefreshTradeSummaryLongQty65 = []
+    """
 
-                    elif TemplateID == 66:
+    if columns is None:
+        columns = [x for x in TIMESTAMP_COLUMNS if x in msgs_data.columns]
 
-                        msgs_MDIncrementalRefreshVolumeLongQty66.append(
-                            main_template.MDIncrementalRefreshVolumeLongQty66(messages, BlockLength, cme_packet))
+    msgs_data = msgs_data.copy(deep=False)
 
-                        if len(msgs_MDIncrementalRefreshVolumeLongQty66) >= chunk_size:
+    for column in columns:
+        msgs_data[column] = pd.Series(ns_to_datetime(msgs_data[column].to_numpy(), timezone),
+                                      index=msgs_data.index, name=column, copy=False)
 
-                            msgs_MDIncrementalRefreshVolumeLongQty66 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshVolumeLongQty66))
-                            msgs_MDIncrementalRefreshVolumeLongQty66.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshVolumeLongQty66_{chunk_index66}.parquet")
-                            chunk_index66 += 1
-                            msgs_MDIncrementalRefreshVolumeLongQty66 = []
+    return msgs_data
 
-                    elif TemplateID == 67:
 
-                        msgs_MDIncrementalRefreshSessionStatisticsLongQty67.append(
-                            main_template.MDIncrementalRefreshSessionStatisticsLongQty67(messages, BlockLength, cme_packet))
+def timestamp_conversion_parquet(path, save_file_path, columns=None,
+                                 timezone='America/Chicago', batch_size=1000000):
+    """
+    Convert timestamps of parquet files batch by batch, without loading
+    whole files into memory.
 
-                        if len(msgs_MDIncrementalRefreshSessionStatisticsLongQty67) >= chunk_size:
+    Timestamps are saved as Arrow timestamp[ns, timezone] columns, which
+    are read back by pandas as datetime64[ns, timezone].
 
-                            msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = pd.DataFrame(
-                                chain.from_iterable(msgs_MDIncrementalRefreshSessionStatisticsLongQty67))
-                            msgs_MDIncrementalRefreshSessionStatisticsLongQty67.to_parquet(
-                                f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatisticsLongQty67_{chunk_index67}.parquet")
-                            chunk_index67 += 1
-                            msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = []
+    Parameters
+    ----------
+    path : str
+        A parquet file or a glob pattern, e.g., ".../msgs_MDIncrementalRefreshBook46*.parquet".
+    save_file_path : str
+        The directory for the converted files, which keep the same file names.
+    columns : list, optional
+        Timestamp columns to be converted. If None, all of SendingTime,
+        TransactTime, LastUpdateTime and EventTime in the files are converted.
+        The default is None.
+    timezone : str, optional
+        The target timezone. If None, timestamps are kept in UTC.
+        The default is 'America/Chicago'.
+    batch_size : int, optional
+        The number of rows converted at a time. The default is 1000000.
 
-                    elif TemplateID == 68:
+    Returns
+    -------
+    files : list
+        The converted files.
 
-                        msgs_SnapshotFullRefreshTCPLongQty68.append(
-                            main_template.SnapshotFullRefreshTCPLongQty68(messages, BlockLength, cme_packet))
+    """
 
-                        if len(msgs_SnapshotFullRefreshTCPLongQty68) >= chunk_size:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
 
-                            msgs_SnapshotFullRefreshTCPLongQty68 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotFullRefreshTCPLongQty68))
-                            msgs_SnapshotFullRefreshTCPLongQty68.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotFullRefreshTCPLongQty68_{chunk_index68}.parquet")
-                            chunk_index68 += 1
-                            msgs_SnapshotFullRefreshTCPLongQty68 = []
+    if isnull(timezone):
+        timezone = 'UTC'
 
-                    elif TemplateID == 69:
+    files = sorted(glob.glob(path))
 
-                        msgs_SnapshotFullRefreshLongQty69.append(
-                            main_template.SnapshotFullRefreshLongQty69(messages, BlockLength, cme_packet))
+    if len(files) == 0:
+        raise Exception(f'Cannot find parquet files in {path}')
 
-                        if len(msgs_SnapshotFullRefreshLongQty69) >= chunk_size:
+    converted = []
 
-                            msgs_SnapshotFullRefreshLongQty69 = pd.DataFrame(
-                                chain.from_iterable(msgs_SnapshotFullRefreshLongQty69))
-                            msgs_SnapshotFullRefreshLongQty69.to_parquet(
-                                f"{save_file_path}/msgs_SnapshotFullRefreshLongQty69_{chunk_index69}.parquet")
-                            chunk_index69 += 1
-                            msgs_SnapshotFullRefreshLongQty69 = []
+    for file in files:
 
-                if notnull(max_read_packets):
-                    read += 1
-                    pbar.update(1)
-                else:
-                    read = end_pos
-                    pbar.update(packet_length + 16)
+        parquet_file = pq.ParquetFile(file)
 
-                f.seek(end_pos)
+        # pandas metadata would still describe timestamps as integers
+        schema = parquet_file.schema_arrow.remove_metadata()
 
-    if (len(msgs_ChannelReset4) != 0):
-        msgs_ChannelReset4 = pd.DataFrame(
-            chain.from_iterable(msgs_ChannelReset4))
-        msgs_ChannelReset4.to_parquet(
-            f"{save_file_path}/msgs_ChannelReset4.parquet")
-        del msgs_ChannelReset4
-
-    if (len(msgs_AdminLogout16) != 0):
-        msgs_AdminLogout16 = pd.DataFrame(
-            chain.from_iterable(msgs_AdminLogout16))
-        msgs_AdminLogout16.to_parquet(
-            f"{save_file_path}/msgs_AdminLogout16.parquet")
-        del msgs_AdminLogout16
-
-    if (len(msgs_MDInstrumentDefinitionFuture27) != 0):
-        msgs_MDInstrumentDefinitionFuture27 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFuture27))
-        msgs_MDInstrumentDefinitionFuture27.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFuture27.parquet")
-        del msgs_MDInstrumentDefinitionFuture27
-
-    if (len(msgs_MDInstrumentDefinitionSpread29) != 0):
-        msgs_MDInstrumentDefinitionSpread29 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionSpread29))
-        msgs_MDInstrumentDefinitionSpread29.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionSpread29.parquet")
-        del msgs_MDInstrumentDefinitionSpread29
-
-    if (len(msgs_SecurityStatus30) != 0):
-        msgs_SecurityStatus30 = pd.DataFrame(
-            chain.from_iterable(msgs_SecurityStatus30))
-        msgs_SecurityStatus30.to_parquet(
-            f"{save_file_path}/msgs_SecurityStatus30.parquet")
-        del msgs_SecurityStatus30
-
-    if (len(msgs_MDIncrementalRefreshBook32) != 0):
-        msgs_MDIncrementalRefreshBook32 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshBook32))
-        msgs_MDIncrementalRefreshBook32.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshBook32.parquet")
-        del msgs_MDIncrementalRefreshBook32
-
-    if (len(msgs_MDIncrementalRefreshDailyStatistics33) != 0):
-        msgs_MDIncrementalRefreshDailyStatistics33 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics33))
-        msgs_MDIncrementalRefreshDailyStatistics33.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics33.parquet")
-        del msgs_MDIncrementalRefreshDailyStatistics33
-
-    if (len(msgs_MDIncrementalRefreshLimitsBanding34) != 0):
-        msgs_MDIncrementalRefreshLimitsBanding34 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding34))
-        msgs_MDIncrementalRefreshLimitsBanding34.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding34.parquet")
-        del msgs_MDIncrementalRefreshLimitsBanding34
-
-    if (len(msgs_MDIncrementalRefreshSessionStatistics35) != 0):
-        msgs_MDIncrementalRefreshSessionStatistics35 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics35))
-        msgs_MDIncrementalRefreshSessionStatistics35.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics35.parquet")
-        del msgs_MDIncrementalRefreshSessionStatistics35
-
-    if (len(msgs_MDIncrementalRefreshTrade36) != 0):
-        msgs_MDIncrementalRefreshTrade36 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTrade36))
-        msgs_MDIncrementalRefreshTrade36.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTrade36.parquet")
-        del msgs_MDIncrementalRefreshTrade36
-
-    if (len(msgs_MDIncrementalRefreshVolume37) != 0):
-        msgs_MDIncrementalRefreshVolume37 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshVolume37))
-        msgs_MDIncrementalRefreshVolume37.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshVolume37.parquet")
-        del msgs_MDIncrementalRefreshVolume37
-
-    if (len(msgs_SnapshotFullRefresh38) != 0):
-        msgs_SnapshotFullRefresh38 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefresh38))
-        msgs_SnapshotFullRefresh38.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefresh38.parquet")
-        del msgs_SnapshotFullRefresh38
-
-    if (len(msgs_QuoteRequest39) != 0):
-        msgs_QuoteRequest39 = pd.DataFrame(
-            chain.from_iterable(msgs_QuoteRequest39))
-        msgs_QuoteRequest39.to_parquet(
-            f"{save_file_path}/msgs_QuoteRequest39.parquet")
-        del msgs_QuoteRequest39
-
-    if (len(msgs_MDInstrumentDefinitionOption41) != 0):
-        msgs_MDInstrumentDefinitionOption41 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionOption41))
-        msgs_MDInstrumentDefinitionOption41.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionOption41.parquet")
-        del msgs_MDInstrumentDefinitionOption41
-
-    if (len(msgs_MDIncrementalRefreshTradeSummary42) != 0):
-        msgs_MDIncrementalRefreshTradeSummary42 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary42))
-        msgs_MDIncrementalRefreshTradeSummary42.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary42.parquet")
-        del msgs_MDIncrementalRefreshTradeSummary42
-
-    if (len(msgs_MDIncrementalRefreshOrderBook43) != 0):
-        msgs_MDIncrementalRefreshOrderBook43 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshOrderBook43))
-        msgs_MDIncrementalRefreshOrderBook43.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook43.parquet")
-        del msgs_MDIncrementalRefreshOrderBook43
-
-    if (len(msgs_SnapshotFullRefreshOrderBook44) != 0):
-        msgs_SnapshotFullRefreshOrderBook44 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshOrderBook44))
-        msgs_SnapshotFullRefreshOrderBook44.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook44.parquet")
-        del msgs_SnapshotFullRefreshOrderBook44
-
-    if (len(msgs_MDIncrementalRefreshBook46) != 0):
-        msgs_MDIncrementalRefreshBook46 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshBook46))
-        msgs_MDIncrementalRefreshBook46.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshBook46.parquet")
-        del msgs_MDIncrementalRefreshBook46
-
-    if (len(msgs_MDIncrementalRefreshOrderBook47) != 0):
-        msgs_MDIncrementalRefreshOrderBook47 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshOrderBook47))
-        msgs_MDIncrementalRefreshOrderBook47.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshOrderBook47.parquet")
-        del msgs_MDIncrementalRefreshOrderBook47
-
-    if (len(msgs_MDIncrementalRefreshTradeSummary48) != 0):
-        msgs_MDIncrementalRefreshTradeSummary48 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTradeSummary48))
-        msgs_MDIncrementalRefreshTradeSummary48.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummary48.parquet")
-        del msgs_MDIncrementalRefreshTradeSummary48
-
-    if (len(msgs_MDIncrementalRefreshDailyStatistics49) != 0):
-        msgs_MDIncrementalRefreshDailyStatistics49 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshDailyStatistics49))
-        msgs_MDIncrementalRefreshDailyStatistics49.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshDailyStatistics49.parquet")
-        del msgs_MDIncrementalRefreshDailyStatistics49
-
-    if (len(msgs_MDIncrementalRefreshLimitsBanding50) != 0):
-        msgs_MDIncrementalRefreshLimitsBanding50 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshLimitsBanding50))
-        msgs_MDIncrementalRefreshLimitsBanding50.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshLimitsBanding50.parquet")
-        del msgs_MDIncrementalRefreshLimitsBanding50
-
-    if (len(msgs_MDIncrementalRefreshSessionStatistics51) != 0):
-        msgs_MDIncrementalRefreshSessionStatistics51 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshSessionStatistics51))
-        msgs_MDIncrementalRefreshSessionStatistics51.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatistics51.parquet")
-        del msgs_MDIncrementalRefreshSessionStatistics51
-
-    if (len(msgs_SnapshotFullRefresh52) != 0):
-        msgs_SnapshotFullRefresh52 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefresh52))
-        msgs_SnapshotFullRefresh52.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefresh52.parquet")
-        del msgs_SnapshotFullRefresh52
-
-    if (len(msgs_SnapshotFullRefreshOrderBook53) != 0):
-        msgs_SnapshotFullRefreshOrderBook53 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshOrderBook53))
-        msgs_SnapshotFullRefreshOrderBook53.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshOrderBook53.parquet")
-        del msgs_SnapshotFullRefreshOrderBook53
-
-    if (len(msgs_MDInstrumentDefinitionFuture54) != 0):
-        msgs_MDInstrumentDefinitionFuture54 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFuture54))
-        msgs_MDInstrumentDefinitionFuture54.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFuture54.parquet")
-        del msgs_MDInstrumentDefinitionFuture54
-
-    if (len(msgs_MDInstrumentDefinitionOption55) != 0):
-        msgs_MDInstrumentDefinitionOption55 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionOption55))
-        msgs_MDInstrumentDefinitionOption55.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionOption55.parquet")
-        del msgs_MDInstrumentDefinitionOption55
-
-    if (len(msgs_MDInstrumentDefinitionSpread56) != 0):
-        msgs_MDInstrumentDefinitionSpread56 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionSpread56))
-        msgs_MDInstrumentDefinitionSpread56.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionSpread56.parquet")
-        del msgs_MDInstrumentDefinitionSpread56
-
-    if (len(msgs_MDInstrumentDefinitionFixedIncome57) != 0):
-        msgs_MDInstrumentDefinitionFixedIncome57 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFixedIncome57))
-        msgs_MDInstrumentDefinitionFixedIncome57.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFixedIncome57.parquet")
-        del msgs_MDInstrumentDefinitionFixedIncome57
-
-    if (len(msgs_MDInstrumentDefinitionRepo58) != 0):
-        msgs_MDInstrumentDefinitionRepo58 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionRepo58))
-        msgs_MDInstrumentDefinitionRepo58.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionRepo58.parquet")
-        del msgs_MDInstrumentDefinitionRepo58
-
-    if (len(msgs_SnapshotRefreshTopOrders59) != 0):
-        msgs_SnapshotRefreshTopOrders59 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotRefreshTopOrders59))
-        msgs_SnapshotRefreshTopOrders59.to_parquet(
-            f"{save_file_path}/msgs_SnapshotRefreshTopOrders59.parquet")
-        del msgs_SnapshotRefreshTopOrders59
-
-    if (len(msgs_SecurityStatusWorkup60) != 0):
-        msgs_SecurityStatusWorkup60 = pd.DataFrame(
-            chain.from_iterable(msgs_SecurityStatusWorkup60))
-        msgs_SecurityStatusWorkup60.to_parquet(
-            f"{save_file_path}/msgs_SecurityStatusWorkup60.parquet")
-        del msgs_SecurityStatusWorkup60
-
-    if (len(msgs_SnapshotFullRefreshTCP61) != 0):
-        msgs_SnapshotFullRefreshTCP61 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshTCP61))
-        msgs_SnapshotFullRefreshTCP61.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshTCP61.parquet")
-        del msgs_SnapshotFullRefreshTCP61
-
-    if (len(msgs_CollateralMarketValue62) != 0):
-        msgs_CollateralMarketValue62 = pd.DataFrame(
-            chain.from_iterable(msgs_CollateralMarketValue62))
-        msgs_CollateralMarketValue62.to_parquet(
-            f"{save_file_path}/msgs_CollateralMarketValue62.parquet")
-        del msgs_CollateralMarketValue62
-
-    if (len(msgs_MDInstrumentDefinitionFX63) != 0):
-        msgs_MDInstrumentDefinitionFX63 = pd.DataFrame(
-            chain.from_iterable(msgs_MDInstrumentDefinitionFX63))
-        msgs_MDInstrumentDefinitionFX63.to_parquet(
-            f"{save_file_path}/msgs_MDInstrumentDefinitionFX63.parquet")
-        del msgs_MDInstrumentDefinitionFX63
-
-    if (len(msgs_MDIncrementalRefreshBookLongQty64) != 0):
-        msgs_MDIncrementalRefreshBookLongQty64 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshBookLongQty64))
-        msgs_MDIncrementalRefreshBookLongQty64.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshBookLongQty64.parquet")
-        del msgs_MDIncrementalRefreshBookLongQty64
-
-    if (len(msgs_MDIncrementalRefreshTradeSummaryLongQty65) != 0):
-        msgs_MDIncrementalRefreshTradeSummaryLongQty65 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshTradeSummaryLongQty65))
-        msgs_MDIncrementalRefreshTradeSummaryLongQty65.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshTradeSummaryLongQty65.parquet")
-        del msgs_MDIncrementalRefreshTradeSummaryLongQty65
-
-    if (len(msgs_MDIncrementalRefreshVolumeLongQty66) != 0):
-        msgs_MDIncrementalRefreshVolumeLongQty66 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshVolumeLongQty66))
-        msgs_MDIncrementalRefreshVolumeLongQty66.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshVolumeLongQty66.parquet")
-        del msgs_MDIncrementalRefreshVolumeLongQty66
-
-    if (len(msgs_MDIncrementalRefreshSessionStatisticsLongQty67) != 0):
-        msgs_MDIncrementalRefreshSessionStatisticsLongQty67 = pd.DataFrame(
-            chain.from_iterable(msgs_MDIncrementalRefreshSessionStatisticsLongQty67))
-        msgs_MDIncrementalRefreshSessionStatisticsLongQty67.to_parquet(
-            f"{save_file_path}/msgs_MDIncrementalRefreshSessionStatisticsLongQty67.parquet")
-        del msgs_MDIncrementalRefreshSessionStatisticsLongQty67
-
-    if (len(msgs_SnapshotFullRefreshTCPLongQty68) != 0):
-        msgs_SnapshotFullRefreshTCPLongQty68 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshTCPLongQty68))
-        msgs_SnapshotFullRefreshTCPLongQty68.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshTCPLongQty68.parquet")
-        del msgs_SnapshotFullRefreshTCPLongQty68
-
-    if (len(msgs_SnapshotFullRefreshLongQty69) != 0):
-        msgs_SnapshotFullRefreshLongQty69 = pd.DataFrame(
-            chain.from_iterable(msgs_SnapshotFullRefreshLongQty69))
-        msgs_SnapshotFullRefreshLongQty69.to_parquet(
-            f"{save_file_path}/msgs_SnapshotFullRefreshLongQty69.parquet")
-        del msgs_SnapshotFullRefreshLongQty69
+        if columns is None:
+            ts_columns = [x for x in TIMESTAMP_COLUMNS if x in schema.names]
+        else:
+            ts_columns = [x for x in columns if x in schema.names]
 
-    return f"PCAP file {path} cleaning finished"
+        for column in ts_columns:
+            schema = schema.set(schema.get_field_index(column),
+                                pa.field(column, pa.timestamp('ns', tz=timezone)))
 
+        save_file = os.path.join(save_file_path, os.path.basename(file))
 
-def timestamp_conversion(msgs_data, USCentralTime=True, timezone=None):
-    """
-    Convert the timestamps, including SendingTime and TransactTime.
+        if os.path.abspath(save_file) == os.path.abspath(file):
+            raise Exception(
+                'Converted files cannot overwrite the input files, please use another directory')
 
-    Parameters
-    ----------
-    msgs_data : pandas DataFrame
-        Message data need to convert timestamps.
-    USCentralTime : str, optional
-        Whether to convert the timestamp to the U.S. Central Time. The default is True.
-    timezone : str, optional
-        The target timezone needs to be converted. The default is None.
+        with pq.ParquetWriter(save_file, schema) as writer:
 
-    Returns
-    -------
-    msgs_data : pandas DataFrame
-        message data with converted timestamps.
+            for batch in parquet_file.iter_batches(batch_size=batch_size):
 
-    """
+                arrays = batch.columns
 
-    msgs_data['SendingTime'] = pd.to_datetime(
-        msgs_data['SendingTime'], utc=True, unit='ns')
-    msgs_data['TransactTime'] = pd.to_datetime(
-        msgs_data['TransactTime'], utc=True, unit='ns')
+                for column in ts_columns:
+                    i = batch.schema.get_field_index(column)
+                    values = arrays[i]
 
-    if USCentralTime:
+                    if values.type == pa.uint64():
+                        values = pc.if_else(pc.equal(values, pa.scalar(TIMESTAMP_NULL, pa.uint64())),
+                                            pa.scalar(None, pa.uint64()), values)
 
-        msgs_data['SendingTime'] = msgs_data['SendingTime'].dt.tz_convert(
-            'America/Chicago')
-        msgs_data['TransactTime'] = msgs_data['TransactTime'].dt.tz_convert(
-            'America/Chicago')
+                    if values.type != pa.int64():
+                        values = values.cast(pa.int64())
 
-    else:
+                    # int64 and timestamp share the same buffer
+                    arrays[i] = values.view(pa.timestamp('ns', tz=timezone))
 
-        if isnull(timezone):
-            raise Exception('Targeted timezone must be provided')
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    arrays, schema=schema))
 
-        else:
-            msgs_data['SendingTime'] = msgs_data['SendingTime'].dt.tz_convert(
-                timezone)
-            msgs_data['TransactTime'] = msgs_data['TransactTime'].dt.tz_convert(
-                timezone)
+        converted.append(save_file)
 
-    return msgs_data
+    return converted
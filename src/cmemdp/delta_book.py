@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Compact storage of reconstructed limit order books
+
+A wide book (one row per update, 6*level price, quantity and order columns)
+is stored as the cells that change between consecutive rows plus a full
+keyframe every N rows. Prices are stored as integer ticks, quantities and
+numbers of orders as integers, so a book takes a fraction of the memory and
+disk of the wide DataFrame. Any slice of rows is decoded back into the wide
+layout by forward filling the changes from the nearest keyframe.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from pandas import isnull
+
+
+# missing cells, e.g., books before the first outright message
+
+MISSING = np.iinfo(np.int32).min
+
+META_COLUMNS = ['Date', 'TransactTime', 'Seq', 'Code', 'SendingTime', 'MsgSeq']
+
+
+def _int_dtype(values):
+    # the smallest of int32 and int64 that holds the values
+
+    if values.size == 0 or (values.min() >= np.iinfo(np.int32).min and
+                            values.max() <= np.iinfo(np.int32).max):
+        return np.int32
+
+    return np.int64
+
+
+class delta_book:
+    """
+    Delta-encoded limit order book.
+
+    Parameters
+    ----------
+    meta : pandas DataFrame
+        The columns of every row other than the book, e.g., Date,
+        TransactTime, Seq, Code, SendingTime and MsgSeq.
+    columns : list
+        The book columns, e.g., from `book_engine.book_columns`.
+    keyframes : numpy array
+        Full rows every `interval` rows, in integers.
+    delta_row, delta_col, delta_value : numpy array
+        Row, column and new value of every cell that changes.
+    tick_size : float
+        The price of one tick.
+    interval : int
+        The number of rows between keyframes.
+
+    """
+
+    def __init__(self, meta, columns, keyframes, delta_row, delta_col, delta_value,
+                 tick_size, interval):
+        self.meta = meta
+        self.columns = list(columns)
+        self.keyframes = keyframes
+        self.delta_row = delta_row
+        self.delta_col = delta_col
+        self.delta_value = delta_value
+        self.tick_size = tick_size
+        self.interval = interval
+
+    def __len__(self):
+        return self.meta.shape[0]
+
+    @property
+    def nbytes(self):
+        """
+        Memory of the encoded book arrays in bytes (without the meta columns).
+        """
+
+        return (self.keyframes.nbytes + self.delta_row.nbytes + self.delta_col.nbytes +
+                self.delta_value.nbytes)
+
+    @classmethod
+    def from_book(cls, book, tick_size, interval=10000):
+        """
+        Encoding a wide book.
+
+        Parameters
+        ----------
+        book : pandas DataFrame
+            A book from `quotes.order_book`, e.g., its 'LOB_outright'.
+        tick_size : float
+            The price of one tick in the units of the book prices.
+        interval : int, optional
+            The number of rows between keyframes. The default is 10000.
+
+        Returns
+        -------
+        delta_book
+
+        """
+
+        columns = [x for x in book.columns if x.startswith(('Bid_', 'Ask_'))]
+        meta = book[[x for x in book.columns if x not in columns]
+                    ].reset_index(drop=True)
+
+        values = book[columns].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        price = np.array(['_PX_' in x for x in columns])
+
+        # prices in ticks, quantities and orders as they are
+
+        values[:, price] = values[:, price] / tick_size
+        integers = np.round(values)
+
+        if np.nanmax(np.abs(values - integers), initial=0) > 1e-6:
+            raise Exception(
+                'Prices are not multiples of the tick size, or quantities are not integers')
+
+        integers = np.where(np.isnan(integers), MISSING,
+                            integers).astype(np.int64)
+
+        # cells that differ from the previous row
+
+        changed = np.zeros(integers.shape, dtype=bool)
+        changed[0] = True
+        changed[1:] = integers[1:] != integers[:-1]
+        delta_row, delta_col = np.nonzero(changed)
+        delta_value = integers[delta_row, delta_col]
+
+        keyframes = integers[::interval]
+        dtype = _int_dtype(integers)
+
+        return cls(meta, columns, keyframes.astype(dtype),
+                   delta_row.astype(_int_dtype(delta_row)), delta_col.astype(np.int16),
+                   delta_value.astype(dtype), tick_size, interval)
+
+    def decode_rows(self, first=0, last=None):
+        """
+        Materializing the wide book of rows first to last (exclusive).
+
+        Parameters
+        ----------
+        first : int, optional
+            The first row. The default is 0.
+        last : int, optional
+            The row after the last row. If None, all rows to the end.
+            The default is None.
+
+        Returns
+        -------
+        book : pandas DataFrame
+            The book in the original layout.
+
+        """
+
+        if isnull(last) or last > len(self):
+            last = len(self)
+
+        last = max(last, 0)
+        first = min(max(first, 0), last)
+        n, m = last - first, len(self.columns)
+
+        if n == 0:
+            values = np.zeros((0, m), dtype=np.float64)
+
+        else:
+            # start from the nearest keyframe and apply the changes after it
+
+            key = first // self.interval
+            start = key * self.interval
+
+            values = np.zeros((last - start, m), dtype=np.int64)
+            filled = np.zeros((last - start, m), dtype=bool)
+
+            values[0] = self.keyframes[key]
+            filled[0] = True
+
+            lo, hi = np.searchsorted(self.delta_row, [start + 1, last])
+            rows = self.delta_row[lo:hi].astype(np.int64) - start
+            cols = self.delta_col[lo:hi].astype(np.int64)
+
+            values[rows, cols] = self.delta_value[lo:hi]
+            filled[rows, cols] = True
+
+            # forward fill every column from its latest change
+
+            index = np.where(filled, np.arange(last - start)[:, None], 0)
+            index = np.maximum.accumulate(index, axis=0)
+            values = np.take_along_axis(values, index, axis=0)
+
+            values = values[(first - start):].astype(np.float64)
+
+        values[values == MISSING] = np.nan
+
+        price = np.array(['_PX_' in x for x in self.columns])
+        values[:, price] = values[:, price] * self.tick_size
+
+        book = pd.DataFrame(values.reshape(n, m), columns=self.columns)
+        meta = self.meta.iloc[first:last].reset_index(drop=True)
+
+        # the original column order, e.g., Date, TransactTime, Seq, Code, book, SendingTime, MsgSeq
+
+        book = pd.concat([meta, book], axis=1)
+        order = [x for x in META_COLUMNS[0:4] if x in meta.columns] + self.columns + \
+            [x for x in meta.columns if x not in META_COLUMNS[0:4]]
+
+        return book[order]
+
+    def decode(self, start=None, end=None):
+        """
+        Materializing the wide book between two times.
+
+        Parameters
+        ----------
+        start : optional
+            The first TransactTime (inclusive), in the same type as the
+            TransactTime column. If None, from the first row. The default is None.
+        end : optional
+            The last TransactTime (inclusive). If None, to the last row.
+            The default is None.
+
+        Returns
+        -------
+        book : pandas DataFrame
+            The book in the original layout.
+
+        """
+
+        time = self.meta['TransactTime'].values
+
+        first = 0 if isnull(start) else int(np.searchsorted(time, start, side='left'))
+        last = len(self) if isnull(end) else int(np.searchsorted(time, end, side='right'))
+
+        return self.decode_rows(first, last)
+
+    def save(self, path):
+        """
+        Saving the encoded book as parquet files in a directory.
+        """
+
+        os.makedirs(path, exist_ok=True)
+
+        self.meta.to_parquet(os.path.join(path, 'rows.parquet'))
+
+        pd.DataFrame(self.keyframes, columns=self.columns).to_parquet(
+            os.path.join(path, 'keyframes.parquet'))
+
+        pd.DataFrame({'Row': self.delta_row, 'Column': self.delta_col,
+                      'Value': self.delta_value}).to_parquet(os.path.join(path, 'deltas.parquet'))
+
+        with open(os.path.join(path, 'book.json'), 'w') as f:
+            json.dump({'columns': self.columns, 'tick_size': self.tick_size,
+                       'interval': self.interval}, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loading an encoded book saved by `save`.
+        """
+
+        with open(os.path.join(path, 'book.json')) as f:
+            info = json.load(f)
+
+        deltas = pd.read_parquet(os.path.join(path, 'deltas.parquet'))
+
+        return cls(pd.read_parquet(os.path.join(path, 'rows.parquet')), info['columns'],
+                   pd.read_parquet(os.path.join(path, 'keyframes.parquet')).to_numpy(),
+                   deltas['Row'].to_numpy(), deltas['Column'].to_numpy(),
+                   deltas['Value'].to_numpy(), info['tick_size'], info['interval'])
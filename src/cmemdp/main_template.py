@@ -1641,7 +1641,10 @@ def MDIncrementalRefreshOrderBook47(msgs_blocks, BlockLength, cme_packet):
     return msgs_list
 
 
-def MDIncrementalRefreshTradeSummary48(msgs_blocks, BlockLength, cme_packet):
+def MDIncrementalRefreshTradeSummary48(msgs_blocks, BlockLength, cme_packet, fills=None):
+
+    # one row per trade entry (NoMDEntries); the order entries (NoOrderIDEntries)
+    # are the fills of the trade entries and are appended to `fills` if given
 
     msgs_list = []
 
@@ -1670,22 +1673,9 @@ def MDIncrementalRefreshTradeSummary48(msgs_blocks, BlockLength, cme_packet):
             '<B', msgs_blocks[pos:(pos+1)])[0]
 
         pos += 1
-        end_group = pos + group_length*NumInGroup
 
         group_repeat = 0
 
-        # since there is reference ID so we need to make sure
-        # the order and MBP parts are connected correctly
-
-        if struct.unpack(
-                '<B', msgs_blocks[(end_group+7):(end_group+8)])[0] != 0:
-
-            msgappend = False
-
-        else:
-
-            msgappend = True
-
         while group_repeat < NumInGroup:
 
             (MDEntryPx, MDEntrySize, SecurityID,
@@ -1708,9 +1698,7 @@ def MDIncrementalRefreshTradeSummary48(msgs_blocks, BlockLength, cme_packet):
                            'MDTradeEntryID': byte_to_int(MDTradeEntryID)
                            }
 
-            if msgappend:
-
-                msgs_list.append(msgs)
+            msgs_list.append(msgs)
 
             pos += group_length
             group_repeat += 1
@@ -1734,6 +1722,8 @@ def MDIncrementalRefreshTradeSummary48(msgs_blocks, BlockLength, cme_packet):
         pos += 1
 
         group_repeat = 0
+        entries = msgs_list
+        entry, fill_index = 0, 0
 
         while group_repeat < NumInGroup:
 
@@ -1742,22 +1732,26 @@ def MDIncrementalRefreshTradeSummary48(msgs_blocks, BlockLength, cme_packet):
                 msgs_blocks[pos:(pos+group_length)]
             )
 
-            try:
-                msgs
-
-            except:
+            # the fills of the trade entries come in the order of the entries,
+            # NumberOfOrders fills for every entry
 
-                msgs = info | {'OrderID': OrderID,
-                               'LastQty': byte_to_int(LastQty)
-                               }
+            while (entry < len(entries) - 1 and
+                   fill_index >= entries[entry]['NumberOfOrders']):
+                entry += 1
+                fill_index = 0
 
-            else:
+            msgs = info | {'SecurityID': entries[entry]['SecurityID'] if entries else np.nan,
+                           'RptSeq': entries[entry]['RptSeq'] if entries else np.nan,
+                           'MDTradeEntryID': entries[entry]['MDTradeEntryID'] if entries else np.nan,
+                           'FillIndex': fill_index,
+                           'OrderID': OrderID,
+                           'LastQty': byte_to_int(LastQty)
+                           }
 
-                msgs = msgs | {'OrderID': OrderID,
-                               'LastQty': byte_to_int(LastQty)
-                               }
+            fill_index += 1
 
-            msgs_list.append(msgs)
+            if fills is not None:
+                fills.append(msgs)
 
             pos += group_length
             group_repeat += 1
@@ -1765,6 +1759,19 @@ def MDIncrementalRefreshTradeSummary48(msgs_blocks, BlockLength, cme_packet):
     return msgs_list
 
 
+def TradeSummaryFills48(msgs_blocks, BlockLength, cme_packet):
+
+    # one row per order entry (fill) of template 48, keyed by the SecurityID,
+    # RptSeq and MDTradeEntryID of its trade entry
+
+    fills = []
+
+    MDIncrementalRefreshTradeSummary48(
+        msgs_blocks, BlockLength, cme_packet, fills)
+
+    return fills
+
+
 def MDIncrementalRefreshDailyStatistics49(msgs_blocks, BlockLength, cme_packet):
 
     msgs_list = []
@@ -2205,12 +2212,12 @@ def MDInstrumentDefinitionFuture54(msgs_blocks, BlockLength, version, cme_packet
 
     if version > 9:
 
-        InstrumentGUID = struct.unpack('<8s', msgs_blocks[216:BlockLength])[0]
+        InstrumentGUID = struct.unpack('<Q', msgs_blocks[216:(216+8)])[0]
 
         if InstrumentGUID == 18446744073709551615:
             InstrumentGUID = np.nan
 
-        info = info | {'InstrumentGUID': byte_to_str(InstrumentGUID)}
+        info = info | {'InstrumentGUID': InstrumentGUID}
 
     if len(msgs_blocks) > BlockLength:
 
@@ -2419,12 +2426,12 @@ def MDInstrumentDefinitionOption55(msgs_blocks, BlockLength, version, cme_packet
 
     if version > 9:
 
-        InstrumentGUID = struct.unpack('<8s', msgs_blocks[213:BlockLength])[0]
+        InstrumentGUID = struct.unpack('<Q', msgs_blocks[213:(213+8)])[0]
 
         if InstrumentGUID == 18446744073709551615:
             InstrumentGUID = np.nan
 
-        info = info | {'InstrumentGUID': byte_to_str(InstrumentGUID)}
+        info = info | {'InstrumentGUID': InstrumentGUID}
 
     if len(msgs_blocks) > BlockLength:
 
@@ -4323,11 +4330,14 @@ def SnapshotFullRefreshLongQty69(msgs_blocks, BlockLength, cme_packet):
             if MDPriceLevel == 255:
                 MDPriceLevel = np.nan
 
+            if NumberOfOrders == 2147483647:
+                NumberOfOrders = np.nan
+
             msgs = info | {
                 'MDEntryPx': MDEntryPx,
                 'MDEntrySize': MDEntrySize,
-                'NumberOfOrders': RptSeq,
-                'MDPriceLevel': RptSeq,
+                'NumberOfOrders': NumberOfOrders,
+                'MDPriceLevel': MDPriceLevel,
                 'OpenCloseSettlFlag': OpenCloseSettlFlag,
                 'MDEntryType': byte_to_str(MDEntryType),
             }
@@ -0,0 +1,749 @@
+# -*- coding: utf-8 -*-
+"""
+Order-level limit order book engine for Market by Order (MBO) messages
+
+Every resting order is kept in an OrderID index, and the orders at every
+price are kept in a FIFO queue keyed by the tick index of the price, so the
+book can be shown at full depth, aggregated by price (MBP), or queried for
+the queue position of single orders.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+import numpy as np
+import pandas as pd
+from pandas import isnull
+from .book_engine import side_codes, book_columns, column_order
+
+
+# update actions in the MBO messages, overlay is treated as a change
+
+NEW, CHANGE, DELETE, OVERLAY = 0, 1, 2, 5
+
+
+class mbo_book:
+    """
+    Full-depth order book of many securities built from MBO messages.
+
+    Orders are indexed by OrderID as [SecurityID, side, tick, qty, priority].
+    Every security and side has a sorted list of ticks and, for every tick,
+    the total quantity, the number of orders and the queue of OrderIDs in
+    time priority (an insertion-ordered dict, so orders leave the queue in
+    O(1)).
+
+    Prices are PRICE9 integers as in the parsed messages. If a price table
+    is given, prices are keyed by tick index (price / MinPriceIncrement),
+    otherwise by the PRICE9 integer itself.
+
+    Parameters
+    ----------
+    prices : cmemdp.prices.price_table, optional
+        Tick sizes of the securities. The default is None.
+
+    """
+
+    def __init__(self, prices=None):
+        self.prices = prices
+        self.orders = {}
+        self.books = {}
+        self.LastMsgSeqNumProcessed = {}
+
+    # ------------------------------ internals ------------------------------
+
+    def _ticks(self, security, px):
+        # tick sizes of every message, 1 for unknown securities
+
+        tick = np.ones(security.shape[0], dtype=np.int64)
+
+        if self.prices is not None and len(self.prices) > 0:
+            pos, found = self.prices.lookup(security)
+            tick = np.where(found & (self.prices.MinPriceIncrement[pos] > 0),
+                            self.prices.MinPriceIncrement[pos], 1)
+
+        return tick, np.floor_divide(px, tick)
+
+    def _book(self, security):
+
+        if security not in self.books:
+            # bid and ask: sorted ticks and {tick: [qty, orders, queue]}
+            self.books[security] = ([[], {}], [[], {}])
+
+        return self.books[security]
+
+    def _add(self, OrderID, security, side, tick, qty, priority):
+
+        ticks, levels = self._book(security)[side]
+        level = levels.get(tick)
+
+        if level is None:
+            level = levels[tick] = [0, 0, {}]
+            insort(ticks, tick)
+
+        level[0] += qty
+        level[1] += 1
+        level[2][OrderID] = None
+
+        self.orders[OrderID] = [security, side, tick, qty, priority]
+
+    def _remove(self, OrderID):
+
+        security, side, tick, qty, priority = self.orders.pop(OrderID)
+        ticks, levels = self.books[security][side]
+        level = levels[tick]
+
+        level[0] -= qty
+        level[1] -= 1
+        del level[2][OrderID]
+
+        if level[1] == 0:
+            del levels[tick]
+            del ticks[bisect_left(ticks, tick)]
+
+    def _level(self, security, side, tick):
+        # price level of a tick, 1 is the best price
+
+        ticks = self.books[security][side][0]
+
+        if side == 0:
+            return len(ticks) - bisect_right(ticks, tick) + 1
+
+        return bisect_left(ticks, tick) + 1
+
+    def _top(self, security, side, level, tick_size):
+        # the best `level` price levels of a side as (price, qty, orders)
+
+        top = np.zeros((level, 3))
+
+        if security not in self.books:
+            return top
+
+        ticks, levels = self.books[security][side]
+        ticks = ticks[:-level-1:-1] if side == 0 else ticks[:level]
+
+        if len(ticks) != 0:
+            top[:len(ticks)] = [(t * tick_size, levels[t][0], levels[t][1]) for t in ticks]
+
+        return top
+
+    def _clear(self, security):
+
+        if security in self.books:
+            for side in self.books[security]:
+                for level in side[1].values():
+                    for OrderID in level[2]:
+                        del self.orders[OrderID]
+
+            del self.books[security]
+
+    def _replay(self, security, OrderID, side, tick, qty, priority, update):
+        # messages without clears applied at once. The state of an order
+        # only depends on its own messages, so every message is compared
+        # with the previous message of its order (sorted by OrderID) to find
+        # whether the order rests before it and whether it joins the end of
+        # a queue. Only the orders in the book before or after the messages
+        # are then updated one by one, in the order they joined their queues
+
+        n = OrderID.shape[0]
+
+        if n == 0:
+            return
+
+        order = np.argsort(OrderID, kind='stable')
+        security, OrderID, side, tick, qty, priority, update = (
+            x[order] for x in (security, OrderID, side, tick, qty, priority, update))
+
+        k = np.arange(n)
+        first = np.ones(n, dtype=bool)
+        first[1:] = OrderID[1:] != OrderID[:-1]
+        last = np.ones(n, dtype=bool)
+        last[:-1] = first[1:]
+        group = np.cumsum(first) - 1
+        start = np.flatnonzero(first)[group]
+
+        # the orders in the book before the messages
+
+        ids = OrderID[first].tolist()
+        resting = [self.orders.get(x) for x in ids]
+        known = np.array([x is not None for x in resting])
+        side0, tick0, priority0 = (np.array([x[i] if x is not None else 0 for x in resting],
+                                            dtype=dtype)[group]
+                                   for i, dtype in [(1, np.int64), (2, np.int64), (4, np.float64)])
+
+        def before(mask):
+            # the last message of the order before every message with mask, -1 if none
+            i = np.empty(n, dtype=np.int64)
+            i[0] = -1
+            i[1:] = np.maximum.accumulate(np.where(mask, k, -1))[:-1]
+            return np.where(i >= start, i, -1)
+
+        # an order rests after a new order or a change (added if unknown)
+        # until it is deleted, other actions keep it as it is
+
+        delete = update == DELETE
+        add = (update == NEW) | (update == CHANGE) | (update == OVERLAY)
+
+        i = np.maximum.accumulate(np.where(delete | add, k, -1))
+        alive = np.where(i >= start, add[i], known[group])
+        rests = np.where(first, known[group], np.roll(alive, 1))
+
+        effective = ~delete & (rests | add)
+
+        # the order joins the end of a queue when it is added, moves, or
+        # gets a new priority. The priority only changes when it is given
+        # or when the order joins a queue
+
+        i = before(effective)
+        moved = rests & ((np.where(i >= 0, side[i], side0) != side) |
+                         (np.where(i >= 0, tick[i], tick0) != tick))
+
+        has_priority = ~np.isnan(priority)
+        i = before(effective & (has_priority | ~rests | moved))
+        kept = np.where(i >= 0, priority[i], priority0)
+
+        requeue = effective & (~rests | moved | (has_priority & (kept != priority)))
+        kept = np.where(requeue | (effective & has_priority), priority, kept)
+
+        joined = np.maximum.accumulate(np.where(requeue, k, -1))
+        joined = np.where(joined >= start, joined, -1)[last]
+        alive = alive[last]
+
+        for x in np.unique(security[effective]).tolist():
+            self._book(x)
+
+        # orders that rested before: removed, or only their quantity changed
+
+        for x, resting_x, alive_x, joined_x, qty_x in zip(ids, resting, alive.tolist(),
+                                                          joined.tolist(), qty[last].tolist()):
+            if resting_x is None:
+                continue
+
+            if alive_x and joined_x < 0:
+                self.books[resting_x[0]][resting_x[1]][1][resting_x[2]][0] += qty_x - resting_x[3]
+                resting_x[3] = qty_x
+            else:
+                self._remove(x)
+
+        # orders that joined a queue, in the order of their last message that did
+
+        select = np.flatnonzero(alive & (joined >= 0))
+        select = select[np.argsort(order[joined[select]], kind='stable')]
+        e = np.flatnonzero(last)[select]
+
+        for x, sec, s, t, q, p in zip(np.array(ids, dtype=object)[select].tolist(),
+                                      security[e].tolist(), side[e].tolist(), tick[e].tolist(),
+                                      qty[e].tolist(), kept[e].tolist()):
+            self._add(x, sec, s, t, q, p)
+
+    # ------------------------------ messages -------------------------------
+
+    def reset(self, security=None):
+        """
+        Remove all orders of a security, or of all securities if None.
+        """
+
+        if security is None:
+            self.orders, self.books = {}, {}
+            self.LastMsgSeqNumProcessed = {}
+
+        else:
+            self._clear(security)
+            self.LastMsgSeqNumProcessed.pop(security, None)
+
+    def snapshot(self, data):
+        """
+        Loading snapshot messages (template 53 or 44).
+
+        The book of a security is replaced by the orders in its snapshot,
+        i.e., it is cleared at the first chunk and orders of all chunks are
+        queued by MDOrderPriority. LastMsgSeqNumProcessed of every security
+        is kept, so that incrementals already in the snapshot can be skipped.
+
+        Parameters
+        ----------
+        data : pandas DataFrame
+            Parsed 'msgs_SnapshotFullRefreshOrderBook53' messages.
+
+        """
+
+        if data.shape[0] == 0:
+            return
+
+        data = data.sort_values(['SecurityID', 'LastMsgSeqNumProcessed', 'CurrentChunk',
+                                 'MDOrderPriority'], kind='stable')
+
+        security = data['SecurityID'].to_numpy(dtype=np.int64)
+        px = data['MDEntryPx'].to_numpy(dtype=np.int64)
+        _, tick = self._ticks(security, px)
+        side = side_codes(data['MDEntryType'])
+
+        qty = data['MDDisplayQty'].to_numpy(dtype=np.float64, na_value=0)
+        priority = data['MDOrderPriority'].to_numpy(
+            dtype=np.float64, na_value=np.nan)
+
+        for (sec, seq, chunk, OrderID, s, t, q, p) in zip(security.tolist(),
+                                                          data['LastMsgSeqNumProcessed'].tolist(),
+                                                          data['CurrentChunk'].tolist(),
+                                                          data['OrderID'].tolist(),
+                                                          side.tolist(), tick.tolist(),
+                                                          qty.tolist(), priority.tolist()):
+
+            if chunk == 1 and self.LastMsgSeqNumProcessed.get(sec) != seq:
+                self._clear(sec)
+                self.LastMsgSeqNumProcessed[sec] = seq
+
+            if s < 0:
+                continue
+
+            if OrderID in self.orders:
+                self._remove(OrderID)
+
+            self._add(OrderID, sec, s, t, q, p)
+
+    def apply(self, data, events=True, queue=False, level=None):
+        """
+        Applying incremental MBO messages (template 47 or 43) in their order.
+
+        New orders join the end of the queue at their price. A change keeps
+        the queue position if the price and MDOrderPriority are unchanged
+        (e.g., a partial fill or a size decrease), otherwise the order joins
+        the end of the queue at its new price. A delete removes the order.
+        Changes of unknown orders are added as new orders, and deletes of
+        unknown orders are ignored. Entries that are neither bids nor asks
+        (e.g., the empty book 'J') clear the book of the security. Messages
+        of a security already in its snapshot (MsgSeq not after the
+        LastMsgSeqNumProcessed of the snapshot) are skipped.
+
+        Parameters
+        ----------
+        data : pandas DataFrame
+            Parsed 'msgs_MDIncrementalRefreshOrderBook47' messages, ordered
+            as received.
+        events : bool, optional
+            Whether to return the order events. The default is True.
+        queue : bool, optional
+            Whether to add the queue position of every order after the
+            message (before it for deletes). This walks the queue of the
+            price, so it is slower on deep queues. The default is False.
+        level : int, optional
+            If given, the book of the security of every message after the
+            message, aggregated by price to `level` levels on each side, is
+            added to the events in the columns of
+            `cmemdp.book_engine.book_columns(level)`, with PRICE9 prices.
+            Levels beyond the book are 0. The default is None.
+
+        Returns
+        -------
+        events : pandas DataFrame
+            The messages with Side (0 bid, 1 ask), Tick, the previous tick
+            and quantity of the order (PrevTick, PrevQty, missing for new
+            orders), the price level of the order after the message (Level,
+            1 is the best price), if queue is True, the number of orders
+            and the quantity ahead of the order in its queue (OrdersAhead,
+            QtyAhead), and if level is given, the book after the message.
+            None if events is False.
+
+        """
+
+        if len(self.LastMsgSeqNumProcessed) != 0 and 'MsgSeq' in data.columns:
+            last = data['SecurityID'].map(self.LastMsgSeqNumProcessed)
+            data = data.loc[~(data['MsgSeq'] <= last).values]
+
+        n = data.shape[0]
+
+        security = data['SecurityID'].to_numpy(dtype=np.int64)
+        px = data['MDEntryPx'].to_numpy(dtype=np.int64)
+        tick_size, tick = self._ticks(security, px)
+        side = side_codes(data['MDEntryType'])
+
+        qty = data['MDDisplayQty'].to_numpy(dtype=np.float64, na_value=0)
+        priority = data['MDOrderPriority'].to_numpy(
+            dtype=np.float64, na_value=np.nan)
+        update = data['MDUpdateAction'].to_numpy(dtype=np.int64)
+
+        if not events:
+
+            # only the book after the messages is needed, so the messages
+            # between two clears are applied together, see `_replay`
+
+            OrderID = data['OrderID'].to_numpy()
+            start = 0
+
+            for k in np.flatnonzero(side < 0).tolist() + [n]:
+                x = slice(start, k)
+                self._replay(security[x], OrderID[x], side[x], tick[x], qty[x],
+                             priority[x], update[x])
+
+                if k < n:
+                    self._clear(int(security[k]))
+
+                start = k + 1
+
+            return None
+
+        books = None
+
+        if events:
+            prev_tick = np.full(n, np.nan)
+            prev_qty = np.full(n, np.nan)
+            price_level = np.zeros(n, dtype=np.int64)
+
+            if level is not None:
+                # books are only built when the best prices change, other
+                # messages point to the last book of their security
+
+                books = np.empty((n, 2, level, 3))
+                book_of = np.arange(n)
+                last_book = {}
+
+        if queue:
+            ahead = np.zeros(n, dtype=np.int64)
+            qty_ahead = np.zeros(n)
+
+        orders = self.orders
+
+        for k, (sec, OrderID, s, t, q, p, u, size) in enumerate(zip(security.tolist(),
+                                                                    data['OrderID'].tolist(),
+                                                                    side.tolist(), tick.tolist(),
+                                                                    qty.tolist(), priority.tolist(),
+                                                                    update.tolist(),
+                                                                    tick_size.tolist())):
+
+            # sides of the book changed by the message, and the sides whose
+            # best `level` prices changed
+
+            sides = ()
+            stale = ()
+
+            if s < 0:
+                self._clear(sec)
+                sides = stale = (0, 1)
+
+            else:
+                order = orders.get(OrderID)
+
+                if order is not None and events:
+                    prev_tick[k], prev_qty[k] = order[2], order[3]
+
+                if u == DELETE:
+
+                    if order is not None:
+                        s, t = order[1], order[2]
+
+                        if events:
+                            price_level[k] = self._level(sec, s, t)
+                        if queue:
+                            ahead[k], qty_ahead[k] = self.position(OrderID)
+
+                        self._remove(OrderID)
+                        sides = (s,)
+
+                        if books is not None and price_level[k] <= level:
+                            stale = sides
+
+                else:
+
+                    if order is not None:
+                        sides = (s,) if order[1] == s else (0, 1)
+
+                        # same price and priority: the order keeps its place
+
+                        if order[2] == t and order[1] == s and (order[4] == p or p != p):
+                            level_k = self.books[sec][s][1][t]
+                            level_k[0] += q - order[3]
+                            order[3] = q
+
+                        else:
+                            if books is not None and self._level(sec, order[1], order[2]) <= level:
+                                stale = (order[1],)
+
+                            self._remove(OrderID)
+                            self._add(OrderID, sec, s, t, q, p)
+
+                    elif u in (NEW, CHANGE, OVERLAY):
+                        self._add(OrderID, sec, s, t, q, p)
+                        sides = (s,)
+
+                    if len(sides) != 0:
+                        if events:
+                            price_level[k] = self._level(sec, s, t)
+
+                            if books is not None and price_level[k] <= level:
+                                stale = tuple(sorted({s, *stale}))
+                        if queue:
+                            ahead[k], qty_ahead[k] = self.position(OrderID)
+
+            if books is not None:
+                j = last_book.get(sec)
+
+                if j is None:
+                    books[k, 0] = self._top(sec, 0, level, size)
+                    books[k, 1] = self._top(sec, 1, level, size)
+                    last_book[sec] = k
+
+                elif len(stale) != 0:
+                    books[k] = books[j]
+
+                    for x in stale:
+                        books[k, x] = self._top(sec, x, level, size)
+
+                    last_book[sec] = k
+
+                else:
+                    book_of[k] = j
+
+        if not events:
+            return None
+
+        events = data.copy(deep=False)
+        events['Side'] = side
+        events['Tick'] = tick
+        events['PrevTick'] = prev_tick
+        events['PrevQty'] = prev_qty
+        events['Level'] = price_level
+
+        if queue:
+            events['OrdersAhead'] = ahead
+            events['QtyAhead'] = qty_ahead
+
+        if books is not None:
+            books = books[book_of].reshape(n, 6 * level)[:, column_order(level)]
+            events = pd.concat([events, pd.DataFrame(books, columns=book_columns(level),
+                                                     index=events.index)], axis=1)
+
+        return events
+
+    # ------------------------------- views ---------------------------------
+
+    def position(self, OrderID):
+        """
+        The number of orders and the quantity ahead of an order in its queue.
+        """
+
+        security, side, tick, qty, priority = self.orders[OrderID]
+        level = self.books[security][side][1][tick]
+
+        n, total = 0, 0
+
+        for x in level[2]:
+            if x == OrderID:
+                break
+            n += 1
+            total += self.orders[x][3]
+
+        return n, total
+
+    def queue(self, security, side, tick):
+        """
+        Orders at one price in time priority.
+
+        Parameters
+        ----------
+        security : int
+            SecurityID.
+        side : int
+            0 for bids and 1 for asks.
+        tick : int
+            The tick index (or PRICE9 price without a price table).
+
+        Returns
+        -------
+        pandas DataFrame
+            OrderID, MDOrderPriority and MDDisplayQty of the queue.
+
+        """
+
+        levels = self._book(security)[side][1]
+        queue = levels[tick][2] if tick in levels else {}
+
+        return pd.DataFrame({'OrderID': list(queue),
+                             'MDOrderPriority': [self.orders[x][4] for x in queue],
+                             'MDDisplayQty': [self.orders[x][3] for x in queue]})
+
+    def depth(self, security, level=None):
+        """
+        Book of a security aggregated by price (MBP) at full depth.
+
+        Parameters
+        ----------
+        security : int
+            SecurityID.
+        level : int, optional
+            The number of price levels on each side. If None, all levels
+            are shown. The default is None.
+
+        Returns
+        -------
+        pandas DataFrame
+            MDEntryType ('0' bid, '1' ask), MDPriceLevel, Tick, MDEntryPx,
+            MDEntrySize and NumberOfOrders, best prices first.
+
+        """
+
+        book = self._book(security)
+        tick_size = int(self._ticks(np.array([security]), np.zeros(1, dtype=np.int64))[0][0])
+
+        rows = []
+
+        for side, (ticks, levels) in enumerate(book):
+
+            ticks = ticks[::-1] if side == 0 else ticks
+
+            if not isnull(level):
+                ticks = ticks[0:level]
+
+            rows += [(str(side), i + 1, t, t * tick_size, levels[t][0], levels[t][1])
+                     for i, t in enumerate(ticks)]
+
+        return pd.DataFrame(rows, columns=['MDEntryType', 'MDPriceLevel', 'Tick', 'MDEntryPx',
+                                           'MDEntrySize', 'NumberOfOrders'])
+
+    def to_snapshot(self, security, LastMsgSeqNumProcessed=0):
+        """
+        Orders of a security in the layout of template 53, in queue order.
+
+        The result can be loaded into another book by `snapshot`, which
+        keeps the queues as long as the priorities follow the queues.
+
+        Parameters
+        ----------
+        security : int
+            SecurityID.
+        LastMsgSeqNumProcessed : int, optional
+            The last packet sequence number in the book. The default is 0.
+
+        Returns
+        -------
+        pandas DataFrame
+            SecurityID, LastMsgSeqNumProcessed, CurrentChunk, OrderID,
+            MDOrderPriority, MDEntryPx, MDDisplayQty and MDEntryType.
+
+        """
+
+        tick_size = int(self._ticks(np.array([security]), np.zeros(1, dtype=np.int64))[0][0])
+        rows = []
+
+        for side, (ticks, levels) in enumerate(self._book(security)):
+            for t in ticks:
+                rows += [(x, self.orders[x][4], t * tick_size, self.orders[x][3], str(side))
+                         for x in levels[t][2]]
+
+        snapshot = pd.DataFrame(rows, columns=['OrderID', 'MDOrderPriority', 'MDEntryPx',
+                                               'MDDisplayQty', 'MDEntryType'])
+        snapshot.insert(0, 'SecurityID', security)
+        snapshot.insert(1, 'LastMsgSeqNumProcessed', LastMsgSeqNumProcessed)
+        snapshot.insert(2, 'CurrentChunk', 1)
+
+        return snapshot
+
+    def order_table(self):
+        """
+        All resting orders as a DataFrame.
+        """
+
+        return pd.DataFrame(
+            [[OrderID] + x for OrderID, x in self.orders.items()],
+            columns=['OrderID', 'SecurityID', 'Side', 'Tick', 'MDDisplayQty', 'MDOrderPriority'])
+
+
+def orders_from_mbp(data):
+    """
+    Order entries carried by MBP messages (template 46) in the layout of
+    template 47.
+
+    Orders within the MBP depth are sent with the MBP update in template 46
+    (NoOrderIDEntries) instead of template 47. Combined with template 47 and
+    sorted by MsgSeq, they complete the order flow.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        Parsed 'msgs_MDIncrementalRefreshBook46' messages.
+
+    Returns
+    -------
+    pandas DataFrame
+        Order entries with MDUpdateAction from OrderUpdateAction.
+
+    """
+
+    if 'OrderID' not in data.columns:
+        return pd.DataFrame(columns=['SecurityID', 'OrderID', 'MDOrderPriority', 'MDEntryPx',
+                                     'MDDisplayQty', 'MDUpdateAction', 'MDEntryType'])
+
+    orders = data.loc[data['OrderID'].notna()].drop(
+        columns=['MDUpdateAction', 'MDEntrySize', 'NumberOfOrders', 'MDPriceLevel', 'RptSeq',
+                 'ReferenceID'], errors='ignore')
+
+    return orders.rename(columns={'OrderUpdateAction': 'MDUpdateAction'})
+
+
+def fill_table(fills, trades=None, orders=None):
+    """
+    Fills of resting and aggressor orders from trade summaries (template 48).
+
+    The order entries (NoOrderIDEntries) of template 48 are saved by the
+    parsers as 'msgs_TradeSummaryFills48', one row per fill keyed by the
+    SecurityID and RptSeq of its trade entry. With the trade entries, every
+    fill gets the trade price, size and aggressor side of its entry, and
+    with the MBO messages, every fill is joined to the order events of its
+    OrderID.
+
+    Parameters
+    ----------
+    fills : pandas DataFrame
+        Parsed 'msgs_TradeSummaryFills48' messages.
+    trades : pandas DataFrame, optional
+        Parsed 'msgs_MDIncrementalRefreshTradeSummary48' messages.
+        The default is None.
+    orders : pandas DataFrame, optional
+        Template 47 messages (and `orders_from_mbp`) in their original order
+        with OrderID and MsgSeq. The default is None.
+
+    Returns
+    -------
+    fills : pandas DataFrame
+        One row per fill. With `orders`, OrderEvent is the row position in
+        `orders` of the last event of the order in an earlier packet (the
+        order as it rested when filled), and NextOrderEvent the first event
+        in the same or a later packet (the update after the fill), -1 if none.
+
+    """
+
+    columns = ['MsgSeq', 'SendingTime', 'TransactTime', 'SecurityID', 'RptSeq', 'MDTradeEntryID',
+               'FillIndex', 'OrderID', 'LastQty']
+
+    if 'OrderID' not in fills.columns:
+        fills = pd.DataFrame(columns=columns)
+
+    fills = fills[[x for x in columns if x in fills.columns]]
+    fills = fills.astype({'SecurityID': np.int64, 'RptSeq': np.int64, 'OrderID': np.int64})
+
+    # the trade entry of every fill
+
+    if trades is not None:
+        entries = trades.loc[trades['SecurityID'].notna(),
+                             ['SecurityID', 'RptSeq', 'MDEntryPx', 'MDEntrySize',
+                              'AggressorSide']].drop_duplicates(['SecurityID', 'RptSeq'])
+        entries = entries.astype({'SecurityID': np.int64, 'RptSeq': np.int64})
+
+        fills = fills.merge(entries, on=['SecurityID', 'RptSeq'], how='left')
+
+    if orders is None:
+        return fills
+
+    events = pd.DataFrame({'OrderID': orders['OrderID'].to_numpy(dtype=np.int64),
+                           'MsgSeq': orders['MsgSeq'].to_numpy(dtype=np.int64),
+                           'Event': np.arange(orders.shape[0])}).sort_values('MsgSeq', kind='stable')
+
+    left = pd.DataFrame({'OrderID': fills['OrderID'].to_numpy(),
+                         'MsgSeq': fills['MsgSeq'].to_numpy(dtype=np.int64),
+                         'Fill': np.arange(fills.shape[0])}).sort_values('MsgSeq', kind='stable')
+
+    before = pd.merge_asof(left, events, on='MsgSeq', by='OrderID', allow_exact_matches=False)
+    after = pd.merge_asof(left, events, on='MsgSeq', by='OrderID', direction='forward')
+
+    fills['OrderEvent'] = before.set_index('Fill')['Event'].reindex(
+        np.arange(fills.shape[0])).fillna(-1).to_numpy(dtype=np.int64)
+    fills['NextOrderEvent'] = after.set_index('Fill')['Event'].reindex(
+        np.arange(fills.shape[0])).fillna(-1).to_numpy(dtype=np.int64)
+
+    return fills
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Reading the parquet files saved by the parsers
+
+The parsers save the messages of every template as msgs_{decoder name}.parquet,
+or as msgs_{decoder name}_{n}.parquet when the messages are saved in chunks.
+"""
+
+import glob
+import numpy as np
+
+
+def parsed_files(save_file_path, name):
+    """
+    Parsed files of one template in the order they were written.
+
+    Parameters
+    ----------
+    save_file_path : str
+        The directory of the parsed files.
+    name : str
+        The decoder name, e.g., 'MDIncrementalRefreshBook46'.
+
+    Returns
+    -------
+    files : list
+        Chunks in the order of their index, followed by the unnumbered last
+        chunk of the parser run.
+
+    """
+
+    files = sorted(glob.glob(f"{save_file_path}/msgs_{name}_*.parquet"),
+                   key=lambda x: int(x.rsplit('_', 1)[1].split('.')[0]))
+    files += glob.glob(f"{save_file_path}/msgs_{name}.parquet")
+
+    return files
+
+
+def security_filter(security):
+    """
+    Parquet filters (predicate pushdown) on SecurityID.
+
+    Parameters
+    ----------
+    security : int or list
+        SecurityIDs of interest. If None, no filters are returned.
+
+    Returns
+    -------
+    list or None
+        Filters for `pandas.read_parquet`.
+
+    """
+
+    if security is None:
+        return None
+
+    security = [security] if np.isscalar(security) else security
+
+    return [('SecurityID', 'in', [int(x) for x in security])]
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Price normalization based on the instrument definitions
+
+Prices in the MDP 3.0 messages are PRICE9 integers. The display price is
+the price times 1e-9 times the display factor of the security, and the tick
+index is the price divided by the minimum price increment.
+"""
+
+import glob
+import numpy as np
+import pandas as pd
+
+
+# null value of the PRICE9 and PRICENULL9 types
+
+PRICE_NULL = 9223372036854775807
+
+# price columns of the parsed templates
+
+PRICE_COLUMNS = ['MDEntryPx', 'LastPx', 'TradingReferencePrice', 'HighLimitPrice',
+                 'LowLimitPrice', 'MaxPriceVariation', 'StrikePrice']
+
+
+class price_table:
+    """
+    Lookup table from SecurityID to the display factor and tick size.
+
+    SecurityIDs are kept sorted in a NumPy array, so a column of SecurityIDs
+    is mapped into the table with one `searchsorted`.
+
+    Parameters
+    ----------
+    definitions : pandas DataFrame, optional
+        Instrument definitions with SecurityID, DisplayFactor and
+        MinPriceIncrement columns. The default is None.
+
+    """
+
+    def __init__(self, definitions=None):
+        self.SecurityID = np.array([], dtype=np.int64)
+        self.DisplayFactor = np.array([], dtype=np.float64)
+        self.MinPriceIncrement = np.array([], dtype=np.int64)
+
+        if definitions is not None:
+            self.update(definitions)
+
+    @classmethod
+    def from_security_master(cls, security_master, date=None):
+        """
+        Build the table from the securities effective on a given date.
+
+        Parameters
+        ----------
+        security_master : cmemdp.security_master.security_master
+            The security master.
+        date : str, int or datetime, optional
+            The date of interest. If None, the latest definitions are used.
+            The default is None.
+
+        """
+
+        return cls(security_master.to_frame(date))
+
+    @classmethod
+    def from_parquet(cls, save_file_path):
+        """
+        Build the table from the definition files saved by the parsers.
+
+        Parameters
+        ----------
+        save_file_path : str
+            The directory that contains msgs_MDInstrumentDefinition*.parquet files.
+
+        """
+
+        table = cls()
+
+        for file in sorted(glob.glob(f"{save_file_path}/msgs_MDInstrumentDefinition*.parquet")):
+            definitions = pd.read_parquet(file)
+
+            if 'DisplayFactor' in definitions.columns:
+                table.update(definitions)
+
+        return table
+
+    def __len__(self):
+        return self.SecurityID.shape[0]
+
+    def update(self, definitions):
+        """
+        Add or replace securities in the table. Later definitions win.
+
+        Parameters
+        ----------
+        definitions : pandas DataFrame
+            Instrument definitions with SecurityID, DisplayFactor and
+            MinPriceIncrement columns.
+
+        """
+
+        definitions = definitions[['SecurityID', 'DisplayFactor', 'MinPriceIncrement']].dropna(
+            subset=['SecurityID'])
+
+        table = pd.concat([pd.DataFrame({'SecurityID': self.SecurityID,
+                                         'DisplayFactor': self.DisplayFactor,
+                                         'MinPriceIncrement': self.MinPriceIncrement}),
+                           definitions.assign(DisplayFactor=definitions['DisplayFactor'] * 1e-9)],
+                          ignore_index=True)
+
+        table = table.drop_duplicates('SecurityID', keep='last').sort_values(
+            'SecurityID')
+
+        self.SecurityID = table['SecurityID'].to_numpy(dtype=np.int64)
+        self.DisplayFactor = table['DisplayFactor'].to_numpy(
+            dtype=np.float64, na_value=np.nan)
+        self.MinPriceIncrement = table['MinPriceIncrement'].to_numpy(
+            dtype=np.float64, na_value=0).astype(np.int64)
+
+    def lookup(self, security_id):
+        """
+        Positions of SecurityIDs in the table.
+
+        Parameters
+        ----------
+        security_id : array-like
+            SecurityIDs.
+
+        Returns
+        -------
+        pos : numpy array
+            Positions in the table.
+        found : numpy array
+            Whether the SecurityID is in the table.
+
+        """
+
+        security_id = np.asarray(security_id, dtype=np.int64)
+
+        if len(self) == 0:
+            return np.zeros(security_id.shape, dtype=np.int64), np.zeros(security_id.shape, dtype=bool)
+
+        pos = np.searchsorted(self.SecurityID, security_id)
+        pos = np.minimum(pos, len(self) - 1)
+        found = self.SecurityID[pos] == security_id
+
+        return pos, found
+
+    def normalize(self, data, price_columns=None, tick_index=True):
+        """
+        Add display prices and integer tick indices to message data.
+
+        For every price column `X`, `XDisplay` holds the display price and
+        `XTick` holds the number of ticks (nullable integer). Rows with null
+        prices or unknown securities are left missing.
+
+        Parameters
+        ----------
+        data : pandas DataFrame
+            Message data with a SecurityID column.
+        price_columns : list, optional
+            Price columns to be normalized. If None, all known price columns
+            in data are normalized. The default is None.
+        tick_index : bool, optional
+            Whether to add the tick index columns. The default is True.
+
+        Returns
+        -------
+        data : pandas DataFrame
+            Message data with normalized prices.
+
+        """
+
+        if price_columns is None:
+            price_columns = [x for x in PRICE_COLUMNS if x in data.columns]
+
+        data = data.copy(deep=False)
+
+        pos, found = self.lookup(
+            data['SecurityID'].to_numpy(dtype=np.float64, na_value=-1))
+        display_factor = np.where(found, self.DisplayFactor[pos], np.nan)
+        tick = np.where(found, self.MinPriceIncrement[pos], 0)
+
+        for column in price_columns:
+
+            px = data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = found & ~np.isnan(px) & (px != PRICE_NULL)
+
+            data[f'{column}Display'] = np.where(
+                valid, px * 1e-9 * display_factor, np.nan)
+
+            if tick_index:
+                valid = valid & (tick > 0)
+                ticks = np.floor_divide(np.where(valid, px, 0).astype(np.int64),
+                                        np.where(valid, tick, 1))
+                data[f'{column}Tick'] = pd.arrays.IntegerArray(ticks, ~valid)
+
+        return data
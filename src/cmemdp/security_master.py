@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Security master built from CME instrument definition messages
+
+Instrument definitions (templates 27, 29, 41, 54, 55 and 56) are kept in an
+on-disk SQLite store keyed by SecurityID and the effective date, so that the
+display factor, tick size, symbol and legs of a security do not need to be
+re-loaded from the parsed definition files for every analysis.
+"""
+
+import sqlite3
+import json
+import glob
+from collections import OrderedDict
+from datetime import datetime, date as date_type
+import numpy as np
+import pandas as pd
+from pandas import isnull, notnull
+
+
+# columns kept from the definition messages
+# prices (MinPriceIncrement, DisplayFactor, StrikePrice) are raw PRICE9 integers
+
+SECURITY_COLUMNS = ['SecurityID', 'EffectiveDate', 'TemplateID', 'Symbol',
+                    'SecurityGroup', 'Asset', 'SecurityType', 'CFICode',
+                    'MaturityMonthYear', 'Currency', 'ApplID', 'MarketSegmentID',
+                    'MinPriceIncrement', 'DisplayFactor', 'PriceDisplayFormat',
+                    'MainFraction', 'SubFraction', 'UnitOfMeasureQty',
+                    'PriceRatio', 'PutOrCall', 'StrikePrice',
+                    'UnderlyingSecurityID', 'Legs', 'LastUpdateTime']
+
+DEFINITION_FILES = ['MDInstrumentDefinitionFuture27', 'MDInstrumentDefinitionSpread29',
+                    'MDInstrumentDefinitionOption41', 'MDInstrumentDefinitionFuture54',
+                    'MDInstrumentDefinitionOption55', 'MDInstrumentDefinitionSpread56']
+
+
+def effective_date(date):
+    """
+    Convert a date into the integer YYYYMMDD key used by the store.
+
+    Parameters
+    ----------
+    date : str, int, datetime or date
+        Date in "YYYY-MM-DD" format, YYYYMMDD integer or datetime.
+
+    Returns
+    -------
+    int
+        Date in YYYYMMDD format.
+
+    """
+
+    if isinstance(date, (int, np.integer)):
+        return int(date)
+
+    if isinstance(date, str):
+        date = datetime.strptime(date, "%Y-%m-%d")
+
+    if isinstance(date, (datetime, date_type)):
+        return date.year * 10000 + date.month * 100 + date.day
+
+    raise Exception('Date must be "YYYY-MM-DD", YYYYMMDD or datetime')
+
+
+class security_master:
+    """
+    On-disk security master with an in-memory LRU cache in front.
+
+    Parameters
+    ----------
+    path : str
+        The path of the SQLite store. It is created if it does not exist.
+    cache_size : int, optional
+        The maximum number of lookups kept in memory. The default is 4096.
+
+    """
+
+    def __init__(self, path, cache_size=4096):
+        self.path = path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+        # parsers running in parallel may write to the same store
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS securities (
+                {', '.join(SECURITY_COLUMNS)},
+                PRIMARY KEY (SecurityID, EffectiveDate))""")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_symbol ON securities (Symbol, EffectiveDate)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def update(self, definitions, TemplateID):
+        """
+        Add parsed instrument definitions into the store.
+
+        Definitions with the same SecurityID and effective date are replaced,
+        so the last definition of a day is the one kept.
+
+        Parameters
+        ----------
+        definitions : pandas DataFrame
+            Parsed definition messages from one of the templates
+            27, 29, 41, 54, 55 or 56.
+        TemplateID : int
+            The template ID of the definitions.
+
+        """
+
+        if definitions.shape[0] == 0:
+            return
+
+        definitions = definitions.copy()
+
+        # the date when the definition starts to be effective (UTC)
+
+        definitions['EffectiveDate'] = pd.to_datetime(
+            definitions['LastUpdateTime'], unit='ns', utc=True).dt.strftime('%Y%m%d').astype(int)
+        definitions['TemplateID'] = TemplateID
+
+        # spread legs are in repeating groups, one row per leg
+
+        if 'LegSecurityID' in definitions.columns:
+            legs = (definitions
+                    .loc[definitions['LegSecurityID'].notna(), ['SecurityID', 'EffectiveDate',
+                                                                'LegSecurityID', 'LegSide', 'LegRatioQty']]
+                    .drop_duplicates()
+                    .astype('int64')
+                    .groupby(['SecurityID', 'EffectiveDate'])
+                    .apply(lambda x: json.dumps(x[['LegSecurityID', 'LegSide', 'LegRatioQty']].to_dict('records')))
+                    .rename('Legs')
+                    .reset_index()
+                    )
+        else:
+            legs = None
+
+        if 'UnderlyingSecurityID' in definitions.columns:
+            underlying = (definitions
+                          .loc[definitions['UnderlyingSecurityID'].notna(), ['SecurityID', 'EffectiveDate', 'UnderlyingSecurityID']]
+                          .drop_duplicates(['SecurityID', 'EffectiveDate'])
+                          )
+            definitions = definitions.drop(columns=['UnderlyingSecurityID'])
+        else:
+            underlying = None
+
+        definitions = definitions.drop_duplicates(
+            ['SecurityID', 'EffectiveDate'], keep='last')
+
+        if legs is not None:
+            definitions = definitions.merge(
+                legs, on=['SecurityID', 'EffectiveDate'], how='left')
+
+        if underlying is not None:
+            definitions = definitions.merge(
+                underlying, on=['SecurityID', 'EffectiveDate'], how='left')
+
+        definitions = definitions.reindex(columns=SECURITY_COLUMNS)
+
+        # sqlite only binds python objects
+
+        rows = definitions.astype(object).where(
+            definitions.notna(), None).values.tolist()
+
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO securities VALUES ({', '.join(['?'] * len(SECURITY_COLUMNS))})", rows)
+        self.conn.commit()
+
+        self.cache.clear()
+
+    def load(self, save_file_path):
+        """
+        Build the store from definition files already saved by the parsers.
+
+        Parameters
+        ----------
+        save_file_path : str
+            The directory that contains msgs_MDInstrumentDefinition*.parquet files.
+
+        """
+
+        for name in DEFINITION_FILES:
+
+            # chunks are saved in order and the remaining messages at the end
+
+            files = sorted(glob.glob(f"{save_file_path}/msgs_{name}_*.parquet"),
+                           key=lambda x: int(x.rsplit('_', 1)[1].split('.')[0]))
+            files += glob.glob(f"{save_file_path}/msgs_{name}.parquet")
+
+            for file in files:
+                self.update(pd.read_parquet(file), int(name[-2:]))
+
+    def get(self, security_id, date=None):
+        """
+        Look up the definition of a security effective on a given date.
+
+        Parameters
+        ----------
+        security_id : int
+            The SecurityID.
+        date : str, int or datetime, optional
+            The date of interest. If None, the latest definition is returned.
+            The default is None.
+
+        Returns
+        -------
+        dict or None
+            Definition of the security, None if it cannot be found.
+
+        """
+
+        if notnull(date):
+            date = effective_date(date)
+
+        key = (int(security_id), date)
+
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        if isnull(date):
+            row = self.conn.execute(
+                "SELECT * FROM securities WHERE SecurityID = ? ORDER BY EffectiveDate DESC LIMIT 1",
+                (key[0],)).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT * FROM securities WHERE SecurityID = ? AND EffectiveDate <= ? ORDER BY EffectiveDate DESC LIMIT 1",
+                key).fetchone()
+
+        if row is not None:
+            row = dict(zip(SECURITY_COLUMNS, row))
+
+            if notnull(row['Legs']):
+                row['Legs'] = json.loads(row['Legs'])
+
+        self.cache[key] = row
+
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return row
+
+    def to_frame(self, date=None):
+        """
+        Snapshot of all securities effective on a given date.
+
+        Parameters
+        ----------
+        date : str, int or datetime, optional
+            The date of interest. If None, the latest definitions are returned.
+            The default is None.
+
+        Returns
+        -------
+        pandas DataFrame
+            One row per SecurityID.
+
+        """
+
+        if isnull(date):
+            date = 99991231
+        else:
+            date = effective_date(date)
+
+        securities = pd.read_sql_query(
+            """SELECT s.* FROM securities s
+               JOIN (SELECT SecurityID, MAX(EffectiveDate) AS EffectiveDate
+                     FROM securities WHERE EffectiveDate <= ? GROUP BY SecurityID) m
+               ON s.SecurityID = m.SecurityID AND s.EffectiveDate = m.EffectiveDate""",
+            self.conn, params=(date,))
+
+        return securities
+
+    def join(self, data, date=None, columns=None, date_col=None):
+        """
+        Join security definitions to message data by SecurityID.
+
+        Parameters
+        ----------
+        data : pandas DataFrame
+            Message data with a SecurityID column.
+        date : str, int or datetime, optional
+            Definitions effective on this date are joined. The default is None.
+        columns : list, optional
+            Definition columns to be joined. If None, all columns are joined.
+            The default is None.
+        date_col : str, optional
+            Column of data with YYYYMMDD dates. If given, every row is joined
+            with the definition effective on its own date. The default is None.
+
+        Returns
+        -------
+        pandas DataFrame
+            data with definition columns.
+
+        """
+
+        if columns is None:
+            columns = [x for x in SECURITY_COLUMNS if x not in [
+                'SecurityID', 'EffectiveDate']]
+
+        if isnull(date_col):
+            securities = self.to_frame(date)[['SecurityID'] + columns]
+            return data.merge(securities, on='SecurityID', how='left')
+
+        securities = pd.read_sql_query(
+            f"SELECT SecurityID, EffectiveDate, {', '.join(columns)} FROM securities", self.conn)
+        securities = securities.sort_values('EffectiveDate')
+
+        # merge_asof needs rows sorted by date, the original order and index are restored after
+
+        index = data.index
+        data = data.assign(_Position=np.arange(data.shape[0])).sort_values(
+            date_col, kind='stable')
+        data = pd.merge_asof(data, securities, left_on=date_col, right_on='EffectiveDate',
+                             by='SecurityID', direction='backward')
+
+        data = data.sort_values('_Position').drop(columns=['_Position', 'EffectiveDate'])
+        data.index = index
+
+        return data
@@ -0,0 +1,858 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic CME MDP 3.0 captures
+
+The encoders here are the inverse of the decoders in `main_template`. The
+generator simulates an order-level book for every instrument and encodes
+the events as templates 46 (MBP), 47 (MBO), 48 (trade summary),
+52/53 (snapshots) and 54 (instrument definition), so that MBP, MBO and
+trades are consistent with each other. Captures can be written in both the
+CME Datamine format and the standard PCAP format, e.g., for benchmarks and
+round-trip tests of the parsers and the book engines.
+"""
+
+import struct
+import numpy as np
+import pandas as pd
+from pandas import isnull
+from . import main_template
+
+
+SCHEMA_ID = 1
+
+# MatchEventIndicator bits
+
+LAST_TRADE_MSG = 0b00000010
+LAST_QUOTE_MSG = 0b00000100
+END_OF_EVENT = 0b10000000
+
+# null values of the SBE types
+
+INT32_NULL = 2147483647
+
+EVENT_MIX = {'add': 0.45, 'modify': 0.15, 'cancel': 0.3, 'trade': 0.1}
+
+
+def encode_header(TemplateID, BlockLength, body, version):
+    """
+    Adding the message size and the SBE header to a message body.
+    """
+
+    return struct.pack('<HHHHH', len(body) + 10, BlockLength, TemplateID,
+                       SCHEMA_ID, version) + body
+
+
+def encode_MDIncrementalRefreshBook46(TransactTime, MatchEventIndicator, entries, orders=()):
+
+    body = struct.pack('<QB2x', TransactTime, MatchEventIndicator)
+
+    body += struct.pack('<HB', 32, len(entries))
+
+    for x in entries:
+        body += struct.pack('<qiiIiBBc5x', x['MDEntryPx'],
+                            INT32_NULL if isnull(
+                                x['MDEntrySize']) else x['MDEntrySize'],
+                            x['SecurityID'], x['RptSeq'],
+                            INT32_NULL if isnull(
+                                x['NumberOfOrders']) else x['NumberOfOrders'],
+                            x['MDPriceLevel'], x['MDUpdateAction'],
+                            x['MDEntryType'].encode('ascii'))
+
+    body += struct.pack('<H5xB', 24, len(orders))
+
+    for x in orders:
+        body += struct.pack('<QQiBB2x', x['OrderID'], x['MDOrderPriority'],
+                            x['MDDisplayQty'], x['ReferenceID'], x['OrderUpdateAction'])
+
+    return 11, body
+
+
+def encode_MDIncrementalRefreshOrderBook47(TransactTime, MatchEventIndicator, entries):
+
+    body = struct.pack('<QB2x', TransactTime, MatchEventIndicator)
+
+    body += struct.pack('<HB', 40, len(entries))
+
+    for x in entries:
+        body += struct.pack('<QQqiiBc6x', x['OrderID'], x['MDOrderPriority'],
+                            x['MDEntryPx'], x['MDDisplayQty'], x['SecurityID'],
+                            x['MDUpdateAction'], x['MDEntryType'].encode('ascii'))
+
+    return 11, body
+
+
+def encode_MDIncrementalRefreshTradeSummary48(TransactTime, MatchEventIndicator, entries, orders=()):
+
+    body = struct.pack('<QB2x', TransactTime, MatchEventIndicator)
+
+    body += struct.pack('<HB', 32, len(entries))
+
+    for x in entries:
+        body += struct.pack('<qiiIiBBI2x', x['MDEntryPx'], x['MDEntrySize'],
+                            x['SecurityID'], x['RptSeq'], x['NumberOfOrders'],
+                            x['AggressorSide'], x['MDUpdateAction'],
+                            x['MDTradeEntryID'])
+
+    body += struct.pack('<H5xB', 16, len(orders))
+
+    for x in orders:
+        body += struct.pack('<Qi4x', x['OrderID'], x['LastQty'])
+
+    return 11, body
+
+
+def encode_SnapshotFullRefresh52(info, entries):
+
+    body = struct.pack('<IIiIQQHBqqq', info['LastMsgSeqNumProcessed'], info['TotNumReports'],
+                       info['SecurityID'], info['RptSeq'], info['TransactTime'],
+                       info['LastUpdateTime'], info['TradeDate'],
+                       info['MDSecurityTradingStatus'], info['HighLimitPrice'],
+                       info['LowLimitPrice'], info['MaxPriceVariation'])
+
+    body += struct.pack('<HB', 22, len(entries))
+
+    for x in entries:
+        body += struct.pack('<qiibHBBc', x['MDEntryPx'], x['MDEntrySize'],
+                            x['NumberOfOrders'], x['MDPriceLevel'], 65535, 255, 255,
+                            x['MDEntryType'].encode('ascii'))
+
+    return 59, body
+
+
+def encode_SnapshotFullRefreshOrderBook53(info, entries):
+
+    body = struct.pack('<IIiIIQ', info['LastMsgSeqNumProcessed'], info['TotNumReports'],
+                       info['SecurityID'], info['NoChunks'], info['CurrentChunk'],
+                       info['TransactTime'])
+
+    body += struct.pack('<HB', 29, len(entries))
+
+    for x in entries:
+        body += struct.pack('<QQqic', x['OrderID'], x['MDOrderPriority'], x['MDEntryPx'],
+                            x['MDDisplayQty'], x['MDEntryType'].encode('ascii'))
+
+    return 28, body
+
+
+def encode_MDInstrumentDefinitionFuture54(info, version):
+
+    def text(value, length):
+        return value.encode('ascii')[:length].ljust(length, b'\x00')
+
+    body = struct.pack('<BIcQBhBB4s6s6s20si6s6s5s3s3scIIqqBBB30sqqBiiqqqiHiibbqcH',
+                       END_OF_EVENT, info['TotNumReports'], b'A', info['LastUpdateTime'],
+                       17, info['ApplID'], info['MarketSegmentID'], 255,
+                       text('XCME', 4), text(info['SecurityGroup'], 6),
+                       text(info['Asset'], 6), text(info['Symbol'], 20),
+                       info['SecurityID'], text('FUT', 6), text('FFIXSX', 6),
+                       struct.pack('<HBBB', 2025, 6, 255, 255), text('USD', 3),
+                       text('USD', 3), b'F', 1, 10000, info['MinPriceIncrement'],
+                       info['DisplayFactor'], 255, 255, 255, text('IPNT', 30),
+                       50 * 10**9, 9223372036854775807, 255, INT32_NULL,
+                       INT32_NULL, 9223372036854775807, 9223372036854775807,
+                       9223372036854775807, INT32_NULL, 65535, INT32_NULL,
+                       INT32_NULL, 127, 127, 12500000000, b'N', 65535)
+
+    if version > 9:
+        body += struct.pack('<Q', info['SecurityID'])
+
+    BlockLength = len(body)
+
+    # events, feed types, instrument attributes and lot type rules
+    # every group entry becomes one decoded row
+
+    body += struct.pack('<HB', 9, 1) + \
+        struct.pack('<BQ', 5, info['LastUpdateTime'])
+    body += struct.pack('<HB', 4, 1) + struct.pack('<3sb', b'GBX', 10)
+    body += struct.pack('<HB', 4, 1) + struct.pack('<I', 0)
+    body += struct.pack('<HB', 5, 1) + struct.pack('<bi', 2, 1)
+
+    return BlockLength, body
+
+
+def round_trip(TemplateID, version=9, **fields):
+    """
+    Encoding a message with the given fields and decoding it with `main_template`.
+
+    Parameters
+    ----------
+    TemplateID : int
+        One of 46, 47, 48, 52, 53 or 54.
+    version : int, optional
+        The schema version. The default is 9.
+    **fields
+        Arguments of the corresponding encoder.
+
+    Returns
+    -------
+    list
+        Decoded messages.
+
+    """
+
+    if TemplateID == 46:
+        BlockLength, body = encode_MDIncrementalRefreshBook46(**fields)
+        return main_template.MDIncrementalRefreshBook46(body, BlockLength, version, False)
+
+    elif TemplateID == 47:
+        BlockLength, body = encode_MDIncrementalRefreshOrderBook47(**fields)
+        return main_template.MDIncrementalRefreshOrderBook47(body, BlockLength, False)
+
+    elif TemplateID == 48:
+        BlockLength, body = encode_MDIncrementalRefreshTradeSummary48(**fields)
+        return main_template.MDIncrementalRefreshTradeSummary48(body, BlockLength, False)
+
+    elif TemplateID == 52:
+        BlockLength, body = encode_SnapshotFullRefresh52(**fields)
+        return main_template.SnapshotFullRefresh52(body, BlockLength, False)
+
+    elif TemplateID == 53:
+        BlockLength, body = encode_SnapshotFullRefreshOrderBook53(**fields)
+        return main_template.SnapshotFullRefreshOrderBook53(body, BlockLength, False)
+
+    elif TemplateID == 54:
+        BlockLength, body = encode_MDInstrumentDefinitionFuture54(
+            version=version, **fields)
+        return main_template.MDInstrumentDefinitionFuture54(body, BlockLength, version, False)
+
+    raise Exception(f'Template {TemplateID} is not supported')
+
+
+class capture_generator:
+    """
+    Generating synthetic MDP 3.0 packets from a simulated order-level book.
+
+    Parameters
+    ----------
+    templates : list, optional
+        Templates to be written, from 46, 47, 48, 52, 53 and 54.
+        The default is [46, 47, 48, 54].
+    event_mix : dict, optional
+        Probabilities of order 'add', 'modify', 'cancel', 'trade' and
+        'implied' events. Order events are encoded as 46 and 47, trades as
+        48, 46 and 47, and implied quote updates as 46 only.
+        The default is EVENT_MIX.
+    n_instruments : int, optional
+        The number of instruments. The default is 1.
+    message_rate : float, optional
+        The average number of events per second. The default is 10000.
+    version : int, optional
+        The schema version in the message headers. The default is 9.
+    depth : int, optional
+        The number of MBP levels. The default is 10.
+    snapshot_interval : int, optional
+        If given, snapshots 52/53 of all instruments are sent every
+        `snapshot_interval` events. The default is None.
+    start : str, optional
+        The first TransactTime in UTC. The default is '2025-04-20 22:00:00'.
+    seed : int, optional
+        The random seed. The default is 0.
+
+    """
+
+    def __init__(self, templates=None, event_mix=None, n_instruments=1, message_rate=10000,
+                 version=9, depth=10, snapshot_interval=None,
+                 start='2025-04-20 22:00:00', seed=0):
+
+        if templates is None:
+            templates = [46, 47, 48, 54]
+
+        if event_mix is None:
+            event_mix = EVENT_MIX
+
+        if any(x not in [46, 47, 48, 52, 53, 54] for x in templates):
+            raise Exception(
+                'Only templates 46, 47, 48, 52, 53 and 54 are supported')
+
+        self.templates = templates
+        self.events = list(event_mix.keys())
+        self.event_p = np.array(list(event_mix.values()), dtype=float)
+        self.event_p = self.event_p / self.event_p.sum()
+        self.version = version
+        self.depth = depth
+        self.message_rate = message_rate
+        self.snapshot_interval = snapshot_interval
+        self.rng = np.random.default_rng(seed)
+
+        self.time = pd.Timestamp(start, tz='UTC').value
+        self.trade_date = pd.Timestamp(start).strftime('%Y%m%d')
+        self.MsgSeq = 0
+        self.OrderID = 0
+        self.priority = 0
+        self.TradeEntryID = 0
+
+        self.instruments = []
+
+        for i in range(n_instruments):
+            tick = 250000000  # 0.25 in PRICE9
+            self.instruments.append({
+                'SecurityID': 100000 + i,
+                'Symbol': f'SYN{i:04d}',
+                'tick': tick,
+                'mid': int(self.rng.integers(10000, 30000)),
+                'RptSeq': 0,
+                'orders': {},
+                # price in ticks -> [quantity, number of orders], per side
+                # implied quotes (E, F) are kept at most two levels deep
+                'levels': {'0': {}, '1': {}, 'E': {}, 'F': {}},
+            })
+
+    # -------------------------- book state -------------------------------
+
+    def _prices(self, instrument, side):
+        # bids descending, asks ascending
+        return sorted(instrument['levels'][side], reverse=(side in ['0', 'E']))
+
+    def _level(self, instrument, side, px):
+        return self._prices(instrument, side).index(px) + 1
+
+    def _mbp(self, instrument, side, px, action, level):
+        instrument['RptSeq'] += 1
+        qty, count = instrument['levels'][side].get(px, [0, 0])
+        return {'MDEntryPx': px * instrument['tick'],
+                'MDEntrySize': qty,
+                'SecurityID': instrument['SecurityID'],
+                'RptSeq': instrument['RptSeq'],
+                'NumberOfOrders': count,
+                'MDPriceLevel': level,
+                'MDUpdateAction': action,
+                'MDEntryType': side}
+
+    def _mbo(self, instrument, OrderID, action):
+        side, px, qty, priority = instrument['orders'][OrderID]
+        return {'OrderID': OrderID,
+                'MDOrderPriority': priority,
+                'MDEntryPx': px * instrument['tick'],
+                'MDDisplayQty': qty,
+                'SecurityID': instrument['SecurityID'],
+                'MDUpdateAction': action,
+                'MDEntryType': side}
+
+    def _add(self, instrument, side, px, qty):
+
+        self.OrderID += 1
+        self.priority += 1
+        instrument['orders'][self.OrderID] = [side, px, qty, self.priority]
+
+        levels = instrument['levels'][side]
+        new_level = px not in levels
+        levels.setdefault(px, [0, 0])
+        levels[px][0] += qty
+        levels[px][1] += 1
+
+        mbo = [self._mbo(instrument, self.OrderID, 0)]
+        level = self._level(instrument, side, px)
+        mbp = []
+
+        if level <= self.depth:
+            mbp.append(self._mbp(instrument, side, px,
+                       0 if new_level else 1, level))
+
+        return mbp, mbo
+
+    def _reduce(self, instrument, OrderID, qty):
+        # reduce an order by qty, deleting it when nothing is left
+
+        side, px, left, priority = instrument['orders'][OrderID]
+        levels = instrument['levels'][side]
+        level = self._level(instrument, side, px)
+
+        instrument['orders'][OrderID][2] = left - qty
+        levels[px][0] -= qty
+
+        if left - qty > 0:
+            mbo = [self._mbo(instrument, OrderID, 1)]
+        else:
+            mbo = [self._mbo(instrument, OrderID, 2)]
+            del instrument['orders'][OrderID]
+            levels[px][1] -= 1
+
+        mbp = []
+
+        if levels[px][1] > 0:
+            if level <= self.depth:
+                mbp.append(self._mbp(instrument, side, px, 1, level))
+
+        else:
+            del levels[px]
+
+            if level <= self.depth:
+                entry = self._mbp(instrument, side, px, 2, level)
+                entry['MDEntrySize'], entry['NumberOfOrders'] = 0, 0
+                mbp.append(entry)
+
+                # the level shifted into the visible depth
+                prices = self._prices(instrument, side)
+
+                if len(prices) >= self.depth:
+                    mbp.append(self._mbp(instrument, side,
+                               prices[self.depth - 1], 0, self.depth))
+
+        return mbp, mbo
+
+    # ------------------------------ events -----------------------------------
+
+    def _event_add(self, instrument):
+
+        side = self.rng.choice(['0', '1'])
+        bids = self._prices(instrument, '0')
+        asks = self._prices(instrument, '1')
+
+        # passive orders a few ticks behind the best opposite price
+
+        offset = int(self.rng.geometric(0.3))
+
+        if side == '0':
+            px = (asks[0] if asks else (bids[0] + 1 if bids else instrument['mid'])) - offset
+        else:
+            px = (bids[0] if bids else (asks[0] - 1 if asks else instrument['mid'])) + offset
+
+        return self._add(instrument, side, px, int(self.rng.integers(1, 21)))
+
+    def _event_modify(self, instrument):
+
+        if len(instrument['orders']) == 0:
+            return self._event_add(instrument)
+
+        OrderID = list(instrument['orders'])[
+            self.rng.integers(len(instrument['orders']))]
+        side, px, qty, priority = instrument['orders'][OrderID]
+
+        if qty > 1:
+            return self._reduce(instrument, OrderID, int(self.rng.integers(1, qty)))
+
+        return self._reduce(instrument, OrderID, qty)
+
+    def _event_cancel(self, instrument):
+
+        if len(instrument['orders']) == 0:
+            return self._event_add(instrument)
+
+        OrderID = list(instrument['orders'])[
+            self.rng.integers(len(instrument['orders']))]
+
+        return self._reduce(instrument, OrderID, instrument['orders'][OrderID][2])
+
+    def _event_trade(self, instrument):
+
+        aggressor = self.rng.choice(['1', '2'])  # 1 buy, 2 sell
+        side = '1' if aggressor == '1' else '0'
+        prices = self._prices(instrument, side)
+
+        if len(prices) == 0:
+            return self._event_add(instrument), None
+
+        px = prices[0]
+        size = int(self.rng.integers(1, instrument['levels'][side][px][0] + 1))
+
+        # resting orders are filled in time priority
+
+        resting = sorted([x for x in instrument['orders'].items() if x[1][0] == side and x[1][1] == px],
+                         key=lambda x: x[1][3])
+
+        instrument['RptSeq'] += 1
+        self.TradeEntryID += 1
+
+        trade = {'MDEntryPx': px * instrument['tick'],
+                 'MDEntrySize': size,
+                 'SecurityID': instrument['SecurityID'],
+                 'RptSeq': instrument['RptSeq'],
+                 'NumberOfOrders': 0,
+                 'AggressorSide': int(aggressor),
+                 'MDUpdateAction': 0,
+                 'MDTradeEntryID': self.TradeEntryID}
+
+        self.OrderID += 1
+        fills = [{'OrderID': self.OrderID, 'LastQty': size}]
+        mbp, mbo = [], []
+        left = size
+
+        for OrderID, (s, p, qty, priority) in resting:
+            if left == 0:
+                break
+            fill = min(qty, left)
+            fills.append({'OrderID': OrderID, 'LastQty': fill})
+            x, y = self._reduce(instrument, OrderID, fill)
+            mbp += x
+            mbo += y
+            left -= fill
+
+        trade['NumberOfOrders'] = len(fills)
+
+        return (mbp, mbo), (trade, fills)
+
+    def _event_implied(self, instrument):
+
+        # implied quotes never cross the outright book
+
+        side = self.rng.choice(['E', 'F'])
+        levels = instrument['levels'][side]
+        prices = self._prices(instrument, side)
+
+        outright = self._prices(instrument, '0' if side == 'E' else '1')
+        best = outright[0] if outright else instrument['mid']
+        offset = int(self.rng.integers(0, 4))
+
+        # existing implied levels are updated half of the time
+
+        if len(prices) != 0 and self.rng.random() < 0.5:
+            px = prices[self.rng.integers(len(prices))]
+        else:
+            px = best - offset if side == 'E' else best + offset
+
+        mbp = []
+
+        if px in levels and self.rng.random() < 0.4:
+            level = prices.index(px) + 1
+            del levels[px]
+            entry = self._mbp(instrument, side, px, 2, level)
+            entry['MDEntrySize'], entry['NumberOfOrders'] = 0, np.nan
+            mbp.append(entry)
+
+        elif px in levels:
+            levels[px] = [int(self.rng.integers(1, 51)), np.nan]
+            mbp.append(self._mbp(instrument, side, px, 1,
+                                 prices.index(px) + 1))
+
+        else:
+            levels[px] = [int(self.rng.integers(1, 51)), np.nan]
+            prices = self._prices(instrument, side)
+            level = prices.index(px) + 1
+
+            if level > 2:
+                del levels[px]
+                return [], []
+
+            mbp.append(self._mbp(instrument, side, px, 0, level))
+
+            # the third level falls out of the implied book
+            if len(prices) > 2:
+                del levels[prices[2]]
+
+        return mbp, []
+
+    # ------------------------------ messages ---------------------------------
+
+    def _definitions(self):
+
+        messages = []
+
+        for instrument in self.instruments:
+            info = {'TotNumReports': len(self.instruments),
+                    'LastUpdateTime': self.time,
+                    'ApplID': 310,
+                    'MarketSegmentID': 64,
+                    'SecurityGroup': 'SY',
+                    'Asset': 'SY',
+                    'Symbol': instrument['Symbol'],
+                    'SecurityID': instrument['SecurityID'],
+                    'MinPriceIncrement': instrument['tick'],
+                    'DisplayFactor': 1000000000}
+            BlockLength, body = encode_MDInstrumentDefinitionFuture54(
+                info, self.version)
+            messages.append(encode_header(
+                54, BlockLength, body, self.version))
+
+        return messages
+
+    def _snapshots(self):
+
+        messages = []
+
+        for instrument in self.instruments:
+
+            if 52 in self.templates:
+                entries = []
+
+                for side in ['0', '1', 'E', 'F']:
+                    for level, px in enumerate(self._prices(instrument, side)[:self.depth]):
+                        qty, count = instrument['levels'][side][px]
+                        entries.append({'MDEntryPx': px * instrument['tick'],
+                                        'MDEntrySize': qty,
+                                        'NumberOfOrders': INT32_NULL if isnull(count) else count,
+                                        'MDPriceLevel': level + 1,
+                                        'MDEntryType': side})
+
+                info = {'LastMsgSeqNumProcessed': self.MsgSeq,
+                        'TotNumReports': len(self.instruments),
+                        'SecurityID': instrument['SecurityID'],
+                        'RptSeq': instrument['RptSeq'],
+                        'TransactTime': self.time,
+                        'LastUpdateTime': self.time,
+                        'TradeDate': 65535,
+                        'MDSecurityTradingStatus': 17,
+                        'HighLimitPrice': 9223372036854775807,
+                        'LowLimitPrice': 9223372036854775807,
+                        'MaxPriceVariation': 9223372036854775807}
+
+                BlockLength, body = encode_SnapshotFullRefresh52(
+                    info, entries)
+                messages.append(encode_header(
+                    52, BlockLength, body, self.version))
+
+            if 53 in self.templates:
+                orders = sorted(instrument['orders'].items(),
+                                key=lambda x: x[1][3])
+                chunks = [orders[i:(i + 100)]
+                          for i in range(0, len(orders), 100)] or [[]]
+
+                for i, chunk in enumerate(chunks):
+                    info = {'LastMsgSeqNumProcessed': self.MsgSeq,
+                            'TotNumReports': len(self.instruments),
+                            'SecurityID': instrument['SecurityID'],
+                            'NoChunks': len(chunks),
+                            'CurrentChunk': i + 1,
+                            'TransactTime': self.time}
+                    entries = [{'OrderID': OrderID,
+                                'MDOrderPriority': priority,
+                                'MDEntryPx': px * instrument['tick'],
+                                'MDDisplayQty': qty,
+                                'MDEntryType': side}
+                               for OrderID, (side, px, qty, priority) in chunk]
+
+                    BlockLength, body = encode_SnapshotFullRefreshOrderBook53(
+                        info, entries)
+                    messages.append(encode_header(
+                        53, BlockLength, body, self.version))
+
+        return messages
+
+    def _event(self):
+
+        instrument = self.instruments[self.rng.integers(
+            len(self.instruments))]
+        event = self.rng.choice(self.events, p=self.event_p)
+
+        trade = None
+
+        if event == 'trade':
+            (mbp, mbo), trade = self._event_trade(instrument)
+        else:
+            mbp, mbo = getattr(self, f'_event_{event}')(instrument)
+
+        self.time += int(self.rng.exponential(1e9 / self.message_rate)) + 1
+
+        bodies = []
+
+        if trade is not None and 48 in self.templates:
+            bodies.append(
+                (48, LAST_TRADE_MSG, encode_MDIncrementalRefreshTradeSummary48, [trade[0]], trade[1]))
+
+        if len(mbp) != 0 and 46 in self.templates:
+            bodies.append(
+                (46, LAST_QUOTE_MSG, encode_MDIncrementalRefreshBook46, mbp, ()))
+
+        if len(mbo) != 0 and 47 in self.templates:
+            bodies.append(
+                (47, LAST_QUOTE_MSG, encode_MDIncrementalRefreshOrderBook47, mbo, None))
+
+        messages = []
+
+        for i, (TemplateID, indicator, encoder, entries, orders) in enumerate(bodies):
+
+            # the last message of the event carries the end of event flag
+
+            if i == len(bodies) - 1:
+                indicator |= END_OF_EVENT
+
+            if orders is None:
+                BlockLength, body = encoder(self.time, indicator, entries)
+            else:
+                BlockLength, body = encoder(
+                    self.time, indicator, entries, orders)
+
+            messages.append(encode_header(
+                TemplateID, BlockLength, body, self.version))
+
+        return messages
+
+    def packets(self, n_events):
+        """
+        Generating packets.
+
+        Parameters
+        ----------
+        n_events : int
+            The number of book and trade events.
+
+        Yields
+        ------
+        MsgSeq : int
+            The packet sequence number.
+        SendingTime : int
+            The sending time in nanoseconds.
+        messages : list
+            Encoded messages (message size, SBE header and body) in the packet.
+
+        """
+
+        if 54 in self.templates:
+            for message in self._definitions():
+                self.MsgSeq += 1
+                yield self.MsgSeq, self.time, [message]
+
+        for k in range(n_events):
+
+            if (self.snapshot_interval is not None and k > 0 and k % self.snapshot_interval == 0
+                    and (52 in self.templates or 53 in self.templates)):
+                for message in self._snapshots():
+                    self.MsgSeq += 1
+                    yield self.MsgSeq, self.time, [message]
+
+            messages = self._event()
+
+            if len(messages) != 0:
+                self.MsgSeq += 1
+                yield self.MsgSeq, self.time + 2000, messages
+
+    def fix_frames(self, n_events):
+        """
+        Generating quotes and trades in the layout of `mbp_input_fix`, which
+        can be used by `quotes.order_book` and `orderbook.tbbo`.
+
+        Parameters
+        ----------
+        n_events : int
+            The number of book and trade events.
+
+        Returns
+        -------
+        quotes : pandas DataFrame
+            Quote messages as returned by `mbp_input_fix.quote_messages`.
+        trades : pandas DataFrame
+            Trade summary as returned by `mbp_input_fix.trade_summary`.
+
+        """
+
+        symbols = {x['SecurityID']: x['Symbol'] for x in self.instruments}
+        quotes, trades = [], []
+
+        for MsgSeq, SendingTime, messages in self.packets(n_events):
+            for message in messages:
+
+                (MsgSize, BlockLength, TemplateID, SchemaID,
+                 Version) = struct.unpack('<HHHHH', message[0:10])
+
+                cme_packet = {'MsgSeq': MsgSeq, 'SendingTime': SendingTime}
+
+                if TemplateID == 46:
+                    quotes += main_template.MDIncrementalRefreshBook46(
+                        message[10:], BlockLength, Version, cme_packet)
+
+                elif TemplateID == 48:
+                    trades += main_template.MDIncrementalRefreshTradeSummary48(
+                        message[10:], BlockLength, cme_packet)
+
+        def fix_time(x):
+            x = pd.to_datetime(x, unit='ns', utc=True)
+            return x.dt.strftime('%Y%m%d%H%M%S%f') + (x.dt.nanosecond % 1000).astype(str).str.zfill(3)
+
+        quotes = pd.DataFrame(quotes, columns=['MsgSeq', 'SendingTime', 'TransactTime', 'MDEntryPx', 'MDEntrySize', 'SecurityID', 'RptSeq',
+                                               'NumberOfOrders', 'MDPriceLevel', 'MDUpdateAction', 'MDEntryType'])
+        quotes = pd.DataFrame({'Date': self.trade_date,
+                               'MsgSeq': quotes['MsgSeq'],
+                               'SendingTime': fix_time(quotes['SendingTime']),
+                               'TransactTime': fix_time(quotes['TransactTime']),
+                               'Update': quotes['MDUpdateAction'],
+                               'Side': quotes['MDEntryType'],
+                               'Code': quotes['SecurityID'].map(symbols),
+                               'Seq': quotes['RptSeq'],
+                               'PX': quotes['MDEntryPx'] * 1e-9,
+                               'Qty': quotes['MDEntrySize'],
+                               'Ord': quotes['NumberOfOrders'],
+                               'PX_depth': quotes['MDPriceLevel'],
+                               'Implied': np.where(quotes['MDEntryType'].isin(['E', 'F']), 'Y', 'N')})
+
+        trades = pd.DataFrame(trades, columns=['MsgSeq', 'SendingTime', 'TransactTime', 'MDEntryPx', 'MDEntrySize', 'SecurityID',
+                                               'RptSeq', 'NumberOfOrders', 'AggressorSide'])
+        trades = trades.drop_duplicates(['SecurityID', 'RptSeq'])
+        trades = pd.DataFrame({'Date': self.trade_date,
+                               'MsgSeq': trades['MsgSeq'],
+                               'SendingTime': fix_time(trades['SendingTime']),
+                               'TransactTime': fix_time(trades['TransactTime']),
+                               'Code': trades['SecurityID'].map(symbols),
+                               'Seq': trades['RptSeq'],
+                               'PX': trades['MDEntryPx'] * 1e-9,
+                               'Size': trades['MDEntrySize'],
+                               'Ord': trades['NumberOfOrders'],
+                               'agg': trades['AggressorSide']}).reset_index(drop=True)
+
+        return quotes, trades
+
+    def write_datamine(self, path, n_events, channel=310):
+        """
+        Writing a capture in the CME Datamine format, which can be parsed by
+        `cme_parser_datamine`.
+        """
+
+        with open(path, 'wb') as f:
+            for MsgSeq, SendingTime, messages in self.packets(n_events):
+                payload = struct.pack(
+                    '<IQ', MsgSeq, SendingTime) + b''.join(messages)
+                f.write(struct.pack('<HH', channel, len(payload)) + payload)
+
+    def write_pcap(self, path, n_events, port=14310):
+        """
+        Writing a capture in the standard PCAP format (UDP over IPv4), which
+        can be parsed by `cme_parser_pcap`.
+        """
+
+        with open(path, 'wb') as f:
+
+            # global header, nanosecond resolution, Ethernet
+            f.write(struct.pack('<IHHiIII', 0xa1b23c4d,
+                    2, 4, 0, 0, 65535, 1))
+
+            for MsgSeq, SendingTime, messages in self.packets(n_events):
+
+                payload = struct.pack(
+                    '<IQ', MsgSeq, SendingTime) + b''.join(messages)
+
+                ethernet = bytes.fromhex(
+                    '01005e001f01' '000000000001' '0800')
+                ip = struct.pack('>BBHHHBBH4s4s', 0x45, 0, 28 + len(payload), 0, 0, 64, 17, 0,
+                                 bytes([10, 0, 0, 1]), bytes([224, 0, 31, 1]))
+                udp = struct.pack('>HHHH', port, port, 8 + len(payload), 0)
+
+                packet = ethernet + ip + udp + payload
+
+                f.write(struct.pack('<IIII', SendingTime // 10**9, SendingTime % 10**9,
+                                    len(packet), len(packet)))
+                f.write(packet)
+
+
+def synthetic_capture(path, n_events, capture_format='datamine', **kwargs):
+    """
+    Writing a synthetic capture.
+
+    Parameters
+    ----------
+    path : str
+        The path of the capture.
+    n_events : int
+        The number of book and trade events.
+    capture_format : str, optional
+        Either 'datamine' or 'pcap'. The default is 'datamine'.
+    **kwargs
+        Arguments of `capture_generator`, e.g., templates, n_instruments,
+        message_rate, version or seed.
+
+    Returns
+    -------
+    path : str
+        The path of the capture.
+
+    """
+
+    generator = capture_generator(**kwargs)
+
+    if capture_format == 'datamine':
+        generator.write_datamine(path, n_events)
+
+    elif capture_format == 'pcap':
+        generator.write_pcap(path, n_events)
+
+    else:
+        raise Exception('Capture format should be either datamine or pcap')
+
+    return path
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cmemdp.bars import bar_builder
+from cmemdp.cme_parser import cme_parser_datamine
+from cmemdp.parquet_files import parsed_files
+from cmemdp.synthetic import capture_generator
+
+
+BARS = {'time': '1s', 'volume': 40, 'tick': 7, 'dollar': 20000}
+
+COLUMNS = ['SecurityID', 'Bar', 'Start', 'End', 'Open', 'High', 'Low', 'Close',
+           'Volume', 'Dollar', 'Trades', 'BuyVolume', 'SellVolume']
+
+
+def _trades(n=2000, seed=0):
+    # trade summary entries of three securities in their original order
+
+    rng = np.random.default_rng(seed)
+    security = rng.choice([100000, 100001, 100002], n)
+
+    return pd.DataFrame({'SecurityID': security,
+                         'RptSeq': pd.Series(security).groupby(security).cumcount().values + 1,
+                         'TransactTime': 1745245800 * 10**9 + np.sort(rng.integers(0, 20 * 10**9, n)),
+                         'MDEntryPx': rng.integers(20000, 20040, n) * 250000000,
+                         'MDEntrySize': rng.integers(1, 10, n),
+                         'AggressorSide': rng.integers(0, 3, n),
+                         'MDUpdateAction': 0})
+
+
+def _expected(trades, kind, size):
+    # bars of all trades at once
+
+    px = trades['MDEntryPx'] * 1e-9
+    qty = trades['MDEntrySize'].astype(float)
+    trades = trades.assign(PX=px, Qty=qty, Dollar=px * qty, Trades=1.0,
+                           BuyVolume=np.where(trades['AggressorSide'] == 1, qty, 0),
+                           SellVolume=np.where(trades['AggressorSide'] == 2, qty, 0))
+
+    if kind == 'time':
+        size = pd.Timedelta(size).value
+        bar = trades['TransactTime'] - trades['TransactTime'] % size
+    else:
+        measure = trades[{'volume': 'Qty', 'tick': 'Trades', 'dollar': 'Dollar'}[kind]]
+        running = measure.groupby(trades['SecurityID']).cumsum()
+        bar = np.floor((running - measure) / size).astype(np.int64)
+
+    return trades.assign(Bar=bar).groupby(['SecurityID', 'Bar']).agg(
+        Start=('TransactTime', 'first'), End=('TransactTime', 'last'), Open=('PX', 'first'),
+        High=('PX', 'max'), Low=('PX', 'min'), Close=('PX', 'last'), Volume=('Qty', 'sum'),
+        Dollar=('Dollar', 'sum'), Trades=('Trades', 'sum'), BuyVolume=('BuyVolume', 'sum'),
+        SellVolume=('SellVolume', 'sum')).reset_index()
+
+
+def _check(bars, trades):
+
+    for kind, size in BARS.items():
+        result = bars[kind].sort_values(['SecurityID', 'Bar'], ignore_index=True)
+
+        pd.testing.assert_frame_equal(result[COLUMNS], _expected(trades, kind, size)[COLUMNS],
+                                      check_dtype=False)
+        np.testing.assert_allclose(result['VWAP'], result['Dollar'] / result['Volume'])
+
+
+@pytest.mark.parametrize('save', [False, True])
+def test_streamed_bars_match_batch(tmp_path, save):
+    trades = _trades()
+    builder = bar_builder(BARS, save_file_path=str(tmp_path) if save else None, chunk_size=50)
+
+    # batches of random sizes, where entries already seen are sent again
+
+    edges = np.sort(np.random.default_rng(1).choice(np.arange(1, trades.shape[0]), 10, replace=False))
+
+    for first, last in zip(np.r_[0, edges], np.r_[edges, trades.shape[0]]):
+        builder.update(trades.iloc[max(first - 5, 0):last])
+
+    bars = builder.close()
+
+    if save:
+        assert all(len(x) > 1 for x in bars.values())
+        bars = {kind: pd.concat([pd.read_parquet(x) for x in files]) for kind, files in bars.items()}
+
+    _check(bars, trades)
+
+
+def test_bars_from_parsed_files(tmp_path):
+    capture = str(tmp_path / 'capture')
+    capture_generator(templates=[46, 48, 54], n_instruments=3, seed=3).write_datamine(capture, 3000)
+    cme_parser_datamine(capture, save_file_path=str(tmp_path), disable_progress_bar=True)
+
+    trades = pd.concat([pd.read_parquet(x) for x in
+                        parsed_files(str(tmp_path), 'MDIncrementalRefreshTradeSummary48')])
+    trades = trades.drop_duplicates(['SecurityID', 'RptSeq'])
+
+    # one security, or a list of securities
+
+    for security in [100001, [100000, 100002]]:
+        builder = bar_builder(BARS)
+        builder.update_parquet(str(tmp_path), security)
+
+        select = [security] if np.isscalar(security) else security
+        _check(builder.close(), trades.loc[trades['SecurityID'].isin(select)])
@@ -0,0 +1,28 @@
+import os
+
+from cmemdp.batch import batch_parser
+from cmemdp.synthetic import capture_generator
+
+
+def test_batch_same_file_names(tmp_path):
+    paths = []
+
+    for day, seed in [('20250420', 1), ('20250421', 2)]:
+        os.makedirs(tmp_path / day)
+        paths.append(str(tmp_path / day / 'capture'))
+        capture_generator(templates=[46, 54], n_instruments=2, seed=seed).write_datamine(paths[-1], 200)
+
+    report = batch_parser(paths, str(tmp_path / 'out'), workers=1)
+
+    assert (report['status'] == 'finished').all()
+    assert report['output'].nunique() == 2
+
+    # the outputs of one file are not overwritten by the other
+    for output in report['output']:
+        assert any(x.startswith('msgs_MDIncrementalRefreshBook46') for x in os.listdir(output))
+
+    # reruns find the same directories and skip the files
+    rerun = batch_parser(paths, str(tmp_path / 'out'), workers=1)
+
+    assert (rerun['status'] == 'skipped').all()
+    assert sorted(rerun['output']) == sorted(report['output'])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cmemdp.book_engine import book_columns
+from cmemdp.checkpoints import book_store
+from cmemdp.cme_parser import cme_parser_datamine
+from cmemdp.FIX_input import quotes
+from cmemdp.mbo_engine import mbo_book
+from cmemdp.parquet_files import parsed_files
+from cmemdp.prices import price_table
+from cmemdp.synthetic import capture_generator
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    save_file_path = tmp_path_factory.mktemp('checkpoints')
+    capture = str(save_file_path / 'capture')
+
+    capture_generator(templates=[46, 47, 54], n_instruments=3, seed=21,
+                      event_mix={'add': 0.35, 'modify': 0.15, 'cancel': 0.25, 'trade': 0.1,
+                                 'implied': 0.15}).write_datamine(capture, 3000)
+    cme_parser_datamine(capture, save_file_path=str(save_file_path), disable_progress_bar=True)
+
+    with book_store(str(save_file_path / 'books.db')) as store:
+        assert store.build(str(save_file_path), every_events=300) > 0
+        assert store.build_mbo(str(save_file_path), every_events=300) > 0
+
+        yield store, str(save_file_path)
+
+
+def _times(TransactTime, n=5):
+    # query times in the second half of the session, some between messages
+
+    times = np.unique(TransactTime)
+    times = np.random.default_rng(3).choice(times[times.shape[0] // 2:], n, replace=False)
+
+    return times.tolist() + [int(times[0]) + 1]
+
+
+def test_book_at_matches_replay(store):
+    store, save_file_path = store
+    data = quotes.read_mbp(save_file_path)
+    books = quotes.order_book(data, None, 10)
+
+    for code, x in books.items():
+        for timestamp in _times(data['TransactTime'].values):
+            result = store.book_at(int(code), timestamp)
+
+            for name, columns in [('LOB_conso', book_columns(10)),
+                                  ('LOB_outright', book_columns(10)),
+                                  ('LOB_implied', book_columns(2, orders=False))]:
+                expected = x[name].loc[x[name]['TransactTime'] <= timestamp]
+
+                np.testing.assert_array_equal(result[name][columns].values[0],
+                                              expected[columns].values[-1])
+
+            assert result['LOB_conso']['MsgSeq'].iloc[0] == x['LOB_conso']['MsgSeq'].loc[
+                x['LOB_conso']['TransactTime'] <= timestamp].iloc[-1]
+
+
+def test_mbo_at_matches_replay(store):
+    store, save_file_path = store
+    data = pd.concat([pd.read_parquet(x) for x in
+                      parsed_files(save_file_path, 'MDIncrementalRefreshOrderBook47')],
+                     ignore_index=True)
+
+    for timestamp in _times(data['TransactTime'].values):
+        expected = mbo_book(price_table.from_parquet(save_file_path))
+        expected.apply(data.loc[data['TransactTime'] <= timestamp], events=False)
+
+        for security in data['SecurityID'].unique().tolist():
+            book = store.mbo_at(security, timestamp)
+
+            pd.testing.assert_frame_equal(book.to_snapshot(security),
+                                          expected.to_snapshot(security))
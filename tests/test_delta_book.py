@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from cmemdp.delta_book import delta_book
+
+
+def _delta_book():
+    rng = np.random.default_rng(0)
+    bid = 5000 + np.cumsum(rng.integers(-1, 2, 1000)) * 0.25
+
+    book = pd.DataFrame({'Date': '20250420',
+                         'TransactTime': np.arange(1000) * 1000,
+                         'Seq': np.arange(1000, dtype=float),
+                         'Code': 'SYN0000',
+                         'Bid_PX_1': bid,
+                         'Bid_Qty_1': rng.integers(1, 100, 1000).astype(float),
+                         'Ask_PX_1': bid + 0.25,
+                         'Ask_Qty_1': rng.integers(1, 100, 1000).astype(float),
+                         'MsgSeq': np.arange(1000, dtype=float)})
+
+    return book, delta_book.from_book(book, 0.25, interval=100)
+
+
+def test_decode_rows():
+    book, stored = _delta_book()
+
+    for first, last in [(0, 1000), (150, 420), (999, 1000), (300, 5000)]:
+        decoded = stored.decode_rows(first, last)
+        expected = book.iloc[first:last].reset_index(drop=True)
+
+        pd.testing.assert_frame_equal(decoded[expected.columns], expected, check_dtype=False)
+
+
+def test_decode_rows_empty():
+    book, stored = _delta_book()
+
+    for first, last in [(500, 400), (1000, None), (5000, None), (0, 0), (0, -3)]:
+        decoded = stored.decode_rows(first, last)
+
+        assert decoded.shape == (0, book.shape[1])
+        assert list(decoded.columns) == list(stored.decode_rows(0, 1).columns)
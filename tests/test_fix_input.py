@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cmemdp.FIX_input import mbp_input_fix
+
+
+# tiny FIX files in the layouts before and after 2015-11-20, the expected
+# tables are the outputs of the regex implementation on the same files
+
+def _message(*fields):
+    return '\x01'.join(fields) + '\x01'
+
+
+def _header(seq, second, n, new):
+
+    if new:
+        return ['1128=9', '9=300', '35=X', '49=CME', '75=20160104', f'34={seq}',
+                f'52=2016010414300{second}123456789', f'60=2016010414300{second}123000000',
+                '5799=10000100', f'268={n}']
+
+    return ['1128=9', '9=300', '35=X', '49=CME', f'34={seq}', f'52=2015011014300{second}000',
+            '75=20150110', f'268={n}']
+
+
+def _status(seq, new):
+    # a message without book entries
+
+    if new:
+        return _message('1128=9', '9=80', '35=f', '49=CME', '75=20160104', f'34={seq}',
+                        '52=20160104143002000000000', '326=17', '10=102')
+
+    return _message('1128=9', '9=80', '35=f', '49=CME', f'34={seq}', '52=20150110143002000',
+                    '75=20150110', '326=17', '10=102')
+
+
+OLD_QUOTES = [
+    _message(*_header(11, 1, 2, False),
+             '279=0', '22=8', '48=1001', '83=5', '107=ESH5', '269=0', '270=205025', '271=10',
+             '273=143000000', '336=2', '346=3', '1023=1',
+             '279=0', '22=8', '48=1001', '83=6', '107=ESH5', '269=1', '270=205050', '271=7',
+             '273=143000000', '336=2', '346=2', '1023=1', '10=101'),
+    _status(12, False),
+    _message(*_header(13, 3, 2, False),
+             '279=1', '22=8', '48=1001', '83=7', '107=ESH5', '269=0', '270=205025', '271=12',
+             '273=143000000', '336=2', '346=4', '1023=1',
+             '279=0', '22=8', '48=1002', '83=3', '107=ESM5', '269=E', '270=204000', '271=5',
+             '273=143000000', '276=K', '1023=1', '10=103'),
+    _message(*_header(14, 4, 1, False),
+             '279=2', '22=8', '48=1001', '83=8', '107=ESH5', '269=1', '270=205050', '271=0',
+             '273=143000000', '336=2', '346=0', '1023=1', '10=104'),
+]
+
+NEW_QUOTES = [
+    _message(*_header(21, 1, 2, True),
+             '279=0', '269=0', '48=1001', '55=ESH6', '83=5', '270=205025', '271=10', '346=3', '1023=1',
+             '279=0', '269=1', '48=1001', '55=ESH6', '83=6', '270=205050', '271=7', '346=2', '1023=1',
+             '10=101'),
+    _status(22, True),
+    _message(*_header(23, 3, 2, True),
+             '279=1', '269=0', '48=1001', '55=ESH6', '83=7', '270=205025', '271=12', '346=4', '1023=1',
+             '279=0', '269=F', '48=1002', '55=ESM6', '83=3', '270=204100', '271=5', '1023=2',
+             '10=103'),
+    _message(*_header(24, 4, 1, True),
+             '279=2', '269=1', '48=1001', '55=ESH6', '83=8', '270=205050', '271=0', '346=0', '1023=1',
+             '10=104'),
+]
+
+OLD_TRADES = [
+    _message(*_header(31, 1, 2, False),
+             '279=0', '48=1001', '83=9', '107=ESH5', '269=2', '270=205050', '271=3', '273=143001000',
+             '274=1', '451=25', '1003=7001', '5797=1',
+             '279=0', '48=1002', '83=4', '107=ESM5', '269=2', '270=204000', '271=1', '273=143001000',
+             '274=0', '451=0', '1003=7002', '10=105'),
+    _message(*_header(32, 2, 1, False),
+             '279=0', '48=1001', '83=10', '107=ESH5', '269=2', '270=205025', '271=2', '273=143002000',
+             '274=2', '451=0', '277=1', '1003=7003', '5797=2', '10=106'),
+    _message(*_header(33, 3, 1, False),
+             '279=0', '22=8', '48=1001', '83=11', '107=ESH5', '269=0', '270=205000', '271=4',
+             '273=143003000', '336=2', '346=1', '1023=2', '10=107'),
+]
+
+NEW_TRADES = [
+    _message(*_header(41, 1, 2, True),
+             '279=0', '269=2', '55=ESH6', '48=1001', '83=9', '270=205050', '271=3', '346=2', '5797=1',
+             '37705=2', '37=9001', '32=2', '37=9002', '32=1',
+             '279=0', '269=2', '55=ESM6', '48=1002', '83=4', '270=204000', '271=1', '346=1', '5797=0',
+             '37705=1', '37=9003', '32=1', '10=105'),
+    _message(*_header(42, 2, 1, True),
+             '279=0', '269=2', '55=ESH6', '48=1001', '83=10', '270=205025', '271=2', '346=1', '5797=2',
+             '37705=1', '37=9004', '32=2', '10=106'),
+    _message(*_header(43, 3, 1, True),
+             '279=0', '269=0', '48=1001', '55=ESH6', '83=11', '270=205000', '271=4', '346=1', '1023=2',
+             '10=107'),
+]
+
+OLD_TIME = ['20150110143001000', '20150110143003000', '20150110143004000']
+NEW_TIME = ['20160104143001123456789', '20160104143003123456789', '20160104143004123456789']
+NEW_TRANSACT = ['20160104143001123000000', '20160104143003123000000', '20160104143004123000000']
+
+EXPECTED = {
+    'quote_messages': {
+        False: pd.DataFrame({
+            'MsgSeq': [11, 11, 13, 14, 13],
+            'SendingTime': OLD_TIME[0:1] * 2 + OLD_TIME[1:] + OLD_TIME[1:2],
+            'Date': '20150110',
+            'Update': [0, 0, 1, 2, 0],
+            'Seq': [5, 6, 7, 8, 3],
+            'Code': ['ESH5'] * 4 + ['ESM5'],
+            'Side': ['0', '1', '0', '1', 'E'],
+            'PX': [2050.25, 2050.5, 2050.25, 2050.5, 2040.0],
+            'Qty': [10, 7, 12, 0, 5],
+            'Ord': [3, 2, 4, 0, np.nan],
+            'PX_depth': 1,
+            'Implied': ['N'] * 4 + ['Y']}),
+        True: pd.DataFrame({
+            'Date': '20160104',
+            'MsgSeq': [21, 21, 23, 24, 23],
+            'SendingTime': NEW_TIME[0:1] * 2 + NEW_TIME[1:] + NEW_TIME[1:2],
+            'TransactTime': NEW_TRANSACT[0:1] * 2 + NEW_TRANSACT[1:] + NEW_TRANSACT[1:2],
+            'Update': [0, 0, 1, 2, 0],
+            'Side': ['0', '1', '0', '1', 'F'],
+            'Code': ['ESH6'] * 4 + ['ESM6'],
+            'Seq': [5, 6, 7, 8, 3],
+            'PX': [2050.25, 2050.5, 2050.25, 2050.5, 2041.0],
+            'Qty': [10, 7, 12, 0, 5],
+            'Ord': [3, 2, 4, 0, np.nan],
+            'PX_depth': [1, 1, 1, 1, 2],
+            'Implied': ['N'] * 4 + ['Y']})},
+    'trade_summary': {
+        False: pd.DataFrame({
+            'MsgSeq': [31, 31, 32],
+            'SendingTime': ['20150110143001000', '20150110143001000', '20150110143002000'],
+            'Date': '20150110',
+            'Seq': [9, 4, 10],
+            'Code': ['ESH5', 'ESM5', 'ESH5'],
+            'PX': [2050.5, 2040.0, 2050.25],
+            'Size': [3, 1, 2],
+            'TrdID': [7001, 7002, 7003],
+            'agg': [1, np.nan, 2],
+            'TrdCon': [np.nan, np.nan, '1']}),
+        True: pd.DataFrame({
+            'Date': '20160104',
+            'MsgSeq': [41, 41, 42],
+            'SendingTime': ['20160104143001123456789', '20160104143001123456789',
+                            '20160104143002123456789'],
+            'TransactTime': ['20160104143001123000000', '20160104143001123000000',
+                             '20160104143002123000000'],
+            'Code': ['ESH6', 'ESM6', 'ESH6'],
+            'Seq': [9, 4, 10],
+            'PX': [2050.5, 2040.0, 2050.25],
+            'Size': [3, 1, 2],
+            'Ord': [2, 1, 1],
+            'agg': [1, 0, 2]})}}
+
+
+@pytest.mark.parametrize('method', ['quote_messages', 'trade_summary'])
+@pytest.mark.parametrize('new', [False, True])
+def test_fix_layouts_match_regex_output(tmp_path, method, new):
+    lines = {('quote_messages', False): OLD_QUOTES, ('quote_messages', True): NEW_QUOTES,
+             ('trade_summary', False): OLD_TRADES, ('trade_summary', True): NEW_TRADES}[method, new]
+
+    path = tmp_path / 'fix.txt'
+    path.write_text('\n'.join(lines) + '\n', encoding='latin-1')
+
+    result = getattr(mbp_input_fix(str(path)), method)(
+        '2016-01-04' if new else '2015-01-10', price_displayformat=0.01)
+    expected = EXPECTED[method][new]
+
+    # one table per security, in the order of their first entries
+
+    assert [x['Code'].iloc[0] for x in result] == list(expected['Code'].unique())
+
+    pd.testing.assert_frame_equal(pd.concat(result).sort_index(), expected, check_dtype=False)
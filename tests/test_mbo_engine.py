@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cmemdp.book_engine import book_columns, mbp_books, side_codes
+from cmemdp.cme_parser import cme_parser_datamine
+from cmemdp.FIX_input import quotes
+from cmemdp.mbo_engine import mbo_book
+from cmemdp.parquet_files import parsed_files
+from cmemdp.synthetic import capture_generator
+
+
+def _read(save_file_path, name):
+    return pd.concat([pd.read_parquet(x) for x in parsed_files(save_file_path, name)],
+                     ignore_index=True)
+
+
+@pytest.fixture(scope='module')
+def parsed(tmp_path_factory):
+    save_file_path = tmp_path_factory.mktemp('mbo')
+    capture = str(save_file_path / 'capture')
+
+    capture_generator(templates=[46, 47, 54], n_instruments=3, seed=11).write_datamine(capture, 5000)
+    cme_parser_datamine(capture, save_file_path=str(save_file_path), disable_progress_bar=True)
+
+    return (_read(save_file_path, 'MDIncrementalRefreshOrderBook47'),
+            _read(save_file_path, 'MDIncrementalRefreshBook46'))
+
+
+def test_mbo_books_match_mbp(parsed):
+    mbo, mbp = parsed
+    columns = book_columns(10)
+
+    events = mbo_book().apply(mbo, level=10)
+    from_mbo = events.groupby(['SecurityID', 'MsgSeq'])[columns].last()
+
+    mbp = mbp.loc[mbp['MDEntryType'].isin(['0', '1'])]
+    books, _ = mbp_books(mbp['SecurityID'].values, mbp['MDUpdateAction'].values,
+                         side_codes(mbp['MDEntryType'].values), mbp['MDPriceLevel'].values,
+                         mbp['MDEntryPx'].values, mbp['MDEntrySize'].values,
+                         mbp['NumberOfOrders'].values, 10)
+    from_mbp = (pd.DataFrame(books, columns=columns)
+                .assign(SecurityID=mbp['SecurityID'].values, MsgSeq=mbp['MsgSeq'].values)
+                .groupby(['SecurityID', 'MsgSeq'])[columns].last())
+
+    # the MBP book as of every packet with MBO messages, changes beyond
+    # the 10 MBP levels leave the MBP book unchanged
+
+    for security, books in from_mbo.groupby(level=0):
+        books = books.droplevel(0)
+        expected = from_mbp.loc[security]
+        expected = expected.reindex(books.index.union(expected.index)).ffill().fillna(0).loc[books.index]
+
+        pd.testing.assert_frame_equal(books, expected, check_dtype=False)
+
+
+def test_apply_level_matches_depth(parsed):
+    mbo = parsed[0]
+    columns = book_columns(3)
+
+    events = mbo_book().apply(mbo, level=3)
+    book = mbo_book()
+
+    for first, last in [(0, 1), (1, 500), (500, 2001), (2001, mbo.shape[0])]:
+        book.apply(mbo.iloc[first:last], events=False)
+        security = int(mbo['SecurityID'].iloc[last - 1])
+
+        expected = dict.fromkeys(columns, 0.0)
+
+        for x in book.depth(security, 3).itertuples():
+            name = 'Bid' if x.MDEntryType == '0' else 'Ask'
+            expected |= {f'{name}_PX_{x.MDPriceLevel}': x.MDEntryPx,
+                         f'{name}_Qty_{x.MDPriceLevel}': x.MDEntrySize,
+                         f'{name}_Ord_{x.MDPriceLevel}': x.NumberOfOrders}
+
+        assert events[columns].iloc[last - 1].to_dict() == expected
+
+
+def _state(book):
+    # orders and the queues of every price, the order of prices is irrelevant
+
+    return (book.orders,
+            {security: [sorted((tick, level[0], level[1], list(level[2]))
+                               for tick, level in side[1].items()) for side in sides]
+             for security, sides in book.books.items()})
+
+
+@pytest.mark.parametrize('chunks', [1, 7])
+def test_apply_without_events_matches_events(parsed, chunks):
+    mbo = parsed[0].copy()
+
+    # clears of the book of one security in between
+
+    mbo.loc[[1000, 3000], 'MDEntryType'] = 'J'
+
+    expected = mbo_book()
+    expected.apply(mbo)
+
+    book = mbo_book()
+
+    for x in np.array_split(np.arange(mbo.shape[0]), chunks):
+        assert book.apply(mbo.iloc[x], events=False) is None
+
+    assert _state(book) == _state(expected)
+
+
+def test_snapshot_then_apply_matches_replay(tmp_path):
+    capture = str(tmp_path / 'capture')
+
+    capture_generator(templates=[47, 53, 54], n_instruments=3, seed=12,
+                      snapshot_interval=500).write_datamine(capture, 2000)
+    cme_parser_datamine(capture, save_file_path=str(tmp_path), disable_progress_bar=True)
+
+    mbo = _read(tmp_path, 'MDIncrementalRefreshOrderBook47')
+
+    expected = mbo_book()
+    expected.apply(mbo, events=False)
+
+    # incrementals already in the snapshot are skipped
+
+    snapshot = quotes.read_snapshot(str(tmp_path), before=int(mbo['MsgSeq'].median()), template=53)
+
+    book = mbo_book()
+    book.snapshot(snapshot)
+    events = book.apply(mbo)
+
+    assert 0 < events.shape[0] < mbo.shape[0]
+    assert _state(book) == _state(expected)
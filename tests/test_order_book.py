@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cmemdp.book_engine import book_columns
+from cmemdp.cme_parser import cme_parser_datamine
+from cmemdp.FIX_input import quotes
+from cmemdp.synthetic import capture_generator
+
+
+EVENT_MIX = {'add': 0.35, 'modify': 0.15, 'cancel': 0.25, 'trade': 0.1, 'implied': 0.15}
+
+
+def _parse(tmp_path, seed, n_events=2000, **kwargs):
+    # parsed outputs of a synthetic capture with outright and implied quotes
+
+    capture = str(tmp_path / 'capture')
+    capture_generator(n_instruments=3, event_mix=EVENT_MIX, seed=seed,
+                      **kwargs).write_datamine(capture, n_events)
+    cme_parser_datamine(capture, save_file_path=str(tmp_path), disable_progress_bar=True)
+
+    return str(tmp_path)
+
+
+@pytest.fixture(scope='module')
+def parsed(tmp_path_factory):
+    return _parse(tmp_path_factory.mktemp('parsed'), 5, templates=[46, 54])
+
+
+@pytest.mark.parametrize('conflate', ['event', 'time'])
+def test_conflate_last_book_of_event(parsed, conflate):
+    data = quotes.read_mbp(parsed)
+
+    # events of three messages, only the last one has EndOfEvent
+
+    event = (data['MsgSeq'] - 1) // 3
+    data['MatchEventIndicator'] = np.where(data['MsgSeq'] % 3 == 0, '0b10000100', '0b00000100')
+    data['TransactTime'] = data.groupby(event)['TransactTime'].transform('min')
+
+    full = quotes.order_book(data, None, 10)
+    conflated = quotes.order_book(data.sample(frac=1, random_state=2), None, 10, conflate=conflate)
+
+    for code, books in full.items():
+        for name, book in books.items():
+
+            if book is None:
+                assert conflated[code][name] is None
+                continue
+
+            expected = book.groupby(((book['MsgSeq'] - 1) // 3).values).tail(1)
+
+            assert expected.shape[0] < book.shape[0]
+            pd.testing.assert_frame_equal(conflated[code][name], expected.reset_index(drop=True))
+
+
+def _replay(messages, level):
+    # reference books of one security, one message at a time with lists of
+    # [price, qty, orders] from the best level, padded with zeros
+
+    sides = [[[0.0] * 3 for _ in range(level)] for _ in range(2)]
+    books = []
+
+    for x in messages.itertuples():
+        side = {'0': 0, 'E': 0, '1': 1, 'F': 1}.get(x.Side)
+        values = [x.PX, x.Qty, 0.0 if np.isnan(x.Ord) else x.Ord]
+
+        if side is None or x.Update not in (0, 1, 2):
+            sides = [[[0.0] * 3 for _ in range(level)] for _ in range(2)]
+        elif x.Update == 0:
+            sides[side].insert(x.PX_depth - 1, values)
+            sides[side].pop()
+        elif x.Update == 1:
+            sides[side][x.PX_depth - 1] = values
+        else:
+            sides[side].pop(x.PX_depth - 1)
+            sides[side].append([0.0] * 3)
+
+        books.append([[list(x) for x in side] for side in sides])
+
+    return books
+
+
+def _row(sides):
+    # a book in the columns of book_columns(level)
+
+    return [v for x in sides[0][::-1] for v in x] + [v for x in sides[1] for v in x]
+
+
+def _merge(levels, px, qty, bid):
+    # an implied level added to a price in the ladder (the deepest bid or
+    # the best ask with the price), or inserted at its rank among the prices
+
+    if px == 0:
+        return
+
+    prices = [x[0] for x in levels]
+
+    if px in prices:
+        j = len(prices) - 1 - prices[::-1].index(px) if bid else prices.index(px)
+        levels[j][1] += qty
+
+    else:
+        rank = len({x for x in prices if x > 0 and (x > px if bid else x < px)})
+
+        if rank < len(levels):
+            levels.insert(rank, [px, qty, 0.0])
+            levels.pop()
+
+
+def _consolidate(messages, level):
+    # reference consolidated books of one security: the latest outright
+    # book (missing before the first one) with the latest implied levels
+
+    implied = messages['Implied'].values == 'Y'
+    outright_books = _replay(messages.loc[~implied], 10)
+    implied_books = _replay(messages.loc[implied], 2)
+
+    outright, books = [[[np.nan] * 3] * level] * 2, []
+    n_outright, n_implied = np.cumsum(~implied), np.cumsum(implied)
+
+    for k in range(messages.shape[0]):
+        if n_outright[k] > 0:
+            outright = outright_books[n_outright[k] - 1]
+
+        sides = [[list(x) for x in side[:level]] for side in outright]
+
+        if n_implied[k] > 0:
+            for side, bid in [(0, True), (1, False)]:
+                for px, qty, _ in implied_books[n_implied[k] - 1][side]:
+                    _merge(sides[side], px, qty, bid)
+
+        books.append(_row(sides))
+
+    return books
+
+
+@pytest.mark.parametrize('seed,depth', [(1, 2), (2, 5), (3, 10)])
+def test_order_book_matches_replay(tmp_path, seed, depth):
+    path = _parse(tmp_path, seed, depth=depth)
+    data = quotes.read_mbp(path).sort_values(['MsgSeq', 'Seq'])
+
+    results = quotes.order_book(data, None, depth)
+
+    # the parsed directory is read with its native columns
+
+    native = quotes.order_book(path, None, depth)
+    assert set(native) == set(results)
+
+    for code, books in native.items():
+        for name, book in books.items():
+            pd.testing.assert_frame_equal(book, results[code][name])
+
+    for code, messages in data.groupby('Code'):
+        outright = messages.loc[messages['Implied'] == 'N']
+        implied = messages.loc[messages['Implied'] == 'Y']
+
+        assert outright.shape[0] > 0 and implied.shape[0] > 0
+
+        book = results[code]['LOB_outright']
+        np.testing.assert_array_equal(book[book_columns(10)].values, [_row(x) for x in _replay(outright, 10)])
+        np.testing.assert_array_equal(book['Seq'].values, outright['Seq'].values)
+
+        book = results[code]['LOB_implied']
+        expected = np.array([_row(x) for x in _replay(implied, 2)])[:, [0, 1, 3, 4, 6, 7, 9, 10]]
+        np.testing.assert_array_equal(book[book_columns(2, orders=False)].values, expected)
+
+
+@pytest.mark.parametrize('seed,depth', [(4, 2), (5, 5), (6, 10)])
+def test_consolidated_book_matches_merge(tmp_path, seed, depth):
+    data = quotes.read_mbp(_parse(tmp_path, seed, depth=depth)).sort_values(['MsgSeq', 'Seq'])
+
+    results = quotes.order_book(data, None, depth)
+
+    for code, messages in data.groupby('Code'):
+        book = results[code]['LOB_conso']
+
+        np.testing.assert_array_equal(book[book_columns(depth)].values,
+                                      _consolidate(messages, depth))
+        np.testing.assert_array_equal(book['Seq'].values, messages['Seq'].values)
+
+
+def test_order_book_from_snapshot(tmp_path):
+    path = _parse(tmp_path, 7, templates=[46, 52, 54], snapshot_interval=500)
+    data = quotes.read_mbp(path)
+
+    # books start from the snapshots before the middle of the session
+
+    snapshot = quotes.read_snapshot(path, before=int(data['MsgSeq'].median()))
+    start = snapshot.groupby('Code')['Seq'].max()
+
+    assert (snapshot['Implied'] == 'Y').any()
+
+    full = quotes.order_book(data, None, 10)
+    seeded = quotes.order_book(data, None, 10, snapshot=snapshot)
+
+    for code, books in full.items():
+        for name, book in books.items():
+            expected = book.loc[book['Seq'] > start[code]].reset_index(drop=True)
+
+            assert 0 < expected.shape[0] < book.shape[0]
+            pd.testing.assert_frame_equal(seeded[code][name], expected)
+
+
+@pytest.mark.parametrize('implied', [False, True])
+def test_bbo_matches_level_1(parsed, implied):
+    books = quotes.order_book(parsed, None, 10)
+    name = 'LOB_implied' if implied else 'LOB_outright'
+    columns = book_columns(1, orders=not implied)
+
+    every = quotes.bbo(parsed, implied=implied, changes_only=False)
+    changes = quotes.bbo(parsed, implied=implied)
+
+    for code, book in books.items():
+        book = book[name]
+        top = every.loc[every['Code'] == code].reset_index(drop=True)
+
+        np.testing.assert_array_equal(top[columns].values, book[columns].values)
+        np.testing.assert_array_equal(top['MsgSeq'].values, book['MsgSeq'].values)
+
+        # only the messages that change the best bid or ask
+
+        changed = book[columns].diff().ne(0).any(axis=1).values
+        top = changes.loc[changes['Code'] == code].reset_index(drop=True)
+
+        assert 0 < top.shape[0] < book.shape[0]
+        np.testing.assert_array_equal(top[columns].values, book.loc[changed, columns].values)
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cmemdp.FIX_input import orderbook, _propagate_sides
+
+
+START = pd.Timestamp('2025-04-21 08:30:00', tz='America/Chicago')
+
+
+def _books(n=400, seed=0):
+    # books of two securities at random times, some sharing a timestamp
+    # and some on the grid points of the tests
+
+    rng = np.random.default_rng(seed)
+    time = rng.integers(-2 * 10**9, 10 * 10**9, n)
+    time[0::5] = time[0::5] // 250000000 * 250000000
+    time = START.value + np.sort(time)
+    time[1::7] = time[0::7][:time[1::7].shape[0]]
+
+    return pd.DataFrame({'TransactTime': time,
+                         'SendingTime': time + 1000,
+                         'Seq': np.arange(n, dtype=np.float64),
+                         'Code': rng.choice(['100000', '100001'], n),
+                         'Bid_PX_1': rng.integers(100, 110, n) * 0.25,
+                         'Ask_PX_1': rng.integers(110, 120, n) * 0.25}).sort_values(['TransactTime', 'Seq'])
+
+
+def _last_before(book, time):
+    # the last book at or before a time, by time and then Seq
+
+    book = book.loc[book['TransactTime'] <= time]
+
+    if book.shape[0] == 0:
+        return [np.nan, np.nan]
+
+    return book.sort_values(['TransactTime', 'Seq']).iloc[-1][['Bid_PX_1', 'Ask_PX_1']].tolist()
+
+
+def test_resample_grid_matches_last_book(tmp_path):
+    book = _books()
+    end = START + pd.Timedelta('8s')
+
+    # books arrive out of order, and before the start
+
+    result = orderbook.resample_grid(book.sample(frac=1, random_state=1), ['1s', '250ms'],
+                                     START.tz_localize(None), end.tz_localize(None))
+
+    for freq, resampled in result.items():
+        grid = pd.date_range(START, end, freq=freq)
+
+        assert resampled.shape[0] == 2 * grid.shape[0]
+
+        for code, x in resampled.groupby('Code'):
+            assert (x['Time'].values == grid.values).all()
+
+            expected = [_last_before(book.loc[book['Code'] == code], t.value) for t in grid]
+            np.testing.assert_array_equal(x[['Bid_PX_1', 'Ask_PX_1']].values, expected)
+
+    # books keyed by security, and saved books read one file at a time
+
+    books = {code: {'LOB_conso': x} for code, x in book.groupby('Code')}
+
+    for code, x in books.items():
+        x['LOB_conso'].to_parquet(tmp_path / f'LOB_conso_{code}.parquet')
+
+    for other in [orderbook.resample_grid(books, ['1s', '250ms'], START, end),
+                  orderbook.resample_grid(str(tmp_path), ['1s', '250ms'], START, end)]:
+        for freq, resampled in result.items():
+            pd.testing.assert_frame_equal(other[freq].sort_values(['Code', 'Time'], ignore_index=True),
+                                          resampled.sort_values(['Code', 'Time'], ignore_index=True))
+
+
+def _trades(n=300, seed=0):
+    # trades of two securities, a third of them without the aggressor side
+
+    rng = np.random.default_rng(seed)
+    bid = rng.integers(100, 104, n) * 0.25
+
+    return pd.DataFrame({'Code': rng.choice(['100000', '100001'], n),
+                         'PX': bid + rng.integers(0, 3, n) * 0.125,
+                         'Bid_PX_1': bid,
+                         'Ask_PX_1': bid + 0.25,
+                         'agg': np.where(rng.random(n) < 0.3, 0, rng.integers(1, 3, n))})
+
+
+def _tick_test(trades):
+    # reference tick test, one trade at a time
+
+    side, last, previous = [], {}, {}
+
+    for x in trades.itertuples():
+        if x.Code in previous and x.PX != previous[x.Code]:
+            last[x.Code] = 1 if x.PX > previous[x.Code] else 2
+
+        previous[x.Code] = x.PX
+        side.append(last.get(x.Code, 0))
+
+    return np.array(side)
+
+
+def test_classify_trades_small():
+    trades = pd.DataFrame({'PX': [10.0, 10.25, 10.25, 10.0, 10.0, 10.5],
+                           'Bid_PX_1': [9.75, 10.0, 10.0, 10.0, 10.0, 10.25],
+                           'Ask_PX_1': [10.25, 10.25, 10.5, 10.25, 10.25, 10.5],
+                           'agg': [0, 0, 0, 0, 2, 0]})
+
+    assert orderbook.classify_trades(trades, 'tick').tolist() == [0, 1, 1, 2, 2, 1]
+    assert orderbook.classify_trades(trades, 'quote').tolist() == [0, 1, 1, 2, 2, 1]
+    assert orderbook.classify_trades(trades, 'emo').tolist() == [0, 1, 1, 2, 2, 1]
+
+    # the quotes disagree with the ticks
+
+    trades['PX'] = [10.0, 10.0, 10.125, 10.25, 10.0, 10.25]
+    assert orderbook.classify_trades(trades, 'tick').tolist() == [0, 0, 1, 1, 2, 1]
+    assert orderbook.classify_trades(trades, 'quote').tolist() == [0, 2, 2, 1, 2, 2]
+    assert orderbook.classify_trades(trades, 'emo').tolist() == [0, 2, 1, 1, 2, 2]
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_classify_trades_matches_reference(seed):
+    trades = _trades(seed=seed)
+    tick = _tick_test(trades)
+
+    px, bid, ask = trades['PX'].values, trades['Bid_PX_1'].values, trades['Ask_PX_1'].values
+    mid = (bid + ask) / 2
+    agg = trades['agg'].values
+
+    expected = {'tick': tick,
+                'quote': np.where(px > mid, 1, np.where(px < mid, 2, tick)),
+                'emo': np.where(px == ask, 1, np.where(px == bid, 2, tick))}
+
+    for method, side in expected.items():
+        np.testing.assert_array_equal(orderbook.classify_trades(trades, method),
+                                      np.where(agg == 0, side, agg))
+        np.testing.assert_array_equal(orderbook.classify_trades(trades.drop(columns='agg'), method),
+                                      side)
+
+
+def _next_side(agg, code):
+    # reference: unsigned trades take the side of the next signed trade of
+    # the same security, one trade at a time from the end
+
+    side, following = [], {}
+
+    for x, y in zip(agg[::-1], code[::-1]):
+        if x != 0:
+            following[y] = x
+        side.append(following.get(y, 0))
+
+    return side[::-1]
+
+
+def test_propagate_sides_matches_reference():
+    trades = _trades(seed=2)
+    agg = trades['agg'].tolist()
+
+    assert _propagate_sides(trades).tolist() == _next_side(agg, trades['Code'].tolist())
+    assert _propagate_sides(trades.drop(columns='Code')).tolist() == _next_side(agg, [0] * len(agg))
+
+
+def _depth(n=300, seed=3):
+    # two-level books of two securities
+
+    book = _books(n, seed)
+    rng = np.random.default_rng(seed)
+
+    for x in ['Bid', 'Ask']:
+        book[f'{x}_Qty_1'] = rng.integers(1, 50, n).astype(float)
+        book[f'{x}_PX_2'] = book[f'{x}_PX_1'] + (-0.25 if x == 'Bid' else 0.25)
+        book[f'{x}_Qty_2'] = rng.integers(1, 50, n).astype(float)
+
+    return book.assign(Date='20250421')
+
+
+@pytest.mark.parametrize('merge_method', ['TransactTime', 'Seq_number'])
+def test_tbbo_many_securities(merge_method):
+    book = _depth()
+    rng = np.random.default_rng(4)
+    trades = book.sample(120, random_state=5)[['Date', 'TransactTime', 'Seq', 'Code']]
+
+    # trades between books, with SecurityIDs where the books have strings
+
+    trades = trades.assign(TransactTime=trades['TransactTime'] + rng.integers(0, 2, 120),
+                           Seq=trades['Seq'] + rng.choice([0, 0.5], 120),
+                           Code=trades['Code'].astype(int), PX=100.0, Size=1,
+                           agg=rng.integers(1, 3, 120), TradeID=np.arange(120)).sort_values('Seq')
+
+    tbbo = orderbook.tbbo(book, trades, merge_method, level=2, post_trade=True)
+    columns = [f'{x}_{y}_{i}' for i in [1, 2] for x in ['Bid', 'Ask'] for y in ['PX', 'Qty']]
+
+    assert tbbo.shape[0] == trades.shape[0]
+
+    for x in tbbo.itertuples():
+        own = book.loc[book['Code'] == str(x.Code)]
+
+        if merge_method == 'TransactTime':
+            before = own.loc[own['TransactTime'] <= x.TransactTime]
+        else:
+            before = own.loc[own['Seq'] <= x.Seq]
+
+        after = own.loc[own['TransactTime'] <= x.TransactTime]
+        row = tbbo.loc[tbbo['TradeID'] == x.TradeID]
+
+        expected = before[columns].values[-1] if before.shape[0] else np.full(len(columns), np.nan)
+        np.testing.assert_array_equal(row[columns].values[0], expected)
+        np.testing.assert_array_equal(row[['Post_' + y for y in columns]].values[0],
+                                      after[columns].values[-1])
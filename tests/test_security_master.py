@@ -0,0 +1,23 @@
+import pandas as pd
+
+from cmemdp.security_master import security_master
+
+
+def test_join_date_col_keeps_order_and_index():
+    definitions = pd.DataFrame({'SecurityID': [1, 1, 2],
+                                'LastUpdateTime': [1735689600000000000, 1736035200000000000, 1735689600000000000],
+                                'Symbol': ['A', 'A2', 'B']})
+
+    # a named index and a column called index, in no particular date order
+
+    data = pd.DataFrame({'SecurityID': [1, 2, 1, 1],
+                         'Date': [20250106, 20250102, 20250102, 20250101],
+                         'index': [9, 8, 7, 6]},
+                        index=pd.Index([40, 30, 20, 10], name='TransactTime'))
+
+    with security_master(':memory:') as store:
+        store.update(definitions, 54)
+        joined = store.join(data, columns=['Symbol'], date_col='Date')
+
+    pd.testing.assert_frame_equal(joined[data.columns], data)
+    assert joined['Symbol'].tolist() == ['A2', 'B', 'A', 'A']
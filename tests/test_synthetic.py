@@ -0,0 +1,223 @@
+import struct
+
+import pandas as pd
+import pytest
+
+from cmemdp import main_template
+from cmemdp.cme_parser import (TEMPLATES, VERSIONED_TEMPLATES, FILL_TEMPLATES,
+                               cme_parser_datamine, cme_parser_pcap)
+from cmemdp.parquet_files import parsed_files
+from cmemdp.security_master import security_master
+from cmemdp.synthetic import (capture_generator, round_trip,
+                              encode_MDIncrementalRefreshTradeSummary48)
+
+TIME = pd.Timestamp('2025-04-21 13:30:00', tz='UTC').value
+
+
+def _assert_fields(decoded, expected):
+    for key, value in expected.items():
+        assert decoded[key] == value, key
+
+
+def test_round_trip_46():
+    entries = [{'MDEntryPx': 5000250000000, 'MDEntrySize': 7, 'SecurityID': 100000, 'RptSeq': 11,
+                'NumberOfOrders': 2, 'MDPriceLevel': 1, 'MDUpdateAction': 0, 'MDEntryType': '0'},
+               {'MDEntryPx': 5000500000000, 'MDEntrySize': 3, 'SecurityID': 100000, 'RptSeq': 12,
+                'NumberOfOrders': 1, 'MDPriceLevel': 1, 'MDUpdateAction': 1, 'MDEntryType': '1'}]
+    orders = [{'OrderID': 9, 'MDOrderPriority': 100, 'MDDisplayQty': 3, 'ReferenceID': 2,
+               'OrderUpdateAction': 0}]
+
+    decoded = round_trip(46, TransactTime=TIME, MatchEventIndicator=0b10000100,
+                         entries=entries, orders=orders)
+
+    assert len(decoded) == 2
+
+    for row, entry in zip(decoded, entries):
+        _assert_fields(row, entry)
+        assert row['TransactTime'] == TIME
+
+    _assert_fields(decoded[-1], orders[0])
+
+
+def test_round_trip_47():
+    entries = [{'OrderID': 9, 'MDOrderPriority': 100, 'MDEntryPx': 5000250000000,
+                'MDDisplayQty': 3, 'SecurityID': 100000, 'MDUpdateAction': 0, 'MDEntryType': '0'},
+               {'OrderID': 10, 'MDOrderPriority': 101, 'MDEntryPx': 5000500000000,
+                'MDDisplayQty': 4, 'SecurityID': 100001, 'MDUpdateAction': 2, 'MDEntryType': '1'}]
+
+    decoded = round_trip(47, TransactTime=TIME,
+                         MatchEventIndicator=0b10000100, entries=entries)
+
+    assert len(decoded) == 2
+
+    for row, entry in zip(decoded, entries):
+        _assert_fields(row, entry)
+
+
+def test_round_trip_48():
+    entries = [{'MDEntryPx': 5000250000000, 'MDEntrySize': 5, 'SecurityID': 100000, 'RptSeq': 20,
+                'NumberOfOrders': 2, 'AggressorSide': 1, 'MDUpdateAction': 0, 'MDTradeEntryID': 7},
+               {'MDEntryPx': 5000500000000, 'MDEntrySize': 1, 'SecurityID': 100000, 'RptSeq': 21,
+                'NumberOfOrders': 2, 'AggressorSide': 1, 'MDUpdateAction': 0, 'MDTradeEntryID': 8}]
+    orders = [{'OrderID': 1, 'LastQty': 5}, {'OrderID': 2, 'LastQty': 5},
+              {'OrderID': 3, 'LastQty': 1}, {'OrderID': 2, 'LastQty': 1}]
+
+    decoded = round_trip(48, TransactTime=TIME, MatchEventIndicator=0b10000010,
+                         entries=entries, orders=orders)
+
+    # fills are not mixed with the trade entries
+    assert len(decoded) == 2
+
+    for row, entry in zip(decoded, entries):
+        _assert_fields(row, entry)
+
+    BlockLength, body = encode_MDIncrementalRefreshTradeSummary48(
+        TIME, 0b10000010, entries, orders)
+    fills = main_template.TradeSummaryFills48(body, BlockLength, False)
+
+    assert len(fills) == 4
+
+    for row, order, rpt_seq in zip(fills, orders, [20, 20, 21, 21]):
+        _assert_fields(row, order | {'RptSeq': rpt_seq, 'SecurityID': 100000})
+
+    assert [x['FillIndex'] for x in fills] == [0, 1, 0, 1]
+
+
+def test_round_trip_52():
+    info = {'LastMsgSeqNumProcessed': 10, 'TotNumReports': 1, 'SecurityID': 100000, 'RptSeq': 5,
+            'TransactTime': TIME, 'LastUpdateTime': TIME, 'TradeDate': 65535,
+            'MDSecurityTradingStatus': 17, 'HighLimitPrice': 9223372036854775807,
+            'LowLimitPrice': 9223372036854775807, 'MaxPriceVariation': 9223372036854775807}
+    entries = [{'MDEntryPx': 5000250000000, 'MDEntrySize': 7, 'NumberOfOrders': 2,
+                'MDPriceLevel': 1, 'MDEntryType': '0'},
+               {'MDEntryPx': 5000500000000, 'MDEntrySize': 4, 'NumberOfOrders': 1,
+                'MDPriceLevel': 1, 'MDEntryType': '1'}]
+
+    decoded = round_trip(52, info=info, entries=entries)
+
+    assert len(decoded) == 2
+
+    for row, entry in zip(decoded, entries):
+        _assert_fields(row, entry)
+        _assert_fields(row, {x: info[x] for x in ['LastMsgSeqNumProcessed', 'SecurityID',
+                                                  'RptSeq', 'TransactTime']})
+
+
+def test_round_trip_53():
+    info = {'LastMsgSeqNumProcessed': 10, 'TotNumReports': 1, 'SecurityID': 100000,
+            'NoChunks': 1, 'CurrentChunk': 1, 'TransactTime': TIME}
+    entries = [{'OrderID': 9, 'MDOrderPriority': 100, 'MDEntryPx': 5000250000000,
+                'MDDisplayQty': 3, 'MDEntryType': '0'},
+               {'OrderID': 10, 'MDOrderPriority': 101, 'MDEntryPx': 5000500000000,
+                'MDDisplayQty': 4, 'MDEntryType': '1'}]
+
+    decoded = round_trip(53, info=info, entries=entries)
+
+    assert len(decoded) == 2
+
+    for row, entry in zip(decoded, entries):
+        _assert_fields(row, entry)
+        _assert_fields(row, {x: info[x] for x in ['SecurityID', 'NoChunks', 'CurrentChunk']})
+
+
+@pytest.mark.parametrize('version', [9, 10])
+def test_round_trip_54(version):
+    info = {'TotNumReports': 1, 'LastUpdateTime': TIME, 'ApplID': 310, 'MarketSegmentID': 64,
+            'SecurityGroup': 'SY', 'Asset': 'SY', 'Symbol': 'SYN0000', 'SecurityID': 100000,
+            'MinPriceIncrement': 250000000, 'DisplayFactor': 1000000000}
+
+    decoded = round_trip(54, version=version, info=info)
+
+    assert len(decoded) >= 1
+    _assert_fields(decoded[0], {x: info[x] for x in ['SecurityID', 'Symbol', 'ApplID',
+                                                     'MinPriceIncrement', 'DisplayFactor']})
+
+    if version > 9:
+        assert decoded[0]['InstrumentGUID'] == info['SecurityID']
+
+
+def _expected(n_events, **kwargs):
+    # every message of the capture decoded directly, keyed by the output name
+
+    expected = {}
+
+    for MsgSeq, SendingTime, messages in capture_generator(**kwargs).packets(n_events):
+        for message in messages:
+
+            (MsgSize, BlockLength, TemplateID, SchemaID,
+             Version) = struct.unpack('<HHHHH', message[0:10])
+            cme_packet = {'MsgSeq': MsgSeq, 'SendingTime': SendingTime}
+
+            if TemplateID in VERSIONED_TEMPLATES:
+                msgs = TEMPLATES[TemplateID](message[10:], BlockLength, Version, cme_packet)
+            else:
+                msgs = TEMPLATES[TemplateID](message[10:], BlockLength, cme_packet)
+
+            expected.setdefault(TEMPLATES[TemplateID].__name__, []).extend(msgs)
+
+            if TemplateID in FILL_TEMPLATES:
+                expected.setdefault(FILL_TEMPLATES[TemplateID].__name__, []).extend(
+                    FILL_TEMPLATES[TemplateID](message[10:], BlockLength, cme_packet))
+
+    return {x: pd.DataFrame(y) for x, y in expected.items()}
+
+
+def _parsed(save_file_path, name):
+    return pd.concat([pd.read_parquet(x) for x in parsed_files(save_file_path, name)],
+                     ignore_index=True)
+
+
+GENERATOR = {'templates': [46, 47, 48, 52, 53, 54], 'n_instruments': 3,
+             'snapshot_interval': 200, 'seed': 3}
+
+
+@pytest.mark.parametrize('capture_format', ['datamine', 'pcap'])
+def test_parser_round_trip(tmp_path, capture_format):
+    capture = str(tmp_path / 'capture')
+    generator = capture_generator(**GENERATOR)
+
+    if capture_format == 'datamine':
+        generator.write_datamine(capture, 1000)
+        cme_parser_datamine(capture, save_file_path=str(tmp_path),
+                            disable_progress_bar=True, chunk_size=100)
+    else:
+        generator.write_pcap(capture, 1000)
+        cme_parser_pcap(capture, save_file_path=str(tmp_path),
+                        disable_progress_bar=True, chunk_size=100)
+
+    expected = _expected(1000, **GENERATOR)
+
+    assert set(expected) == {'MDIncrementalRefreshBook46', 'MDIncrementalRefreshOrderBook47',
+                             'MDIncrementalRefreshTradeSummary48', 'TradeSummaryFills48',
+                             'SnapshotFullRefresh52', 'SnapshotFullRefreshOrderBook53',
+                             'MDInstrumentDefinitionFuture54'}
+
+    for name, data in expected.items():
+        pd.testing.assert_frame_equal(_parsed(tmp_path, name), data, check_dtype=False)
+
+
+def test_packet_sequence_numbers():
+    MsgSeq = [x[0] for x in capture_generator(**GENERATOR).packets(1000)]
+
+    assert MsgSeq == list(range(1, len(MsgSeq) + 1))
+
+
+def test_parser_security_master_and_prices(tmp_path):
+    capture = str(tmp_path / 'capture')
+    capture_generator(**GENERATOR).write_datamine(capture, 1000)
+
+    # definitions are saved at close, after the first book chunks
+    cme_parser_datamine(capture, save_file_path=str(tmp_path), disable_progress_bar=True,
+                        chunk_size=100, security_master_path=str(tmp_path / 'sm.db'),
+                        normalize_prices=True)
+
+    books = _parsed(tmp_path, 'MDIncrementalRefreshBook46')
+
+    assert books['MDEntryPxDisplay'].notna().all()
+    assert (books['MDEntryPxTick'] * 250000000 == books['MDEntryPx']).all()
+
+    with security_master(str(tmp_path / 'sm.db')) as sm:
+        joined = sm.join(books, date='2025-04-20', columns=['Symbol', 'DisplayFactor'])
+
+    assert joined['Symbol'].str.startswith('SYN').all()
+    assert (joined['DisplayFactor'] == 1000000000).all()
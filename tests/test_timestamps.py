@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from cmemdp.cme_parser import (TIMESTAMP_NULL, timestamp_conversion_fast,
+                               timestamp_conversion_parquet)
+
+
+def _messages():
+    start = pd.Timestamp('2025-04-21 13:30:00', tz='UTC').value
+
+    return pd.DataFrame({'SendingTime': np.array([start, start + 1000, start + 2000], dtype=np.uint64),
+                         'TransactTime': np.array([start - 10, start + 990, TIMESTAMP_NULL], dtype=np.uint64),
+                         'MDEntryPx': [1, 2, 3]})
+
+
+def test_timestamp_conversion_fast_columns():
+    msgs = _messages()
+    converted = timestamp_conversion_fast(
+        msgs, columns=['SendingTime', 'TransactTime'])
+
+    for column in ['SendingTime', 'TransactTime']:
+        assert str(converted[column].dtype) == 'datetime64[ns, America/Chicago]'
+
+    assert converted['SendingTime'].iloc[0] == pd.Timestamp(
+        '2025-04-21 08:30:00', tz='America/Chicago')
+    assert pd.isnull(converted['TransactTime'].iloc[2])
+
+    # the input is not mutated
+    assert msgs['SendingTime'].dtype == np.uint64
+
+
+def test_timestamp_conversion_fast_default():
+    converted = timestamp_conversion_fast(_messages(), timezone=None)
+
+    assert str(converted['SendingTime'].dtype) == 'datetime64[ns, UTC]'
+    assert str(converted['TransactTime'].dtype) == 'datetime64[ns, UTC]'
+
+
+def test_timestamp_conversion_parquet_columns(tmp_path):
+    (tmp_path / 'converted').mkdir()
+    _messages().to_parquet(tmp_path / 'msgs.parquet')
+
+    files = timestamp_conversion_parquet(str(tmp_path / 'msgs.parquet'), str(tmp_path / 'converted'),
+                                         columns=['SendingTime', 'TransactTime'])
+    converted = pd.read_parquet(files[0])
+    expected = timestamp_conversion_fast(_messages())
+
+    for column in ['SendingTime', 'TransactTime']:
+        assert converted[column].dt.tz is not None
+        pd.testing.assert_series_equal(converted[column].dt.tz_convert('America/Chicago'),
+                                       expected[column], check_dtype=False)